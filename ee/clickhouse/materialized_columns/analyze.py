@@ -1,12 +1,13 @@
 import re
 from datetime import timedelta
-from typing import Optional
+from typing import Optional, cast
 from collections.abc import Generator
 
 import structlog
 
 from ee.clickhouse.materialized_columns.columns import (
     DEFAULT_TABLE_COLUMN,
+    SHORT_TABLE_COLUMN_NAME,
     backfill_materialized_columns,
     get_materialized_columns,
     materialize,
@@ -14,6 +15,7 @@ from ee.clickhouse.materialized_columns.columns import (
 from ee.settings import (
     MATERIALIZE_COLUMNS_ANALYSIS_PERIOD_HOURS,
     MATERIALIZE_COLUMNS_BACKFILL_PERIOD_DAYS,
+    MATERIALIZE_COLUMNS_DISK_BUDGET_BYTES,
     MATERIALIZE_COLUMNS_MAX_AT_ONCE,
     MATERIALIZE_COLUMNS_MINIMUM_QUERY_TIME,
 )
@@ -27,9 +29,13 @@ from posthog.models.person.sql import (
 from posthog.models.property import PropertyName, TableColumn, TableWithProperties
 from posthog.models.property_definition import PropertyDefinition
 from posthog.models.team import Team
+from posthog.settings import CLICKHOUSE_DATABASE
 
 Suggestion = tuple[TableWithProperties, TableColumn, PropertyName]
 
+# Rows sampled to estimate the share of a table column that a property takes up
+DISK_ESTIMATE_SAMPLE_ROWS = 100_000
+
 logger = structlog.get_logger(__name__)
 
 
@@ -184,6 +190,110 @@ LIMIT 100 -- Make sure we don't add 100s of columns in one run
     return [("events", table_column, property_name) for (table_column, property_name) in raw_queries]
 
 
+def _analyze_hogql(since_hours_ago: int, team_id: Optional[int] = None) -> list[Suggestion]:
+    """
+    Finds properties that HogQL queries read without a materialized column, ranked by the bytes that materializing
+    them would save across all teams.
+
+    `execute_hogql_query` tags queries with the properties printed without a materialized column (see
+    `_get_materialized_column` in the HogQL printer). Reading the JSON column they're extracted from is only
+    avoided once all of them are materialized, so the bytes each query read are split between its properties.
+    """
+    rows = sync_execute(
+        """
+WITH
+    JSONExtract(log_comment, 'unmaterialized_properties', 'Array(Tuple(String, String, String))') as properties
+SELECT
+    property.1 as table_name,
+    property.2 as table_column,
+    property.3 as property_name,
+    sum(read_bytes / length(properties)) as estimated_bytes_saved,
+    count() as query_count,
+    uniqExact(JSONExtractInt(log_comment, 'team_id')) as team_count
+FROM
+    clusterAllReplicas(posthog, system, query_log)
+ARRAY JOIN properties as property
+WHERE
+    query_start_time > now() - toIntervalHour(%(since)s)
+    and type > 1
+    and is_initial_query
+    and JSONHas(log_comment, 'unmaterialized_properties')
+    and JSONExtractInt(log_comment, 'team_id') != 0
+    {team_id_filter}
+GROUP BY
+    table_name, table_column, property_name
+ORDER BY
+    estimated_bytes_saved DESC
+LIMIT 100 -- Make sure we don't add 100s of columns in one run
+        """.format(team_id_filter="and JSONExtractInt(log_comment, 'team_id') = %(team_id)s" if team_id else ""),
+        {"since": since_hours_ago, "team_id": team_id},
+    )
+
+    suggestions: list[Suggestion] = []
+    for table, table_column, property_name, estimated_bytes_saved, query_count, team_count in rows:
+        # Only person properties are materialized on the person table
+        if not (
+            (table == "events" and table_column in SHORT_TABLE_COLUMN_NAME)
+            or (table == "person" and table_column == DEFAULT_TABLE_COLUMN)
+        ):
+            continue
+        logger.info(
+            f"Found unmaterialized property in HogQL queries. table={table}, table_column={table_column}, "
+            f"property_name={property_name}, estimated_bytes_saved={int(estimated_bytes_saved)}, "
+            f"query_count={query_count}, team_count={team_count}"
+        )
+        suggestions.append((cast(TableWithProperties, table), cast(TableColumn, table_column), property_name))
+    return suggestions
+
+
+def _estimate_disk_bytes(table: TableWithProperties, table_column: TableColumn, property_name: PropertyName) -> int:
+    """
+    Estimates the bytes that a materialized column of the property takes up once backfilled, as the compressed bytes
+    of the table column on disk times the share of the table column that the property takes up in recent rows.
+    """
+    updated_table = "sharded_events" if table == "events" else table
+    [(column_bytes,)] = sync_execute(
+        """
+        SELECT sum(column_data_compressed_bytes)
+        FROM clusterAllReplicas(posthog, system, parts_columns)
+        WHERE database = %(database)s AND table = %(table)s AND column = %(column)s AND active
+        """,
+        {"database": CLICKHOUSE_DATABASE, "table": updated_table, "column": table_column},
+    )
+    [(property_share,)] = sync_execute(
+        f"""
+        SELECT sum(length(JSONExtractRaw({table_column}, %(property)s))) / greatest(sum(length({table_column})), 1)
+        FROM (
+            SELECT {table_column}
+            FROM {table}
+            {"WHERE timestamp > now() - toIntervalDay(1)" if table == "events" else ""}
+            LIMIT %(sample_rows)s
+        )
+        """,
+        {"property": property_name, "sample_rows": DISK_ESTIMATE_SAMPLE_ROWS},
+    )
+    return int(column_bytes * property_share)
+
+
+def _fit_disk_budget(suggestions: list[Suggestion], disk_budget_bytes: int, maximum: int) -> list[Suggestion]:
+    "Picks the suggestions to materialize in order, skipping those that would exceed the disk budget"
+    result: list[Suggestion] = []
+    remaining_bytes = disk_budget_bytes
+    for table, table_column, property_name in suggestions:
+        if len(result) >= maximum:
+            break
+        estimated_disk_bytes = _estimate_disk_bytes(table, table_column, property_name)
+        if estimated_disk_bytes > remaining_bytes:
+            logger.info(
+                f"Skipping column over the disk budget. table={table}, property_name={property_name}, "
+                f"estimated_disk_bytes={estimated_disk_bytes}, remaining_bytes={remaining_bytes}"
+            )
+            continue
+        remaining_bytes -= estimated_disk_bytes
+        result.append((table, table_column, property_name))
+    return result
+
+
 def materialize_properties_task(
     columns_to_materialize: Optional[list[Suggestion]] = None,
     time_to_analyze_hours: int = MATERIALIZE_COLUMNS_ANALYSIS_PERIOD_HOURS,
@@ -192,19 +302,26 @@ def materialize_properties_task(
     backfill_period_days: int = MATERIALIZE_COLUMNS_BACKFILL_PERIOD_DAYS,
     dry_run: bool = False,
     team_id_to_analyze: Optional[int] = None,
+    disk_budget_bytes: int = MATERIALIZE_COLUMNS_DISK_BUDGET_BYTES,
 ) -> None:
     """
-    Creates materialized columns for event and person properties based off of slow queries
+    Creates materialized columns for event and person properties based off of the properties read by HogQL queries
+    and of slow queries, within the disk budget if there is one
     """
 
     if columns_to_materialize is None:
-        columns_to_materialize = _analyze(time_to_analyze_hours, min_query_time, team_id_to_analyze)
+        columns_to_materialize = _analyze_hogql(time_to_analyze_hours, team_id_to_analyze) + _analyze(
+            time_to_analyze_hours, min_query_time, team_id_to_analyze
+        )
     result = []
     for suggestion in columns_to_materialize:
         table, table_column, property_name = suggestion
-        if (property_name, table_column) not in get_materialized_columns(table):
+        if (property_name, table_column) not in get_materialized_columns(table) and suggestion not in result:
             result.append(suggestion)
 
+    if disk_budget_bytes > 0:
+        result = _fit_disk_budget(result, disk_budget_bytes, maximum)
+
     if len(result) > 0:
         logger.info(f"Calculated columns that could be materialized. count={len(result)}")
     else:
@@ -1,3 +1,5 @@
+import json
+
 from posthog.test.base import BaseTest, ClickhouseTestMixin
 from posthog.client import sync_execute
 from ee.clickhouse.materialized_columns.analyze import materialize_properties_task
@@ -55,3 +57,67 @@ class TestMaterializedColumnsAnalyze(ClickhouseTestMixin, BaseTest):
                 call("events", "materialize_me3", table_column="properties"),
             ]
         )
+
+    def _insert_hogql_query(self, unmaterialized_properties, read_bytes):
+        sync_execute(
+            """
+            INSERT INTO system.query_log (query, query_start_time, type, is_initial_query, log_comment, read_bytes)
+            VALUES ('SELECT 1', now(), 2, 1, %(log_comment)s, %(read_bytes)s)
+            """,
+            {
+                "log_comment": json.dumps({"team_id": 2, "unmaterialized_properties": unmaterialized_properties}),
+                "read_bytes": read_bytes,
+            },
+        )
+
+    @patch("ee.clickhouse.materialized_columns.analyze.materialize")
+    @patch("ee.clickhouse.materialized_columns.analyze.backfill_materialized_columns")
+    def test_mat_columns_from_hogql_queries(self, patch_backfill, patch_materialize):
+        sync_execute("SYSTEM FLUSH LOGS")
+        sync_execute("TRUNCATE TABLE system.query_log")
+
+        self._insert_hogql_query([["events", "properties", "read_alone"]], 1000)
+        self._insert_hogql_query(
+            [["events", "properties", "read_with_others"], ["person", "properties", "email"]], 1500
+        )
+        self._insert_hogql_query([["events", "person_properties", "read_with_others"]], 200)
+        self._insert_hogql_query([["person", "properties", "email"]], 100)
+        self._insert_hogql_query([["groups", "group_properties", "not_materialized"]], 10000)
+        self._insert_hogql_query([], 10000)
+
+        materialize_properties_task()
+        patch_materialize.assert_has_calls(
+            [
+                call("events", "read_alone", table_column="properties"),
+                call("person", "email", table_column="properties"),
+                call("events", "read_with_others", table_column="properties"),
+                call("events", "read_with_others", table_column="person_properties"),
+            ]
+        )
+        self.assertEqual(patch_materialize.call_count, 4)
+
+    @patch("ee.clickhouse.materialized_columns.analyze._estimate_disk_bytes")
+    @patch("ee.clickhouse.materialized_columns.analyze.materialize")
+    @patch("ee.clickhouse.materialized_columns.analyze.backfill_materialized_columns")
+    def test_mat_columns_within_disk_budget(self, patch_backfill, patch_materialize, patch_estimate_disk_bytes):
+        patch_estimate_disk_bytes.side_effect = lambda table, table_column, property_name: {
+            "big": 800,
+            "too_big": 500,
+            "small": 100,
+        }[property_name]
+
+        materialize_properties_task(
+            columns_to_materialize=[
+                ("events", "properties", "big"),
+                ("events", "properties", "too_big"),
+                ("events", "properties", "small"),
+            ],
+            disk_budget_bytes=1000,
+        )
+        patch_materialize.assert_has_calls(
+            [
+                call("events", "big", table_column="properties"),
+                call("events", "small", table_column="properties"),
+            ]
+        )
+        self.assertEqual(patch_materialize.call_count, 2)
@@ -10,6 +10,7 @@ from ee.clickhouse.materialized_columns.columns import DEFAULT_TABLE_COLUMN
 from posthog.settings import (
     MATERIALIZE_COLUMNS_ANALYSIS_PERIOD_HOURS,
     MATERIALIZE_COLUMNS_BACKFILL_PERIOD_DAYS,
+    MATERIALIZE_COLUMNS_DISK_BUDGET_BYTES,
     MATERIALIZE_COLUMNS_MAX_AT_ONCE,
     MATERIALIZE_COLUMNS_MINIMUM_QUERY_TIME,
 )
@@ -69,6 +70,12 @@ class Command(BaseCommand):
             default=MATERIALIZE_COLUMNS_MAX_AT_ONCE,
             help="Max number of columns to materialize via single invocation. Same as MATERIALIZE_COLUMNS_MAX_AT_ONCE env variable.",
         )
+        parser.add_argument(
+            "--disk-budget",
+            type=int,
+            default=MATERIALIZE_COLUMNS_DISK_BUDGET_BYTES,
+            help="Estimated bytes the materialized columns may take up on disk. 0 for no budget. Same as MATERIALIZE_COLUMNS_DISK_BUDGET_BYTES env variable.",
+        )
 
     def handle(self, *args, **options):
         logger.setLevel(logging.INFO)
@@ -90,6 +97,7 @@ class Command(BaseCommand):
                 ],
                 backfill_period_days=options["backfill_period"],
                 dry_run=options["dry_run"],
+                disk_budget_bytes=options["disk_budget"],
             )
         else:
             materialize_properties_task(
@@ -99,4 +107,5 @@ class Command(BaseCommand):
                 backfill_period_days=options["backfill_period"],
                 dry_run=options["dry_run"],
                 team_id_to_analyze=options["analyze_team_id"],
+                disk_budget_bytes=options["disk_budget"],
             )
@@ -0,0 +1,39 @@
+import json
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Any
+from collections.abc import Callable
+
+from .compiled import execute_compiled_bytecode
+from .execute import execute_bytecode
+
+# Compares the interpreter and the compiled VM on the programs in hogvm/__tests__.
+# Usage: python3 -m hogvm.python.benchmark [iterations]
+
+SNAPSHOTS_DIR = Path(__file__).parent.parent / "__tests__" / "__snapshots__"
+TIMEOUT = timedelta(seconds=600)
+
+
+def _time_runs(execute: Callable[..., Any], bytecode: list[Any], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        execute(bytecode, timeout=TIMEOUT)
+    return (time.perf_counter() - start) / iterations
+
+
+def main(iterations: int) -> None:
+    print(f"{'program':<16}{'interpreter ms':>16}{'compiled ms':>14}{'speedup':>10}")  # noqa: T201
+    for path in sorted(SNAPSHOTS_DIR.glob("*.hoge")):
+        bytecode = json.loads(path.read_text())
+        execute_compiled_bytecode(bytecode, timeout=TIMEOUT)  # compile and cache outside the timed runs
+        interpreted = _time_runs(execute_bytecode, bytecode, iterations)
+        compiled = _time_runs(execute_compiled_bytecode, bytecode, iterations)
+        print(  # noqa: T201
+            f"{path.stem:<16}{interpreted * 1000:>16.3f}{compiled * 1000:>14.3f}{interpreted / compiled:>9.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,462 @@
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from copy import deepcopy
+from datetime import timedelta
+from typing import Any, Optional, TYPE_CHECKING
+from collections.abc import Callable
+
+from hogvm.python.execute import BytecodeResult, execute_bytecode
+from hogvm.python.operation import Operation, HOGQL_BYTECODE_IDENTIFIER
+from hogvm.python.stl import STL
+from hogvm.python.utils import HogVMException, get_nested_value, like, set_nested_value
+
+if TYPE_CHECKING:
+    from posthog.models import Team
+
+# Compiled programs are reused across calls, keyed by the JSON of their bytecode
+COMPILED_BYTECODE_CACHE_SIZE = 1024
+
+# The "compiled" path decodes each instruction of the bytecode once into a pre-bound Python closure, and then runs
+# a tight loop over the closures. Operands (constants, argument counts, jump offsets, function names) are read
+# from the bytecode at compile time, instead of on every execution. Instructions are compiled lazily, the first time
+# the instruction pointer reaches them, so that malformed bytecode fails at the exact same point as in the
+# interpreter in `execute.py`, which stays the reference implementation.
+
+
+class _VMState:
+    __slots__ = ("stack", "call_stack", "declared_functions", "globals", "functions", "team", "stdout", "timeout")
+
+    def __init__(
+        self,
+        globals: Optional[dict[str, Any]],
+        functions: Optional[dict[str, Callable[..., Any]]],
+        team: Optional["Team"],
+        timeout: timedelta,
+    ):
+        self.stack: list[Any] = []
+        self.call_stack: list[tuple[int, int, int]] = []  # (ip, stack_start, arg_len)
+        self.declared_functions: dict[str, tuple[int, int]] = {}
+        self.globals = globals
+        self.functions = functions
+        self.team = team
+        self.stdout: list[str] = []
+        self.timeout = timeout
+
+
+# A compiled instruction is a tuple of (handler, end, is_call). The handler mutates the VM state and returns either
+# None to continue after the instruction's last operand (`end`), or the new instruction pointer for jumps.
+_Handler = Callable[[_VMState], Optional[int]]
+_Instruction = tuple[_Handler, int, bool]
+
+
+class _Halt(Exception):
+    """Raised when reaching a `None` symbol in the bytecode."""
+
+
+class _Return(Exception):
+    """Raised when returning from the top level of the program."""
+
+    def __init__(self, value: Any):
+        super().__init__()
+        self.value = value
+
+
+def _underflow():
+    raise HogVMException("Stack underflow")
+
+
+def _pop_n(stack: list, count: int) -> list:
+    if len(stack) < count:
+        _underflow()
+    return [stack.pop() for _ in range(count)]
+
+
+def _noop(vm: _VMState) -> None:
+    return None
+
+
+def _halt(vm: _VMState) -> None:
+    raise _Halt()
+
+
+def _push_constant(value: Any) -> _Handler:
+    def handler(vm: _VMState) -> None:
+        vm.stack.append(value)
+
+    return handler
+
+
+def _binary(operator: Callable[[Any, Any], Any]) -> _Handler:
+    # The first value popped is the left-hand side, matching `pop_stack() + pop_stack()` in the interpreter
+    def handler(vm: _VMState) -> None:
+        stack = vm.stack
+        if len(stack) < 2:
+            _underflow()
+        left = stack.pop()
+        stack.append(operator(left, stack.pop()))
+
+    return handler
+
+
+def _not(vm: _VMState) -> None:
+    stack = vm.stack
+    if not stack:
+        _underflow()
+    stack.append(not stack.pop())
+
+
+def _pop(vm: _VMState) -> None:
+    if not vm.stack:
+        _underflow()
+    vm.stack.pop()
+
+
+def _return(vm: _VMState) -> Optional[int]:
+    stack = vm.stack
+    if vm.call_stack:
+        ip, stack_start, arg_len = vm.call_stack.pop()
+        if not stack:
+            _underflow()
+        response = stack.pop()
+        del stack[stack_start:]
+        stack.append(response)
+        return ip
+    if not stack:
+        _underflow()
+    raise _Return(stack.pop())
+
+
+def _get_property(vm: _VMState) -> None:
+    stack = vm.stack
+    if len(stack) < 2:
+        _underflow()
+    property = stack.pop()
+    stack.append(get_nested_value(stack.pop(), [property]))
+
+
+def _set_property(vm: _VMState) -> None:
+    stack = vm.stack
+    if len(stack) < 3:
+        _underflow()
+    value = stack.pop()
+    field = stack.pop()
+    set_nested_value(stack.pop(), [field], value)
+
+
+def _regex(negate: bool, flags: int = 0) -> _Handler:
+    def handler(vm: _VMState) -> None:
+        stack = vm.stack
+        if len(stack) < 2:
+            _underflow()
+        string = stack.pop()
+        matches = bool(re.search(re.compile(stack.pop(), flags), string))
+        stack.append(not matches if negate else matches)
+
+    return handler
+
+
+_SIMPLE_HANDLERS: dict[int, _Handler] = {
+    Operation.TRUE: _push_constant(True),
+    Operation.FALSE: _push_constant(False),
+    Operation.NULL: _push_constant(None),
+    Operation.NOT: _not,
+    Operation.PLUS: _binary(lambda a, b: a + b),
+    Operation.MINUS: _binary(lambda a, b: a - b),
+    Operation.DIVIDE: _binary(lambda a, b: a / b),
+    Operation.MULTIPLY: _binary(lambda a, b: a * b),
+    Operation.MOD: _binary(lambda a, b: a % b),
+    Operation.EQ: _binary(lambda a, b: a == b),
+    Operation.NOT_EQ: _binary(lambda a, b: a != b),
+    Operation.GT: _binary(lambda a, b: a > b),
+    Operation.GT_EQ: _binary(lambda a, b: a >= b),
+    Operation.LT: _binary(lambda a, b: a < b),
+    Operation.LT_EQ: _binary(lambda a, b: a <= b),
+    Operation.LIKE: _binary(lambda a, b: like(a, b)),
+    Operation.ILIKE: _binary(lambda a, b: like(a, b, re.IGNORECASE)),
+    Operation.NOT_LIKE: _binary(lambda a, b: not like(a, b)),
+    Operation.NOT_ILIKE: _binary(lambda a, b: not like(a, b, re.IGNORECASE)),
+    Operation.IN: _binary(lambda a, b: a in b),
+    Operation.NOT_IN: _binary(lambda a, b: a not in b),
+    Operation.REGEX: _regex(negate=False),
+    Operation.NOT_REGEX: _regex(negate=True),
+    Operation.IREGEX: _regex(negate=False, flags=re.RegexFlag.IGNORECASE),
+    Operation.NOT_IREGEX: _regex(negate=True, flags=re.RegexFlag.IGNORECASE),
+    Operation.POP: _pop,
+    Operation.RETURN: _return,
+    Operation.GET_PROPERTY: _get_property,
+    Operation.SET_PROPERTY: _set_property,
+}
+
+
+def _compile_instruction(bytecode: list[Any], ip: int) -> _Instruction:
+    """Compile the instruction whose symbol is at `ip`. Operands are read with the same bounds checks as the
+    interpreter's `next_token()`."""
+    last_op = len(bytecode) - 1
+    end = ip
+
+    def next_token() -> Any:
+        nonlocal end
+        end += 1
+        if end > last_op:
+            raise HogVMException("Unexpected end of bytecode")
+        return bytecode[end]
+
+    symbol = bytecode[ip]
+    if symbol is None:
+        return _halt, end, False
+
+    try:
+        simple_handler = _SIMPLE_HANDLERS.get(symbol)
+    except TypeError:  # unhashable symbols are not operations, and are skipped like in the interpreter
+        return _noop, end, False
+    if simple_handler is not None:
+        return simple_handler, end, False
+
+    match symbol:
+        case Operation.STRING | Operation.INTEGER | Operation.FLOAT:
+            return _push_constant(next_token()), end, False
+
+        case Operation.AND | Operation.OR:
+            count = next_token()
+            reduce = all if symbol == Operation.AND else any
+
+            def logical(vm: _VMState) -> None:
+                vm.stack.append(reduce(_pop_n(vm.stack, count)))
+
+            return logical, end, False
+
+        case Operation.GET_GLOBAL:
+            count = next_token()
+
+            def get_global(vm: _VMState) -> None:
+                chain = _pop_n(vm.stack, count)
+                vm.stack.append(deepcopy(get_nested_value(vm.globals, chain)))
+
+            return get_global, end, False
+
+        case Operation.GET_LOCAL:
+            index = next_token()
+
+            def get_local(vm: _VMState) -> None:
+                stack_start = 0 if not vm.call_stack else vm.call_stack[-1][1]
+                vm.stack.append(vm.stack[index + stack_start])
+
+            return get_local, end, False
+
+        case Operation.SET_LOCAL:
+            index = next_token()
+
+            def set_local(vm: _VMState) -> None:
+                stack_start = 0 if not vm.call_stack else vm.call_stack[-1][1]
+                if not vm.stack:
+                    _underflow()
+                value = vm.stack.pop()
+                vm.stack[index + stack_start] = value
+
+            return set_local, end, False
+
+        case Operation.DICT:
+            count = next_token()
+
+            def dict_(vm: _VMState) -> None:
+                stack = vm.stack
+                if count > 0:
+                    elems = stack[-(count * 2) :]
+                    del stack[-(count * 2) :]
+                    stack.append({elems[i]: elems[i + 1] for i in range(0, len(elems), 2)})
+                else:
+                    stack.append({})
+
+            return dict_, end, False
+
+        case Operation.ARRAY | Operation.TUPLE:
+            count = next_token()
+            to_value = list if symbol == Operation.ARRAY else tuple
+
+            def collection(vm: _VMState) -> None:
+                stack = vm.stack
+                elems = stack[-count:]
+                del stack[-count:]
+                stack.append(to_value(elems))
+
+            return collection, end, False
+
+        case Operation.JUMP:
+            target = next_token() + end
+
+            def jump(vm: _VMState) -> int:
+                return target
+
+            return jump, end, False
+
+        case Operation.JUMP_IF_FALSE:
+            target = next_token() + end
+
+            def jump_if_false(vm: _VMState) -> Optional[int]:
+                if not vm.stack:
+                    _underflow()
+                if not vm.stack.pop():
+                    return target
+                return None
+
+            return jump_if_false, end, False
+
+        case Operation.DECLARE_FN:
+            name = next_token()
+            arg_len = next_token()
+            body_len = next_token()
+            declaration = (end, arg_len)
+            after_body = end + body_len
+
+            def declare_fn(vm: _VMState) -> int:
+                vm.declared_functions[name] = declaration
+                return after_body
+
+            return declare_fn, end, False
+
+        case Operation.CALL:
+            name = next_token()
+            name_ip = end
+            # Calls to declared functions don't read the argument count, so it may legitimately be missing here
+            arg_count = bytecode[end + 1] if end + 1 <= last_op else None
+            call_end = end + 1
+            stl_function = STL.get(name)
+
+            def call(vm: _VMState) -> Optional[int]:
+                declared = vm.declared_functions.get(name)
+                if declared is not None:
+                    func_ip, arg_len = declared
+                    vm.call_stack.append((name_ip + 1, len(vm.stack) - arg_len, arg_len))
+                    return func_ip
+                if arg_count is None:
+                    raise HogVMException("Unexpected end of bytecode")
+                args = _pop_n(vm.stack, arg_count)
+                if vm.functions is not None and name in vm.functions:
+                    vm.stack.append(vm.functions[name](*args))
+                    if call_end == last_op:
+                        # The interpreter skips its end-of-bytecode check after host functions and reads past the end
+                        raise HogVMException("Unexpected end of bytecode")
+                    return call_end
+                if stl_function is None:
+                    raise HogVMException(f"Unsupported function call: {name}")
+                vm.stack.append(stl_function(name, args, vm.team, vm.stdout, vm.timeout))
+                return call_end
+
+            return call, end, True
+
+    # Unknown symbols are skipped, like in the interpreter
+    return _noop, end, False
+
+
+class CompiledBytecode:
+    """Bytecode decoded into pre-bound closures, safe to share between threads and executions."""
+
+    def __init__(self, bytecode: list[Any]):
+        if not bytecode:
+            raise HogVMException("Unexpected end of bytecode")
+        if bytecode[0] != HOGQL_BYTECODE_IDENTIFIER:
+            raise HogVMException(f"Invalid bytecode. Must start with '{HOGQL_BYTECODE_IDENTIFIER}'")
+        self.bytecode = list(bytecode)
+        self.instructions: list[Optional[_Instruction]] = [None] * len(bytecode)
+
+    def instruction_at(self, ip: int) -> _Instruction:
+        instruction = self.instructions[ip]
+        if instruction is None:
+            instruction = _compile_instruction(self.bytecode, ip)
+            self.instructions[ip] = instruction
+        return instruction
+
+    def execute(
+        self,
+        globals: Optional[dict[str, Any]] = None,
+        functions: Optional[dict[str, Callable[..., Any]]] = None,
+        timeout=timedelta(seconds=5),
+        team: Optional["Team"] = None,
+    ) -> tuple[Any, list[str]]:
+        vm = _VMState(globals=globals, functions=functions, team=team, timeout=timeout)
+        if len(self.bytecode) == 1:
+            return None, vm.stdout
+
+        start_time = time.time()
+        last_op = len(self.bytecode) - 1
+        instructions = self.instructions
+        ip = 0
+        ops = 0
+
+        try:
+            while True:
+                ops += 1
+                ip += 1
+                if ip > last_op:
+                    raise HogVMException("Unexpected end of bytecode")
+                instruction = instructions[ip] or self.instruction_at(ip)
+                handler, end, is_call = instruction
+                if (ops & 127) == 0 or is_call:  # every 128th operation, and on every call
+                    if time.time() - start_time > timeout.total_seconds():
+                        raise HogVMException(
+                            f"Execution timed out after {timeout.total_seconds()} seconds. Performed {ops} ops."
+                        )
+                jump = handler(vm)
+                if jump is None:
+                    ip = end
+                else:
+                    if jump < -1:
+                        raise HogVMException(f"Invalid jump to {jump}")
+                    ip = jump
+                if ip == last_op:
+                    break
+        except _Halt:
+            pass
+        except _Return as response:
+            return response.value, vm.stdout
+
+        if len(vm.stack) > 1:
+            raise HogVMException("Invalid bytecode. More than one value left on stack")
+        return vm.stack.pop() if vm.stack else None, vm.stdout
+
+
+_compiled_cache: OrderedDict[str, CompiledBytecode] = OrderedDict()
+_compiled_cache_lock = threading.Lock()
+
+
+def compile_bytecode(bytecode: list[Any]) -> CompiledBytecode:
+    """Compile bytecode, reusing an earlier compilation of identical bytecode if there is one."""
+    try:
+        # JSON keeps `1`, `1.0` and `true` apart, which a tuple of the bytecode would not
+        key = json.dumps(bytecode)
+    except (TypeError, ValueError):
+        return CompiledBytecode(bytecode)
+
+    with _compiled_cache_lock:
+        compiled = _compiled_cache.get(key)
+        if compiled is not None:
+            _compiled_cache.move_to_end(key)
+            return compiled
+
+    compiled = CompiledBytecode(bytecode)
+    with _compiled_cache_lock:
+        _compiled_cache[key] = compiled
+        while len(_compiled_cache) > COMPILED_BYTECODE_CACHE_SIZE:
+            _compiled_cache.popitem(last=False)
+    return compiled
+
+
+def execute_compiled_bytecode(
+    bytecode: list[Any],
+    globals: Optional[dict[str, Any]] = None,
+    functions: Optional[dict[str, Callable[..., Any]]] = None,
+    timeout=timedelta(seconds=5),
+    team: Optional["Team"] = None,
+    debug=False,
+) -> BytecodeResult:
+    """Same as `execute_bytecode`, but runs a cached compiled version of the bytecode."""
+    if debug:
+        # The debugger steps through the bytecode itself, so it only works with the interpreter
+        return execute_bytecode(bytecode, globals=globals, functions=functions, timeout=timeout, team=team, debug=True)
+    result, stdout = compile_bytecode(bytecode).execute(
+        globals=globals, functions=functions, timeout=timeout, team=team
+    )
+    return BytecodeResult(result=result, stdout=stdout, bytecode=bytecode)
@@ -0,0 +1,72 @@
+import json
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+
+from hogvm.python import compiled
+from hogvm.python.compiled import compile_bytecode, execute_compiled_bytecode
+from hogvm.python.execute import execute_bytecode
+from hogvm.python.operation import Operation as op, HOGQL_BYTECODE_IDENTIFIER as _H
+from hogvm.python.test import test_execute
+from hogvm.python.test.test_execute import TestBytecodeExecute
+
+SNAPSHOTS_DIR = Path(__file__).parent.parent.parent / "__tests__" / "__snapshots__"
+
+
+class TestCompiledBytecodeExecute(TestBytecodeExecute):
+    """Runs all the interpreter tests through the compiled path."""
+
+    @pytest.fixture(autouse=True)
+    def use_compiled_bytecode(self, monkeypatch):
+        monkeypatch.setattr(test_execute, "execute_bytecode", execute_compiled_bytecode)
+
+
+class TestCompiledBytecode:
+    @pytest.mark.parametrize("filename", sorted(path.name for path in SNAPSHOTS_DIR.glob("*.hoge")))
+    def test_matches_interpreter_on_snapshots(self, filename):
+        bytecode = json.loads((SNAPSHOTS_DIR / filename).read_text())
+        expected = execute_bytecode(bytecode, timeout=timedelta(seconds=60))
+        response = execute_compiled_bytecode(bytecode, timeout=timedelta(seconds=60))
+        assert response.result == expected.result
+        assert response.stdout == expected.stdout
+
+    def test_compiled_bytecode_is_cached(self):
+        bytecode = [_H, op.INTEGER, 2, op.INTEGER, 1, op.PLUS]
+        assert compile_bytecode(bytecode) is compile_bytecode(list(bytecode))
+        assert compile_bytecode(bytecode) is not compile_bytecode([_H, op.INTEGER, 2, op.FLOAT, 1.0, op.PLUS])
+        assert execute_compiled_bytecode(bytecode).result == 3
+
+    def test_cache_is_bounded(self, monkeypatch):
+        monkeypatch.setattr(compiled, "COMPILED_BYTECODE_CACHE_SIZE", 2)
+        first = compile_bytecode([_H, op.INTEGER, 1])
+        compile_bytecode([_H, op.INTEGER, 2])
+        compile_bytecode([_H, op.INTEGER, 3])
+        assert compile_bytecode([_H, op.INTEGER, 1]) is not first
+
+    def test_state_is_not_shared_between_executions(self):
+        bytecode = [_H, op.STRING, "hello", op.CALL, "print", 1, op.POP]
+        assert execute_compiled_bytecode(bytecode).stdout == ["hello"]
+        assert execute_compiled_bytecode(bytecode).stdout == ["hello"]
+
+    def test_errors_match_interpreter(self):
+        for bytecode in (
+            [],
+            ["invalid"],
+            [_H, op.STRING],
+            [_H, op.PLUS],
+            [_H, op.INTEGER, 1, op.AND, 2],
+            [_H, op.DECLARE_FN, "fn", 0],
+        ):
+            with pytest.raises(Exception) as interpreter_error:
+                execute_bytecode(bytecode)
+            with pytest.raises(Exception) as compiled_error:
+                execute_compiled_bytecode(bytecode)
+            assert str(compiled_error.value) == str(interpreter_error.value)
+
+    def test_timeout(self):
+        # while (true) {}
+        bytecode = [_H, op.TRUE, op.JUMP_IF_FALSE, 2, op.JUMP, -5]
+        with pytest.raises(Exception) as e:
+            execute_compiled_bytecode(bytecode, timeout=timedelta(milliseconds=10))
+        assert str(e.value).startswith("Execution timed out after 0.01 seconds.")
@@ -83,10 +83,10 @@ def list_batch_exports_ok(client: TestClient, team_id: int):
     return response.json()
 
 
-def backfill_batch_export(client: TestClient, team_id: int, batch_export_id: str, start_at: str, end_at: str):
+def backfill_batch_export(client: TestClient, team_id: int, batch_export_id: str, start_at: str, end_at: str, **kwargs):
     return client.post(
         f"/api/projects/{team_id}/batch_exports/{batch_export_id}/backfill",
-        {"start_at": start_at, "end_at": end_at},
+        {"start_at": start_at, "end_at": end_at, **kwargs},
         content_type="application/json",
     )
 
@@ -1,4 +1,5 @@
 import pytest
+from django.test import override_settings
 from django.test.client import Client as HttpClient
 from rest_framework import status
 
@@ -146,6 +147,57 @@ def test_batch_export_backfill_with_start_at_after_end_at(client: HttpClient):
         assert response.status_code == status.HTTP_400_BAD_REQUEST, response.json()
 
 
+def test_batch_export_backfill_with_parallelism(client: HttpClient):
+    """Test a BatchExport can be backfilled in parallel, up to the maximum parallelism."""
+    temporal = sync_connect()
+
+    destination_data = {
+        "type": "S3",
+        "config": {
+            "bucket_name": "my-production-s3-bucket",
+            "region": "us-east-1",
+            "prefix": "posthog-events/",
+            "aws_access_key_id": "abc123",
+            "aws_secret_access_key": "secret",
+        },
+    }
+    batch_export_data = {
+        "name": "my-production-s3-bucket-destination",
+        "destination": destination_data,
+        "interval": "hour",
+    }
+
+    organization = create_organization("Test Org")
+    team = create_team(organization)
+    user = create_user("test@user.com", "Test User", organization)
+    client.force_login(user)
+
+    with start_test_worker(temporal), override_settings(BATCH_EXPORT_BACKFILL_MAX_PARALLELISM=4):
+        batch_export = create_batch_export_ok(client, team.pk, batch_export_data)
+        batch_export_id = batch_export["id"]
+
+        for parallelism in (0, 5, "4"):
+            response = backfill_batch_export(
+                client,
+                team.pk,
+                batch_export_id,
+                "2021-01-01T00:00:00",
+                "2021-01-01T04:00:00",
+                parallelism=parallelism,
+            )
+            assert response.status_code == status.HTTP_400_BAD_REQUEST, response.json()
+
+        response = backfill_batch_export(
+            client,
+            team.pk,
+            batch_export_id,
+            "2021-01-01T00:00:00",
+            "2021-01-01T04:00:00",
+            parallelism=4,
+        )
+        assert response.status_code == status.HTTP_200_OK, response.json()
+
+
 def test_cannot_trigger_backfill_for_another_organization(client: HttpClient):
     temporal = sync_connect()
 
@@ -3,6 +3,7 @@ from typing import Any, TypedDict, cast
 
 import posthoganalytics
 import structlog
+from django.conf import settings
 from django.db import transaction
 from django.utils.timezone import now
 from rest_framework import filters, request, response, serializers, viewsets
@@ -373,12 +374,22 @@ class BatchExportViewSet(TeamAndOrgViewSetMixin, viewsets.ModelViewSet):
         if start_at >= end_at:
             raise ValidationError("The initial backfill datetime 'start_at' happens after 'end_at'")
 
+        parallelism = request.data.get("parallelism", 1)
+        if (
+            not isinstance(parallelism, int)
+            or isinstance(parallelism, bool)
+            or not 1 <= parallelism <= settings.BATCH_EXPORT_BACKFILL_MAX_PARALLELISM
+        ):
+            raise ValidationError(
+                f"'parallelism' must be an integer between 1 and {settings.BATCH_EXPORT_BACKFILL_MAX_PARALLELISM}"
+            )
+
         team_id = request.user.current_team.id
 
         batch_export = self.get_object()
         temporal = sync_connect()
         try:
-            backfill_id = backfill_export(temporal, str(batch_export.pk), team_id, start_at, end_at)
+            backfill_id = backfill_export(temporal, str(batch_export.pk), team_id, start_at, end_at, parallelism)
         except BatchExportWithNoEndNotAllowedError:
             raise ValidationError("Backfilling a BatchExport with no end date is not allowed")
 
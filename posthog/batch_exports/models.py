@@ -361,6 +361,12 @@ class BatchExportBackfill(UUIDModel):
         auto_now=True,
         help_text="The timestamp at which this BatchExportBackfill was last updated.",
     )
+    total_runs: models.IntegerField = models.IntegerField(
+        null=True, help_text="The number of runs this BatchExportBackfill backfills, if it has an end."
+    )
+    finished_runs: models.IntegerField = models.IntegerField(
+        null=True, help_text="The number of runs of this BatchExportBackfill that have finished."
+    )
 
     @property
     def workflow_id(self) -> str:
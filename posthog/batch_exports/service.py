@@ -411,6 +411,8 @@ class BackfillBatchExportInputs:
     end_at: str | None
     buffer_limit: int = 1
     start_delay: float = 1.0
+    # How many runs to backfill at the same time, only backfills with an end can run more than one
+    parallelism: int = 1
 
 
 def backfill_export(
@@ -419,6 +421,7 @@ def backfill_export(
     team_id: int,
     start_at: dt.datetime,
     end_at: dt.datetime | None,
+    parallelism: int = 1,
 ) -> str:
     """Starts a backfill for given team and batch export covering given date range.
 
@@ -429,6 +432,7 @@ def backfill_export(
         start_at: From when to backfill.
         end_at: Up to when to backfill, if None it will backfill until it has caught up with realtime
                 and then unpause the underlying BatchExport.
+        parallelism: How many runs to backfill at the same time.
     """
     try:
         batch_export = BatchExport.objects.select_related("destination").get(id=batch_export_id, team_id=team_id)
@@ -447,6 +451,7 @@ def backfill_export(
         team_id=team_id,
         start_at=start_at.isoformat(),
         end_at=end_at.isoformat() if end_at else None,
+        parallelism=parallelism,
     )
     workflow_id = start_backfill_batch_export_workflow(temporal, inputs=inputs)
     return workflow_id
@@ -729,6 +734,42 @@ def update_batch_export_backfill_status(backfill_id: UUID, status: str) -> Batch
     return model.get()
 
 
+def update_batch_export_backfill_progress(backfill_id: UUID, total_runs: int, finished_runs: int) -> None:
+    """Update how many runs of an BatchExportBackfill with given id have finished.
+
+    Arguments:
+        backfill_id: The id of the BatchExportBackfill to update.
+        total_runs: How many runs the BatchExportBackfill backfills in total.
+        finished_runs: How many of them have finished.
+    """
+    updated = BatchExportBackfill.objects.filter(id=backfill_id).update(
+        total_runs=total_runs, finished_runs=finished_runs, last_updated_at=dt.datetime.now(dt.UTC)
+    )
+
+    if not updated:
+        raise ValueError(f"BatchExportBackfill with id {backfill_id} not found.")
+
+
+def fetch_completed_batch_export_run_interval_ends(
+    batch_export_id: UUID, data_interval_start: dt.datetime, data_interval_end: dt.datetime
+) -> set[dt.datetime]:
+    """Return the ends of the data intervals in given range with a completed BatchExportRun.
+
+    Arguments:
+        batch_export_id: The id of the BatchExport the runs belong to.
+        data_interval_start: Only runs whose data interval starts at or after this are considered.
+        data_interval_end: Only runs whose data interval ends at or before this are considered.
+    """
+    return set(
+        BatchExportRun.objects.filter(
+            batch_export_id=batch_export_id,
+            status=BatchExportRun.Status.COMPLETED,
+            data_interval_start__gte=data_interval_start,
+            data_interval_end__lte=data_interval_end,
+        ).values_list("data_interval_end", flat=True)
+    )
+
+
 async def aupdate_batch_export_backfill_status(backfill_id: UUID, status: str) -> BatchExportBackfill:
     """Update the status of an BatchExportBackfill with given id.
 
@@ -1,21 +1,26 @@
 from datetime import datetime, timedelta
 from typing import Any, Optional
-from uuid import UUID
+from uuid import UUID, uuid4
 
 import structlog
 from django.conf import settings
 from django.core.cache import cache
 from django.db import connection
+from django.db.models import F, Q
 from django.utils.timezone import now
 from prometheus_client import Counter, Gauge
 from sentry_sdk.api import capture_exception
 
 from posthog.api.services.query import process_query_dict
+from posthog.caching.insight_caching_state import GENERALLY_VIEWED_THRESHOLD
+from posthog.client import sync_execute
+from posthog.clickhouse.client.connection import Workload
 from posthog.clickhouse.query_tagging import tag_queries
 from posthog.hogql_queries.legacy_compatibility.flagged_conversion_manager import conversion_to_query_based
 from posthog.hogql_queries.query_runner import ExecutionMode
 from posthog.models import Dashboard, Insight, InsightCachingState
 from posthog.models.instance_setting import get_instance_setting
+from posthog.settings.data_stores import CLICKHOUSE_CLUSTER
 from posthog.tasks.tasks import update_cache_task
 
 logger = structlog.get_logger(__name__)
@@ -23,6 +28,13 @@ logger = structlog.get_logger(__name__)
 REQUEUE_DELAY = timedelta(hours=2)
 MAX_ATTEMPTS = 3
 
+# Refreshes are prioritized by staleness (age relative to the target cache age) × views ÷ ClickHouse cost
+NEVER_REFRESHED_STALENESS = 1000.0
+DEFAULT_QUERY_DURATION_MS = 5_000
+MIN_QUERY_DURATION_MS = 100
+
+QUERY_COSTS_LOOKBACK = timedelta(minutes=30)
+
 INSIGHT_CACHE_WRITE_COUNTER = Counter("posthog_cloud_insight_cache_write", "A write to the redis insight cache")
 
 CACHE_UPDATE_SKIPPED_COUNTER = Counter(
@@ -38,13 +50,29 @@ CACHE_UPDATE_SHARED_GAUGE = Gauge(
     "insight_cache_state_update_rows_updated",
     "Number of rows updated during insight cache refresh. A single cache key can be shared by more than one insight/tile.",
 )
+CACHE_UPDATE_IN_FLIGHT_GAUGE = Gauge(
+    "insight_cache_state_updates_in_flight",
+    "Number of insight cache refreshes queued or running when scheduling more of them.",
+)
+CACHE_UPDATE_SCHEDULING_COUNTER = Counter(
+    "insight_cache_state_update_scheduling",
+    "Decisions on insight caches in need of a refresh: scheduled, or deferred due to the team or global budget.",
+    labelnames=["decision"],
+)
 
 
 def schedule_cache_updates():
     # :TODO: Separate celery queue for updates rather than limiting via this method
     PARALLEL_INSIGHT_CACHE = get_instance_setting("PARALLEL_DASHBOARD_ITEM_CACHE")
+    PARALLEL_INSIGHT_CACHE_PER_TEAM = get_instance_setting("PARALLEL_DASHBOARD_ITEM_CACHE_PER_TEAM")
 
-    to_update = fetch_states_in_need_of_updating(limit=PARALLEL_INSIGHT_CACHE)
+    # Only top up the refreshes in flight, so that a burst of stale caches doesn't hit ClickHouse all at once
+    in_flight = count_updates_in_flight()
+    CACHE_UPDATE_IN_FLIGHT_GAUGE.set(in_flight)
+
+    to_update = fetch_states_in_need_of_updating(
+        limit=max(PARALLEL_INSIGHT_CACHE - in_flight, 0), per_team_limit=PARALLEL_INSIGHT_CACHE_PER_TEAM
+    )
     # :TRICKY: Schedule tasks and deduplicate by ID to avoid clashes
     representative_by_cache_key = set()
     for team_id, cache_key, caching_state_id in to_update:
@@ -59,39 +87,162 @@ def schedule_cache_updates():
             "Scheduled caches to be updated",
             candidates=len(to_update),
             tasks_created=len(representative_by_cache_key),
+            in_flight=in_flight,
         )
     else:
         logger.warn("No caches were found to be updated")
 
 
-def fetch_states_in_need_of_updating(limit: int) -> list[tuple[int, str, UUID]]:
+def count_updates_in_flight() -> int:
+    """Counts the cache keys queued for a refresh that hasn't finished (nor been given up on) yet."""
+    return (
+        InsightCachingState.objects.filter(
+            last_refresh_queued_at__gte=now() - REQUEUE_DELAY, refresh_attempt__lt=MAX_ATTEMPTS
+        )
+        .filter(Q(last_refresh__isnull=True) | Q(last_refresh__lt=F("last_refresh_queued_at")))
+        .values("team_id", "cache_key")
+        .distinct()
+        .count()
+    )
+
+
+def fetch_states_in_need_of_updating(limit: int, per_team_limit: Optional[int] = None) -> list[tuple[int, str, UUID]]:
+    """
+    Returns the states in need of a refresh, most valuable refresh first: the most stale and most viewed caches
+    that are cheapest to calculate. States sharing a cache key are returned together, highest priority first.
+
+    At most `limit` cache keys are returned, and at most `per_team_limit` in flight per team.
+    """
+    if limit <= 0:
+        return []
+
     current_time = now()
     with connection.cursor() as cursor:
         cursor.execute(
             """
-            SELECT team_id, cache_key, id
-            FROM posthog_insightcachingstate
-            WHERE target_cache_age_seconds IS NOT NULL
-            AND refresh_attempt < %(max_attempts)s
-            AND (
-                last_refresh IS NULL OR
-                last_refresh < %(current_time)s - target_cache_age_seconds * interval '1' second
-            )
-            AND (
-                last_refresh_queued_at IS NULL OR
-                last_refresh_queued_at < %(last_refresh_queued_at_threshold)s
+            WITH in_flight AS (
+                SELECT team_id, count(DISTINCT cache_key) AS refreshes
+                FROM posthog_insightcachingstate
+                WHERE last_refresh_queued_at >= %(last_refresh_queued_at_threshold)s
+                AND refresh_attempt < %(max_attempts)s
+                AND (last_refresh IS NULL OR last_refresh < last_refresh_queued_at)
+                GROUP BY team_id
+            ),
+            candidates AS (
+                SELECT
+                    state.team_id,
+                    state.cache_key,
+                    state.id,
+                    (
+                        CASE
+                            WHEN state.last_refresh IS NULL THEN %(never_refreshed_staleness)s
+                            ELSE extract(epoch FROM %(current_time)s - state.last_refresh)
+                                / greatest(state.target_cache_age_seconds, 1)
+                        END
+                    ) * (1 + viewers.count)
+                    / greatest(coalesce(state.query_duration_ms, %(default_query_duration_ms)s), %(min_query_duration_ms)s)
+                    AS priority
+                FROM posthog_insightcachingstate AS state
+                CROSS JOIN LATERAL (
+                    SELECT count(*) AS count
+                    FROM posthog_insightviewed AS viewed
+                    WHERE viewed.insight_id = state.insight_id AND viewed.last_viewed_at >= %(viewed_since)s
+                ) AS viewers
+                WHERE state.target_cache_age_seconds IS NOT NULL
+                AND state.refresh_attempt < %(max_attempts)s
+                AND (
+                    state.last_refresh IS NULL OR
+                    state.last_refresh < %(current_time)s - state.target_cache_age_seconds * interval '1' second
+                )
+                AND (
+                    state.last_refresh_queued_at IS NULL OR
+                    state.last_refresh_queued_at < %(last_refresh_queued_at_threshold)s
+                )
+            ),
+            cache_keys AS (
+                SELECT team_id, cache_key, max(priority) AS priority, array_agg(id ORDER BY priority DESC) AS ids
+                FROM candidates
+                GROUP BY team_id, cache_key
+            ),
+            ranked AS (
+                SELECT
+                    cache_keys.*,
+                    row_number() OVER (PARTITION BY team_id ORDER BY priority DESC) AS team_rank,
+                    count(*) OVER () AS candidates_count
+                FROM cache_keys
             )
-            ORDER BY last_refresh ASC NULLS FIRST
+            SELECT ranked.team_id, ranked.cache_key, ranked.ids, ranked.candidates_count, count(*) OVER ()
+            FROM ranked
+            LEFT JOIN in_flight ON in_flight.team_id = ranked.team_id
+            WHERE %(per_team_limit)s IS NULL OR ranked.team_rank + coalesce(in_flight.refreshes, 0) <= %(per_team_limit)s
+            ORDER BY ranked.priority DESC
             LIMIT %(limit)s
             """,
             {
                 "max_attempts": MAX_ATTEMPTS,
                 "current_time": current_time,
                 "last_refresh_queued_at_threshold": current_time - REQUEUE_DELAY,
+                "viewed_since": current_time - GENERALLY_VIEWED_THRESHOLD,
+                "never_refreshed_staleness": NEVER_REFRESHED_STALENESS,
+                "default_query_duration_ms": DEFAULT_QUERY_DURATION_MS,
+                "min_query_duration_ms": MIN_QUERY_DURATION_MS,
+                "per_team_limit": per_team_limit,
                 "limit": limit,
             },
         )
-        return cursor.fetchall()
+        rows = cursor.fetchall()
+
+    if rows:
+        candidates_count, within_team_limit_count = rows[0][3], rows[0][4]
+        CACHE_UPDATE_SCHEDULING_COUNTER.labels(decision="scheduled").inc(len(rows))
+        CACHE_UPDATE_SCHEDULING_COUNTER.labels(decision="deferred_team_budget").inc(
+            candidates_count - within_team_limit_count
+        )
+        CACHE_UPDATE_SCHEDULING_COUNTER.labels(decision="deferred_global_budget").inc(
+            within_team_limit_count - len(rows)
+        )
+
+    return [
+        (team_id, cache_key, caching_state_id) for team_id, cache_key, ids, _, _ in rows for caching_state_id in ids
+    ]
+
+
+def record_query_costs():
+    """
+    Records the ClickHouse cost of recent cache refreshes on their caching states, for prioritizing the next ones.
+    Each refresh tags its queries, so that all queries of one refresh can be summed up.
+    """
+    rows = sync_execute(
+        """
+        SELECT caching_state_id, avg(refresh_duration_ms), avg(refresh_read_bytes)
+        FROM (
+            SELECT
+                JSONExtractString(log_comment, 'insight_caching_state_id') AS caching_state_id,
+                JSONExtractString(log_comment, 'insight_cache_refresh_id') AS refresh_id,
+                sum(query_duration_ms) AS refresh_duration_ms,
+                sum(read_bytes) AS refresh_read_bytes
+            FROM clusterAllReplicas(%(cluster)s, system.query_log)
+            WHERE type = 'QueryFinish'
+            AND is_initial_query
+            AND event_time > %(since)s
+            AND refresh_id != ''
+            GROUP BY caching_state_id, refresh_id
+        )
+        GROUP BY caching_state_id
+        """,
+        {"cluster": CLICKHOUSE_CLUSTER, "since": now() - QUERY_COSTS_LOOKBACK},
+        workload=Workload.OFFLINE,
+    )
+    costs = {UUID(caching_state_id): (duration_ms, read_bytes) for caching_state_id, duration_ms, read_bytes in rows}
+
+    # States sharing a cache key are only refreshed once, so they share the cost
+    for caching_state_id, team_id, cache_key in InsightCachingState.objects.filter(pk__in=costs.keys()).values_list(
+        "id", "team_id", "cache_key"
+    ):
+        duration_ms, read_bytes = costs[caching_state_id]
+        InsightCachingState.objects.filter(team_id=team_id, cache_key=cache_key).update(
+            query_duration_ms=round(duration_ms), read_bytes=round(read_bytes)
+        )
 
 
 def update_cache(caching_state_id: UUID):
@@ -102,6 +253,10 @@ def update_cache(caching_state_id: UUID):
         and now() - caching_state.last_refresh < timedelta(seconds=caching_state.target_cache_age_seconds)
     ):
         CACHE_UPDATE_SKIPPED_COUNTER.inc()
+        # Free up the budget taken by this refresh
+        InsightCachingState.objects.filter(pk=caching_state.pk, last_refresh_queued_at__isnull=False).update(
+            last_refresh_queued_at=None
+        )
         return
 
     insight, dashboard = _extract_insight_dashboard(caching_state)
@@ -119,7 +274,12 @@ def update_cache(caching_state_id: UUID):
         "last_refresh_queued_at": caching_state.last_refresh_queued_at,
     }
 
-    tag_queries(team_id=insight.team_id, insight_id=insight.pk)
+    tag_queries(
+        team_id=insight.team_id,
+        insight_id=insight.pk,
+        insight_caching_state_id=str(caching_state.pk),
+        insight_cache_refresh_id=str(uuid4()),
+    )
     if dashboard:
         tag_queries(dashboard_id=dashboard.pk)
 
@@ -0,0 +1,112 @@
+import time
+import uuid
+from typing import Optional
+
+import structlog
+from django.conf import settings
+from prometheus_client import Counter, Histogram
+from redis.exceptions import RedisError, WatchError
+
+from posthog import redis
+
+logger = structlog.get_logger(__name__)
+
+QUERY_COALESCING_COUNTER = Counter(
+    "posthog_query_coalescing_total",
+    "Calculations of a query result: by the leader, or coalesced into the leader's calculation.",
+    labelnames=["outcome"],
+)
+QUERY_COALESCING_WAIT_TIME = Histogram(
+    "posthog_query_coalescing_wait_seconds",
+    "Time spent waiting for the leader calculating the same query.",
+)
+
+
+class QueryCoalescer:
+    """
+    Single-flight for query calculations, keyed on the cache key.
+
+    The first caller takes a lease and calculates, concurrent callers wait for the leader to publish that it's done
+    and then read the result from the cache. If the leader crashes, the lease expires and the waiting callers go
+    ahead on their own. Redis errors never block a calculation.
+    """
+
+    KEY_PREFIX = "query_coalescing"
+
+    def __init__(self, cache_key: str, lease_seconds: Optional[int] = None):
+        self.redis_client = redis.get_client()
+        self.cache_key = cache_key
+        self.lease_seconds = lease_seconds or settings.QUERY_COALESCING_LEASE_SECONDS
+        self.token = str(uuid.uuid4())
+        self.is_leader = False
+
+    @property
+    def lease_key(self) -> str:
+        return f"{self.KEY_PREFIX}:{self.cache_key}:lease"
+
+    @property
+    def channel(self) -> str:
+        return f"{self.KEY_PREFIX}:{self.cache_key}:done"
+
+    def acquire(self) -> bool:
+        """Returns whether this caller is the leader and should calculate."""
+        try:
+            self.is_leader = bool(self.redis_client.set(self.lease_key, self.token, nx=True, ex=self.lease_seconds))
+        except RedisError as e:
+            logger.warning("query_coalescing_acquire_failed", error=str(e))
+            self.is_leader = True
+            return True
+
+        if self.is_leader:
+            QUERY_COALESCING_COUNTER.labels(outcome="leader").inc()
+        return self.is_leader
+
+    def wait(self) -> bool:
+        """
+        Waits for the leader to finish. Returns whether its result may be in the cache now.
+        Returns False if the leader failed, in which case the caller should calculate itself.
+        """
+        start_time = time.monotonic()
+        try:
+            with self.redis_client.pubsub(ignore_subscribe_messages=True) as pubsub:
+                pubsub.subscribe(self.channel)
+                while True:
+                    # Checked after subscribing, so that the leader's message can't be missed in between
+                    lease_ttl_ms = self.redis_client.pttl(self.lease_key)
+                    if lease_ttl_ms < 0:
+                        # The leader finished before we subscribed, or its lease expired
+                        outcome = "lease_gone"
+                        break
+                    message = pubsub.get_message(timeout=lease_ttl_ms / 1000)
+                    if message is not None and message["type"] == "message":
+                        outcome = "coalesced" if message["data"] == b"done" else "leader_failed"
+                        break
+        except RedisError as e:
+            logger.warning("query_coalescing_wait_failed", error=str(e))
+            outcome = "error"
+
+        QUERY_COALESCING_WAIT_TIME.observe(time.monotonic() - start_time)
+        QUERY_COALESCING_COUNTER.labels(outcome=outcome).inc()
+        return outcome in ("coalesced", "lease_gone")
+
+    def release(self, succeeded: bool) -> None:
+        """Lets the waiting callers know the leader is done. Must only be called after the result has been cached."""
+        if not self.is_leader:
+            return
+
+        try:
+            with self.redis_client.pipeline() as pipe:
+                try:
+                    # Only delete our own lease, in case it has expired and another caller has taken over since
+                    pipe.watch(self.lease_key)
+                    if pipe.get(self.lease_key) == self.token.encode():
+                        pipe.multi()
+                        pipe.delete(self.lease_key)
+                        pipe.execute()
+                except WatchError:
+                    pass
+            self.redis_client.publish(self.channel, "done" if succeeded else "failed")
+        except RedisError as e:
+            logger.warning("query_coalescing_release_failed", error=str(e))
+        finally:
+            self.is_leader = False
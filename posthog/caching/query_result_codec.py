@@ -0,0 +1,105 @@
+import struct
+from collections.abc import Callable
+from functools import cached_property
+from typing import Any, Optional
+
+import orjson
+import zstd
+from prometheus_client import Counter
+
+from posthog.cache_utils import OrjsonJsonSerializer
+
+QUERY_CACHE_ENTRY_READ_COUNTER = Counter(
+    "posthog_query_cache_entry_read_total",
+    "Cached query responses read, by the format version they were written in.",
+    labelnames=["version"],
+)
+QUERY_CACHE_RESULTS_DECODE_COUNTER = Counter(
+    "posthog_query_cache_results_decode_total",
+    "Cached query responses whose results had to be decoded, by the format version they were written in.",
+    labelnames=["version"],
+)
+
+# Cache entries start with these bytes, which are never at the start of a JSON document
+CACHE_ENTRY_MAGIC = b"PHQR"
+CACHE_ENTRY_VERSION = 1
+# Magic, version, length of the metadata
+_HEADER = struct.Struct(">4sBI")
+# Entries written before there were versions are a single JSON document
+LEGACY_CACHE_ENTRY_VERSION = 0
+
+RESULTS_ZSTD_LEVEL = 6
+
+
+class CachedResponseEntry:
+    """
+    A cached query response, whose `results` are only decoded when accessed.
+
+    Everything but `results` is small, so e.g. whether a cached response is stale can be decided from `metadata`
+    without paying for decompressing and parsing what's usually almost all of the entry.
+    """
+
+    def __init__(self, metadata: dict[str, Any], version: int, load_results: Optional[Callable[[], Any]]):
+        self.metadata = metadata
+        self.version = version
+        self._load_results = load_results
+
+    @cached_property
+    def results(self) -> Any:
+        if self._load_results is None:
+            return None
+        QUERY_CACHE_RESULTS_DECODE_COUNTER.labels(version=self.version).inc()
+        return self._load_results()
+
+    def to_dict(self) -> dict[str, Any]:
+        if self._load_results is None:
+            return dict(self.metadata)
+        return {**self.metadata, "results": self.results}
+
+
+def encode_cached_response(response: dict[str, Any]) -> bytes:
+    """
+    Encodes a cached query response as the header, the response without `results` as JSON, and then `results` as
+    zstd-compressed JSON (unless the response has no `results`).
+    """
+    serializer = OrjsonJsonSerializer({})
+    encoded_metadata = serializer.dumps({key: value for key, value in response.items() if key != "results"})
+    encoded_results = (
+        zstd.compress(serializer.dumps(response["results"]), RESULTS_ZSTD_LEVEL, 1) if "results" in response else b""
+    )
+    return b"".join(
+        (_HEADER.pack(CACHE_ENTRY_MAGIC, CACHE_ENTRY_VERSION, len(encoded_metadata)), encoded_metadata, encoded_results)
+    )
+
+
+def decode_cached_response(value: bytes) -> Optional[CachedResponseEntry]:
+    """
+    Decodes a cached query response, without decoding its `results` yet.
+
+    Entries written before the binary format are still read, their results just can't be decoded lazily.
+    Returns None for entries written in a format version this code doesn't know (yet).
+    """
+    if not value.startswith(CACHE_ENTRY_MAGIC):
+        QUERY_CACHE_ENTRY_READ_COUNTER.labels(version=LEGACY_CACHE_ENTRY_VERSION).inc()
+        response = OrjsonJsonSerializer({}).loads(value)
+        if not isinstance(response, dict):
+            # Malformed, but let the caller decide what to do about that
+            return CachedResponseEntry(metadata={}, version=LEGACY_CACHE_ENTRY_VERSION, load_results=None)
+        if "results" not in response:
+            return CachedResponseEntry(metadata=response, version=LEGACY_CACHE_ENTRY_VERSION, load_results=None)
+        results = response.pop("results")
+        return CachedResponseEntry(metadata=response, version=LEGACY_CACHE_ENTRY_VERSION, load_results=lambda: results)
+
+    _, version, metadata_length = _HEADER.unpack_from(value)
+    if version != CACHE_ENTRY_VERSION:
+        return None
+    QUERY_CACHE_ENTRY_READ_COUNTER.labels(version=version).inc()
+
+    metadata_end = _HEADER.size + metadata_length
+    metadata = orjson.loads(value[_HEADER.size : metadata_end])
+    encoded_results = value[metadata_end:]
+    return CachedResponseEntry(
+        metadata=metadata,
+        version=version,
+        load_results=(lambda: orjson.loads(zstd.decompress(encoded_results))) if encoded_results else None,
+    )
@@ -9,7 +9,9 @@ from freezegun import freeze_time
 
 from posthog.caching.calculate_results import get_cache_type
 from posthog.caching.insight_cache import (
+    count_updates_in_flight,
     fetch_states_in_need_of_updating,
+    record_query_costs,
     schedule_cache_updates,
     update_cache,
 )
@@ -22,9 +24,10 @@ from posthog.constants import (
     INSIGHT_TRENDS,
 )
 from posthog.decorators import CacheType
-from posthog.models import Filter, InsightCachingState, RetentionFilter, Team, User
+from posthog.models import Filter, InsightCachingState, InsightViewed, RetentionFilter, Team, User
 from posthog.models.filters import PathFilter
 from posthog.models.filters.stickiness_filter import StickinessFilter
+from posthog.models.instance_setting import override_instance_config
 from posthog.models.signals import mute_selected_signals
 from posthog.utils import get_safe_cache
 
@@ -39,6 +42,7 @@ def create_insight_caching_state(
     target_cache_age: Optional[timedelta] = timedelta(days=1),  # noqa
     refresh_attempt: int = 0,
     filters=filter_dict,
+    query_duration_ms: Optional[int] = None,
     **kw,
 ):
     with mute_selected_signals():
@@ -51,6 +55,7 @@ def create_insight_caching_state(
     model.last_refresh_queued_at = now() - last_refresh_queued_at if last_refresh_queued_at is not None else None
     model.target_cache_age_seconds = target_cache_age.total_seconds() if target_cache_age is not None else None
     model.refresh_attempt = refresh_attempt
+    model.query_duration_ms = query_duration_ms
     model.save()
     return model
 
@@ -129,6 +134,86 @@ def test_fetch_states_in_need_of_updating(team: Team, user: User, params, expect
     assert len(results) == expected_matches
 
 
+def filters_for_event(event: str) -> dict:
+    return {**filter_dict, "events": [{"id": event}]}
+
+
+@pytest.mark.django_db
+def test_fetch_states_in_need_of_updating_prioritizes_stale_viewed_and_cheap(team: Team, user: User):
+    expensive = create_insight_caching_state(
+        team, user, filters=filters_for_event("expensive"), query_duration_ms=60_000
+    )
+    cheap = create_insight_caching_state(team, user, filters=filters_for_event("cheap"), query_duration_ms=1_000)
+    stale = create_insight_caching_state(
+        team, user, filters=filters_for_event("stale"), last_refresh=timedelta(days=60), query_duration_ms=60_000
+    )
+    viewed = create_insight_caching_state(team, user, filters=filters_for_event("viewed"), query_duration_ms=60_000)
+    InsightViewed.objects.create(team=team, user=user, insight=viewed.insight, last_viewed_at=now())
+    never_refreshed = create_insight_caching_state(
+        team, user, filters=filters_for_event("never_refreshed"), last_refresh=None, query_duration_ms=60_000
+    )
+
+    results = fetch_states_in_need_of_updating(limit=10)
+
+    assert [caching_state_id for _, _, caching_state_id in results] == [
+        never_refreshed.pk,
+        cheap.pk,
+        stale.pk,
+        viewed.pk,
+        expensive.pk,
+    ]
+
+
+@pytest.mark.django_db
+def test_fetch_states_in_need_of_updating_per_team_limit(team: Team, user: User):
+    create_insight_caching_state(
+        team, user, filters=filters_for_event("in_flight"), last_refresh_queued_at=timedelta(minutes=5)
+    )
+    create_insight_caching_state(team, user, filters=filters_for_event("a"))
+    create_insight_caching_state(team, user, filters=filters_for_event("b"))
+
+    assert count_updates_in_flight() == 1
+    assert len(fetch_states_in_need_of_updating(limit=10)) == 2
+    assert len(fetch_states_in_need_of_updating(limit=10, per_team_limit=2)) == 1
+    assert len(fetch_states_in_need_of_updating(limit=10, per_team_limit=1)) == 0
+
+
+@pytest.mark.django_db
+@patch("posthog.caching.insight_cache.update_cache_task")
+def test_schedule_cache_updates_tops_up_updates_in_flight(update_cache_task, team: Team, user: User):
+    create_insight_caching_state(
+        team, user, filters=filters_for_event("in_flight"), last_refresh_queued_at=timedelta(minutes=5)
+    )
+    create_insight_caching_state(team, user, filters=filters_for_event("a"))
+    create_insight_caching_state(team, user, filters=filters_for_event("b"))
+
+    with override_instance_config("PARALLEL_DASHBOARD_ITEM_CACHE", 2):
+        schedule_cache_updates()
+    assert update_cache_task.delay.call_count == 1
+
+    with override_instance_config("PARALLEL_DASHBOARD_ITEM_CACHE", 3):
+        schedule_cache_updates()
+    assert update_cache_task.delay.call_count == 1
+
+
+@pytest.mark.django_db
+@patch("posthog.caching.insight_cache.sync_execute")
+def test_record_query_costs(sync_execute, team: Team, user: User):
+    caching_state1 = create_insight_caching_state(team, user)
+    caching_state2 = create_insight_caching_state(team, user)
+    other_caching_state = create_insight_caching_state(team, user, filters=filters_for_event("other"))
+    sync_execute.return_value = [(str(caching_state1.pk), 1234.5, 1_000_000.0)]
+
+    record_query_costs()
+
+    for caching_state in (caching_state1, caching_state2):
+        caching_state.refresh_from_db()
+        assert caching_state.query_duration_ms == 1234
+        assert caching_state.read_bytes == 1_000_000
+    other_caching_state.refresh_from_db()
+    assert other_caching_state.query_duration_ms is None
+
+
 @pytest.mark.django_db
 @freeze_time("2020-01-04T13:01:01Z")
 def test_update_cache(team: Team, user: User, cache):
@@ -0,0 +1,63 @@
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from posthog.caching.query_coalescing import QueryCoalescer
+
+
+class TestQueryCoalescer(SimpleTestCase):
+    def _release_later(self, leader: QueryCoalescer, succeeded: bool) -> threading.Thread:
+        def release():
+            time.sleep(0.1)
+            leader.release(succeeded)
+
+        thread = threading.Thread(target=release)
+        thread.start()
+        return thread
+
+    def test_first_caller_leads(self):
+        leader = QueryCoalescer("cache_leads")
+        follower = QueryCoalescer("cache_leads")
+
+        self.assertTrue(leader.acquire())
+        self.assertFalse(follower.acquire())
+
+        leader.release(succeeded=True)
+        self.assertTrue(follower.acquire())
+        follower.release(succeeded=True)
+
+    def test_waits_for_leader(self):
+        leader = QueryCoalescer("cache_waits")
+        follower = QueryCoalescer("cache_waits")
+        leader.acquire()
+        follower.acquire()
+
+        thread = self._release_later(leader, succeeded=True)
+        self.assertTrue(follower.wait())
+        thread.join()
+
+    def test_waits_for_failed_leader(self):
+        leader = QueryCoalescer("cache_fails")
+        follower = QueryCoalescer("cache_fails")
+        leader.acquire()
+        follower.acquire()
+
+        thread = self._release_later(leader, succeeded=False)
+        self.assertFalse(follower.wait())
+        thread.join()
+
+    def test_stops_waiting_when_lease_expires(self):
+        leader = QueryCoalescer("cache_expires", lease_seconds=1)
+        follower = QueryCoalescer("cache_expires")
+        leader.acquire()
+        follower.acquire()
+
+        start_time = time.monotonic()
+        self.assertTrue(follower.wait())
+        self.assertLess(time.monotonic() - start_time, 2)
+
+        # The expired leader must not release the lease of whoever took over since
+        self.assertTrue(follower.acquire())
+        leader.release(succeeded=True)
+        self.assertFalse(QueryCoalescer("cache_expires").acquire())
@@ -0,0 +1,57 @@
+from datetime import datetime, UTC
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from posthog.cache_utils import OrjsonJsonSerializer
+from posthog.caching.query_result_codec import CACHE_ENTRY_MAGIC, decode_cached_response, encode_cached_response
+
+
+class TestQueryResultCodec(SimpleTestCase):
+    response = {
+        "results": [{"data": [1, 2, 3], "labels": ["a", "b", "c"]}] * 100,
+        "is_cached": False,
+        "last_refresh": datetime(2024, 1, 1, 12, tzinfo=UTC),
+        "cache_key": "cache_key",
+        "timezone": "UTC",
+    }
+    decoded_response = {**response, "last_refresh": "2024-01-01T12:00:00Z"}
+
+    def test_round_trip(self):
+        encoded = encode_cached_response(self.response)
+
+        self.assertTrue(encoded.startswith(CACHE_ENTRY_MAGIC))
+        self.assertLess(len(encoded), len(OrjsonJsonSerializer({}).dumps(self.response)))
+        entry = decode_cached_response(encoded)
+        assert entry is not None
+        self.assertEqual(entry.to_dict(), self.decoded_response)
+
+    def test_results_are_decoded_lazily(self):
+        with mock.patch("posthog.caching.query_result_codec.zstd.decompress") as decompress:
+            entry = decode_cached_response(encode_cached_response(self.response))
+            assert entry is not None
+            self.assertEqual(entry.metadata["last_refresh"], "2024-01-01T12:00:00Z")
+            self.assertNotIn("results", entry.metadata)
+            decompress.assert_not_called()
+
+    def test_response_without_results(self):
+        response = {"is_cached": False, "error": "Something went wrong"}
+
+        entry = decode_cached_response(encode_cached_response(response))
+
+        assert entry is not None
+        self.assertEqual(entry.to_dict(), response)
+
+    def test_reads_legacy_entries(self):
+        entry = decode_cached_response(OrjsonJsonSerializer({}).dumps(self.response))
+
+        assert entry is not None
+        self.assertEqual(entry.version, 0)
+        self.assertNotIn("results", entry.metadata)
+        self.assertEqual(entry.to_dict(), self.decoded_response)
+
+    def test_ignores_unknown_versions(self):
+        encoded = bytearray(encode_cached_response(self.response))
+        encoded[len(CACHE_ENTRY_MAGIC)] = 99
+
+        self.assertIsNone(decode_cached_response(bytes(encoded)))
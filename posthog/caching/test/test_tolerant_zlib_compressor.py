@@ -1,6 +1,9 @@
+import pickle
+
 from django.test import TestCase
 from parameterized import parameterized
 
+from posthog.caching.query_result_codec import encode_cached_response
 from posthog.caching.tolerant_zlib_compressor import TolerantZlibCompressor
 
 
@@ -72,3 +75,10 @@ class TestTolerantZlibCompressor(TestCase):
     def test_the_zlib_compressor_decompression(self, _, setting: bool, input: bytes, output: bytes) -> None:
         with self.settings(USE_REDIS_COMPRESSION=setting):
             assert self.compressor.decompress(input) == output
+
+    def test_cached_query_responses_are_passed_through(self) -> None:
+        value = pickle.dumps(encode_cached_response({"results": ["hello world"] * 1000}), pickle.HIGHEST_PROTOCOL)
+
+        with self.settings(USE_REDIS_COMPRESSION=True):
+            assert self.compressor.compress(value) == value
+            assert self.compressor.decompress(value) == value
@@ -8,6 +8,8 @@ from django.conf import settings
 import structlog
 from prometheus_client import Counter
 
+from posthog.caching.query_result_codec import CACHE_ENTRY_MAGIC
+
 logger = structlog.get_logger(__name__)
 
 COULD_NOT_DECOMPRESS_VALUE_COUNTER = Counter(
@@ -35,6 +37,8 @@ class TolerantZlibCompressor(BaseCompressor):
     Even while we no longer write compressed values to the cache.
 
     This compressor is a tolerant reader and will return the original value if it can't be decompressed.
+
+    Cached query responses compress their results themselves, so they're passed through as they are.
     """
 
     # we don't want to compress all values, e.g. feature flag cache in decide is already small
@@ -43,12 +47,21 @@ class TolerantZlibCompressor(BaseCompressor):
     zstd_threads = 1
     zlib_preset = 6
 
+    @staticmethod
+    def is_cached_query_response(value: bytes) -> bool:
+        # Values are pickled before being compressed, the magic comes right after the pickle's opcodes
+        return value.startswith(b"\x80") and CACHE_ENTRY_MAGIC in value[:32]
+
     def compress(self, value: bytes) -> bytes:
+        if self.is_cached_query_response(value):
+            return value
         if settings.USE_REDIS_COMPRESSION and len(value) > self.min_length:
             return zstd.compress(value, self.zstd_preset, self.zstd_threads)
         return value
 
     def decompress(self, value: bytes) -> bytes:
+        if self.is_cached_query_response(value):
+            return value
         try:
             try:
                 return zstd.decompress(value)
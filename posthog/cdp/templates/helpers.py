@@ -3,7 +3,7 @@ from unittest.mock import MagicMock
 from posthog.cdp.templates.hog_function_template import HogFunctionTemplate
 from posthog.cdp.validation import compile_hog
 from posthog.test.base import BaseTest
-from hogvm.python.execute import execute_bytecode
+from hogvm.python.compiled import execute_compiled_bytecode
 
 
 class BaseHogFunctionTemplateTest(BaseTest):
@@ -43,7 +43,7 @@ class BaseHogFunctionTemplateTest(BaseTest):
 
         # Run the function
 
-        return execute_bytecode(
+        return execute_compiled_bytecode(
             self.compiled_hog,
             globals,
             functions={"fetch": self.mock_fetch, "print": self.mock_print},
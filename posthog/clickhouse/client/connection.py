@@ -86,6 +86,10 @@ def make_ch_pool(**overrides) -> ChPool:
     return ChPool(**kwargs)
 
 
+def is_default_workload_offline() -> bool:
+    return _default_workload == Workload.OFFLINE
+
+
 @contextmanager
 def set_default_clickhouse_workload_type(workload: Workload):
     global _default_workload
@@ -5,14 +5,18 @@ from contextlib import contextmanager
 from functools import lru_cache
 from time import perf_counter
 from typing import Any, Optional, Union
-from collections.abc import Sequence
+from collections.abc import Iterator, Sequence
+from urllib.parse import urlparse
 
+import pyarrow as pa
+import requests
 import sqlparse
 from clickhouse_driver import Client as SyncClient
+from clickhouse_driver.errors import ServerException
 from django.conf import settings as app_settings
 from statshog.defaults.django import statsd
 
-from posthog.clickhouse.client.connection import Workload, get_pool
+from posthog.clickhouse.client.connection import Workload, get_pool, is_default_workload_offline
 from posthog.clickhouse.client.escape import substitute_params
 from posthog.clickhouse.query_tagging import get_query_tag_value, get_query_tags
 from posthog.errors import wrap_query_error
@@ -71,18 +75,7 @@ def validated_client_query_id() -> Optional[str]:
     return f"{client_query_team_id}_{client_query_id}_{random_id}"
 
 
-@patchable
-def sync_execute(
-    query,
-    args=None,
-    settings=None,
-    with_column_types=False,
-    flush=True,
-    *,
-    workload: Workload = Workload.DEFAULT,
-    team_id: Optional[int] = None,
-    readonly=False,
-):
+def _flush_test_data(flush: bool) -> None:
     if TEST and flush:
         try:
             from posthog.test.base import flush_persons_and_events
@@ -91,6 +84,8 @@ def sync_execute(
         except ModuleNotFoundError:  # when we run plugin server tests it tries to run above, ignore
             pass
 
+
+def _get_workload(workload: Workload) -> Workload:
     if workload == Workload.DEFAULT and (
         # When someone uses an API key, always put their query to the offline cluster
         get_query_tag_value("access_method") == "personal_api_key"
@@ -104,6 +99,24 @@ def sync_execute(
     if get_query_tag_value("id") == "posthog.tasks.tasks.process_query_task":
         workload = Workload.ONLINE
 
+    return workload
+
+
+@patchable
+def sync_execute(
+    query,
+    args=None,
+    settings=None,
+    with_column_types=False,
+    flush=True,
+    *,
+    workload: Workload = Workload.DEFAULT,
+    team_id: Optional[int] = None,
+    readonly=False,
+):
+    _flush_test_data(flush)
+    workload = _get_workload(workload)
+
     with get_pool(workload, team_id, readonly).get_client() as client:
         start_time = perf_counter()
 
@@ -144,6 +157,104 @@ def sync_execute(
     return result
 
 
+@patchable
+def sync_execute_arrow(
+    query,
+    args: Optional[NonInsertParams] = None,
+    settings=None,
+    flush=True,
+    *,
+    workload: Workload = Workload.DEFAULT,
+    team_id: Optional[int] = None,
+    readonly=False,
+) -> Iterator[pa.RecordBatch]:
+    """
+    Like `sync_execute`, but streams the results back as Arrow record batches instead of lists of tuples.
+
+    The native protocol used by `sync_execute` doesn't support Arrow, so this goes over the HTTP interface with the
+    `ArrowStream` output format. Note that ClickHouse returns `DateTime` columns as `UInt32` and `Date` columns as
+    `UInt16` in Arrow, and doesn't support some types (like `UUID`) at all.
+    """
+    if isinstance(args, list | tuple | types.GeneratorType):
+        raise ValueError("sync_execute_arrow does not support INSERT queries")
+
+    _flush_test_data(flush)
+    workload = _get_workload(workload)
+
+    start_time = perf_counter()
+    prepared_sql, _, tags = _prepare_query(client=None, query=query, args=args, workload=workload)
+    query_id = validated_client_query_id()
+    core_settings = {**default_settings(), **(settings or {})}
+    tags["query_settings"] = core_settings
+    url, user, password = _get_http_connection_params(workload, team_id, readonly)
+    params = {
+        **core_settings,
+        "database": app_settings.CLICKHOUSE_DATABASE,
+        "default_format": "ArrowStream",
+        "output_format_arrow_string_as_string": 1,
+        "log_comment": json.dumps(tags, separators=(",", ":")),
+        "query_id": query_id,
+    }
+
+    try:
+        with requests.post(
+            url,
+            params=params,
+            headers={"X-ClickHouse-User": user, "X-ClickHouse-Key": password},
+            data=prepared_sql.encode("utf-8"),
+            stream=True,
+            verify=app_settings.CLICKHOUSE_CA or app_settings.CLICKHOUSE_VERIFY,
+        ) as response:
+            if response.status_code != 200:
+                code = int(response.headers.get("X-ClickHouse-Exception-Code", 0))
+                raise ServerException(response.text, code=code)
+
+            with pa.ipc.open_stream(pa.PythonFile(response.raw, mode="r")) as reader:
+                yield from reader
+    except Exception as e:
+        err = wrap_query_error(e)
+        statsd.incr(
+            "clickhouse_sync_arrow_execution_failure",
+            tags={"failed": True, "reason": type(err).__name__},
+        )
+
+        raise err from e
+    finally:
+        execution_time = perf_counter() - start_time
+
+        statsd.timing("clickhouse_sync_arrow_execution_time", execution_time * 1000.0)
+
+        if query_counter := getattr(thread_local_storage, "query_counter", None):
+            query_counter.total_query_time += execution_time
+
+
+def _get_http_connection_params(workload: Workload, team_id: Optional[int], readonly: bool) -> tuple[str, str, str]:
+    """Returns the HTTP interface URL, user and password to use, following the same rules as `get_pool`."""
+    if team_id is not None and str(team_id) in app_settings.CLICKHOUSE_PER_TEAM_SETTINGS:
+        overrides = app_settings.CLICKHOUSE_PER_TEAM_SETTINGS[str(team_id)]
+        url = app_settings.CLICKHOUSE_HTTP_URL
+        if "host" in overrides:
+            parsed_url = urlparse(url)
+            url = parsed_url._replace(netloc=f"{overrides['host']}:{parsed_url.port}").geturl()
+        return (
+            url,
+            overrides.get("user", app_settings.CLICKHOUSE_USER),
+            overrides.get("password", app_settings.CLICKHOUSE_PASSWORD),
+        )
+
+    if readonly and app_settings.READONLY_CLICKHOUSE_USER is not None and app_settings.READONLY_CLICKHOUSE_PASSWORD:
+        return (
+            app_settings.CLICKHOUSE_HTTP_URL,
+            app_settings.READONLY_CLICKHOUSE_USER,
+            app_settings.READONLY_CLICKHOUSE_PASSWORD,
+        )
+
+    if workload == Workload.OFFLINE or workload == Workload.DEFAULT and is_default_workload_offline():
+        return app_settings.CLICKHOUSE_OFFLINE_HTTP_URL, app_settings.CLICKHOUSE_USER, app_settings.CLICKHOUSE_PASSWORD
+
+    return app_settings.CLICKHOUSE_HTTP_URL, app_settings.CLICKHOUSE_USER, app_settings.CLICKHOUSE_PASSWORD
+
+
 def query_with_columns(
     query: str,
     args: Optional[QueryArgs] = None,
@@ -174,7 +285,7 @@ def query_with_columns(
 
 @patchable
 def _prepare_query(
-    client: SyncClient,
+    client: Optional[SyncClient],
     query: str,
     args: QueryArgs,
     workload: Workload = Workload.DEFAULT,
@@ -9,6 +9,7 @@ from django.db import transaction, IntegrityError
 
 from posthog.client import query_with_columns, sync_execute
 from posthog.demo.matrix.taxonomy_inference import infer_taxonomy_for_team
+from posthog.hogql.database.database_cache import invalidate_hogql_database
 from posthog.models import (
     Cohort,
     Group,
@@ -165,6 +166,7 @@ class MatrixManager:
             GroupTypeMapping.objects.bulk_create(bulk_group_type_mappings)
         except IntegrityError as e:
             print(f"SKIPPING GROUP TYPE MAPPING CREATION: {e}")
+        invalidate_hogql_database(data_team.pk)  # bulk_create doesn't send signals
         for sim_person in sim_persons:
             self._save_sim_person(data_team, sim_person)
         # We need to wait a bit for data just queued into Kafka to show up in CH
@@ -224,6 +226,7 @@ class MatrixManager:
                 )
             ),
         )
+        invalidate_hogql_database(target_team.pk)  # bulk_create doesn't send signals
 
     @classmethod
     def _sync_postgres_with_clickhouse_data(cls, source_team_id: int, target_team_id: int):
@@ -1,7 +1,10 @@
+import inspect
 import re
+from collections.abc import Callable
 from dataclasses import dataclass, field
+from types import FunctionType
 
-from typing import TYPE_CHECKING, Literal, Optional
+from typing import TYPE_CHECKING, Any, ClassVar, Literal, Optional
 
 from posthog.hogql.constants import ConstantDataType
 from posthog.hogql.errors import NotImplementedError
@@ -13,29 +16,61 @@ if TYPE_CHECKING:
 camel_case_pattern = re.compile(r"(?<!^)(?<![A-Z])(?=[A-Z])")
 
 
-@dataclass(kw_only=True)
+def _visit_method_name(class_name: str) -> str:
+    name = camel_case_pattern.sub("_", class_name).lower()
+
+    # NOTE: Sync with ./test/test_visitor.py#test_hogql_visitor_naming_exceptions
+    replacements = {"hog_qlxtag": "hogqlx_tag", "hog_qlxattribute": "hogqlx_attribute", "uuidtype": "uuid_type"}
+    for old, new in replacements.items():
+        name = name.replace(old, new)
+    return f"visit_{name}"
+
+
+# For each class of visitor, the function visiting each class of node, e.g. `Printer.visit_constant` for `Constant`
+_visit_functions: dict[type, dict[type, Callable[[Any, "AST"], Any]]] = {}
+
+
+def _get_visit_function(visitor_class: type, node_class: type["AST"]) -> Callable[[Any, "AST"], Any]:
+    method_name = node_class.visit_method_name
+    if not hasattr(visitor_class, method_name):
+        method_name = "visit_unknown"
+    if not hasattr(visitor_class, method_name):
+        raise NotImplementedError(f"{visitor_class.__name__} has no method {node_class.visit_method_name}")
+
+    # Call plain methods directly, and anything else, e.g. methods set on the visitor itself, by name
+    visit = inspect.getattr_static(visitor_class, method_name)
+    if isinstance(visit, FunctionType):
+        return visit
+    return lambda visitor, node: getattr(visitor, method_name)(node)
+
+
+@dataclass(kw_only=True, slots=True)
 class AST:
     start: Optional[int] = field(default=None)
     end: Optional[int] = field(default=None)
 
+    # Set for each class once it's created, as `accept` is called for every node of every query
+    visit_method_name: ClassVar[str] = "visit_ast"
+
+    def __init_subclass__(cls, **kwargs):
+        # Not `super()`, as slotted dataclasses are recreated, so their methods can't use it
+        object.__init_subclass__(**kwargs)
+        cls.visit_method_name = _visit_method_name(cls.__name__)
+
     # This is part of the visitor pattern from visitor.py.
     def accept(self, visitor):
-        name = camel_case_pattern.sub("_", self.__class__.__name__).lower()
-
-        # NOTE: Sync with ./test/test_visitor.py#test_hogql_visitor_naming_exceptions
-        replacements = {"hog_qlxtag": "hogqlx_tag", "hog_qlxattribute": "hogqlx_attribute", "uuidtype": "uuid_type"}
-        for old, new in replacements.items():
-            name = name.replace(old, new)
-        method_name = f"visit_{name}"
-        if hasattr(visitor, method_name):
-            visit = getattr(visitor, method_name)
-            return visit(self)
-        if hasattr(visitor, "visit_unknown"):
-            return visitor.visit_unknown(self)
-        raise NotImplementedError(f"{visitor.__class__.__name__} has no method {method_name}")
-
-
-@dataclass(kw_only=True)
+        visit_functions = _visit_functions.get(visitor.__class__)
+        if visit_functions is None:
+            visit_functions = _visit_functions[visitor.__class__] = {}
+
+        visit = visit_functions.get(self.__class__)
+        if visit is None:
+            visit = visit_functions[self.__class__] = _get_visit_function(visitor.__class__, self.__class__)
+
+        return visit(visitor, self)
+
+
+@dataclass(kw_only=True, slots=True)
 class Type(AST):
     def get_child(self, name: str, context: "HogQLContext") -> "Type":
         raise NotImplementedError("Type.get_child not overridden")
@@ -50,12 +85,12 @@ class Type(AST):
         raise NotImplementedError(f"{self.__class__.__name__}.resolve_column_constant_type not overridden")
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class Expr(AST):
     type: Optional[Type] = field(default=None)
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class CTE(Expr):
     """A common table expression."""
 
@@ -65,7 +100,7 @@ class CTE(Expr):
     cte_type: Literal["column", "subquery"]
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class ConstantType(Type):
     data_type: ConstantDataType
     nullable: bool = field(default=True)
@@ -77,7 +112,7 @@ class ConstantType(Type):
         raise NotImplementedError("ConstantType.print_type not implemented")
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class UnknownType(ConstantType):
     data_type: ConstantDataType = field(default="unknown", init=False)
 
@@ -3,7 +3,8 @@ from datetime import timedelta
 from typing import Any, Optional, cast, TYPE_CHECKING
 from collections.abc import Callable
 
-from hogvm.python.execute import execute_bytecode, BytecodeResult
+from hogvm.python.compiled import execute_compiled_bytecode
+from hogvm.python.execute import BytecodeResult
 from hogvm.python.stl import STL
 from posthog.hogql import ast
 from posthog.hogql.base import AST
@@ -399,4 +400,4 @@ def execute_hog(
             source_code = f"{source_code};"
     program = parse_program(source_code)
     bytecode = create_bytecode(program)
-    return execute_bytecode(bytecode, globals=globals, functions=functions, timeout=timeout, team=team)
+    return execute_compiled_bytecode(bytecode, globals=globals, functions=functions, timeout=timeout, team=team)
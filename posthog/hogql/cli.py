@@ -1,7 +1,7 @@
 import sys
 import json
 
-from hogvm.python.execute import execute_bytecode
+from hogvm.python.compiled import execute_compiled_bytecode
 from .bytecode import create_bytecode, parse_program
 
 modifiers = [arg for arg in sys.argv if arg.startswith("-")]
@@ -23,7 +23,7 @@ if "--run" in modifiers:
     if len(args) != 2:
         raise ValueError("Must specify exactly one filename")
 
-    response = execute_bytecode(bytecode, globals=None, timeout=5, team=None, debug="--debug" in modifiers)
+    response = execute_compiled_bytecode(bytecode, globals=None, timeout=5, team=None, debug="--debug" in modifiers)
     for line in response.stdout:
         print(line)  # noqa: T201
 
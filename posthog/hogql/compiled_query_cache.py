@@ -0,0 +1,221 @@
+"""
+Per-process cache of compiled HogQL queries.
+
+Compiling a query resolves its types, swaps its properties for their types, resolves lazy tables and cohorts, and
+prints it, which takes longer than running small queries. Dashboards and saved insights run the same queries over and
+over, so the printed HogQL and ClickHouse SQL, together with the values of the ClickHouse query, are kept per
+query, team, modifiers and settings.
+
+Besides the query itself, compiling reads the team's database schema, property definitions, cohorts and actions.
+Keys include the team's schema version (see `database_cache.py`) and a version of the team's compiled queries, which
+is replaced whenever property definitions, cohorts or actions are saved or deleted, or a cohort is recalculated.
+Changes made without Django signals (e.g. property definitions created during ingestion, or new materialized columns)
+are picked up once a compiled query is older than `HOGQL_COMPILED_QUERY_CACHE_TTL_SECONDS`.
+"""
+
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from prometheus_client import Counter
+
+from posthog.hogql import ast
+from posthog.hogql.constants import HogQLGlobalSettings
+from posthog.hogql.context import HogQLContext
+from posthog.hogql.database.database_cache import get_schema_version
+from posthog.hogql.resolver import resolve_constant_data_type
+from posthog.hogql.visitor import CloningVisitor
+from posthog.models.signals import mutable_receiver
+from posthog.schema import HogQLQueryModifiers
+
+if TYPE_CHECKING:
+    from posthog.models import Team
+
+HOGQL_COMPILED_QUERY_CACHE_MAX_ENTRIES = 10_000
+# The version is only looked up, never refreshed, so let it outlive any compiled query by far
+COMPILED_QUERY_VERSION_TTL_SECONDS = 60 * 60 * 24 * 7
+
+HOGQL_COMPILED_QUERY_CACHE_COUNTER = Counter(
+    "hogql_compiled_query_cache_total",
+    "Whether a compiled HogQL query could be reused, had to be compiled, or couldn't be cached.",
+    labelnames=["result"],
+)
+
+
+def _compiled_query_version_key(team_id: int) -> str:
+    return f"hogql_compiled_query_version:{team_id}"
+
+
+def get_compiled_query_version(team_id: int) -> Optional[str]:
+    """The current version of the team's compiled queries, or None if it can't be looked up."""
+    key = _compiled_query_version_key(team_id)
+    try:
+        version = cache.get(key)
+        if version is None:
+            # A fresh version never matches what was cached before the previous one was lost
+            cache.add(key, uuid.uuid4().hex, COMPILED_QUERY_VERSION_TTL_SECONDS)
+            version = cache.get(key)
+        return version
+    except Exception:
+        return None
+
+
+def invalidate_compiled_queries(team_id: int) -> None:
+    """Makes all processes compile the team's queries again the next time they're run."""
+    try:
+        cache.set(_compiled_query_version_key(team_id), uuid.uuid4().hex, COMPILED_QUERY_VERSION_TTL_SECONDS)
+    except Exception:
+        pass
+
+
+def can_cache_compiled_query(context: HogQLContext) -> bool:
+    # Queries compiled against a given database, or after other values were added, can't be reproduced from the key
+    return (
+        settings.HOGQL_COMPILED_QUERY_CACHE
+        and context.database is None
+        and not context.values
+        and context.globals is None
+    )
+
+
+def get_compiled_query_key(
+    query: ast.SelectQuery | ast.SelectUnionQuery,
+    team: "Team",
+    modifiers: HogQLQueryModifiers,
+    query_settings: HogQLGlobalSettings,
+    context: HogQLContext,
+    pretty: bool,
+) -> Optional[str]:
+    """The key of the query compiled with these arguments, or None if the team's versions can't be looked up."""
+    schema_version = get_schema_version(team.pk)
+    compiled_query_version = get_compiled_query_version(team.pk)
+    if schema_version is None or compiled_query_version is None:
+        HOGQL_COMPILED_QUERY_CACHE_COUNTER.labels(result="uncached").inc()
+        return None
+
+    # Queries only differing in where their nodes were parsed from, or in the values of parameters, compile the same
+    normalized_query = repr(_NormalizeQuery().visit(query))
+    key = "\n".join(
+        [
+            str(team.pk),
+            schema_version,
+            compiled_query_version,
+            str(team.timezone),
+            str(team.week_start_day),
+            modifiers.model_dump_json(exclude_none=True),
+            query_settings.model_dump_json(exclude_none=True),
+            f"{pretty}:{context.limit_top_select}:{context.within_non_hogql_query}:{context.max_view_depth}:{context.debug}",
+            normalized_query,
+        ]
+    )
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class _NormalizeQuery(CloningVisitor):
+    def __init__(self):
+        super().__init__(clear_types=True, clear_locations=True)
+
+    def visit_parameter(self, node: ast.Parameter):
+        # Parameters are printed by their types, and bound to their values after printing
+        return ast.Parameter(name=node.name, value=repr(resolve_constant_data_type(node.value)))
+
+
+@dataclass(frozen=True)
+class CompiledQuery:
+    hogql: str
+    columns: list[str]
+    clickhouse_sql: str
+    values: dict
+    compiled_at: float
+    # Types of the parameters that the HogQL, columns and ClickHouse SQL have slots for, if any
+    parameter_types: Optional[dict[str, ast.ConstantType]] = None
+    timezone: str = "UTC"
+    unmaterialized_properties: frozenset[tuple[str, str, str]] = frozenset()
+
+
+class HogQLCompiledQueryCache:
+    """Thread-safe LRU cache of compiled queries by key."""
+
+    def __init__(self, max_entries: int = HOGQL_COMPILED_QUERY_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._queries: OrderedDict[str, CompiledQuery] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CompiledQuery]:
+        with self._lock:
+            compiled_query = self._queries.get(key)
+            if compiled_query is not None:
+                self._queries.move_to_end(key)
+
+        if (
+            compiled_query is None
+            or time.monotonic() - compiled_query.compiled_at >= settings.HOGQL_COMPILED_QUERY_CACHE_TTL_SECONDS
+        ):
+            HOGQL_COMPILED_QUERY_CACHE_COUNTER.labels(result="miss").inc()
+            return None
+
+        HOGQL_COMPILED_QUERY_CACHE_COUNTER.labels(result="hit").inc()
+        return compiled_query
+
+    def set(
+        self,
+        key: str,
+        hogql: str,
+        columns: list[str],
+        clickhouse_sql: str,
+        values: dict,
+        parameter_types: Optional[dict[str, ast.ConstantType]] = None,
+        timezone: str = "UTC",
+        unmaterialized_properties: Optional[set[tuple[str, str, str]]] = None,
+    ) -> None:
+        if self.max_entries <= 0:
+            return
+        # Copied, as the caller's lists and dicts stay in use
+        compiled_query = CompiledQuery(
+            hogql=hogql,
+            columns=list(columns),
+            clickhouse_sql=clickhouse_sql,
+            values=dict(values),
+            compiled_at=time.monotonic(),
+            parameter_types=dict(parameter_types) if parameter_types is not None else None,
+            timezone=timezone,
+            unmaterialized_properties=frozenset(unmaterialized_properties or ()),
+        )
+        with self._lock:
+            self._queries[key] = compiled_query
+            self._queries.move_to_end(key)
+            while len(self._queries) > self.max_entries:
+                self._queries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._queries.clear()
+
+    def __len__(self) -> int:
+        return len(self._queries)
+
+
+HOGQL_COMPILED_QUERY_CACHE = HogQLCompiledQueryCache()
+
+
+def invalidate_compiled_queries_on_change(sender, instance, **kwargs):
+    team_id = instance.team_id
+    invalidate_compiled_queries(team_id)
+    # Other processes could otherwise compile queries from before the change is committed, under the new version
+    transaction.on_commit(lambda: invalidate_compiled_queries(team_id))
+
+
+for sender in ["posthog.PropertyDefinition", "posthog.Cohort", "posthog.Action"] + (
+    # Saving the enterprise subclass of property definitions only sends signals for the subclass
+    ["ee.EnterprisePropertyDefinition"] if settings.EE_AVAILABLE else []
+):
+    # Not weak, as the handler wrapping this function isn't referenced anywhere else
+    mutable_receiver([post_save, post_delete], sender=sender, weak=False)(invalidate_compiled_queries_on_change)
@@ -6,6 +6,7 @@ from posthog.schema import HogQLNotice, HogQLQueryModifiers
 
 if TYPE_CHECKING:
     from posthog.hogql.transforms.property_types import PropertySwapper
+    from posthog.hogql.ast import ConstantType
     from posthog.hogql.database.database import Database
     from posthog.models import Team
 
@@ -30,6 +31,9 @@ class HogQLContext:
     database: Optional["Database"] = None
     # If set, will save string constants to this dict. Inlines strings into the query if None.
     values: dict = field(default_factory=dict)
+    # If set, prints parameters as slots to bind their values to after printing, and saves their types to this dict.
+    # Inlines parameters into the query like constants if None.
+    parameter_types: Optional[dict[str, "ConstantType"]] = None
     # Are we small part of a non-HogQL query? If so, use custom syntax for accessed person properties.
     within_non_hogql_query: bool = False
     # Enable full SELECT queries and subqueries in ClickHouse
@@ -56,6 +60,8 @@ class HogQLContext:
     debug: bool = False
 
     property_swapper: Optional["PropertySwapper"] = None
+    # Properties printed without a materialized column, as (table, table column, property name)
+    unmaterialized_properties: set[tuple[str, str, str]] = field(default_factory=set)
 
     def add_value(self, value: Any) -> str:
         key = f"hogql_val_{len(self.values)}"
@@ -1,14 +1,17 @@
 import dataclasses
 from collections.abc import Callable
+from functools import partial
 from typing import TYPE_CHECKING, Any, ClassVar, Optional, TypeAlias, cast, Union
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
+from django.conf import settings
 from django.db.models import Q
 from pydantic import ConfigDict, BaseModel
 from sentry_sdk import capture_exception
 
 from posthog.hogql import ast
 from posthog.hogql.context import HogQLContext
+from posthog.hogql.database.database_cache import HOGQL_DATABASE_CACHE
 from posthog.hogql.database.models import (
     FieldOrTable,
     FieldTraverser,
@@ -143,6 +146,8 @@ class Database(BaseModel):
 
     _timezone: Optional[str]
     _week_start_day: Optional[WeekStartDay]
+    # Serialized fields by table name, along with the table they were serialized from. Shared with copy-on-write views
+    _serialized_fields: dict[str, tuple[Table, list[DatabaseSchemaField]]] = {}
 
     def __init__(self, timezone: Optional[str] = None, week_start_day: Optional[WeekStartDay] = None):
         super().__init__()
@@ -188,6 +193,27 @@ class Database(BaseModel):
             setattr(self, f_name, f_def)
             self._view_table_names.append(f_name)
 
+    def copy_on_write(self) -> "Database":
+        """
+        A cheap copy, which tables can be added to or replaced in without affecting this database.
+        The tables themselves are shared, so they must not be modified in place.
+        """
+        database = self.model_copy()
+        database._warehouse_table_names = list(self._warehouse_table_names)
+        database._view_table_names = list(self._view_table_names)
+        return database
+
+    def get_serialized_fields(
+        self, table_name: str, table: Table, serialize: Callable[[], list[DatabaseSchemaField]]
+    ) -> list[DatabaseSchemaField]:
+        """Serializes the fields of a table of this database with `serialize`, only once per table."""
+        serialized = self._serialized_fields.get(table_name)
+        if serialized is not None and serialized[0] is table:
+            return serialized[1]
+        fields = serialize()
+        self._serialized_fields[table_name] = (table, fields)
+        return fields
+
 
 def _use_person_properties_from_events(database: Database) -> None:
     database.events.fields["person"] = FieldTraverser(chain=["poe"])
@@ -214,16 +240,26 @@ def create_hogql_database(
     team_id: int, modifiers: Optional[HogQLQueryModifiers] = None, team_arg: Optional["Team"] = None
 ) -> Database:
     from posthog.models import Team
-    from posthog.hogql.database.s3_table import S3Table
     from posthog.hogql.query import create_default_modifiers_for_team
+
+    team = team_arg or Team.objects.get(pk=team_id)
+    modifiers = create_default_modifiers_for_team(team, modifiers)
+    if not settings.HOGQL_DATABASE_CACHE:
+        return _build_hogql_database(team, modifiers)
+
+    cache_key = f"{team.timezone}:{team.week_start_day}:{modifiers.model_dump_json(exclude_none=True)}"
+    return HOGQL_DATABASE_CACHE.get(team.pk, cache_key, lambda: _build_hogql_database(team, modifiers))
+
+
+def _build_hogql_database(team: "Team", modifiers: HogQLQueryModifiers) -> Database:
+    from posthog.hogql.database.s3_table import S3Table
     from posthog.warehouse.models import (
         DataWarehouseTable,
         DataWarehouseSavedQuery,
         DataWarehouseJoin,
     )
 
-    team = team_arg or Team.objects.get(pk=team_id)
-    modifiers = create_default_modifiers_for_team(team, modifiers)
+    team_id = team.pk
     database = Database(timezone=team.timezone, week_start_day=team.week_start_day)
 
     if modifiers.personsOnEventsMode == PersonsOnEventsMode.DISABLED:
@@ -479,7 +515,12 @@ def serialize_database(
         elif isinstance(table, Table):
             field_input = table.fields
 
-        fields = serialize_fields(field_input, context, table_key)
+        if isinstance(table, Table):
+            fields = context.database.get_serialized_fields(
+                table_key, table, partial(serialize_fields, field_input, context, table_key)
+            )
+        else:
+            fields = serialize_fields(field_input, context, table_key)
         fields_dict = {field.name: field for field in fields}
         tables[table_key] = DatabaseSchemaPostHogTable(fields=fields_dict, id=table_key, name=table_key)
 
@@ -502,12 +543,13 @@ def serialize_database(
     for warehouse_table in warehouse_tables:
         table_key = warehouse_table.name
 
-        field_input = {}
         table = getattr(context.database, table_key, None)
         if isinstance(table, Table):
-            field_input = table.fields
-
-        fields = serialize_fields(field_input, context, table_key, warehouse_table.columns)
+            fields = context.database.get_serialized_fields(
+                table_key, table, partial(serialize_fields, table.fields, context, table_key, warehouse_table.columns)
+            )
+        else:
+            fields = serialize_fields({}, context, table_key, warehouse_table.columns)
         fields_dict = {field.name: field for field in fields}
 
         # Schema
@@ -563,7 +605,9 @@ def serialize_database(
         if view is None:
             continue
 
-        fields = serialize_fields(view.fields, context, view_name)
+        fields = context.database.get_serialized_fields(
+            view_name, view, partial(serialize_fields, view.fields, context, view_name)
+        )
         fields_dict = {field.name: field for field in fields}
 
         saved_query: list[DataWarehouseSavedQuery] = list(
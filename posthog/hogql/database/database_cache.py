@@ -0,0 +1,142 @@
+"""
+Per-process cache of each team's HogQL `Database`.
+
+Building a `Database` loads and defines every warehouse table, saved query and join of the team, which adds up for
+teams with many of them. Built databases are kept per team and modifiers, together with the team's schema version.
+The version lives in the Django cache, so it's shared by all processes, and is replaced whenever one of the models
+the schema is built from is saved or deleted. Writes that don't send signals (e.g. group types created during
+ingestion) are picked up once a cached database is older than `HOGQL_DATABASE_CACHE_TTL_SECONDS`.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from prometheus_client import Counter
+
+from posthog.models.signals import mutable_receiver
+
+if TYPE_CHECKING:
+    from posthog.hogql.database.database import Database
+
+HOGQL_DATABASE_CACHE_MAX_ENTRIES = 1_000
+# The version is only looked up, never refreshed, so let it outlive any cached database by far
+SCHEMA_VERSION_TTL_SECONDS = 60 * 60 * 24 * 7
+
+HOGQL_DATABASE_CACHE_COUNTER = Counter(
+    "hogql_database_cache_total",
+    "Whether a team's HogQL database could be reused, had to be built, or couldn't be cached.",
+    labelnames=["result"],
+)
+
+
+def _schema_version_key(team_id: int) -> str:
+    return f"hogql_database_schema_version:{team_id}"
+
+
+def get_schema_version(team_id: int) -> Optional[str]:
+    """The current version of the team's database schema, or None if it can't be looked up."""
+    key = _schema_version_key(team_id)
+    try:
+        version = cache.get(key)
+        if version is None:
+            # A fresh version never matches what was cached before the previous one was lost
+            cache.add(key, uuid.uuid4().hex, SCHEMA_VERSION_TTL_SECONDS)
+            version = cache.get(key)
+        return version
+    except Exception:
+        return None
+
+
+def invalidate_hogql_database(team_id: int) -> None:
+    """Makes all processes rebuild the team's database the next time it's needed."""
+    try:
+        cache.set(_schema_version_key(team_id), uuid.uuid4().hex, SCHEMA_VERSION_TTL_SECONDS)
+    except Exception:
+        pass
+    HOGQL_DATABASE_CACHE.invalidate(team_id)
+
+
+@dataclass(frozen=True)
+class CachedDatabase:
+    version: str
+    built_at: float
+    database: "Database"
+
+
+class HogQLDatabaseCache:
+    """Thread-safe LRU cache of the latest database per team and cache key."""
+
+    def __init__(self, max_entries: int = HOGQL_DATABASE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._databases: OrderedDict[tuple[int, str], CachedDatabase] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, team_id: int, cache_key: str, build: Callable[[], "Database"]) -> "Database":
+        """
+        Returns a copy-on-write view of the cached database, building it with `build` if needed.
+        The views share their tables with the cached database, so tables must not be modified in place.
+        """
+        version = get_schema_version(team_id)
+        if version is None:
+            HOGQL_DATABASE_CACHE_COUNTER.labels(result="uncached").inc()
+            return build()
+
+        key = (team_id, cache_key)
+        with self._lock:
+            cached = self._databases.get(key)
+            if cached is not None:
+                self._databases.move_to_end(key)
+
+        if (
+            cached is not None
+            and cached.version == version
+            and time.monotonic() - cached.built_at < settings.HOGQL_DATABASE_CACHE_TTL_SECONDS
+        ):
+            HOGQL_DATABASE_CACHE_COUNTER.labels(result="hit").inc()
+            return cached.database.copy_on_write()
+
+        HOGQL_DATABASE_CACHE_COUNTER.labels(result="miss").inc()
+        database = build()
+        if self.max_entries > 0:
+            with self._lock:
+                self._databases[key] = CachedDatabase(version=version, built_at=time.monotonic(), database=database)
+                self._databases.move_to_end(key)
+                while len(self._databases) > self.max_entries:
+                    self._databases.popitem(last=False)
+        return database.copy_on_write()
+
+    def invalidate(self, team_id: int) -> None:
+        with self._lock:
+            for key in [key for key in self._databases if key[0] == team_id]:
+                del self._databases[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._databases.clear()
+
+    def __len__(self) -> int:
+        return len(self._databases)
+
+
+HOGQL_DATABASE_CACHE = HogQLDatabaseCache()
+
+
+@mutable_receiver([post_save, post_delete], sender="posthog.GroupTypeMapping")
+@mutable_receiver([post_save, post_delete], sender="posthog.DataWarehouseTable")
+@mutable_receiver([post_save, post_delete], sender="posthog.DataWarehouseCredential")
+@mutable_receiver([post_save, post_delete], sender="posthog.DataWarehouseSavedQuery")
+@mutable_receiver([post_save, post_delete], sender="posthog.DataWarehouseJoin")
+def invalidate_hogql_database_on_schema_change(sender, instance, **kwargs):
+    team_id = instance.team_id
+    invalidate_hogql_database(team_id)
+    # Other processes could otherwise rebuild the database from before the change is committed, under the new version
+    transaction.on_commit(lambda: invalidate_hogql_database(team_id))
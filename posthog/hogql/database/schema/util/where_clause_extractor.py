@@ -204,6 +204,9 @@ class WhereClauseExtractor(CloningVisitor):
     def visit_constant(self, node: ast.Constant) -> ast.Expr:
         return ast.Constant(value=node.value)
 
+    def visit_parameter(self, node: ast.Parameter) -> ast.Expr:
+        return ast.Parameter(name=node.name, value=node.value)
+
     def visit_placeholder(self, node: ast.Placeholder) -> ast.Expr:
         raise Exception()  # this should never happen, as placeholders should be resolved before this runs
 
@@ -398,6 +401,9 @@ class IsTimeOrIntervalConstantVisitor(Visitor[bool]):
             return False
         return True
 
+    def visit_parameter(self, node: ast.Parameter) -> bool:
+        return True
+
     def visit_select_query(self, node: ast.SelectQuery) -> bool:
         return False
 
@@ -474,6 +480,9 @@ class IsSimpleTimestampFieldExpressionVisitor(Visitor[bool]):
     def visit_constant(self, node: ast.Constant) -> bool:
         return False
 
+    def visit_parameter(self, node: ast.Parameter) -> bool:
+        return False
+
     def visit_select_query(self, node: ast.SelectQuery) -> bool:
         return False
 
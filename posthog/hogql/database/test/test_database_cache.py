@@ -0,0 +1,91 @@
+from unittest.mock import patch
+
+from django.test import override_settings
+
+from posthog.hogql.context import HogQLContext
+from posthog.hogql.database.database import create_hogql_database, serialize_database
+from posthog.hogql.database.database_cache import HOGQL_DATABASE_CACHE
+from posthog.models.group_type_mapping import GroupTypeMapping
+from posthog.schema import HogQLQueryModifiers, PersonsOnEventsMode
+from posthog.test.base import BaseTest
+from posthog.warehouse.models import DataWarehouseCredential, DataWarehouseTable
+
+
+@override_settings(HOGQL_DATABASE_CACHE=True)
+class TestDatabaseCache(BaseTest):
+    def setUp(self):
+        super().setUp()
+        HOGQL_DATABASE_CACHE.clear()
+
+    def _create_warehouse_table(self, name: str) -> DataWarehouseTable:
+        credential = DataWarehouseCredential.objects.create(access_key="blah", access_secret="blah", team=self.team)
+        return DataWarehouseTable.objects.create(
+            name=name,
+            format="Parquet",
+            team=self.team,
+            credential=credential,
+            url_pattern="https://bucket.s3/data/*",
+            columns={"id": {"hogql": "StringDatabaseField", "clickhouse": "Nullable(String)", "schema_valid": True}},
+        )
+
+    def test_database_is_reused(self):
+        database = create_hogql_database(team_id=self.team.pk)
+
+        with patch("posthog.hogql.database.database._build_hogql_database") as build:
+            other_database = create_hogql_database(team_id=self.team.pk)
+            build.assert_not_called()
+
+        self.assertIsNot(database, other_database)
+        self.assertIs(database.events, other_database.events)
+
+    def test_views_are_copy_on_write(self):
+        database = create_hogql_database(team_id=self.team.pk)
+        database.add_warehouse_tables(some_table=database.events)
+
+        other_database = create_hogql_database(team_id=self.team.pk)
+        self.assertFalse(other_database.has_table("some_table"))
+        self.assertEqual(other_database.get_warehouse_tables(), [])
+
+    def test_databases_differ_by_modifiers(self):
+        database = create_hogql_database(
+            team_id=self.team.pk, modifiers=HogQLQueryModifiers(personsOnEventsMode=PersonsOnEventsMode.DISABLED)
+        )
+        other_database = create_hogql_database(
+            team_id=self.team.pk,
+            modifiers=HogQLQueryModifiers(
+                personsOnEventsMode=PersonsOnEventsMode.PERSON_ID_NO_OVERRIDE_PROPERTIES_ON_EVENTS
+            ),
+        )
+
+        self.assertIsNot(database.events, other_database.events)
+        self.assertEqual(database.events.fields["person"].chain, ["pdi", "person"])
+        self.assertEqual(other_database.events.fields["person"].chain, ["poe"])
+
+    def test_invalidated_by_schema_changes(self):
+        self.assertFalse(create_hogql_database(team_id=self.team.pk).has_table("table_1"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            warehouse_table = self._create_warehouse_table("table_1")
+        self.assertTrue(create_hogql_database(team_id=self.team.pk).has_table("table_1"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            GroupTypeMapping.objects.create(team=self.team, group_type="organization", group_type_index=0)
+        self.assertIn("organization", create_hogql_database(team_id=self.team.pk).events.fields)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            warehouse_table.delete()
+        self.assertFalse(create_hogql_database(team_id=self.team.pk).has_table("table_1"))
+
+    def test_serialize_database_reuses_serialized_fields(self):
+        self._create_warehouse_table("table_1")
+        serialized_database = serialize_database(
+            HogQLContext(team_id=self.team.pk, database=create_hogql_database(team_id=self.team.pk))
+        )
+
+        with patch("posthog.hogql.database.database.serialize_fields") as serialize_fields:
+            other_serialized_database = serialize_database(
+                HogQLContext(team_id=self.team.pk, database=create_hogql_database(team_id=self.team.pk))
+            )
+            serialize_fields.assert_not_called()
+
+        self.assertEqual(serialized_database, other_serialized_database)
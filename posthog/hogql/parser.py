@@ -1,9 +1,11 @@
-from typing import Literal, Optional, cast
+import threading
+from collections import OrderedDict
+from typing import Any, Literal, Optional, cast
 from collections.abc import Callable
 
 from antlr4 import CommonTokenStream, InputStream, ParseTreeVisitor, ParserRuleContext
 from antlr4.error.ErrorListener import ErrorListener
-from prometheus_client import Histogram
+from prometheus_client import Counter, Histogram
 
 from posthog.hogql import ast
 from posthog.hogql.base import AST
@@ -14,6 +16,7 @@ from posthog.hogql.grammar.HogQLParser import HogQLParser
 from posthog.hogql.parse_string import parse_string_literal_text, parse_string_literal_ctx, parse_string_text_ctx
 from posthog.hogql.placeholders import replace_placeholders
 from posthog.hogql.timings import HogQLTimings
+from posthog.hogql.visitor import clone_expr
 from hogql_parser import (
     parse_expr as _parse_expr_cpp,
     parse_order_expr as _parse_order_expr_cpp,
@@ -67,6 +70,84 @@ RULE_TO_HISTOGRAM: dict[Literal["expr", "order_expr", "select", "full_template_s
     for rule in ("expr", "order_expr", "select", "full_template_string")
 }
 
+PARSE_CACHE_HITS_COUNTER = Counter(
+    "hogql_parse_cache_hits_total",
+    "Number of HogQL parses answered from the parsed AST cache",
+    labelnames=["rule", "backend"],
+)
+PARSE_CACHE_MISSES_COUNTER = Counter(
+    "hogql_parse_cache_misses_total",
+    "Number of HogQL parses that had to run the parser",
+    labelnames=["rule", "backend"],
+)
+
+PARSE_CACHE_MAX_SIZE = 2048
+
+
+class ParseCache:
+    """Thread-safe LRU cache of parsed ASTs, keyed by (rule, backend, string, start).
+
+    Cached nodes are never handed out directly. Callers get a fresh copy, either through
+    `replace_placeholders` (which clones the tree anyway) or through `clone_expr`, so that
+    later passes like the resolver can mutate their tree without touching the cached one."""
+
+    def __init__(self, max_size: int = PARSE_CACHE_MAX_SIZE):
+        self.max_size = max_size
+        self._entries: OrderedDict[tuple, AST] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[AST]:
+        with self._lock:
+            node = self._entries.get(key)
+            if node is not None:
+                self._entries.move_to_end(key)
+            return node
+
+    def set(self, key: tuple, node: AST) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = node
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+PARSE_CACHE = ParseCache()
+
+
+def _parse_cached(
+    rule: Literal["expr", "order_expr", "select", "full_template_string", "program"],
+    backend: Literal["python", "cpp"],
+    string: str,
+    *args: Any,
+) -> Any:
+    """Run the parse function for `rule`, going through `PARSE_CACHE`. The returned node is shared, don't mutate it."""
+    key = (rule, backend, string, *args)
+    node = PARSE_CACHE.get(key)
+    if node is not None:
+        PARSE_CACHE_HITS_COUNTER.labels(rule=rule, backend=backend).inc()
+        return node
+    PARSE_CACHE_MISSES_COUNTER.labels(rule=rule, backend=backend).inc()
+    with RULE_TO_HISTOGRAM[rule if rule != "program" else "expr"].labels(backend=backend).time():
+        node = RULE_TO_PARSE_FUNCTION[backend][rule](string, *args)
+    PARSE_CACHE.set(key, node)
+    return node
+
+
+def _copy_or_replace_placeholders(node: Any, placeholders: Optional[dict[str, ast.Expr]], timings: HogQLTimings) -> Any:
+    if placeholders:
+        with timings.measure("replace_placeholders"):
+            return replace_placeholders(node, placeholders)
+    return clone_expr(node)
+
 
 def parse_string_template(
     string: str,
@@ -79,11 +160,8 @@ def parse_string_template(
     if timings is None:
         timings = HogQLTimings()
     with timings.measure(f"parse_full_template_string_{backend}"):
-        with RULE_TO_HISTOGRAM["full_template_string"].labels(backend=backend).time():
-            node = RULE_TO_PARSE_FUNCTION[backend]["full_template_string"]("F'" + string)
-        if placeholders:
-            with timings.measure("replace_placeholders"):
-                node = replace_placeholders(node, placeholders)
+        node = _parse_cached("full_template_string", backend, "F'" + string)
+        node = _copy_or_replace_placeholders(node, placeholders, timings)
     return node
 
 
@@ -100,11 +178,8 @@ def parse_expr(
     if timings is None:
         timings = HogQLTimings()
     with timings.measure(f"parse_expr_{backend}"):
-        with RULE_TO_HISTOGRAM["expr"].labels(backend=backend).time():
-            node = RULE_TO_PARSE_FUNCTION[backend]["expr"](expr, start)
-        if placeholders:
-            with timings.measure("replace_placeholders"):
-                node = replace_placeholders(node, placeholders)
+        node = _parse_cached("expr", backend, expr, start)
+        node = _copy_or_replace_placeholders(node, placeholders, timings)
     return node
 
 
@@ -118,11 +193,8 @@ def parse_order_expr(
     if timings is None:
         timings = HogQLTimings()
     with timings.measure(f"parse_order_expr_{backend}"):
-        with RULE_TO_HISTOGRAM["order_expr"].labels(backend=backend).time():
-            node = RULE_TO_PARSE_FUNCTION[backend]["order_expr"](order_expr)
-        if placeholders:
-            with timings.measure("replace_placeholders"):
-                node = replace_placeholders(node, placeholders)
+        node = _parse_cached("order_expr", backend, order_expr)
+        node = _copy_or_replace_placeholders(node, placeholders, timings)
     return node
 
 
@@ -136,11 +208,8 @@ def parse_select(
     if timings is None:
         timings = HogQLTimings()
     with timings.measure(f"parse_select_{backend}"):
-        with RULE_TO_HISTOGRAM["select"].labels(backend=backend).time():
-            node = RULE_TO_PARSE_FUNCTION[backend]["select"](statement)
-        if placeholders:
-            with timings.measure("replace_placeholders"):
-                node = replace_placeholders(node, placeholders)
+        node = _parse_cached("select", backend, statement)
+        node = _copy_or_replace_placeholders(node, placeholders, timings)
     return node
 
 
@@ -153,8 +222,7 @@ def parse_program(
     if timings is None:
         timings = HogQLTimings()
     with timings.measure(f"parse_expr_{backend}"):
-        with RULE_TO_HISTOGRAM["expr"].labels(backend=backend).time():
-            node = RULE_TO_PARSE_FUNCTION[backend]["program"](source)
+        node = clone_expr(_parse_cached("program", backend, source))
     return node
 
 
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Any, Optional
 
 from posthog.hogql import ast
 from posthog.hogql.errors import QueryError
@@ -15,6 +15,13 @@ def find_placeholders(node: ast.Expr) -> list[str]:
     return list(finder.found)
 
 
+def find_parameters(node: ast.Expr) -> dict[str, Any]:
+    """Returns the value of each `ast.Parameter` in the query by name."""
+    finder = FindParameters()
+    finder.visit(node)
+    return finder.found
+
+
 class FindPlaceholders(TraversingVisitor):
     def __init__(self):
         super().__init__()
@@ -27,6 +34,21 @@ class FindPlaceholders(TraversingVisitor):
         self.found.add(node.field)
 
 
+class FindParameters(TraversingVisitor):
+    def __init__(self):
+        super().__init__()
+        self.found: dict[str, Any] = {}
+
+    def visit_cte(self, node: ast.CTE):
+        super().visit(node.expr)
+
+    def visit_parameter(self, node: ast.Parameter):
+        if node.value is None:
+            raise QueryError(f"Parameter {node.name} can't be null")
+        if self.found.setdefault(node.name, node.value) != node.value:
+            raise QueryError(f"Parameter {node.name} has different values")
+
+
 class ReplacePlaceholders(CloningVisitor):
     def __init__(self, placeholders: Optional[dict[str, ast.Expr]]):
         super().__init__()
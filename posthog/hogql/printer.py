@@ -1,9 +1,11 @@
+import math
 import re
 from dataclasses import dataclass
 from datetime import datetime, date
 from difflib import get_close_matches
-from typing import Literal, Optional, Union, cast
+from typing import Any, Literal, Optional, Union, cast
 from uuid import UUID
+from zoneinfo import ZoneInfo
 
 from posthog.hogql import ast
 from posthog.hogql.base import AST
@@ -31,7 +33,7 @@ from posthog.hogql.escape_sql import (
 )
 from posthog.hogql.functions.mapping import ALL_EXPOSED_FUNCTION_NAMES, validate_function_args, HOGQL_COMPARISON_MAPPING
 from posthog.hogql.modifiers import create_default_modifiers_for_team, set_default_in_cohort_via
-from posthog.hogql.resolver import resolve_types
+from posthog.hogql.resolver import resolve_constant_data_type, resolve_types
 from posthog.hogql.resolver_utils import lookup_field_by_name
 from posthog.hogql.transforms.in_cohort import resolve_in_cohorts, resolve_in_cohorts_conjoined
 from posthog.hogql.transforms.lazy_tables import resolve_lazy_tables
@@ -176,6 +178,81 @@ def print_prepared_ast(
         ).visit(node)
 
 
+@dataclass(frozen=True)
+class PreparedStatement:
+    """A printed query with slots for the values of its parameters, which can be bound to different values each run"""
+
+    sql: str
+    dialect: Literal["hogql", "clickhouse"]
+    timezone: str
+    # Values of the printed query, besides those of the parameters
+    values: dict[str, Any]
+    parameter_types: dict[str, ast.ConstantType]
+
+    def bind(self, parameters: dict[str, Any]) -> tuple[str, dict[str, Any]]:
+        """Returns the SQL and values of the query with these values of its parameters."""
+        sql = self.sql
+        values = dict(self.values)
+        for name, parameter_type in self.parameter_types.items():
+            if name not in parameters:
+                raise ResolutionError(f"No value for parameter {name}")
+            value = parameters[name]
+            if resolve_constant_data_type(value) != parameter_type:
+                raise ResolutionError(
+                    f"Parameter {name} was prepared as {type(parameter_type).__name__}, "
+                    f"can't bind {type(value).__name__}"
+                )
+            if self.dialect == "hogql":
+                sql = sql.replace(_parameter_marker(name), escape_hogql_string(value, timezone=self.timezone))
+            else:
+                values[_parameter_value_key(name)] = _parameter_value(value, self.timezone)
+        return sql, values
+
+
+def prepare_statement(
+    node: ast.Expr,
+    context: HogQLContext,
+    dialect: Literal["hogql", "clickhouse"],
+    stack: Optional[list[ast.SelectQuery]] = None,
+    settings: Optional[HogQLGlobalSettings] = None,
+    pretty: bool = False,
+) -> PreparedStatement:
+    """Prints the query like `print_ast`, but with slots for the values of its `ast.Parameter`s."""
+    context.parameter_types = {}
+    sql = print_ast(node=node, context=context, dialect=dialect, stack=stack, settings=settings, pretty=pretty)
+    return PreparedStatement(
+        sql=sql,
+        dialect=dialect,
+        timezone=context.database.get_timezone() if context.database else "UTC",
+        values=dict(context.values),
+        parameter_types=context.parameter_types,
+    )
+
+
+def _parameter_value_key(name: str) -> str:
+    return f"hogql_param_{name}"
+
+
+def _parameter_marker(name: str) -> str:
+    # NUL is escaped in all strings and identifiers printed in HogQL, so it can't clash with the rest of the query
+    return f"\0{name}\0"
+
+
+def _parameter_value(value: Any, timezone: str) -> Any:
+    """The value to bind to the slot of a parameter printed in ClickHouse"""
+    if isinstance(value, bool):
+        return 1 if value else 0
+    if isinstance(value, float) and not math.isfinite(value):
+        raise QueryError(f"Can't bind {value} to a parameter")
+    if isinstance(value, datetime):
+        return value.astimezone(ZoneInfo(timezone)).strftime("%Y-%m-%d %H:%M:%S.%f")
+    if isinstance(value, date):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, UUID | UUIDT):
+        return str(value)
+    return value
+
+
 @dataclass
 class JoinExprResponse:
     printed_sql: str
@@ -649,11 +726,11 @@ class _Printer(Visitor):
             or node.op == ast.CompareOperationOp.Like
             or node.op == ast.CompareOperationOp.ILike
         ):
-            if isinstance(node.right, ast.Constant):
+            if isinstance(node.right, ast.Constant | ast.Parameter):
                 if node.right.value is None:
                     return f"isNull({left})"
                 return f"ifNull({op}, 0)"
-            elif isinstance(node.left, ast.Constant):
+            elif isinstance(node.left, ast.Constant | ast.Parameter):
                 if node.left.value is None:
                     return f"isNull({right})"
                 return f"ifNull({op}, 0)"
@@ -665,11 +742,11 @@ class _Printer(Visitor):
             or node.op == ast.CompareOperationOp.NotLike
             or node.op == ast.CompareOperationOp.NotILike
         ):
-            if isinstance(node.right, ast.Constant):
+            if isinstance(node.right, ast.Constant | ast.Parameter):
                 if node.right.value is None:
                     return f"isNotNull({left})"
                 return f"ifNull({op}, 1)"
-            elif isinstance(node.left, ast.Constant):
+            elif isinstance(node.left, ast.Constant | ast.Parameter):
                 if node.left.value is None:
                     return f"isNotNull({right})"
                 return f"ifNull({op}, 1)"
@@ -731,6 +808,30 @@ class _Printer(Visitor):
             # Strings, lists, tuples, and any other random datatype printed in ClickHouse.
             return self.context.add_value(node.value)
 
+    def visit_parameter(self, node: ast.Parameter):
+        if self.context.parameter_types is None:
+            return self.visit_constant(ast.Constant(value=node.value))
+
+        if not isinstance(node.type, ast.ConstantType) or isinstance(node.type, ast.UnknownType):
+            raise ImpossibleASTError(f"Parameter {node.name} has no type")
+        if not re.match(r"^[A-Za-z_][A-Za-z0-9_]*$", node.name):
+            raise ImpossibleASTError(f"Invalid parameter name: {node.name}")
+        if self.context.parameter_types.setdefault(node.name, node.type) != node.type:
+            raise ImpossibleASTError(f"Parameter {node.name} has values of different types")
+
+        if self.dialect == "hogql":
+            return _parameter_marker(node.name)
+
+        # Printed like the constant would be inlined, see `SQLValueEscaper`
+        slot = f"%({_parameter_value_key(node.name)})s"
+        if isinstance(node.type, ast.DateTimeType):
+            return f"toDateTime64({slot}, 6, {self._print_escaped_string(self._get_timezone())})"
+        if isinstance(node.type, ast.DateType):
+            return f"toDate({slot})"
+        if isinstance(node.type, ast.UUIDType):
+            return f"toUUIDOrNull({slot})"
+        return slot
+
     def visit_field(self, node: ast.Field):
         if node.type is None:
             field = ".".join([self._print_hogql_identifier_or_index(identifier) for identifier in node.chain])
@@ -1234,10 +1335,15 @@ class _Printer(Visitor):
             )
 
             materialized_columns = get_materialized_columns(cast(TablesWithMaterializedColumns, table_name))
-            return materialized_columns.get((property_name, field_name), None)
+            materialized_column = materialized_columns.get((property_name, field_name), None)
         except ModuleNotFoundError:
             return None
 
+        if materialized_column is None and self.dialect == "clickhouse" and table_name in ("events", "person"):
+            # Recorded with the query, so that columns worth materializing can be found, see `analyze.py` in `ee`
+            self.context.unmaterialized_properties.add((table_name, field_name, str(property_name)))
+        return materialized_column
+
     def _get_timezone(self) -> str:
         return self.context.database.get_timezone() if self.context.database else "UTC"
 
@@ -1245,7 +1351,7 @@ class _Printer(Visitor):
         return self.context.database.get_week_start_day() if self.context.database else WeekStartDay.SUNDAY
 
     def _is_nullable(self, node: ast.Expr) -> bool:
-        if isinstance(node, ast.Constant):
+        if isinstance(node, ast.Constant | ast.Parameter):
             return node.value is None
         elif isinstance(node.type, ast.PropertyType):
             return True
@@ -4,13 +4,20 @@ from typing import Optional, Union, cast
 from posthog.clickhouse.client.connection import Workload
 from posthog.errors import ExposedCHQueryError
 from posthog.hogql import ast
+from posthog.hogql.compiled_query_cache import (
+    HOGQL_COMPILED_QUERY_CACHE,
+    CompiledQuery,
+    can_cache_compiled_query,
+    get_compiled_query_key,
+)
 from posthog.hogql.constants import HogQLGlobalSettings, LimitContext, get_default_limit_for_context
 from posthog.hogql.errors import ExposedHogQLError
 from posthog.hogql.hogql import HogQLContext
 from posthog.hogql.modifiers import create_default_modifiers_for_team
 from posthog.hogql.parser import parse_select
-from posthog.hogql.placeholders import replace_placeholders, find_placeholders
+from posthog.hogql.placeholders import replace_placeholders, find_placeholders, find_parameters
 from posthog.hogql.printer import (
+    PreparedStatement,
     prepare_ast_for_printing,
     print_ast,
     print_prepared_ast,
@@ -20,7 +27,7 @@ from posthog.hogql.timings import HogQLTimings
 from posthog.hogql.visitor import clone_expr
 from posthog.models.team import Team
 from posthog.clickhouse.query_tagging import tag_queries
-from posthog.client import sync_execute
+from posthog.client import sync_execute, sync_execute_arrow
 from posthog.schema import (
     HogQLQueryResponse,
     HogQLFilters,
@@ -46,7 +53,14 @@ def execute_hogql_query(
     timings: Optional[HogQLTimings] = None,
     pretty: Optional[bool] = True,
     context: Optional[HogQLContext] = None,
+    arrow: bool = False,
 ) -> HogQLQueryResponse:
+    """
+    Compiles and runs a HogQL query.
+
+    With `arrow`, the query is streamed back in the Arrow format. `results` is then a list of `pyarrow.RecordBatch`es
+    instead of rows, and `types` holds the Arrow types of the columns.
+    """
     if timings is None:
         timings = HogQLTimings()
 
@@ -87,6 +101,10 @@ def execute_hogql_query(
                 )
             select_query = replace_placeholders(select_query, placeholders)
 
+        # Parameters are printed as slots, so that queries only differing in their values compile the same
+        parameters = find_parameters(select_query)
+        parameter_types: Optional[dict[str, ast.ConstantType]] = {} if parameters else None
+
     with timings.measure("max_limit"):
         select_queries = (
             select_query.select_queries if isinstance(select_query, ast.SelectUnionQuery) else [select_query]
@@ -95,81 +113,135 @@ def execute_hogql_query(
             if one_query.limit is None:
                 one_query.limit = ast.Constant(value=get_default_limit_for_context(limit_context))
 
-    # Get printed HogQL query, and returned columns. Using a cloned query.
-    with timings.measure("hogql"):
-        with timings.measure("prepare_ast"):
-            hogql_query_context = dataclasses.replace(
-                context,
-                # set the team.pk here so someone can't pass a context for a different team 🤷‍️
-                team_id=team.pk,
-                team=team,
-                enable_select_queries=True,
-                timings=timings,
-                modifiers=query_modifiers,
-            )
-
-            with timings.measure("clone"):
-                cloned_query = clone_expr(select_query, True)
-            select_query_hogql = cast(
-                ast.SelectQuery,
-                prepare_ast_for_printing(node=cloned_query, context=hogql_query_context, dialect="hogql"),
-            )
-
-        with timings.measure("print_ast"):
-            hogql = print_prepared_ast(
-                select_query_hogql, hogql_query_context, "hogql", pretty=pretty if pretty is not None else True
-            )
-            print_columns = []
-            columns_query = (
-                select_query_hogql.select_queries[0]
-                if isinstance(select_query_hogql, ast.SelectUnionQuery)
-                else select_query_hogql
-            )
-            for node in columns_query.select:
-                if isinstance(node, ast.Alias):
-                    print_columns.append(node.alias)
-                else:
-                    print_columns.append(
-                        print_prepared_ast(
-                            node=node,
-                            context=hogql_query_context,
-                            dialect="hogql",
-                            stack=[select_query_hogql],
-                        )
-                    )
-
     settings = settings or HogQLGlobalSettings()
     if limit_context in (LimitContext.EXPORT, LimitContext.COHORT_CALCULATION, LimitContext.QUERY_ASYNC):
         settings.max_execution_time = HOGQL_INCREASED_MAX_EXECUTION_TIME
 
-    # Print the ClickHouse SQL query
-    with timings.measure("print_ast"):
-        try:
-            clickhouse_context = dataclasses.replace(
-                context,
-                # set the team.pk here so someone can't pass a context for a different team 🤷‍️
-                team_id=team.pk,
-                team=team,
-                enable_select_queries=True,
-                timings=timings,
-                modifiers=query_modifiers,
-            )
-            clickhouse_sql = print_ast(
+    clickhouse_context = dataclasses.replace(
+        context,
+        # set the team.pk here so someone can't pass a context for a different team 🤷‍️
+        team_id=team.pk,
+        team=team,
+        enable_select_queries=True,
+        timings=timings,
+        modifiers=query_modifiers,
+        parameter_types=parameter_types,
+        unmaterialized_properties=set(),
+    )
+
+    compiled_query_key: Optional[str] = None
+    compiled_query: Optional[CompiledQuery] = None
+    if can_cache_compiled_query(context):
+        with timings.measure("compiled_query_cache"):
+            compiled_query_key = get_compiled_query_key(
                 select_query,
-                context=clickhouse_context,
-                dialect="clickhouse",
-                settings=settings,
+                team,
+                query_modifiers,
+                settings,
+                context,
                 pretty=pretty if pretty is not None else True,
             )
-        except Exception as e:
-            if debug:
-                clickhouse_sql = None
-                if isinstance(e, ExposedCHQueryError | ExposedHogQLError):
-                    error = str(e)
+            if compiled_query_key is not None:
+                compiled_query = HOGQL_COMPILED_QUERY_CACHE.get(compiled_query_key)
+
+    if compiled_query is not None:
+        hogql = compiled_query.hogql
+        print_columns = list(compiled_query.columns)
+        clickhouse_sql = compiled_query.clickhouse_sql
+        clickhouse_context.values.update(compiled_query.values)
+        clickhouse_context.unmaterialized_properties.update(compiled_query.unmaterialized_properties)
+        parameter_types = compiled_query.parameter_types
+        timezone = compiled_query.timezone
+    else:
+        # Get printed HogQL query, and returned columns. Using a cloned query.
+        with timings.measure("hogql"):
+            with timings.measure("prepare_ast"):
+                hogql_query_context = dataclasses.replace(
+                    context,
+                    # set the team.pk here so someone can't pass a context for a different team 🤷‍️
+                    team_id=team.pk,
+                    team=team,
+                    enable_select_queries=True,
+                    timings=timings,
+                    modifiers=query_modifiers,
+                    parameter_types=parameter_types,
+                )
+
+                with timings.measure("clone"):
+                    cloned_query = clone_expr(select_query, True)
+                select_query_hogql = cast(
+                    ast.SelectQuery,
+                    prepare_ast_for_printing(node=cloned_query, context=hogql_query_context, dialect="hogql"),
+                )
+
+            with timings.measure("print_ast"):
+                hogql = print_prepared_ast(
+                    select_query_hogql, hogql_query_context, "hogql", pretty=pretty if pretty is not None else True
+                )
+                print_columns = []
+                columns_query = (
+                    select_query_hogql.select_queries[0]
+                    if isinstance(select_query_hogql, ast.SelectUnionQuery)
+                    else select_query_hogql
+                )
+                for node in columns_query.select:
+                    if isinstance(node, ast.Alias):
+                        print_columns.append(node.alias)
+                    else:
+                        print_columns.append(
+                            print_prepared_ast(
+                                node=node,
+                                context=hogql_query_context,
+                                dialect="hogql",
+                                stack=[select_query_hogql],
+                            )
+                        )
+
+        # Print the ClickHouse SQL query
+        with timings.measure("print_ast"):
+            try:
+                clickhouse_sql = print_ast(
+                    select_query,
+                    context=clickhouse_context,
+                    dialect="clickhouse",
+                    settings=settings,
+                    pretty=pretty if pretty is not None else True,
+                )
+            except Exception as e:
+                if debug:
+                    clickhouse_sql = None
+                    if isinstance(e, ExposedCHQueryError | ExposedHogQLError):
+                        error = str(e)
+                    else:
+                        error = "Unknown error"
                 else:
-                    error = "Unknown error"
-            else:
-                raise
+                    raise
+
+        timezone = clickhouse_context.database.get_timezone() if clickhouse_context.database else "UTC"
+        if compiled_query_key is not None and clickhouse_sql is not None:
+            HOGQL_COMPILED_QUERY_CACHE.set(
+                compiled_query_key,
+                hogql,
+                print_columns,
+                clickhouse_sql,
+                clickhouse_context.values,
+                parameter_types=parameter_types,
+                timezone=timezone,
+                unmaterialized_properties=clickhouse_context.unmaterialized_properties,
+            )
+
+    if parameter_types:
+        with timings.measure("bind_parameters"):
+            hogql, print_columns = _bind_hogql_parameters(hogql, print_columns, parameters, parameter_types, timezone)
+            if clickhouse_sql is not None:
+                clickhouse_sql, values = PreparedStatement(
+                    sql=clickhouse_sql,
+                    dialect="clickhouse",
+                    timezone=timezone,
+                    values={},
+                    parameter_types=parameter_types,
+                ).bind(parameters)
+                clickhouse_context.values.update(values)
 
     if clickhouse_sql is not None:
         timings_dict = timings.to_dict()
@@ -181,17 +253,30 @@ def execute_hogql_query(
                 has_json_operations="JSONExtract" in clickhouse_sql or "JSONHas" in clickhouse_sql,
                 timings=timings_dict,
                 modifiers={k: v for k, v in modifiers.model_dump().items() if v is not None} if modifiers else {},
+                unmaterialized_properties=sorted(clickhouse_context.unmaterialized_properties),
             )
 
             try:
-                results, types = sync_execute(
-                    clickhouse_sql,
-                    clickhouse_context.values,
-                    with_column_types=True,
-                    workload=workload,
-                    team_id=team.pk,
-                    readonly=True,
-                )
+                if arrow:
+                    results = list(
+                        sync_execute_arrow(
+                            clickhouse_sql,
+                            clickhouse_context.values,
+                            workload=workload,
+                            team_id=team.pk,
+                            readonly=True,
+                        )
+                    )
+                    types = [(field.name, str(field.type)) for field in results[0].schema] if results else []
+                else:
+                    results, types = sync_execute(
+                        clickhouse_sql,
+                        clickhouse_context.values,
+                        with_column_types=True,
+                        workload=workload,
+                        team_id=team.pk,
+                        readonly=True,
+                    )
             except Exception as e:
                 if debug:
                     results = []
@@ -231,3 +316,18 @@ def execute_hogql_query(
         explain=explain,
         metadata=metadata,
     )
+
+
+def _bind_hogql_parameters(
+    hogql: str,
+    columns: list[str],
+    parameters: dict,
+    parameter_types: dict[str, ast.ConstantType],
+    timezone: str,
+) -> tuple[str, list[str]]:
+    def bind(sql: str) -> str:
+        return PreparedStatement(
+            sql=sql, dialect="hogql", timezone=timezone, values={}, parameter_types=parameter_types
+        ).bind(parameters)[0]
+
+    return bind(hogql), [bind(column) for column in columns]
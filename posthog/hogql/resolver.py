@@ -737,6 +737,11 @@ class Resolver(CloningVisitor):
         node.type = resolve_constant_data_type(node.value)
         return node
 
+    def visit_parameter(self, node: ast.Parameter):
+        node = super().visit_parameter(node)
+        node.type = resolve_constant_data_type(node.value)
+        return node
+
     def visit_and(self, node: ast.And):
         node = super().visit_and(node)
         node.type = ast.BooleanType(
@@ -1,6 +1,7 @@
 from typing import Literal, cast, Optional
 
 import math
+from unittest.mock import patch
 from posthog.hogql.ast import (
     VariableAssignment,
     Constant,
@@ -26,7 +27,7 @@ from posthog.hogql.ast import (
 from posthog.hogql.parser import parse_program
 from posthog.hogql import ast
 from posthog.hogql.errors import ExposedHogQLError, SyntaxError
-from posthog.hogql.parser import parse_expr, parse_order_expr, parse_select, parse_string_template
+from posthog.hogql.parser import ParseCache, parse_expr, parse_order_expr, parse_select, parse_string_template
 from posthog.hogql.visitor import clear_locations
 from posthog.test.base import BaseTest, MemoryLeakTestMixin
 
@@ -42,6 +43,13 @@ def parser_test_factory(backend: Literal["python", "cpp"]):
 
         maxDiff = None
 
+        def setUp(self):
+            super().setUp()
+            # Exercise the parser itself on every call, not the parsed AST cache in front of it
+            cache_patcher = patch("posthog.hogql.parser.PARSE_CACHE", ParseCache(max_size=0))
+            cache_patcher.start()
+            self.addCleanup(cache_patcher.stop)
+
         def _string_template(self, template: str, placeholders: Optional[dict[str, ast.Expr]] = None) -> ast.Expr:
             return clear_locations(parse_string_template(template, placeholders=placeholders, backend=backend))
 
@@ -0,0 +1,126 @@
+from unittest.mock import patch
+
+from django.test import override_settings
+
+from posthog.hogql import ast
+from posthog.hogql.compiled_query_cache import HOGQL_COMPILED_QUERY_CACHE
+from posthog.hogql.context import HogQLContext
+from posthog.hogql.parser import parse_select
+from posthog.hogql.printer import print_ast
+from posthog.hogql.query import execute_hogql_query
+from posthog.models import Cohort, PropertyDefinition
+from posthog.test.base import APIBaseTest, ClickhouseTestMixin, _create_event, flush_persons_and_events
+
+
+@override_settings(HOGQL_COMPILED_QUERY_CACHE=True)
+class TestCompiledQueryCache(ClickhouseTestMixin, APIBaseTest):
+    def setUp(self):
+        super().setUp()
+        HOGQL_COMPILED_QUERY_CACHE.clear()
+
+    def test_compiled_query_is_reused(self):
+        _create_event(distinct_id="bla", event="$pageview", team=self.team, properties={"$browser": "Chrome"})
+        flush_persons_and_events()
+
+        response = execute_hogql_query(
+            "select event, properties.$browser from events where properties.$browser = 'Chrome'", self.team
+        )
+
+        with patch("posthog.hogql.query.print_ast") as patched_print_ast:
+            # Only differs in whitespace, which doesn't change how the query compiles
+            cached_response = execute_hogql_query(
+                "select event,  properties.$browser from events where properties.$browser = 'Chrome'", self.team
+            )
+            patched_print_ast.assert_not_called()
+
+        self.assertEqual(cached_response.results, [("$pageview", "Chrome")])
+        self.assertEqual(cached_response.results, response.results)
+        self.assertEqual(cached_response.clickhouse, response.clickhouse)
+        self.assertEqual(cached_response.hogql, response.hogql)
+        self.assertEqual(cached_response.columns, response.columns)
+
+        timings = [timing.k for timing in cached_response.timings]
+        self.assertIn("./compiled_query_cache", timings)
+        self.assertNotIn("./print_ast", timings)
+
+    def test_different_queries_and_arguments_are_compiled_separately(self):
+        response = execute_hogql_query("select event from events where event = 'a'", self.team, pretty=False)
+        other_response = execute_hogql_query("select event from events where event = 'b'", self.team, pretty=False)
+        self.assertEqual(len(HOGQL_COMPILED_QUERY_CACHE), 2)
+
+        execute_hogql_query("select event from events where event = 'a'", self.team)
+        self.assertEqual(len(HOGQL_COMPILED_QUERY_CACHE), 3)
+
+        self.assertEqual(response.hogql, "SELECT event FROM events WHERE equals(event, 'a') LIMIT 100")
+        self.assertEqual(other_response.hogql, "SELECT event FROM events WHERE equals(event, 'b') LIMIT 100")
+
+    def test_query_is_reused_for_other_parameter_values(self):
+        _create_event(distinct_id="bla", event="a", team=self.team)
+        _create_event(distinct_id="bla", event="b", team=self.team)
+        flush_persons_and_events()
+
+        def run(event):
+            return execute_hogql_query(
+                parse_select(
+                    "select event from events where event = toString({event})",
+                    placeholders={"event": ast.Parameter(name="event", value=event)},
+                ),
+                self.team,
+                pretty=False,
+            )
+
+        response = run("a")
+        with patch("posthog.hogql.query.print_ast") as patched_print_ast:
+            other_response = run("b")
+            patched_print_ast.assert_not_called()
+
+        self.assertEqual(len(HOGQL_COMPILED_QUERY_CACHE), 1)
+        self.assertEqual(response.results, [("a",)])
+        self.assertEqual(other_response.results, [("b",)])
+        self.assertEqual(other_response.hogql, "SELECT event FROM events WHERE equals(event, toString('b')) LIMIT 100")
+
+        # Values of another type can't be bound to the same query
+        run(1)
+        self.assertEqual(len(HOGQL_COMPILED_QUERY_CACHE), 2)
+
+    def test_timezone_change_compiles_again(self):
+        query = "select toStartOfDay(timestamp) from events"
+        execute_hogql_query(query, self.team)
+
+        self.team.timezone = "Europe/Berlin"
+        self.team.save()
+        with patch("posthog.hogql.query.print_ast", wraps=print_ast) as patched_print_ast:
+            execute_hogql_query(query, self.team)
+            patched_print_ast.assert_called_once()
+
+    def test_property_type_change_compiles_again(self):
+        query = "select properties.amount from events"
+        response = execute_hogql_query(query, self.team)
+
+        PropertyDefinition.objects.create(
+            team=self.team, name="amount", property_type="Numeric", type=PropertyDefinition.Type.EVENT
+        )
+        other_response = execute_hogql_query(query, self.team)
+
+        assert response.clickhouse is not None and other_response.clickhouse is not None
+        self.assertNotIn("Float64", response.clickhouse)
+        self.assertIn("Float64", other_response.clickhouse)
+
+    def test_cohort_change_compiles_again(self):
+        cohort = Cohort.objects.create(team=self.team, groups=[], is_static=False)
+        query = f"select event from events where person_id in cohort {cohort.pk}"
+        execute_hogql_query(query, self.team)
+
+        cohort.name = "renamed"
+        cohort.save()
+        with patch("posthog.hogql.query.print_ast", wraps=print_ast) as patched_print_ast:
+            execute_hogql_query(query, self.team)
+            patched_print_ast.assert_called_once()
+
+    def test_query_with_values_in_context_is_not_cached(self):
+        context = HogQLContext(team_id=self.team.pk)
+        context.add_value("taken")
+
+        execute_hogql_query("select event from events where event = 'a'", self.team, context=context)
+
+        self.assertEqual(len(HOGQL_COMPILED_QUERY_CACHE), 0)
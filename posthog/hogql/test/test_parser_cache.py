@@ -0,0 +1,74 @@
+from typing import cast
+
+from posthog.hogql import ast
+from posthog.hogql.errors import SyntaxError
+from posthog.hogql.parser import (
+    PARSE_CACHE,
+    PARSE_CACHE_HITS_COUNTER,
+    PARSE_CACHE_MISSES_COUNTER,
+    ParseCache,
+    parse_expr,
+    parse_select,
+)
+from posthog.test.base import BaseTest
+
+
+class TestParserCache(BaseTest):
+    def setUp(self):
+        super().setUp()
+        PARSE_CACHE.clear()
+
+    def _counter_value(self, counter, rule: str, backend: str = "cpp") -> float:
+        return counter.labels(rule=rule, backend=backend)._value.get()
+
+    def test_repeated_parse_hits_cache(self):
+        misses_before = self._counter_value(PARSE_CACHE_MISSES_COUNTER, "expr")
+        hits_before = self._counter_value(PARSE_CACHE_HITS_COUNTER, "expr")
+
+        first = parse_expr("event = 'pageview'")
+        second = parse_expr("event = 'pageview'")
+
+        self.assertEqual(first, second)
+        self.assertEqual(self._counter_value(PARSE_CACHE_MISSES_COUNTER, "expr") - misses_before, 1)
+        self.assertEqual(self._counter_value(PARSE_CACHE_HITS_COUNTER, "expr") - hits_before, 1)
+
+    def test_cached_nodes_are_not_shared(self):
+        first = cast(ast.CompareOperation, parse_expr("event = 'pageview'"))
+        first.left = ast.Constant(value=1)
+        cast(ast.Constant, first.right).value = "changed"
+
+        second = cast(ast.CompareOperation, parse_expr("event = 'pageview'"))
+        self.assertEqual(second.left, ast.Field(chain=["event"], start=0, end=5))
+        self.assertEqual(cast(ast.Constant, second.right).value, "pageview")
+
+    def test_placeholders_are_replaced_per_call(self):
+        query = "select {col} from events"
+        first = cast(ast.SelectQuery, parse_select(query, placeholders={"col": ast.Constant(value=1)}))
+        second = cast(ast.SelectQuery, parse_select(query, placeholders={"col": ast.Constant(value=2)}))
+
+        self.assertEqual(cast(ast.Constant, first.select[0]).value, 1)
+        self.assertEqual(cast(ast.Constant, second.select[0]).value, 2)
+        self.assertIsInstance(parse_select(query).select[0], ast.Placeholder)  # type: ignore
+
+    def test_key_includes_backend_and_start(self):
+        parse_expr("1 + 2", backend="cpp")
+        parse_expr("1 + 2", backend="python")
+        parse_expr("1 + 2", start=None, backend="cpp")
+        self.assertEqual(len(PARSE_CACHE), 3)
+
+    def test_syntax_errors_are_not_cached(self):
+        with self.assertRaises(SyntaxError):
+            parse_expr("1 +")
+        self.assertEqual(len(PARSE_CACHE), 0)
+
+    def test_lru_eviction(self):
+        cache = ParseCache(max_size=2)
+        cache.set(("expr", "cpp", "a", 0), ast.Constant(value="a"))
+        cache.set(("expr", "cpp", "b", 0), ast.Constant(value="b"))
+        cache.get(("expr", "cpp", "a", 0))
+        cache.set(("expr", "cpp", "c", 0), ast.Constant(value="c"))
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNotNone(cache.get(("expr", "cpp", "a", 0)))
+        self.assertIsNone(cache.get(("expr", "cpp", "b", 0)))
+        self.assertIsNotNone(cache.get(("expr", "cpp", "c", 0)))
@@ -1,3 +1,4 @@
+from datetime import UTC, datetime
 from typing import Literal, Optional, cast
 
 import pytest
@@ -8,9 +9,15 @@ from posthog.hogql.constants import MAX_SELECT_RETURNED_ROWS, HogQLQuerySettings
 from posthog.hogql.context import HogQLContext
 from posthog.hogql.database.database import Database
 from posthog.hogql.database.models import DateDatabaseField, StringDatabaseField
-from posthog.hogql.errors import ExposedHogQLError, QueryError
+from posthog.hogql.errors import ExposedHogQLError, QueryError, ResolutionError
 from posthog.hogql.parser import parse_select, parse_expr
-from posthog.hogql.printer import print_ast, to_printed_hogql, prepare_ast_for_printing, print_prepared_ast
+from posthog.hogql.printer import (
+    print_ast,
+    to_printed_hogql,
+    prepare_ast_for_printing,
+    prepare_statement,
+    print_prepared_ast,
+)
 from posthog.models import PropertyDefinition
 from posthog.models.team.team import WeekStartDay
 from posthog.schema import HogQLQueryModifiers, PersonsArgMaxVersion, PersonsOnEventsMode
@@ -285,6 +292,26 @@ class TestPrinter(BaseTest):
         )
         self.assertEqual(context.values, {"hogql_val_0": "json", "hogql_val_1": "yet"})
 
+    def test_unmaterialized_properties(self):
+        try:
+            from ee.clickhouse.materialized_columns.analyze import materialize
+        except ModuleNotFoundError:
+            # EE not available? Assume we're good
+            self.assertEqual(1 + 2, 3)
+            return
+
+        materialize("events", "withmat")
+        context = HogQLContext(team_id=self.team.pk)
+        self._expr("concat(properties.withmat, properties.nomat.json, properties.other)", context)
+        self.assertEqual(
+            context.unmaterialized_properties,
+            {("events", "properties", "nomat"), ("events", "properties", "other")},
+        )
+
+        context = HogQLContext(team_id=self.team.pk)
+        self._expr("properties.nomat", context, dialect="hogql")
+        self.assertEqual(context.unmaterialized_properties, set())
+
     def test_materialized_fields_and_properties(self):
         try:
             from ee.clickhouse.materialized_columns.analyze import materialize
@@ -498,6 +525,76 @@ class TestPrinter(BaseTest):
             {"hogql_val_0": "E", "hogql_val_1": "lol", "hogql_val_2": "hoo"},
         )
 
+    def test_parameters_inlined_without_prepared_statement(self):
+        self.assertEqual(
+            self._select(
+                "select event from events where event = {event}",
+                placeholders={"event": ast.Parameter(name="event", value="E")},
+            ),
+            self._select("select event from events where event = 'E'"),
+        )
+
+    def test_prepared_statement(self):
+        query = "select event from events where event = {event} and timestamp > {date_from} and {amount} > 1"
+        context = HogQLContext(team_id=self.team.pk, enable_select_queries=True)
+        statement = prepare_statement(
+            parse_select(
+                query,
+                placeholders={
+                    "event": ast.Parameter(name="event", value="E"),
+                    "date_from": ast.Parameter(name="date_from", value=datetime(2024, 1, 1, tzinfo=UTC)),
+                    "amount": ast.Parameter(name="amount", value=2),
+                },
+            ),
+            context,
+            "clickhouse",
+        )
+        self.assertEqual(
+            statement.sql,
+            f"SELECT events.event AS event FROM events WHERE and(equals(events.team_id, {self.team.pk}), "
+            "equals(events.event, %(hogql_param_event)s), "
+            "greater(toTimeZone(events.timestamp, %(hogql_val_0)s), toDateTime64(%(hogql_param_date_from)s, 6, 'UTC')), "
+            f"greater(%(hogql_param_amount)s, 1)) LIMIT {MAX_SELECT_RETURNED_ROWS}",
+        )
+        self.assertEqual(
+            statement.parameter_types,
+            {
+                "event": ast.StringType(nullable=False),
+                "date_from": ast.DateTimeType(nullable=False),
+                "amount": ast.IntegerType(nullable=False),
+            },
+        )
+
+        sql, values = statement.bind({"event": "F", "date_from": datetime(2024, 2, 1, tzinfo=UTC), "amount": 3})
+        self.assertEqual(sql, statement.sql)
+        self.assertEqual(
+            values,
+            {
+                "hogql_val_0": "UTC",
+                "hogql_param_event": "F",
+                "hogql_param_date_from": "2024-02-01 00:00:00.000000",
+                "hogql_param_amount": 3,
+            },
+        )
+
+        with self.assertRaises(ResolutionError):
+            statement.bind({"event": "F", "date_from": "2024-02-01", "amount": 3})
+        with self.assertRaises(ResolutionError):
+            statement.bind({"event": "F", "amount": 3})
+
+    def test_prepared_statement_hogql(self):
+        query = "select event from events where event = {event}"
+        statement = prepare_statement(
+            parse_select(query, placeholders={"event": ast.Parameter(name="event", value="E")}),
+            HogQLContext(team_id=self.team.pk, enable_select_queries=True),
+            "hogql",
+        )
+        sql, values = statement.bind({"event": "it's"})
+        self.assertEqual(
+            sql, f"SELECT event FROM events WHERE equals(event, 'it\\'s') LIMIT {MAX_SELECT_RETURNED_ROWS}"
+        )
+        self.assertEqual(values, {})
+
     def test_alias_keywords(self):
         self._assert_expr_error(
             "1 as team_id",
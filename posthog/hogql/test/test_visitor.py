@@ -154,3 +154,21 @@ class TestVisitor(BaseTest):
         assert NamingCheck().visit(UUIDType()) == "visit_uuid_type"
         assert NamingCheck().visit(HogQLXAttribute(name="a", value="a")) == "visit_hogqlx_attribute"
         assert NamingCheck().visit(HogQLXTag(kind="", attributes=[])) == "visit_hogqlx_tag"
+
+    def test_visitor_dispatch_per_visitor_class(self):
+        class ConstantVisitor(Visitor):
+            def visit_constant(self, node: ast.Constant):
+                return "constant"
+
+        class OverridingVisitor(ConstantVisitor):
+            def visit_constant(self, node: ast.Constant):
+                return "overridden"
+
+        node = ast.Constant(value=1)
+        assert ConstantVisitor().visit(node) == "constant"
+        assert OverridingVisitor().visit(node) == "overridden"
+        assert ConstantVisitor().visit(node) == "constant"
+
+    def test_ast_nodes_have_no_extra_attributes(self):
+        with self.assertRaises(AttributeError):
+            ast.Constant(value=1).foo = "bar"  # type: ignore
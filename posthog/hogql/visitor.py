@@ -95,6 +95,9 @@ class TraversingVisitor(Visitor[None]):
     def visit_placeholder(self, node: ast.Placeholder):
         self.visit(node.type)
 
+    def visit_parameter(self, node: ast.Parameter):
+        self.visit(node.type)
+
     def visit_call(self, node: ast.Call):
         for expr in node.args:
             self.visit(expr)
@@ -480,6 +483,15 @@ class CloningVisitor(Visitor[Any]):
             field=node.field,
         )
 
+    def visit_parameter(self, node: ast.Parameter):
+        return ast.Parameter(
+            start=None if self.clear_locations else node.start,
+            end=None if self.clear_locations else node.end,
+            type=None if self.clear_types else node.type,
+            name=node.name,
+            value=node.value,
+        )
+
     def visit_call(self, node: ast.Call):
         return ast.Call(
             start=None if self.clear_locations else node.start,
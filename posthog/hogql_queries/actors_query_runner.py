@@ -64,21 +64,21 @@ class ActorsQueryRunner(QueryRunner):
         recordings_column_index: Optional[int],
         recordings_lookup: Optional[dict[str, list[dict]]],
     ) -> list:
-        enriched = []
-
-        for result in results:
-            new_row = list(result)
-            actor_id = str(result[actor_column_index])
-            actor = actors_lookup.get(actor_id)
-            new_row[actor_column_index] = actor if actor else {"id": actor_id}
-            if recordings_column_index is not None and recordings_lookup is not None:
-                new_row[recordings_column_index] = (
-                    self._get_recordings(result[recordings_column_index], recordings_lookup) or []
-                )
+        if not results:
+            return []
+
+        # Enrich one column at a time instead of one row at a time, so that the lookups run in tight loops
+        columns = [list(column) for column in zip(*results)]
+
+        actor_ids = [str(actor_id) for actor_id in columns[actor_column_index]]
+        columns[actor_column_index] = [actors_lookup.get(actor_id) or {"id": actor_id} for actor_id in actor_ids]
 
-            enriched.append(new_row)
+        if recordings_column_index is not None and recordings_lookup is not None:
+            columns[recordings_column_index] = [
+                self._get_recordings(events, recordings_lookup) or [] for events in columns[recordings_column_index]
+            ]
 
-        return enriched
+        return [list(row) for row in zip(*columns)]
 
     def prepare_recordings(
         self, column_name: str, input_columns: list[str]
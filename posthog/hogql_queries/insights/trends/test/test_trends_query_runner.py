@@ -12,6 +12,7 @@ from posthog.hogql import ast
 from posthog.hogql.constants import MAX_SELECT_RETURNED_ROWS, LimitContext
 from posthog.hogql.modifiers import create_default_modifiers_for_team
 from posthog.hogql_queries.insights.trends.trends_query_runner import TrendsQueryRunner, BREAKDOWN_OTHER_DISPLAY
+from posthog.hogql_queries.query_runner import ExecutionMode
 from posthog.models.cohort.cohort import Cohort
 from posthog.models.property_definition import PropertyDefinition
 
@@ -828,6 +829,78 @@ class TestTrendsQueryRunner(ClickhouseTestMixin, APIBaseTest):
         for mock_execute_call_args in mock_sync_execute.call_args_list:
             self.assertIn(f" max_execution_time={HOGQL_INCREASED_MAX_EXECUTION_TIME},", mock_execute_call_args[0][0])
 
+    def _create_late_and_latest_events(self):
+        # An event that arrived late for an interval that had already been calculated, and one for the latest interval
+        _create_event(team=self.team, event="$pageview", distinct_id="p1", timestamp="2020-01-15T12:00:00Z")
+        _create_event(team=self.team, event="$pageview", distinct_id="p1", timestamp="2020-01-20T13:00:00Z")
+        flush_persons_and_events()
+
+    @override_settings(TRENDS_INCREMENTAL_REFRESH=True, TRENDS_INCREMENTAL_REFRESH_INGESTION_LAG_MINUTES=60)
+    def test_trends_incremental_refresh(self):
+        self._create_test_events()
+
+        with freeze_time("2020-01-20T12:00:00Z"):
+            response = self._create_query_runner("-7d", None, IntervalType.DAY, None).run()
+
+            assert response.is_cached is False
+            assert response.results[0]["data"] == [1, 0, 2, 0, 1, 0, 1, 0]
+
+        self._create_late_and_latest_events()
+
+        with freeze_time("2020-01-20T15:00:00Z"):
+            with patch.object(TrendsQueryRunner, "calculate", wraps=TrendsQueryRunner.calculate, autospec=True) as calc:
+                response = self._create_query_runner("-7d", None, IntervalType.DAY, None).run()
+
+            # Only the intervals since the previous refresh (minus the ingestion lag) are recalculated
+            assert calc.call_count == 1
+            assert calc.call_args[0][0].query.dateRange.date_from == "2020-01-20T00:00:00+00:00"
+            assert response.is_cached is False
+            assert response.results[0]["days"] == [
+                "2020-01-13",
+                "2020-01-14",
+                "2020-01-15",
+                "2020-01-16",
+                "2020-01-17",
+                "2020-01-18",
+                "2020-01-19",
+                "2020-01-20",
+            ]
+            assert response.results[0]["labels"][-1] == "20-Jan-2020"
+            assert response.results[0]["data"] == [1, 0, 2, 0, 1, 0, 1, 1]
+            assert response.results[0]["count"] == 6
+
+            response = self._create_query_runner("-7d", None, IntervalType.DAY, None).run(
+                execution_mode=ExecutionMode.CALCULATE_BLOCKING_ALWAYS
+            )
+            assert response.results[0]["data"] == [1, 0, 3, 0, 1, 0, 1, 1]
+
+    @override_settings(TRENDS_INCREMENTAL_REFRESH=True, TRENDS_INCREMENTAL_REFRESH_INGESTION_LAG_MINUTES=60)
+    def test_trends_incremental_refresh_falls_back_for_cumulative(self):
+        self._create_test_events()
+
+        with freeze_time("2020-01-20T12:00:00Z"):
+            self._create_query_runner(
+                "-7d",
+                None,
+                IntervalType.DAY,
+                None,
+                TrendsFilter(display=ChartDisplayType.ACTIONS_LINE_GRAPH_CUMULATIVE),
+            ).run()
+
+        self._create_late_and_latest_events()
+
+        with freeze_time("2020-01-20T15:00:00Z"):
+            response = self._create_query_runner(
+                "-7d",
+                None,
+                IntervalType.DAY,
+                None,
+                TrendsFilter(display=ChartDisplayType.ACTIONS_LINE_GRAPH_CUMULATIVE),
+            ).run()
+
+            assert response.is_cached is False
+            assert response.results[0]["data"] == [1, 1, 4, 4, 5, 5, 6, 7]
+
     def test_trends_compare(self):
         self._create_test_events()
 
@@ -952,6 +1025,33 @@ class TestTrendsQueryRunner(ClickhouseTestMixin, APIBaseTest):
         assert response.results[2]["count"] == 1
         assert response.results[3]["count"] == 1
 
+    def test_trends_breakdowns_arrow_results(self):
+        self._create_test_events()
+
+        for interval in (IntervalType.HOUR, IntervalType.DAY, IntervalType.WEEK):
+            with self.subTest(interval=interval):
+                responses = []
+                for arrow_results in (False, True):
+                    with override_settings(HOGQL_ARROW_RESULTS=arrow_results):
+                        responses.append(
+                            self._run_trends_query(
+                                "2020-01-09",
+                                "2020-01-20",
+                                interval,
+                                [EventsNode(event="$pageview")],
+                                None,
+                                BreakdownFilter(breakdown_type=BreakdownType.EVENT, breakdown="$browser"),
+                            )
+                        )
+                response, arrow_response = responses
+
+                assert len(arrow_response.results) == 4
+                for result, arrow_result in zip(response.results, arrow_response.results):
+                    assert arrow_result["breakdown_value"] == result["breakdown_value"]
+                    assert arrow_result["data"] == result["data"]
+                    assert arrow_result["days"] == result["days"]
+                    assert arrow_result["labels"] == result["labels"]
+
     def test_trends_breakdowns_boolean(self):
         self._create_test_events()
 
@@ -7,6 +7,7 @@ from operator import itemgetter
 import threading
 from typing import Optional, Any
 from django.conf import settings
+from prometheus_client import Counter
 
 from django.utils.timezone import datetime
 from posthog.caching.insights_api import (
@@ -14,6 +15,7 @@ from posthog.caching.insights_api import (
     REDUCED_MINIMUM_INSIGHT_REFRESH_INTERVAL,
     REAL_TIME_INSIGHT_REFRESH_INTERVAL,
 )
+from posthog.caching.utils import last_refresh_from_cached_result
 from posthog.clickhouse import query_tagging
 
 from posthog.hogql import ast
@@ -32,6 +34,7 @@ from posthog.hogql_queries.insights.trends.trends_query_builder import TrendsQue
 from posthog.hogql_queries.insights.trends.trends_actors_query_builder import TrendsActorsQueryBuilder
 from posthog.hogql_queries.insights.trends.series_with_extras import SeriesWithExtras
 from posthog.hogql_queries.query_runner import QueryRunner
+from posthog.hogql_queries.utils.arrow import list_column_sums, record_batches_to_columns
 from posthog.hogql_queries.utils.formula_ast import FormulaAST
 from posthog.hogql_queries.utils.query_compare_to_date_range import QueryCompareToDateRange
 from posthog.hogql_queries.utils.query_date_range import QueryDateRange
@@ -46,6 +49,7 @@ from posthog.models.property_definition import PropertyDefinition
 from posthog.queries.util import correct_result_for_sampling
 from posthog.schema import (
     ActionsNode,
+    BaseMathType,
     BreakdownItem,
     CachedTrendsQueryResponse,
     ChartDisplayType,
@@ -66,10 +70,31 @@ from posthog.schema import (
     DataWarehouseEventsModifier,
     BreakdownType,
     IntervalType,
+    InsightDateRange,
+    PropertyMathType,
+    CountPerActorMathType,
 )
 from posthog.warehouse.models import DataWarehouseTable
 from posthog.utils import format_label_date, multisort
 
+TRENDS_INCREMENTAL_REFRESH_COUNTER = Counter(
+    "posthog_trends_incremental_refresh_total",
+    "Whether a stale trends result could be refreshed incrementally, or had to be calculated from scratch.",
+    labelnames=["result"],
+)
+
+# Math whose value for an interval only depends on the events in that interval, so that intervals can be
+# calculated separately. Math like weekly/monthly active users looks back past the interval
+PER_INTERVAL_MATH_TYPES: set[Optional[str]] = {
+    None,
+    BaseMathType.TOTAL,
+    BaseMathType.DAU,
+    BaseMathType.UNIQUE_SESSION,
+    "unique_group",
+    *PropertyMathType,
+    *CountPerActorMathType,
+}
+
 
 class TrendsQueryRunner(QueryRunner):
     query: TrendsQuery
@@ -274,9 +299,7 @@ class TrendsQueryRunner(QueryRunner):
             series=res_series, breakdown=res_breakdown, day=res_days, compare=res_compare
         )
 
-    def calculate(self):
-        queries = self.to_queries()
-
+    def _print_response_hogql(self, queries: list[ast.SelectQuery | ast.SelectUnionQuery]) -> str:
         if len(queries) == 1:
             response_hogql_query = queries[0]
         else:
@@ -288,7 +311,11 @@ class TrendsQueryRunner(QueryRunner):
                     response_hogql_query.select_queries.extend(query.select_queries)
 
         with self.timings.measure("printing_hogql_for_response"):
-            response_hogql = to_printed_hogql(response_hogql_query, self.team, self.modifiers)
+            return to_printed_hogql(response_hogql_query, self.team, self.modifiers)
+
+    def calculate(self):
+        queries = self.to_queries()
+        response_hogql = self._print_response_hogql(queries)
 
         res_matrix: list[list[Any] | Any | None] = [None] * len(queries)
         timings_matrix: list[list[QueryTiming] | None] = [None] * (2 + len(queries))
@@ -307,6 +334,7 @@ class TrendsQueryRunner(QueryRunner):
                     query_tagging.tag_queries(**query_tags)
 
                 series_with_extra = self.series[index]
+                arrow = settings.HOGQL_ARROW_RESULTS
 
                 response = execute_hogql_query(
                     query_type="TrendsQuery",
@@ -315,10 +343,11 @@ class TrendsQueryRunner(QueryRunner):
                     timings=timings,
                     modifiers=self.modifiers,
                     limit_context=self.limit_context,
+                    arrow=arrow,
                 )
 
                 timings_matrix[index + 1] = response.timings
-                res_matrix[index] = self.build_series_response(response, series_with_extra, len(queries))
+                res_matrix[index] = self.build_series_response(response, series_with_extra, len(queries), arrow=arrow)
                 if response.error:
                     debug_errors.append(response.error)
             except Exception as e:
@@ -407,23 +436,187 @@ class TrendsQueryRunner(QueryRunner):
             error=". ".join(debug_errors),
         )
 
-    def build_series_response(self, response: HogQLQueryResponse, series: SeriesWithExtras, series_count: int):
-        def get_value(name: str, val: Any):
+    def calculate_incrementally(
+        self, stale_cached_response: CachedTrendsQueryResponse
+    ) -> Optional[TrendsQueryResponse]:
+        """
+        Only the latest intervals of a stale result can have changed, so query the intervals since the previous
+        refresh (minus the ingestion lag), and take the earlier ones from the stale result.
+        """
+        last_refresh = last_refresh_from_cached_result(stale_cached_response)
+        if last_refresh is None:
+            TRENDS_INCREMENTAL_REFRESH_COUNTER.labels(result="unsupported").inc()
+            return None
+
+        watermark = self.query_date_range.align_with_interval(
+            (last_refresh - timedelta(minutes=settings.TRENDS_INCREMENTAL_REFRESH_INGESTION_LAG_MINUTES)).astimezone(
+                self.team.timezone_info
+            )
+        )
+        date_to = self.query_date_range.date_to()
+        if watermark <= self.query_date_range.date_from() or watermark > date_to:
+            # Either nothing of the stale result can be reused, or there's nothing left to recalculate
+            TRENDS_INCREMENTAL_REFRESH_COUNTER.labels(result="out_of_range").inc()
+            return None
+
+        latest_intervals_query = self.query.model_copy(
+            update={
+                "dateRange": InsightDateRange(
+                    date_from=watermark.isoformat(), date_to=date_to.isoformat(), explicitDate=True
+                )
+            }
+        )
+        latest_intervals_response = TrendsQueryRunner(
+            query=latest_intervals_query,
+            team=self.team,
+            timings=self.timings,
+            modifiers=self.modifiers,
+            limit_context=self.limit_context,
+        ).calculate()
+
+        results = self._merge_latest_intervals(stale_cached_response.results, latest_intervals_response.results)
+        if results is None:
+            TRENDS_INCREMENTAL_REFRESH_COUNTER.labels(result="mismatch").inc()
+            return None
+
+        TRENDS_INCREMENTAL_REFRESH_COUNTER.labels(result="incremental").inc()
+        return TrendsQueryResponse(
+            results=results,
+            timings=latest_intervals_response.timings,
+            hogql=self._print_response_hogql(self.to_queries()),
+            modifiers=self.modifiers,
+            error=latest_intervals_response.error,
+        )
+
+    def can_calculate_incrementally(self) -> bool:
+        if not settings.TRENDS_INCREMENTAL_REFRESH:
+            return False
+
+        # With minute intervals the first interval is cut off, and week and month intervals move with the date range
+        if self.query_date_range.interval_name not in ("hour", "day"):
+            return False
+        date_from = self.query_date_range.date_from()
+        if self.query_date_range.align_with_interval(date_from) != date_from:
+            return False
+
+        # Values spanning the whole date range, or depending on each other, need all intervals recalculated
+        if (
+            self._trends_display.is_total_value()
+            or self._trends_display.display_type == ChartDisplayType.ACTIONS_LINE_GRAPH_CUMULATIVE
+        ):
+            return False
+        if self.query.trendsFilter is not None and (
+            self.query.trendsFilter.formula
+            or (
+                self.query.trendsFilter.smoothingIntervals is not None
+                and self.query.trendsFilter.smoothingIntervals > 1
+            )
+        ):
+            return False
+
+        # Breakdown values are picked by their totals over the whole date range
+        if self.query.breakdownFilter is not None and self.query.breakdownFilter.breakdown is not None:
+            return False
+        if self.query.compareFilter is not None and self.query.compareFilter.compare:
+            return False
+
+        return all(series.math in PER_INTERVAL_MATH_TYPES for series in self.query.series)
+
+    def _merge_latest_intervals(
+        self, stale_results: list[dict[str, Any]], latest_results: list[dict[str, Any]]
+    ) -> Optional[list[dict[str, Any]]]:
+        """Returns None if the stale results don't line up with the latest ones."""
+        if len(stale_results) != len(latest_results):
+            return None
+
+        all_dates = self.query_date_range.all_values()
+        days = [date.strftime(self._day_format) for date in all_dates]
+
+        results = []
+        for stale_result, latest_result in zip(stale_results, latest_results):
+            if (
+                stale_result.get("label") != latest_result["label"]
+                or stale_result.get("action", {}).get("order") != latest_result["action"]["order"]
+            ):
+                return None
+
+            stale_values = dict(zip(stale_result["days"], zip(stale_result["data"], stale_result["labels"])))
+            latest_values = dict(zip(latest_result["days"], zip(latest_result["data"], latest_result["labels"])))
+            data = []
+            labels = []
+            for day in days:
+                value = latest_values.get(day) or stale_values.get(day)
+                if value is None:
+                    return None
+                data.append(value[0])
+                labels.append(value[1])
+
+            results.append(
+                {
+                    **latest_result,
+                    "data": data,
+                    "labels": labels,
+                    "days": days,
+                    "count": float(sum(data)),
+                    "filter": self._query_to_filter(),
+                    "action": {**latest_result["action"], "days": all_dates},
+                }
+            )
+
+        return results
+
+    @property
+    def _day_format(self) -> str:
+        return "%Y-%m-%d{}".format(" %H:%M:%S" if self.query_date_range.interval_name in ("hour", "minute") else "")
+
+    def build_series_response(
+        self, response: HogQLQueryResponse, series: SeriesWithExtras, series_count: int, arrow: bool = False
+    ):
+        # Results are processed a column at a time, and Arrow results are converted to Python a column at a time
+        if arrow:
+            columns = record_batches_to_columns(
+                response.results, date_time_columns=("date",), tzinfo=self.team.timezone_info
+            )
+            # Totals are summed without converting them to Python
+            counts = list_column_sums(response.results, "total") if "total" in columns else None
+        else:
+            columns = dict(zip(response.columns or [], (list(values) for values in zip(*response.results))))
+            counts = None
+        row_count = len(next(iter(columns.values()), []))
+
+        def get_value(name: str, index: int):
             if name not in ["date", "total", "breakdown_value"]:
                 raise Exception("Column not found in hogql results")
             if response.columns is None:
                 raise Exception("No columns returned from hogql results")
-            if name not in response.columns:
+            if name not in columns:
                 return None
-            index = response.columns.index(name)
-            return val[index]
+            return columns[name][index]
 
         real_series_count = series_count
         if self.query.compareFilter is not None and self.query.compareFilter.compare:
             real_series_count = ceil(series_count / 2)
 
+        # Breakdown rows usually share the same dates, and with Arrow results even the same list of dates,
+        # so format each list of dates only once
+        day_format = self._day_format
+        formatted_days: dict[int, list[str]] = {}
+        formatted_labels: dict[int, list[str]] = {}
+
+        def format_days(dates: list) -> list[str]:
+            if id(dates) not in formatted_days:
+                formatted_days[id(dates)] = [item.strftime(day_format) for item in dates]
+            return list(formatted_days[id(dates)])
+
+        def format_labels(dates: list) -> list[str]:
+            if id(dates) not in formatted_labels:
+                formatted_labels[id(dates)] = [
+                    format_label_date(item, self.query_date_range.interval_name) for item in dates
+                ]
+            return list(formatted_labels[id(dates)])
+
         res = []
-        for val in response.results:
+        for index in range(row_count):
             try:
                 series_label = self.series_event(series.series)
             except Action.DoesNotExist:
@@ -434,19 +627,10 @@ class TrendsQueryRunner(QueryRunner):
                 series_object = {
                     "data": [],
                     "days": (
-                        [
-                            item.strftime(
-                                "%Y-%m-%d{}".format(
-                                    " %H:%M:%S" if self.query_date_range.interval_name in ("hour", "minute") else ""
-                                )
-                            )
-                            for item in get_value("date", val)
-                        ]
-                        if response.columns and "date" in response.columns
-                        else []
+                        format_days(get_value("date", index)) if response.columns and "date" in response.columns else []
                     ),
                     "count": 0,
-                    "aggregated_value": get_value("total", val),
+                    "aggregated_value": get_value("total", index),
                     "label": "All events" if series_label is None else series_label,
                     "filter": self._query_to_filter(),
                     "action": {  # TODO: Populate missing props in `action`
@@ -465,23 +649,14 @@ class TrendsQueryRunner(QueryRunner):
                 }
             else:
                 if self._trends_display.display_type == ChartDisplayType.ACTIONS_LINE_GRAPH_CUMULATIVE:
-                    count = get_value("total", val)[-1]
+                    count = get_value("total", index)[-1]
                 else:
-                    count = float(sum(get_value("total", val)))
+                    count = counts[index] if counts is not None else float(sum(get_value("total", index)))
 
                 series_object = {
-                    "data": get_value("total", val),
-                    "labels": [
-                        format_label_date(item, self.query_date_range.interval_name) for item in get_value("date", val)
-                    ],
-                    "days": [
-                        item.strftime(
-                            "%Y-%m-%d{}".format(
-                                " %H:%M:%S" if self.query_date_range.interval_name in ("hour", "minute") else ""
-                            )
-                        )
-                        for item in get_value("date", val)
-                    ],
+                    "data": get_value("total", index),
+                    "labels": format_labels(get_value("date", index)),
+                    "days": format_days(get_value("date", index)),
                     "count": count,
                     "label": "All events" if series_label is None else series_label,
                     "filter": self._query_to_filter(),
@@ -519,7 +694,7 @@ class TrendsQueryRunner(QueryRunner):
                 remapped_label = None
 
                 if self._is_breakdown_field_boolean():
-                    remapped_label = self._convert_boolean(get_value("breakdown_value", val))
+                    remapped_label = self._convert_boolean(get_value("breakdown_value", index))
 
                     if remapped_label == "" or remapped_label is None:
                         # Skip the "none" series if it doesn't have any data
@@ -534,7 +709,7 @@ class TrendsQueryRunner(QueryRunner):
                         series_object["label"] = remapped_label
                     series_object["breakdown_value"] = remapped_label
                 elif self.query.breakdownFilter.breakdown_type == "cohort":
-                    cohort_id = get_value("breakdown_value", val)
+                    cohort_id = get_value("breakdown_value", index)
                     cohort_name = "all users" if str(cohort_id) == "0" else Cohort.objects.get(pk=cohort_id).name
 
                     if real_series_count > 1:
@@ -543,7 +718,7 @@ class TrendsQueryRunner(QueryRunner):
                         series_object["label"] = cohort_name
                     series_object["breakdown_value"] = "all" if str(cohort_id) == "0" else int(cohort_id)
                 else:
-                    remapped_label = get_value("breakdown_value", val)
+                    remapped_label = get_value("breakdown_value", index)
                     if remapped_label == "" or remapped_label is None:
                         # Skip the "none" series if it doesn't have any data
                         if series_object["count"] == 0 and series_object.get("aggregated_value", 0) == 0:
@@ -583,6 +758,7 @@ class TrendsQueryRunner(QueryRunner):
             team=self.team,
             interval=interval,
             now=datetime.now(),
+            bind_parameters=True,
         )
 
     @cached_property
@@ -11,6 +11,8 @@ from pydantic import BaseModel, ConfigDict
 from sentry_sdk import capture_exception, push_scope
 
 from posthog.cache_utils import OrjsonJsonSerializer
+from posthog.caching.query_coalescing import QueryCoalescer
+from posthog.caching.query_result_codec import CachedResponseEntry, decode_cached_response, encode_cached_response
 from posthog.caching.utils import is_stale, last_refresh_from_cached_result, ThresholdMode, cache_target_age
 from posthog.clickhouse.client.execute_async import enqueue_process_query_task
 from posthog.clickhouse.query_tagging import tag_queries
@@ -371,6 +373,8 @@ class QueryRunner(ABC, Generic[Q, R, CR]):
         _modifiers = modifiers or (query.modifiers if hasattr(query, "modifiers") else None)
         self.modifiers = create_default_modifiers_for_team(team, _modifiers)
         self.query_id = query_id
+        # The stale cached response the current run is recalculating, with its results only decoded if they're used
+        self.stale_cache_entry: Optional[CachedResponseEntry] = None
 
         if not self.is_query_node(query):
             query = self.query_type.model_validate(query)
@@ -404,6 +408,17 @@ class QueryRunner(ABC, Generic[Q, R, CR]):
     def calculate(self) -> R:
         raise NotImplementedError()
 
+    def can_calculate_incrementally(self) -> bool:
+        """Whether `calculate_incrementally` can be tried for this query, which is never the case by default."""
+        return False
+
+    def calculate_incrementally(self, stale_cached_response: CR) -> Optional[R]:
+        """
+        Recalculate a stale cached response, only querying the part of it that can have changed since.
+        Returns None if the response has to be calculated from scratch, which is the default.
+        """
+        return None
+
     def enqueue_async_calculation(
         self, *, cache_key: str, refresh_requested: bool = False, user: Optional[User] = None
     ) -> QueryStatusResponse:
@@ -419,41 +434,28 @@ class QueryRunner(ABC, Generic[Q, R, CR]):
     def handle_cache_and_async_logic(
         self, execution_mode: ExecutionMode, cache_key: str, user: Optional[User] = None
     ) -> Optional[CR | CacheMissResponse]:
-        CachedResponse: type[CR] = self.cached_response_type
         cached_response: CR | CacheMissResponse
         cached_response_candidate_bytes: Optional[bytes] = get_safe_cache(cache_key)
-        cached_response_candidate: Optional[dict] = (
-            OrjsonJsonSerializer({}).loads(cached_response_candidate_bytes) if cached_response_candidate_bytes else None
+        cache_entry = (
+            decode_cached_response(cached_response_candidate_bytes) if cached_response_candidate_bytes else None
         )
-        if self.is_cached_response(cached_response_candidate):
-            cached_response_candidate["is_cached"] = True
-            cached_response = CachedResponse(**cached_response_candidate)
-        elif cached_response_candidate is None:
-            cached_response = CacheMissResponse(cache_key=cache_key)
-        else:
-            # Whatever's in cache is malformed, so let's treat is as non-existent
-            cached_response = CacheMissResponse(cache_key=cache_key)
-            with push_scope() as scope:
-                scope.set_tag("cache_key", cache_key)
-                capture_exception(
-                    ValueError(f"Cached response is of unexpected type {type(cached_response)}, ignoring it")
-                )
-
-        if self.is_cached_response(cached_response_candidate):
-            cached_response.cache_target_age = self.cache_target_age(cached_response)
 
-            if not self._is_stale(cached_response):
+        if cache_entry is not None and self.is_cached_response(cache_entry.metadata):
+            # Staleness is decided from the metadata alone, the results are only decoded if they're returned or reused
+            if not self._is_stale(cache_entry.metadata):
                 QUERY_CACHE_HIT_COUNTER.labels(team_id=self.team.pk, cache_hit="hit").inc()
                 # We have a valid result that's fresh enough, let's return it
-                return cached_response
+                return self._cached_response_from_cache_entry(cache_entry)
 
             QUERY_CACHE_HIT_COUNTER.labels(team_id=self.team.pk, cache_hit="stale").inc()
+            self.stale_cache_entry = cache_entry
             # We have a stale result. If we aren't allowed to calculate, let's still return it
             # – otherwise let's proceed to calculation
             if execution_mode == ExecutionMode.CACHE_ONLY_NEVER_CALCULATE:
-                return cached_response
+                return self._cached_response_from_cache_entry(cache_entry)
             elif execution_mode == ExecutionMode.RECENT_CACHE_CALCULATE_ASYNC_IF_STALE:
                 # We're allowed to calculate, but we'll do it asynchronously and attach the query status
+                cached_response = self._cached_response_from_cache_entry(cache_entry)
                 query_status_response = self.enqueue_async_calculation(
                     cache_key=cache_key, user=user, refresh_requested=True
                 )
@@ -461,12 +463,21 @@ class QueryRunner(ABC, Generic[Q, R, CR]):
                 return cached_response
             elif execution_mode == ExecutionMode.EXTENDED_CACHE_CALCULATE_ASYNC_IF_STALE:
                 # We're allowed to calculate if the lazy check fails, but we'll do it asynchronously
-                assert isinstance(cached_response, CachedResponse)
-                if self._is_stale(cached_response, lazy=True):
+                cached_response = self._cached_response_from_cache_entry(cache_entry)
+                if self._is_stale(cache_entry.metadata, lazy=True):
                     query_status_response = self.enqueue_async_calculation(cache_key=cache_key, user=user)
                     cached_response.query_status = query_status_response.query_status
                 return cached_response
         else:
+            cached_response = CacheMissResponse(cache_key=cache_key)
+            if cache_entry is not None:
+                # Whatever's in cache is malformed, so let's treat is as non-existent
+                with push_scope() as scope:
+                    scope.set_tag("cache_key", cache_key)
+                    capture_exception(
+                        ValueError(f"Cached response is of unexpected type {type(cache_entry.metadata)}, ignoring it")
+                    )
+
             QUERY_CACHE_HIT_COUNTER.labels(team_id=self.team.pk, cache_hit="miss").inc()
             # We have no cached result. If we aren't allowed to calculate, let's return the cache miss
             # – otherwise let's proceed to calculation
@@ -494,7 +505,9 @@ class QueryRunner(ABC, Generic[Q, R, CR]):
         tag_queries(cache_key=cache_key)
         self.query_id = query_id or self.query_id
         CachedResponse: type[CR] = self.cached_response_type
+        self.stale_cache_entry = None
 
+        coalescer: Optional[QueryCoalescer] = None
         if execution_mode == ExecutionMode.CALCULATE_ASYNC_ALWAYS:
             # We should always kick off async calculation and disregard the cache
             return self.enqueue_async_calculation(refresh_requested=True, cache_key=cache_key, user=user)
@@ -504,25 +517,56 @@ class QueryRunner(ABC, Generic[Q, R, CR]):
             if results is not None:
                 return results
 
-        fresh_response_dict = {
-            **self.calculate().model_dump(),
-            "is_cached": False,
-            "last_refresh": datetime.now(UTC),
-            "next_allowed_client_refresh": datetime.now(UTC) + self._refresh_frequency(),
-            "cache_key": cache_key,
-            "timezone": self.team.timezone,
-        }
-        fresh_response = CachedResponse(**fresh_response_dict)
-
-        # Don't cache debug queries with errors and export queries
-        has_error: Optional[list] = fresh_response_dict.get("error", None)
-        cache_ttl = self.cache_ttl()
-        if (has_error is None or len(has_error) == 0) and self.limit_context != LimitContext.EXPORT and cache_ttl > 0:
-            fresh_response_serialized = OrjsonJsonSerializer({}).dumps(fresh_response.model_dump())
-            cache.set(cache_key, fresh_response_serialized, cache_ttl)
-            QUERY_CACHE_WRITE_COUNTER.labels(team_id=self.team.pk).inc()
+            if settings.QUERY_COALESCING_ENABLED:
+                # If the same query is being calculated somewhere else right now, let's wait for that result instead
+                coalescer = QueryCoalescer(cache_key)
+                if not coalescer.acquire() and coalescer.wait():
+                    results = self.handle_cache_and_async_logic(
+                        execution_mode=execution_mode, cache_key=cache_key, user=user
+                    )
+                    if results is not None:
+                        return results
+
+        succeeded = False
+        try:
+            response: Optional[R] = None
+            if self.stale_cache_entry is not None and self.can_calculate_incrementally():
+                # A stale result that's been calculated before can possibly be brought up to date cheaper
+                response = self.calculate_incrementally(self._cached_response_from_cache_entry(self.stale_cache_entry))
+            if response is None:
+                response = self.calculate()
+
+            fresh_response_dict = {
+                **response.model_dump(),
+                "is_cached": False,
+                "last_refresh": datetime.now(UTC),
+                "next_allowed_client_refresh": datetime.now(UTC) + self._refresh_frequency(),
+                "cache_key": cache_key,
+                "timezone": self.team.timezone,
+            }
+            fresh_response = CachedResponse(**fresh_response_dict)
+
+            # Don't cache debug queries with errors and export queries
+            has_error: Optional[list] = fresh_response_dict.get("error", None)
+            cache_ttl = self.cache_ttl()
+            if (
+                (has_error is None or len(has_error) == 0)
+                and self.limit_context != LimitContext.EXPORT
+                and cache_ttl > 0
+            ):
+                fresh_response_serialized = (
+                    encode_cached_response(fresh_response.model_dump())
+                    if settings.QUERY_CACHE_BINARY_FORMAT
+                    else OrjsonJsonSerializer({}).dumps(fresh_response.model_dump())
+                )
+                cache.set(cache_key, fresh_response_serialized, cache_ttl)
+                QUERY_CACHE_WRITE_COUNTER.labels(team_id=self.team.pk).inc()
 
-        return fresh_response
+            succeeded = True
+            return fresh_response
+        finally:
+            if coalescer is not None:
+                coalescer.release(succeeded)
 
     @abstractmethod
     def to_query(self) -> ast.SelectQuery | ast.SelectUnionQuery:
@@ -559,6 +603,11 @@ class QueryRunner(ABC, Generic[Q, R, CR]):
     def get_cache_key(self) -> str:
         return generate_cache_key(f"query_{bytes.decode(to_json(self.get_cache_payload()))}")
 
+    def _cached_response_from_cache_entry(self, cache_entry: CachedResponseEntry) -> CR:
+        cached_response = self.cached_response_type(**{**cache_entry.to_dict(), "is_cached": True})
+        cached_response.cache_target_age = self.cache_target_age(cached_response)
+        return cached_response
+
     def cache_target_age(self, cached_result_package) -> Optional[datetime]:
         last_refresh = last_refresh_from_cached_result(cached_result_package)
         if last_refresh is None:
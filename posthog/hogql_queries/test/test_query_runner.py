@@ -1,11 +1,16 @@
+import threading
+import time
 from datetime import datetime, timedelta
 from typing import Any, Literal, Optional
 from unittest import mock
 from zoneinfo import ZoneInfo
 
+from django.core.cache import cache
 from freezegun import freeze_time
 from pydantic import BaseModel
 
+from posthog.caching.query_coalescing import QueryCoalescer
+from posthog.caching.utils import last_refresh_from_cached_result
 from posthog.hogql_queries.query_runner import ExecutionMode, QueryRunner
 from posthog.models.team.team import Team
 from posthog.schema import (
@@ -48,9 +53,10 @@ class TestQueryRunner(BaseTest):
                 return timedelta(minutes=4)
 
             def _is_stale(self, cached_result_package, lazy: bool = False, *args, **kwargs) -> bool:
+                last_refresh = last_refresh_from_cached_result(cached_result_package)
                 if lazy:
-                    return cached_result_package.last_refresh + timedelta(days=1) <= datetime.now(tz=ZoneInfo("UTC"))
-                return cached_result_package.last_refresh + timedelta(minutes=10) <= datetime.now(tz=ZoneInfo("UTC"))
+                    return last_refresh + timedelta(days=1) <= datetime.now(tz=ZoneInfo("UTC"))
+                return last_refresh + timedelta(minutes=10) <= datetime.now(tz=ZoneInfo("UTC"))
 
         TestQueryRunner.__abstractmethods__ = frozenset()
 
@@ -202,6 +208,78 @@ class TestQueryRunner(BaseTest):
             self.assertEqual(response.is_cached, True)
             mock_on_commit.assert_called_once()
 
+    def test_cache_response_binary_format(self):
+        TestQueryRunner = self.setup_test_query_runner_class()
+        runner = TestQueryRunner(query={"some_attr": "binary"}, team=self.team)
+
+        with freeze_time(datetime(2023, 2, 4, 13, 37, 42)):
+            # an entry in the previous format is still read
+            with self.settings(QUERY_CACHE_BINARY_FORMAT=False):
+                runner.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE)
+            response = runner.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE)
+            self.assertIsInstance(response, TestCachedBasicQueryResponse)
+            self.assertEqual(response.is_cached, True)
+
+            with self.settings(QUERY_CACHE_BINARY_FORMAT=True):
+                fresh_response = runner.run(execution_mode=ExecutionMode.CALCULATE_BLOCKING_ALWAYS)
+                self.assertEqual(fresh_response.is_cached, False)
+
+                response = runner.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE)
+                self.assertIsInstance(response, TestCachedBasicQueryResponse)
+                self.assertEqual(response.is_cached, True)
+                self.assertEqual(response.results, [["row", 1, 2, 3], list(range(10))])
+                self.assertEqual(response.last_refresh.isoformat(), "2023-02-04T13:37:42+00:00")
+
+        with freeze_time(datetime(2023, 2, 4, 13, 37 + 11, 42)):
+            # the results of a stale entry aren't decoded if they aren't reused
+            with mock.patch("posthog.caching.query_result_codec.zstd.decompress") as decompress:
+                response = runner.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE)
+            self.assertEqual(response.is_cached, False)
+            decompress.assert_not_called()
+
+    def test_run_coalesces_concurrent_calculations(self):
+        TestQueryRunner = self.setup_test_query_runner_class()
+        runner = TestQueryRunner(query={"some_attr": "coalesced"}, team=self.team)
+        cache_key = runner.get_cache_key()
+
+        runner.run(execution_mode=ExecutionMode.CALCULATE_BLOCKING_ALWAYS)
+        leader_result = cache.get(cache_key)
+        cache.delete(cache_key)
+
+        # Someone else is calculating the same query right now
+        leader = QueryCoalescer(cache_key)
+        self.assertTrue(leader.acquire())
+
+        def finish_leader():
+            time.sleep(0.1)
+            cache.set(cache_key, leader_result)
+            leader.release(succeeded=True)
+
+        thread = threading.Thread(target=finish_leader)
+        thread.start()
+        with mock.patch.object(TestQueryRunner, "calculate") as calculate:
+            response = runner.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE)
+        thread.join()
+
+        calculate.assert_not_called()
+        self.assertIsInstance(response, TestCachedBasicQueryResponse)
+        self.assertEqual(response.is_cached, True)
+
+    def test_run_calculates_when_coalesced_calculation_fails(self):
+        TestQueryRunner = self.setup_test_query_runner_class()
+        runner = TestQueryRunner(query={"some_attr": "coalesced_failure"}, team=self.team)
+
+        leader = QueryCoalescer(runner.get_cache_key())
+        self.assertTrue(leader.acquire())
+
+        thread = threading.Thread(target=lambda: (time.sleep(0.1), leader.release(succeeded=False)))
+        thread.start()
+        response = runner.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE)
+        thread.join()
+
+        self.assertIsInstance(response, TestCachedBasicQueryResponse)
+        self.assertEqual(response.is_cached, False)
+
     def test_modifier_passthrough(self):
         try:
             from ee.clickhouse.materialized_columns.analyze import materialize
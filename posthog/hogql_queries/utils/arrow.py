@@ -0,0 +1,113 @@
+import datetime
+from collections.abc import Callable, Collection
+from typing import Any, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.types as pat
+
+EPOCH_DATE = datetime.date(1970, 1, 1)
+
+
+def _date_time_converter(arrow_type: pa.DataType, tzinfo: datetime.tzinfo) -> Optional[Callable[[int], Any]]:
+    """
+    ClickHouse sends `DateTime` as seconds since epoch in a `UInt32` and `Date` as days since epoch in a `UInt16`.
+    These are converted to the same Python objects `clickhouse_driver` returns.
+    """
+    if pat.is_uint32(arrow_type):
+        return lambda value: datetime.datetime.fromtimestamp(value, tz=tzinfo)
+    if pat.is_uint16(arrow_type):
+        return lambda value: EPOCH_DATE + datetime.timedelta(days=value)
+    return None
+
+
+def _date_time_column_to_pylist(column: pa.ChunkedArray, tzinfo: datetime.tzinfo) -> list[Any]:
+    """
+    Converts a column of dates or datetimes, or of lists of them, to Python.
+
+    Lists of dates are usually the same for every row (e.g. all days of the date range), so each distinct list is
+    only converted once, and then shared between all rows with that list.
+    """
+    is_list = pat.is_list(column.type) or pat.is_large_list(column.type)
+    convert = _date_time_converter(column.type.value_type if is_list else column.type, tzinfo)
+    if convert is None:
+        return column.to_pylist()
+
+    if not is_list:
+        return [convert(value) if value is not None else None for value in column.to_pylist()]
+
+    result: list[Any] = []
+    converted_lists: dict[bytes, list[Any]] = {}
+    for chunk in column.chunks:
+        if chunk.values.null_count > 0:
+            # Nullable dates inside the lists are rare enough to not bother deduplicating
+            result.extend(
+                [convert(value) if value is not None else None for value in values] if values is not None else None
+                for values in chunk.to_pylist()
+            )
+            continue
+
+        offsets = chunk.offsets.to_numpy(zero_copy_only=False)
+        flat_values = chunk.values.to_numpy(zero_copy_only=False)
+        is_null = chunk.is_null().to_numpy(zero_copy_only=False)
+        for index in range(len(chunk)):
+            if is_null[index]:
+                result.append(None)
+                continue
+
+            row_values = flat_values[offsets[index] : offsets[index + 1]]
+            key = row_values.tobytes()
+            converted = converted_lists.get(key)
+            if converted is None:
+                converted = [convert(value) for value in row_values.tolist()]
+                converted_lists[key] = converted
+            result.append(converted)
+
+    return result
+
+
+def record_batches_to_columns(
+    record_batches: list[pa.RecordBatch],
+    date_time_columns: Collection[str] = (),
+    tzinfo: datetime.tzinfo = datetime.UTC,
+) -> dict[str, list[Any]]:
+    """
+    Converts record batches to a list of Python values per column, one column at a time.
+
+    `date_time_columns` are the columns holding `Date`s or `DateTime`s (or lists of them), which are converted to
+    Python dates and datetimes in `tzinfo`.
+    """
+    if not record_batches:
+        return {}
+
+    table = pa.Table.from_batches(record_batches)
+    return {
+        name: _date_time_column_to_pylist(column, tzinfo) if name in date_time_columns else column.to_pylist()
+        for name, column in zip(table.column_names, table.columns)
+    }
+
+
+def list_column_sums(record_batches: list[pa.RecordBatch], name: str) -> Optional[list[float]]:
+    """
+    Sums each list of a column of numeric lists, without converting the values to Python.
+    Returns None if the column isn't such a column, or if it has nulls.
+    """
+    if not record_batches:
+        return []
+
+    column = pa.Table.from_batches(record_batches).column(name)
+    if not (pat.is_list(column.type) or pat.is_large_list(column.type)) or not (
+        pat.is_integer(column.type.value_type) or pat.is_floating(column.type.value_type)
+    ):
+        return None
+
+    sums: list[float] = []
+    for chunk in column.chunks:
+        if chunk.null_count > 0 or chunk.values.null_count > 0:
+            return None
+        # The values of the lists with the index of the list each is in, which `flatten` respects slices for
+        values = chunk.flatten().to_numpy(zero_copy_only=False)
+        list_indices = pc.list_parent_indices(chunk).to_numpy(zero_copy_only=False)
+        sums.extend(np.bincount(list_indices, weights=values, minlength=len(chunk)).tolist())
+    return sums
@@ -28,6 +28,8 @@ class QueryDateRange:
     _date_range: Optional[InsightDateRange | DateRange]
     _interval: Optional[IntervalType]
     _now_without_timezone: datetime
+    # Whether the dates are bound to queries as parameters, see `ast.Parameter`
+    _bind_parameters: bool
 
     def __init__(
         self,
@@ -35,11 +37,13 @@ class QueryDateRange:
         team: Team,
         interval: Optional[IntervalType],
         now: datetime,
+        bind_parameters: bool = False,
     ) -> None:
         self._team = team
         self._date_range = date_range
         self._interval = interval or IntervalType.DAY
         self._now_without_timezone = now
+        self._bind_parameters = bind_parameters
 
         if not isinstance(self._interval, IntervalType) or re.match(r"[^a-z]", "DAY", re.IGNORECASE):
             raise ValueError(f"Invalid interval: {interval}")
@@ -171,16 +175,22 @@ class QueryDateRange:
             start += delta
         return values
 
+    def _date_as_hogql_constant(self, name: str, value: str) -> ast.Expr:
+        if self._bind_parameters:
+            # Queries only differing in their date range then compile the same
+            return ast.Parameter(name=name, value=value)
+        return ast.Constant(value=value)
+
     def date_to_as_hogql(self) -> ast.Expr:
         return ast.Call(
             name="assumeNotNull",
-            args=[ast.Call(name="toDateTime", args=[(ast.Constant(value=self.date_to_str))])],
+            args=[ast.Call(name="toDateTime", args=[self._date_as_hogql_constant("date_to", self.date_to_str)])],
         )
 
     def date_from_as_hogql(self) -> ast.Expr:
         return ast.Call(
             name="assumeNotNull",
-            args=[ast.Call(name="toDateTime", args=[(ast.Constant(value=self.date_from_str))])],
+            args=[ast.Call(name="toDateTime", args=[self._date_as_hogql_constant("date_from", self.date_from_str)])],
         )
 
     def previous_period_date_from_as_hogql(self) -> ast.Expr:
@@ -189,7 +199,9 @@ class QueryDateRange:
             args=[
                 ast.Call(
                     name="toDateTime",
-                    args=[(ast.Constant(value=self.previous_period_date_from_str))],
+                    args=[
+                        self._date_as_hogql_constant("previous_period_date_from", self.previous_period_date_from_str)
+                    ],
                 )
             ],
         )
@@ -0,0 +1,54 @@
+import datetime
+from zoneinfo import ZoneInfo
+
+import pyarrow as pa
+
+from posthog.hogql_queries.utils.arrow import list_column_sums, record_batches_to_columns
+from posthog.test.base import BaseTest
+
+
+class TestArrow(BaseTest):
+    def test_record_batches_to_columns(self):
+        tz = ZoneInfo("Europe/Berlin")
+        batch = pa.record_batch(
+            [
+                pa.array([[1577836800, 1577923200], None, [1577836800, 1577923200]], type=pa.list_(pa.uint32())),
+                pa.array([18262, 18263, None], type=pa.uint16()),
+                pa.array(["Chrome", "Firefox", None]),
+            ],
+            names=["date", "day", "breakdown_value"],
+        )
+
+        columns = record_batches_to_columns([batch, batch.slice(2)], date_time_columns=("date", "day"), tzinfo=tz)
+
+        dates = [datetime.datetime(2020, 1, 1, 1, tzinfo=tz), datetime.datetime(2020, 1, 2, 1, tzinfo=tz)]
+        self.assertEqual(
+            columns,
+            {
+                "date": [dates, None, dates, dates],
+                "day": [datetime.date(2020, 1, 1), datetime.date(2020, 1, 2), None, None],
+                "breakdown_value": ["Chrome", "Firefox", None, None],
+            },
+        )
+        # Identical lists of dates are only converted once
+        self.assertIs(columns["date"][0], columns["date"][2])
+        self.assertIs(columns["date"][0], columns["date"][3])
+
+    def test_record_batches_to_columns_empty(self):
+        self.assertEqual(record_batches_to_columns([]), {})
+
+    def test_list_column_sums(self):
+        batch = pa.record_batch(
+            [
+                pa.array([[1, 2], [3], [], [4, 5, 6]], type=pa.list_(pa.int64())),
+                pa.array([[1.5], None, [], [2.5]], type=pa.list_(pa.float64())),
+                pa.array(["a", "b", "c", "d"]),
+            ],
+            names=["total", "nullable_total", "breakdown_value"],
+        )
+
+        self.assertEqual(list_column_sums([batch, batch.slice(1, 2), batch.slice(3)], "total"), [3, 3, 0, 15, 3, 0, 15])
+        # Columns that can't be summed as they are are left to be summed in Python
+        self.assertIsNone(list_column_sums([batch], "nullable_total"))
+        self.assertIsNone(list_column_sums([batch], "breakdown_value"))
+        self.assertEqual(list_column_sums([], "total"), [])
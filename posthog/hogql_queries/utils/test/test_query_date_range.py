@@ -118,6 +118,37 @@ class TestQueryDateRange(APIBaseTest):
         self.assertEqual(query_date_range.date_from(), parser.isoparse("2021-08-24T00:00:00.000000Z"))
         self.assertEqual(query_date_range.date_to(), parser.isoparse("2021-08-24T23:59:59.999999Z"))
 
+    def test_bind_parameters(self):
+        now = parser.isoparse("2021-08-25T00:00:00.000Z")
+        date_range = InsightDateRange(date_from="-48h")
+
+        query_date_range = QueryDateRange(team=self.team, date_range=date_range, interval=IntervalType.DAY, now=now)
+        self.assertEqual(
+            query_date_range.date_from_as_hogql(),
+            ast.Call(
+                name="assumeNotNull",
+                args=[ast.Call(name="toDateTime", args=[ast.Constant(value="2021-08-23 00:00:00")])],
+            ),
+        )
+
+        query_date_range = QueryDateRange(
+            team=self.team, date_range=date_range, interval=IntervalType.DAY, now=now, bind_parameters=True
+        )
+        self.assertEqual(
+            query_date_range.date_from_as_hogql(),
+            ast.Call(
+                name="assumeNotNull",
+                args=[ast.Call(name="toDateTime", args=[ast.Parameter(name="date_from", value="2021-08-23 00:00:00")])],
+            ),
+        )
+        self.assertEqual(
+            query_date_range.date_to_as_hogql(),
+            ast.Call(
+                name="assumeNotNull",
+                args=[ast.Call(name="toDateTime", args=[ast.Parameter(name="date_to", value="2021-08-25 23:59:59")])],
+            ),
+        )
+
 
 class TestQueryDateRangeWithIntervals(APIBaseTest):
     def setUp(self):
@@ -41,6 +41,7 @@ class WebAnalyticsQueryRunner(QueryRunner, ABC):
             team=self.team,
             interval=None,
             now=datetime.now(),
+            bind_parameters=True,
         )
 
     @cached_property
@@ -152,6 +152,7 @@ FROM (
             team=self.team,
             interval=None,
             now=datetime.now(),
+            bind_parameters=True,
         )
 
     def all_properties(self) -> ast.Expr:
@@ -0,0 +1,98 @@
+import csv
+import datetime as dt
+import io
+import json
+import random
+import time
+import uuid
+
+import pyarrow as pa
+from django.core.management.base import BaseCommand
+
+from posthog.temporal.batch_exports.encoders import CSVRecordBatchEncoder, JSONLRecordBatchEncoder
+from posthog.temporal.batch_exports.temporary_file import json_dumps_bytes
+from posthog.temporal.batch_exports.utils import cast_record_batch_json_columns
+
+
+def _record_batch(num_rows: int, seed: int) -> pa.RecordBatch:
+    """An events record batch like the ones exported from ClickHouse, with JSON properties."""
+    rng = random.Random(seed)
+    timestamp = dt.datetime(2024, 1, 1, tzinfo=dt.UTC)
+    properties = [
+        json.dumps(
+            {
+                "$browser": rng.choice(["Chrome", "Firefox", "Safari"]),
+                "$current_url": f"https://posthog.com/{uuid.UUID(int=rng.getrandbits(128))}",
+                "$screen_width": rng.randint(320, 3840),
+                "revenue": rng.random() * 100,
+            }
+        )
+        for _ in range(num_rows)
+    ]
+
+    return cast_record_batch_json_columns(
+        pa.RecordBatch.from_pydict(
+            {
+                "uuid": pa.array([str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(num_rows)]),
+                "event": pa.array([rng.choice(["$pageview", "$autocapture", 'signed "up"']) for _ in range(num_rows)]),
+                "distinct_id": pa.array([f"user-{rng.randint(0, 10_000)}" for _ in range(num_rows)]),
+                "team_id": pa.array([1] * num_rows, type=pa.int64()),
+                "timestamp": pa.array(
+                    [timestamp + dt.timedelta(seconds=index) for index in range(num_rows)],
+                    type=pa.timestamp("us", tz="UTC"),
+                ),
+                "properties": pa.array(properties),
+            }
+        ),
+        json_columns=("properties",),
+    )
+
+
+def _encode_jsonl_each_row(record_batch: pa.RecordBatch) -> bytes:
+    """How JSONL was encoded before: A dictionary per row, serialized one at a time."""
+    return b"".join(json_dumps_bytes(record) + b"\n" for record in record_batch.to_pylist())
+
+
+def _encode_csv_each_row(record_batch: pa.RecordBatch, field_names: list[str]) -> bytes:
+    """How CSV was encoded before: A dictionary per row, written by a `csv.DictWriter`."""
+    output = io.StringIO()
+    csv.DictWriter(
+        output, fieldnames=field_names, escapechar="\\", quoting=csv.QUOTE_NONE, lineterminator="\n"
+    ).writerows(record_batch.to_pylist())
+    return output.getvalue().encode("utf-8")
+
+
+def _time(encode, record_batches: list[pa.RecordBatch]) -> tuple[float, bytes]:
+    start = time.perf_counter()
+    encoded = b"".join(encode(record_batch) for record_batch in record_batches)
+    return time.perf_counter() - start, encoded
+
+
+class Command(BaseCommand):
+    help = "Compare encoding batch export record batches a row at a time and a column at a time"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batches", type=int, default=20, help="Record batches to encode")
+        parser.add_argument("--rows-per-batch", type=int, default=10_000, help="Rows in each record batch")
+
+    def handle(self, *args, **options):
+        record_batches = [_record_batch(options["rows_per_batch"], seed) for seed in range(options["batches"])]
+        field_names = record_batches[0].column_names
+        csv_encoder = CSVRecordBatchEncoder(field_names=field_names)
+
+        formats = {
+            "JSONL": (_encode_jsonl_each_row, JSONLRecordBatchEncoder().encode),
+            "CSV": (lambda record_batch: _encode_csv_each_row(record_batch, field_names), csv_encoder.encode),
+        }
+        for file_format, (encode_each_row, encode_each_column) in formats.items():
+            row_seconds, row_encoded = _time(encode_each_row, record_batches)
+            column_seconds, column_encoded = _time(encode_each_column, record_batches)
+            megabytes = len(row_encoded) / 1024 / 1024
+
+            self.stdout.write(
+                f"{file_format}: {megabytes:.1f}MB a row at a time in {row_seconds:.2f}s "
+                f"({megabytes / row_seconds:.1f}MB/s), a column at a time in {column_seconds:.2f}s "
+                f"({megabytes / column_seconds:.1f}MB/s), speedup {row_seconds / column_seconds:.1f}x"
+            )
+            if row_encoded != column_encoded:
+                self.stdout.write(self.style.ERROR(f"{file_format} outputs differ"))
@@ -0,0 +1,89 @@
+import asyncio
+import datetime as dt
+import time
+
+from django.core.management.base import BaseCommand
+
+from posthog.temporal.batch_exports.batch_exports import aiter_records, iter_records
+from posthog.temporal.common.clickhouse import get_client
+
+
+async def _blocking_records(client, **parameters):
+    """How events were exported before: an async generator wrapping the blocking stream."""
+    for record_batch in iter_records(client, **parameters):
+        yield record_batch
+
+
+async def _export(records, consume_seconds: float) -> int:
+    rows = 0
+    async for record_batch in records:
+        rows += record_batch.num_rows
+        # Stand-in for the destination being busy with the batch, e.g. uploading it
+        await asyncio.sleep(consume_seconds)
+    return rows
+
+
+async def _measure_event_loop_lag(stop: asyncio.Event, interval: float = 0.01) -> float:
+    """Returns by how much the event loop was late to wake up at most, which is what delays heartbeats."""
+    max_lag = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        max_lag = max(max_lag, time.perf_counter() - start - interval)
+    return max_lag
+
+
+async def _run(streaming: str, concurrency: int, consume_seconds: float, **parameters) -> tuple[float, int, float]:
+    async with get_client(team_id=parameters["team_id"]) as client:
+        stop = asyncio.Event()
+        lag_task = asyncio.create_task(_measure_event_loop_lag(stop))
+
+        start = time.perf_counter()
+        if streaming == "blocking":
+            exports = [_export(_blocking_records(client, **parameters), consume_seconds) for _ in range(concurrency)]
+        else:
+            exports = [_export(aiter_records(client, **parameters), consume_seconds) for _ in range(concurrency)]
+        rows = await asyncio.gather(*exports)
+        seconds = time.perf_counter() - start
+
+        stop.set()
+        max_lag = await lag_task
+
+    return seconds, sum(rows), max_lag
+
+
+class Command(BaseCommand):
+    help = "Compare running concurrent events batch exports in one event loop with blocking and async streaming"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--team-id", type=int, required=True, help="Team to export events of")
+        parser.add_argument("--interval-start", type=str, required=True, help="ISO start of the exported interval")
+        parser.add_argument("--interval-end", type=str, required=True, help="ISO end of the exported interval")
+        parser.add_argument(
+            "--concurrency", type=int, default=8, help="Exports running at the same time, like on one worker"
+        )
+        parser.add_argument(
+            "--consume-ms", type=float, default=5, help="Time the destination is busy with each record batch (ms)"
+        )
+
+    def handle(self, *args, **options):
+        parameters = {
+            "team_id": options["team_id"],
+            "interval_start": dt.datetime.fromisoformat(options["interval_start"]).isoformat(),
+            "interval_end": dt.datetime.fromisoformat(options["interval_end"]).isoformat(),
+        }
+        concurrency = options["concurrency"]
+        consume_seconds = options["consume_ms"] / 1000
+
+        results = {}
+        for streaming in ("blocking", "async"):
+            results[streaming] = asyncio.run(_run(streaming, concurrency, consume_seconds, **parameters))
+            seconds, rows, max_lag = results[streaming]
+            self.stdout.write(
+                f"{streaming.capitalize()} streaming: {concurrency} exports of {rows // concurrency} rows in "
+                f"{seconds:.2f}s ({rows / seconds:,.0f} rows/s), max event loop lag {max_lag * 1000:.0f}ms"
+            )
+
+        self.stdout.write(f"Speedup: {results['blocking'][0] / results['async'][0]:.1f}x")
+        if results["blocking"][1] != results["async"][1]:
+            self.stdout.write(self.style.ERROR("Row counts differ"))
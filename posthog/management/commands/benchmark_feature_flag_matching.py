@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posthog.models import PersonDistinctId
+from posthog.models.feature_flag.flag_matching import get_all_feature_flags, get_all_feature_flags_bulk
+
+
+class Command(BaseCommand):
+    help = "Compare evaluating all feature flags one distinct ID at a time with bulk evaluation"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--team-id", type=int, required=True, help="Team to evaluate flags for")
+        parser.add_argument("--count", type=int, default=1000, help="Number of distinct IDs (default: 1000)")
+        parser.add_argument("--runs", type=int, default=3, help="Runs of each method, best is reported (default: 3)")
+
+    def handle(self, *args, **options):
+        team_id = options["team_id"]
+        distinct_ids = list(
+            PersonDistinctId.objects.filter(team_id=team_id)
+            .order_by("id")
+            .values_list("distinct_id", flat=True)[: options["count"]]
+        )
+        if not distinct_ids:
+            self.stdout.write(self.style.ERROR(f"Team {team_id} has no persons"))
+            return
+
+        per_id_results = {}
+        per_id_seconds = float("inf")
+        for _ in range(options["runs"]):
+            start = time.perf_counter()
+            per_id_results = {distinct_id: get_all_feature_flags(team_id, distinct_id) for distinct_id in distinct_ids}
+            per_id_seconds = min(per_id_seconds, time.perf_counter() - start)
+
+        bulk_results = {}
+        bulk_seconds = float("inf")
+        for _ in range(options["runs"]):
+            start = time.perf_counter()
+            bulk_results = get_all_feature_flags_bulk(team_id, distinct_ids)
+            bulk_seconds = min(bulk_seconds, time.perf_counter() - start)
+
+        mismatches = [
+            distinct_id for distinct_id in distinct_ids if per_id_results[distinct_id] != bulk_results[distinct_id]
+        ]
+
+        self.stdout.write(f"Distinct IDs: {len(distinct_ids)}")
+        self.stdout.write(
+            f"Per distinct ID: {per_id_seconds:.3f}s ({per_id_seconds / len(distinct_ids) * 1000:.2f}ms each)"
+        )
+        self.stdout.write(f"Bulk: {bulk_seconds:.3f}s ({bulk_seconds / len(distinct_ids) * 1000:.2f}ms each)")
+        self.stdout.write(f"Speedup: {per_id_seconds / bulk_seconds:.1f}x")
+        if mismatches:
+            self.stdout.write(self.style.ERROR(f"Results differ for {len(mismatches)} distinct IDs: {mismatches[:10]}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Results are identical"))
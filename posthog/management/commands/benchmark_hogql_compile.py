@@ -0,0 +1,108 @@
+import statistics
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from posthog.hogql.context import HogQLContext
+from posthog.hogql.database.database import create_hogql_database
+from posthog.hogql.errors import BaseHogQLError
+from posthog.hogql.parser import parse_select
+from posthog.hogql.printer import prepare_ast_for_printing, print_prepared_ast, to_printed_hogql
+from posthog.hogql.visitor import clone_expr
+from posthog.hogql_queries.query_runner import get_query_runner
+from posthog.models import Team
+
+DATE_RANGE = {"date_from": "-30d"}
+PAGEVIEW = {"kind": "EventsNode", "event": "$pageview"}
+SIGNUP = {"kind": "EventsNode", "event": "$identify"}
+
+# Representative queries of each runner, as covered by the query runner snapshot tests
+QUERIES: dict[str, dict[str, Any]] = {
+    "trends": {"kind": "TrendsQuery", "series": [{**PAGEVIEW, "math": "dau"}], "dateRange": DATE_RANGE},
+    "trends_breakdown": {
+        "kind": "TrendsQuery",
+        "series": [PAGEVIEW],
+        "dateRange": DATE_RANGE,
+        "breakdownFilter": {"breakdown": "$browser", "breakdown_type": "event"},
+    },
+    "trends_formula": {
+        "kind": "TrendsQuery",
+        "series": [PAGEVIEW, SIGNUP],
+        "dateRange": DATE_RANGE,
+        "trendsFilter": {"formula": "A / B"},
+    },
+    "funnels": {"kind": "FunnelsQuery", "series": [PAGEVIEW, SIGNUP], "dateRange": DATE_RANGE},
+    "retention": {"kind": "RetentionQuery", "retentionFilter": {"totalIntervals": 7}, "dateRange": DATE_RANGE},
+    "lifecycle": {"kind": "LifecycleQuery", "series": [PAGEVIEW], "dateRange": DATE_RANGE},
+    "stickiness": {"kind": "StickinessQuery", "series": [PAGEVIEW], "dateRange": DATE_RANGE},
+    "paths": {"kind": "PathsQuery", "pathsFilter": {"includeEventTypes": ["$pageview"]}, "dateRange": DATE_RANGE},
+    "events": {"kind": "EventsQuery", "select": ["*", "event", "person", "timestamp"], "after": "-24h"},
+    "actors": {"kind": "ActorsQuery", "select": ["person", "id", "created_at"]},
+    "web_overview": {"kind": "WebOverviewQuery", "properties": [], "dateRange": DATE_RANGE},
+    "hogql": {
+        "kind": "HogQLQuery",
+        "query": "select event, properties.$browser, person.properties.email, count() from events "
+        "where timestamp > now() - interval 7 day group by event, properties.$browser, person.properties.email",
+    },
+}
+
+
+class Command(BaseCommand):
+    help = "Time compiling HogQL queries of each query runner to ClickHouse SQL, without running them"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--team-id", type=int, required=True, help="Team to compile queries for")
+        parser.add_argument("--runs", type=int, default=20, help="Runs of each query, median is reported (default: 20)")
+        parser.add_argument("--query", type=str, action="append", choices=list(QUERIES), help="Only these queries")
+
+    def handle(self, *args, **options):
+        team = Team.objects.get(pk=options["team_id"])
+        # The database schema is loaded from Postgres, so load it once to only time the compiler itself
+        database = create_hogql_database(team.pk, team=team)
+
+        self.stdout.write(f"{'query':<20} {'parse':>10} {'resolve':>10} {'print':>10} {'total':>10}")
+        totals: list[float] = []
+        for name in options["query"] or QUERIES:
+            runner = get_query_runner(QUERIES[name], team)
+            try:
+                hogql = to_printed_hogql(runner.to_query(), team, runner.modifiers)
+            except BaseHogQLError as e:
+                self.stdout.write(self.style.ERROR(f"{name:<20} failed to build: {e}"))
+                continue
+
+            stages: dict[str, list[float]] = {"parse": [], "resolve": [], "print": []}
+            # One run to warm up caches, e.g. of the parser and of property definitions
+            for run in range(options["runs"] + 1):
+                context = HogQLContext(
+                    team_id=team.pk,
+                    team=team,
+                    database=database,
+                    enable_select_queries=True,
+                    modifiers=runner.modifiers,
+                )
+
+                start = time.perf_counter()
+                node = parse_select(hogql)
+                parsed = time.perf_counter()
+                prepared = prepare_ast_for_printing(clone_expr(node), context=context, dialect="clickhouse")
+                resolved = time.perf_counter()
+                assert prepared is not None
+                print_prepared_ast(prepared, context=context, dialect="clickhouse")
+                printed = time.perf_counter()
+
+                if run > 0:
+                    stages["parse"].append(parsed - start)
+                    stages["resolve"].append(resolved - parsed)
+                    stages["print"].append(printed - resolved)
+
+            medians = {stage: statistics.median(seconds) * 1000 for stage, seconds in stages.items()}
+            total = sum(medians.values())
+            totals.append(total)
+            self.stdout.write(
+                f"{name:<20} {medians['parse']:>8.2f}ms {medians['resolve']:>8.2f}ms "
+                f"{medians['print']:>8.2f}ms {total:>8.2f}ms"
+            )
+
+        if totals:
+            self.stdout.write(self.style.SUCCESS(f"Compiled {len(totals)} queries in {sum(totals):.2f}ms"))
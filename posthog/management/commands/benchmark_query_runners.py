@@ -0,0 +1,247 @@
+import datetime as dt
+import json
+import logging
+import statistics
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posthog.clickhouse.client import sync_execute
+from posthog.clickhouse.query_tagging import reset_query_tags, tag_queries
+from posthog.demo.matrix import MatrixManager
+from posthog.demo.products.hedgebox import HedgeboxMatrix
+from posthog.hogql.compiled_query_cache import HOGQL_COMPILED_QUERY_CACHE
+from posthog.hogql_queries.query_runner import get_query_runner
+from posthog.models import Team
+from posthog.models.utils import UUIDT
+from posthog.schema import QueryTiming
+
+logging.getLogger("kafka").setLevel(logging.ERROR)  # Hide kafka-python's logspam
+
+# The dataset is simulated up to a fixed date, and queried over fixed dates, so that runs on other days are comparable
+DATASET_NOW = dt.datetime(2024, 1, 1, tzinfo=dt.UTC)
+DATASET_DAYS_PAST = 120
+DATE_RANGE = {"date_from": "2023-12-01", "date_to": "2023-12-31"}
+PAGEVIEW = {"kind": "EventsNode", "event": "$pageview"}
+SIGNUP = {"kind": "EventsNode", "event": "signed_up"}
+UPLOAD = {"kind": "EventsNode", "event": "uploaded_file"}
+
+# Representative queries of each runner, over events of the Hedgebox demo product
+QUERIES: dict[str, dict[str, Any]] = {
+    "trends": {"kind": "TrendsQuery", "series": [{**PAGEVIEW, "math": "dau"}], "dateRange": DATE_RANGE},
+    "trends_breakdown": {
+        "kind": "TrendsQuery",
+        "series": [PAGEVIEW],
+        "dateRange": DATE_RANGE,
+        "breakdownFilter": {"breakdown": "$browser", "breakdown_type": "event"},
+    },
+    "trends_formula": {
+        "kind": "TrendsQuery",
+        "series": [UPLOAD, SIGNUP],
+        "dateRange": DATE_RANGE,
+        "trendsFilter": {"formula": "A / B"},
+    },
+    "funnels": {"kind": "FunnelsQuery", "series": [PAGEVIEW, SIGNUP, UPLOAD], "dateRange": DATE_RANGE},
+    "retention": {"kind": "RetentionQuery", "retentionFilter": {"totalIntervals": 7}, "dateRange": DATE_RANGE},
+    "lifecycle": {"kind": "LifecycleQuery", "series": [PAGEVIEW], "dateRange": DATE_RANGE},
+    "stickiness": {"kind": "StickinessQuery", "series": [PAGEVIEW], "dateRange": DATE_RANGE},
+    "paths": {"kind": "PathsQuery", "pathsFilter": {"includeEventTypes": ["$pageview"]}, "dateRange": DATE_RANGE},
+    "web_overview": {"kind": "WebOverviewQuery", "properties": [], "dateRange": DATE_RANGE},
+    "web_stats_table": {
+        "kind": "WebStatsTableQuery",
+        "breakdownBy": "Page",
+        "properties": [],
+        "includeBounceRate": True,
+        "dateRange": DATE_RANGE,
+    },
+    "web_top_clicks": {"kind": "WebTopClicksQuery", "properties": [], "dateRange": DATE_RANGE},
+    "actors": {"kind": "ActorsQuery", "select": ["person", "id", "created_at"]},
+}
+
+# Stages of `execute_hogql_query` that compile the query, as opposed to running it
+COMPILE_STAGES = {
+    "query",
+    "replace_placeholders",
+    "max_limit",
+    "compiled_query_cache",
+    "hogql",
+    "print_ast",
+    "bind_parameters",
+}
+METRICS = ["build", "compile", "clickhouse", "post_processing", "read_rows", "read_bytes"]
+TIME_METRICS = {"build", "compile", "clickhouse", "post_processing"}
+
+
+def sum_timings(timings: list[QueryTiming], stages: set[str]) -> float:
+    """Seconds spent in these stages, in any query run by the runner."""
+    total = 0.0
+    for timing in timings:
+        segments = timing.k.split("/")[1:]
+        # Only the outermost stages count, as their timings include those of the stages within them
+        if segments and segments[-1] in stages and not any(segment in stages for segment in segments[:-1]):
+            total += timing.t
+    return total
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark query runners against a reproducible demo dataset, reporting the time spent building, compiling, "
+        "running in ClickHouse and post-processing each query, and the rows and bytes ClickHouse read"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--team-id", type=int, default=None, help="Team to query, instead of the generated demo dataset"
+        )
+        parser.add_argument(
+            "--seed", type=str, default="benchmark", help="Simulation seed of the demo dataset (default: benchmark)"
+        )
+        parser.add_argument(
+            "--n-clusters", type=int, default=500, help="Number of clusters of the demo dataset (default: 500)"
+        )
+        parser.add_argument("--runs", type=int, default=5, help="Runs of each query, median is reported (default: 5)")
+        parser.add_argument("--query", type=str, action="append", choices=list(QUERIES), help="Only these queries")
+        parser.add_argument("--output", type=str, help="Save the results as JSON to this file")
+        parser.add_argument("--compare", type=str, help="Compare the results to those saved by an earlier --output")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Relative increase over --compare results that counts as a regression (default: 0.2)",
+        )
+
+    def handle(self, *args, **options):
+        team = self._get_team(options)
+        baseline = None
+        if options["compare"]:
+            with open(options["compare"]) as f:
+                baseline = json.load(f)
+            if baseline["dataset"] != self._dataset(options):
+                self.stdout.write(self.style.WARNING(f"Comparing to results of another dataset: {baseline['dataset']}"))
+
+        self.stdout.write(
+            f"{'query':<20} {'build':>10} {'compile':>10} {'clickhouse':>10} {'post-proc':>10} "
+            f"{'read rows':>12} {'read bytes':>14}"
+        )
+        results: dict[str, dict[str, float]] = {}
+        for name in options["query"] or QUERIES:
+            try:
+                results[name] = self._benchmark(QUERIES[name], team, options["runs"])
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"{name:<20} failed: {e}"))
+                continue
+            result = results[name]
+            self.stdout.write(
+                f"{name:<20} {result['build']:>8.2f}ms {result['compile']:>8.2f}ms {result['clickhouse']:>8.2f}ms "
+                f"{result['post_processing']:>8.2f}ms {result['read_rows']:>12.0f} {result['read_bytes']:>14.0f}"
+            )
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump({"dataset": self._dataset(options), "results": results}, f, indent=2)
+            self.stdout.write(f"Saved results to {options['output']}")
+
+        if baseline is not None:
+            regressions = self._compare(results, baseline["results"], options["threshold"])
+            if regressions:
+                raise CommandError(f"{len(regressions)} regressions: {', '.join(regressions)}")
+            self.stdout.write(self.style.SUCCESS("No regressions"))
+
+    def _dataset(self, options) -> dict[str, Any]:
+        if options["team_id"] is not None:
+            return {"team_id": options["team_id"]}
+        return {"seed": options["seed"], "n_clusters": options["n_clusters"], "now": DATASET_NOW.isoformat()}
+
+    def _get_team(self, options) -> Team:
+        if options["team_id"] is not None:
+            return Team.objects.get(pk=options["team_id"])
+
+        matrix = HedgeboxMatrix(
+            options["seed"],
+            now=DATASET_NOW,
+            days_past=DATASET_DAYS_PAST,
+            days_future=0,
+            n_clusters=options["n_clusters"],
+        )
+        # The same seed simulates the same data, so an account per dataset lets later benchmarks reuse it
+        _, team, _ = MatrixManager(matrix, print_steps=True).ensure_account_and_save(
+            f"benchmark-{options['seed']}-{options['n_clusters']}@posthog.com", "Benchmark", "Benchmark"
+        )
+        return team
+
+    def _benchmark(self, query: dict[str, Any], team: Team, runs: int) -> dict[str, float]:
+        samples: dict[str, list[float]] = {metric: [] for metric in METRICS}
+        # One run to warm up caches, e.g. of the parser, of the database schema and of ClickHouse
+        for run in range(runs + 1):
+            # Building the query AST is timed by itself, with another runner so that nothing it caches is reused
+            start = time.perf_counter()
+            get_query_runner(query, team).to_query()
+            build = time.perf_counter() - start
+
+            runner = get_query_runner(query, team)
+            # Time compiling every run, instead of reusing the query compiled by the previous one
+            HOGQL_COMPILED_QUERY_CACHE.clear()
+
+            benchmark_id = str(UUIDT())
+            tag_queries(kind="benchmark", id=benchmark_id)
+            try:
+                start = time.perf_counter()
+                response = runner.calculate()
+                duration = time.perf_counter() - start
+            finally:
+                reset_query_tags()
+
+            if run == 0:
+                continue
+            timings = getattr(response, "timings", None) or runner.timings.to_list()
+            compile_time = sum_timings(timings, COMPILE_STAGES)
+            clickhouse = sum_timings(timings, {"clickhouse_execute"})
+            read_rows, read_bytes = self._get_clickhouse_stats(benchmark_id)
+
+            samples["build"].append(build)
+            samples["compile"].append(compile_time)
+            samples["clickhouse"].append(clickhouse)
+            # What's left besides building, compiling and running the query is processing its results. Series of
+            # trends queries compile and run in parallel though, so the sum of their stages can exceed the duration.
+            samples["post_processing"].append(max(duration - build - compile_time - clickhouse, 0.0))
+            samples["read_rows"].append(read_rows)
+            samples["read_bytes"].append(read_bytes)
+
+        return {
+            metric: statistics.median(values) * (1000 if metric in TIME_METRICS else 1)
+            for metric, values in samples.items()
+        }
+
+    def _get_clickhouse_stats(self, benchmark_id: str) -> tuple[int, int]:
+        sync_execute("SYSTEM FLUSH LOGS")
+        rows = sync_execute(
+            """
+            SELECT sum(read_rows), sum(read_bytes)
+            FROM system.query_log
+            WHERE type = 'QueryFinish' AND JSONExtractString(log_comment, 'id') = %(benchmark_id)s
+            """,
+            {"benchmark_id": benchmark_id},
+        )
+        return rows[0][0], rows[0][1]
+
+    def _compare(
+        self, results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]], threshold: float
+    ) -> list[str]:
+        regressions: list[str] = []
+        self.stdout.write(f"\nCompared to baseline (regressions are over {threshold:.0%} worse):")
+        for name, result in results.items():
+            if name not in baseline:
+                self.stdout.write(f"{name:<20} not in baseline")
+                continue
+            changes: list[str] = []
+            for metric in METRICS:
+                before, after = baseline[name][metric], result[metric]
+                change = (after - before) / before if before else 0.0
+                text = f"{metric} {change:+.0%}"
+                if change > threshold:
+                    regressions.append(f"{name} {metric}")
+                    text = self.style.ERROR(text)
+                changes.append(text)
+            self.stdout.write(f"{name:<20} {'  '.join(changes)}")
+        return regressions
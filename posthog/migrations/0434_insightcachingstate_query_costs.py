@@ -0,0 +1,22 @@
+# Generated by Django 4.2.11 on 2024-07-05 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("posthog", "0433_dashboard_idx_dashboard_deleted_team_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="insightcachingstate",
+            name="query_duration_ms",
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name="insightcachingstate",
+            name="read_bytes",
+            field=models.BigIntegerField(null=True),
+        ),
+    ]
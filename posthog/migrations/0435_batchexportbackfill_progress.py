@@ -0,0 +1,26 @@
+# Generated by Django 4.2.11 on 2024-07-08 09:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("posthog", "0434_insightcachingstate_query_costs"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="batchexportbackfill",
+            name="finished_runs",
+            field=models.IntegerField(
+                help_text="The number of runs of this BatchExportBackfill that have finished.", null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="batchexportbackfill",
+            name="total_runs",
+            field=models.IntegerField(
+                help_text="The number of runs this BatchExportBackfill backfills, if it has an end.", null=True
+            ),
+        ),
+    ]
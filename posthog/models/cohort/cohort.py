@@ -195,6 +195,7 @@ class Cohort(models.Model):
         }
 
     def calculate_people_ch(self, pending_version: int, *, initiating_user_id: Optional[int] = None):
+        from posthog.hogql.compiled_query_cache import invalidate_compiled_queries
         from posthog.models.cohort.util import recalculate_cohortpeople
         from posthog.tasks.calculate_cohort import clear_stale_cohort
 
@@ -230,6 +231,8 @@ class Cohort(models.Model):
         Cohort.objects.filter(pk=self.pk).filter(Q(version__lt=pending_version) | Q(version__isnull=True)).update(
             version=pending_version, count=count
         )
+        # Queries compiled against the previous version would miss its people once they're cleared
+        invalidate_compiled_queries(self.team_id)
         self.refresh_from_db()
 
         logger.warn(
@@ -177,7 +177,7 @@ def save_content_to_exported_asset(exported_asset: ExportedAsset, content: bytes
     exported_asset.save(update_fields=["content"])
 
 
-def save_content_to_object_storage(exported_asset: ExportedAsset, content: bytes) -> None:
+def get_object_path(exported_asset: ExportedAsset) -> str:
     path_parts: list[str] = [
         settings.OBJECT_STORAGE_EXPORTS_FOLDER,
         exported_asset.export_format.split("/")[1],
@@ -185,7 +185,81 @@ def save_content_to_object_storage(exported_asset: ExportedAsset, content: bytes
         f"task-{exported_asset.id}",
         str(UUIDT()),
     ]
-    object_path = "/".join(path_parts)
+    return "/".join(path_parts)
+
+
+def save_content_to_object_storage(exported_asset: ExportedAsset, content: bytes) -> None:
+    object_path = get_object_path(exported_asset)
     object_storage.write(object_path, content)
     exported_asset.content_location = object_path
     exported_asset.save(update_fields=["content_location"])
+
+
+class ContentWriter:
+    """
+    Saves the content of an asset as it is written, without keeping all of it in memory.
+
+    Content is uploaded to object storage in parts as soon as there is enough of it for a part.
+    Content smaller than a part is saved with `save_content` once closed, like any other.
+    """
+
+    def __init__(self, exported_asset: ExportedAsset, part_size: Optional[int] = None) -> None:
+        self.exported_asset = exported_asset
+        self.part_size = part_size or settings.OBJECT_STORAGE_EXPORTS_PART_SIZE_BYTES
+        self.buffer = bytearray()
+        self.object_path: Optional[str] = None
+        self.upload_id: Optional[str] = None
+        self.etags: list[str] = []
+
+    def __enter__(self) -> "ContentWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, content: bytes) -> None:
+        self.buffer += content
+
+        if settings.OBJECT_STORAGE_ENABLED and len(self.buffer) >= self.part_size:
+            self._upload_part(bytes(self.buffer))
+            self.buffer.clear()
+
+    def _upload_part(self, content: bytes) -> None:
+        if self.upload_id is None:
+            self.object_path = get_object_path(self.exported_asset)
+            self.upload_id = object_storage.create_multipart_upload(self.object_path)
+            if self.upload_id is None:
+                raise ObjectStorageError("object storage is unavailable")
+
+        assert self.object_path is not None
+        etag = object_storage.upload_part(self.object_path, self.upload_id, len(self.etags) + 1, content)
+        if etag is None:
+            raise ObjectStorageError("object storage is unavailable")
+        self.etags.append(etag)
+
+    def close(self) -> None:
+        if self.upload_id is None:
+            save_content(self.exported_asset, bytes(self.buffer))
+            return
+
+        assert self.object_path is not None
+        try:
+            if self.buffer:
+                self._upload_part(bytes(self.buffer))
+            object_storage.complete_multipart_upload(self.object_path, self.upload_id, self.etags)
+        except ObjectStorageError:
+            # Unlike with `save_content`, the content is gone, so can't be saved to the asset instead
+            self.abort()
+            raise
+
+        self.exported_asset.content_location = self.object_path
+        self.exported_asset.save(update_fields=["content_location"])
+
+    def abort(self) -> None:
+        if self.upload_id is not None and self.object_path is not None:
+            object_storage.abort_multipart_upload(self.object_path, self.upload_id)
+        self.upload_id = None
+        self.buffer.clear()
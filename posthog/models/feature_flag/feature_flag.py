@@ -358,7 +358,10 @@ def delete_experiment_flags(sender, instance, **kwargs):
 
 @mutable_receiver([post_save, post_delete], sender=FeatureFlag)
 def refresh_flag_cache_on_updates(sender, instance, **kwargs):
+    from posthog.models.feature_flag.flag_evaluation_plan import invalidate_feature_flag_evaluation_plan
+
     set_feature_flags_for_team_in_cache(instance.team_id)
+    invalidate_feature_flag_evaluation_plan(instance.team_id)
 
 
 class FeatureFlagHashKeyOverride(models.Model):
@@ -0,0 +1,424 @@
+"""
+Precompiled, per-team feature flag evaluation plans.
+
+Evaluating flags for a `/decide` request used to re-derive the same structure from the flag models on every call:
+filter groups, `Filter` property parsing, variant lookup tables, regexes and numeric coercions. A plan does this once
+per team and flag set, and is kept in a per-process cache that's invalidated by `refresh_flag_cache_on_updates`.
+
+Plans are immutable and hashable. They're cached per flag set, by the IDs of the flags and a version of the team's
+flags that's shared between processes and replaced whenever a flag is saved or deleted. Looking a plan up doesn't
+need to serialize the flags, and matchers for a subset of the team's flags don't evict the plan of all of them.
+"""
+
+import json
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import Any, Optional
+
+from django.core.cache import cache
+from django.db import transaction
+from prometheus_client import Counter
+
+from posthog.models.filters import Filter
+from posthog.models.property import GroupTypeIndex
+from posthog.models.property.property import Property
+from posthog.queries.base import is_truthy_or_falsy_property_value, match_property
+
+from .feature_flag import FeatureFlag
+
+FLAG_EVALUATION_PLAN_CACHE_MAX_TEAMS = 10_000
+# Matchers can be built for subsets of a team's flags, which get plans of their own
+FLAG_EVALUATION_PLAN_CACHE_MAX_FLAG_SETS = 8
+# Bounds how long a plan compiled from flags read just before a change can outlive it
+FLAG_EVALUATION_PLAN_TTL_SECONDS = 300
+# The version is only looked up, never refreshed, so let it outlive any plan by far
+FLAGS_VERSION_TTL_SECONDS = 60 * 60 * 24 * 7
+
+FLAG_EVALUATION_PLAN_CACHE_COUNTER = Counter(
+    "flag_evaluation_plan_cache_total",
+    "Whether a compiled flag evaluation plan could be reused or had to be compiled.",
+    labelnames=["cache_hit"],
+)
+
+_COMPARISON_OPERATORS = ("gt", "gte", "lt", "lte")
+
+
+def _compare(lhs: Any, rhs: Any, operator: str) -> bool:
+    if operator == "gt":
+        return lhs > rhs
+    elif operator == "gte":
+        return lhs >= rhs
+    elif operator == "lt":
+        return lhs < rhs
+    elif operator == "lte":
+        return lhs <= rhs
+    else:
+        raise ValueError(f"Invalid operator: {operator}")
+
+
+@dataclass(frozen=True)
+class CompiledProperty:
+    """
+    A flag condition property with its value coerced ahead of time.
+    `matches` gives the same result as `match_property(property, ...)`.
+    """
+
+    key: str
+    type: str
+    operator: str
+    property: Property = field(compare=False)
+    precompiled: bool = False
+    # "exact" and "is_not"
+    exact_truthy_value: Optional[str] = None
+    exact_values: tuple[str, ...] = ()
+    # "icontains", "not_icontains", and the string side of comparisons
+    string_value: Optional[str] = None
+    # "regex" and "not_regex", None if the regex is invalid
+    regex: Optional[re.Pattern] = None
+    # comparisons
+    numeric_value: Optional[float] = None
+
+    def matches(self, override_property_values: dict[str, Any]) -> bool:
+        if not self.precompiled or self.key not in override_property_values:
+            return match_property(self.property, override_property_values)
+
+        operator = self.operator
+        override_value = override_property_values[self.key]
+
+        if operator in ("exact", "is_not"):
+            lowered_override_value = str(override_value).lower()
+            if self.exact_truthy_value is not None:
+                is_exact_match = lowered_override_value == self.exact_truthy_value
+            else:
+                is_exact_match = lowered_override_value in self.exact_values
+            return is_exact_match if operator == "exact" else not is_exact_match
+
+        if operator == "icontains":
+            return self.string_value in str(override_value).lower()
+
+        if operator == "not_icontains":
+            return self.string_value not in str(override_value).lower()
+
+        if operator in ("regex", "not_regex"):
+            if self.regex is None:
+                return False
+            match = self.regex.search(str(override_value))
+            return match is not None if operator == "regex" else match is None
+
+        # comparisons
+        if self.numeric_value is not None and override_value is not None:
+            if isinstance(override_value, str):
+                return _compare(override_value, self.string_value, operator)
+            return _compare(override_value, self.numeric_value, operator)
+        return _compare(str(override_value), self.string_value, operator)
+
+
+def compile_property(property: Property) -> CompiledProperty:
+    operator = property.operator or "exact"
+    value = property.value
+    compiled = CompiledProperty(key=property.key, type=property.type, operator=operator, property=property)
+    try:
+        if operator in ("exact", "is_not"):
+            parsed_value = property._parse_value(value)
+            if is_truthy_or_falsy_property_value(parsed_value):
+                truthy = parsed_value in (True, [True], "true", ["true"], "True", ["True"])
+                return replace(compiled, precompiled=True, exact_truthy_value=str(truthy).lower())
+            if isinstance(value, list):
+                return replace(compiled, precompiled=True, exact_values=tuple(str(val).lower() for val in value))
+            return replace(compiled, precompiled=True, exact_values=(str(value).lower(),))
+
+        if operator in ("icontains", "not_icontains"):
+            return replace(compiled, precompiled=True, string_value=str(value).lower())
+
+        if operator in ("regex", "not_regex"):
+            try:
+                regex: Optional[re.Pattern] = re.compile(str(value))
+            except re.error:
+                regex = None
+            return replace(compiled, precompiled=True, regex=regex)
+
+        if operator in _COMPARISON_OPERATORS:
+            numeric_value = None
+            try:
+                numeric_value = float(value)  # type: ignore
+            except Exception:
+                pass
+            return replace(compiled, precompiled=True, string_value=str(value), numeric_value=numeric_value)
+    except Exception:
+        # Leave anything unusual to `match_property`, so it fails (or not) exactly as before
+        pass
+
+    return compiled
+
+
+def compile_condition_properties(condition: dict) -> tuple[CompiledProperty, ...]:
+    return tuple(compile_property(property) for property in Filter(data=condition).property_groups.flat)
+
+
+def check_pure_is_not_operator_condition(condition: dict) -> bool:
+    properties = condition.get("properties", [])
+    if properties and all(prop.get("operator") in ("is_not_set", "is_not") for prop in properties):
+        return True
+    return False
+
+
+@dataclass(frozen=True)
+class CompiledFlagCondition:
+    index: int
+    rollout_percentage: Optional[float]
+    variant: Optional[str]
+    has_properties: bool
+    match_if_entity_doesnt_exist: bool
+    # None if the properties couldn't be parsed, the error is then raised again when the condition is evaluated
+    properties: Optional[tuple[CompiledProperty, ...]]
+    property_keys: frozenset[str]
+    has_cohort_property: bool
+    condition: dict = field(compare=False, hash=False)
+
+    def get_properties(self) -> tuple[CompiledProperty, ...]:
+        if self.properties is None:
+            return compile_condition_properties(self.condition)
+        return self.properties
+
+    def can_compute_locally(self, target_properties: dict[str, Any]) -> bool:
+        """
+        Whether this condition can be matched from the passed in `target_properties` alone, which is the case
+        if it has no cohort properties and all its properties are in `target_properties`.
+        """
+        if self.properties is None:
+            properties = self.get_properties()
+            return all(prop.type != "cohort" and prop.key in target_properties for prop in properties)
+        return not self.has_cohort_property and self.property_keys.issubset(target_properties)
+
+
+def compile_condition(condition: dict, index: int) -> CompiledFlagCondition:
+    has_properties = len(condition.get("properties", [])) > 0
+    properties: Optional[tuple[CompiledProperty, ...]] = ()
+    if has_properties:
+        try:
+            properties = compile_condition_properties(condition)
+        except Exception:
+            properties = None
+
+    return CompiledFlagCondition(
+        index=index,
+        rollout_percentage=condition.get("rollout_percentage"),
+        variant=condition.get("variant"),
+        has_properties=has_properties,
+        match_if_entity_doesnt_exist=check_pure_is_not_operator_condition(condition),
+        properties=properties,
+        property_keys=frozenset(prop.key for prop in properties or ()),
+        has_cohort_property=any(prop.type == "cohort" for prop in properties or ()),
+        condition=condition,
+    )
+
+
+@dataclass(frozen=True)
+class CompiledFeatureFlag:
+    key: str
+    fingerprint: tuple
+    aggregation_group_type_index: Optional[GroupTypeIndex]
+    has_super_groups: bool
+    # Stable sorted with variant overrides first, see `FeatureFlagMatcher.get_match`
+    sorted_conditions: tuple[CompiledFlagCondition, ...]
+    super_conditions: tuple[CompiledFlagCondition, ...]
+    # (value_min, value_max, variant key) tuples, None if the variants are invalid
+    variant_lookup_table: Optional[tuple[tuple[float, float, str], ...]]
+    variant_keys: frozenset[str]
+
+
+def build_variant_lookup_table(feature_flag: FeatureFlag) -> tuple[tuple[float, float, str], ...]:
+    # Define contiguous sub-domains within [0, 1].
+    # By looking up a random hash value, you can find the associated variant key.
+    # e.g. the first of two variants with 50% rollout percentage will have value_max: 0.5
+    # and the second will have value_min: 0.5 and value_max: 1.0
+    lookup_table = []
+    value_min: float = 0
+    for variant in feature_flag.variants:
+        value_max = value_min + variant["rollout_percentage"] / 100
+        lookup_table.append((value_min, value_max, variant["key"]))
+        value_min = value_max
+    return tuple(lookup_table)
+
+
+def feature_flag_fingerprint(feature_flag: FeatureFlag) -> tuple:
+    return (
+        feature_flag.pk,
+        feature_flag.key,
+        feature_flag.rollout_percentage,
+        json.dumps(feature_flag.filters, default=str),
+    )
+
+
+def compile_feature_flag(feature_flag: FeatureFlag, fingerprint: Optional[tuple] = None) -> CompiledFeatureFlag:
+    try:
+        variant_lookup_table: Optional[tuple[tuple[float, float, str], ...]] = build_variant_lookup_table(feature_flag)
+    except Exception:
+        variant_lookup_table = None
+
+    conditions = [compile_condition(condition, index) for index, condition in enumerate(feature_flag.conditions)]
+    return CompiledFeatureFlag(
+        key=feature_flag.key,
+        fingerprint=fingerprint if fingerprint is not None else feature_flag_fingerprint(feature_flag),
+        aggregation_group_type_index=feature_flag.aggregation_group_type_index,
+        has_super_groups=bool(feature_flag.filters.get("super_groups", None)),
+        sorted_conditions=tuple(sorted(conditions, key=lambda condition: 0 if condition.variant else 1)),
+        super_conditions=tuple(
+            compile_condition(condition, index) for index, condition in enumerate(feature_flag.super_conditions)
+        ),
+        variant_lookup_table=variant_lookup_table,
+        variant_keys=frozenset(variant["key"] for variant in feature_flag.variants if isinstance(variant, dict)),
+    )
+
+
+@dataclass(frozen=True)
+class FeatureFlagEvaluationPlan:
+    team_id: int
+    fingerprint: tuple
+    # None for flags that failed to compile, these are compiled again (and fail again) when evaluated
+    flags: tuple[Optional[CompiledFeatureFlag], ...]
+    flags_by_key: dict[str, CompiledFeatureFlag] = field(compare=False, hash=False)
+
+    def get(self, feature_flag: FeatureFlag) -> CompiledFeatureFlag:
+        compiled = self.flags_by_key.get(feature_flag.key)
+        if compiled is None:
+            return compile_feature_flag(feature_flag)
+        return compiled
+
+
+def compile_evaluation_plan(
+    team_id: int,
+    feature_flags: list[FeatureFlag],
+    fingerprint: Optional[tuple] = None,
+    previous_plan: Optional[FeatureFlagEvaluationPlan] = None,
+) -> FeatureFlagEvaluationPlan:
+    if fingerprint is None:
+        fingerprint = tuple(feature_flag_fingerprint(feature_flag) for feature_flag in feature_flags)
+
+    # Flags that didn't change since the previous plan don't need compiling again
+    previous_flags = {}
+    if previous_plan is not None:
+        previous_flags = {flag.fingerprint: flag for flag in previous_plan.flags if flag is not None}
+
+    flags: list[Optional[CompiledFeatureFlag]] = []
+    for feature_flag, flag_fingerprint in zip(feature_flags, fingerprint):
+        compiled: Optional[CompiledFeatureFlag] = previous_flags.get(flag_fingerprint)
+        if compiled is None:
+            try:
+                compiled = compile_feature_flag(feature_flag, flag_fingerprint)
+            except Exception:
+                compiled = None
+        flags.append(compiled)
+
+    return FeatureFlagEvaluationPlan(
+        team_id=team_id,
+        fingerprint=fingerprint,
+        flags=tuple(flags),
+        flags_by_key={flag.key: flag for flag in flags if flag is not None},
+    )
+
+
+def _flags_version_key(team_id: int) -> str:
+    return f"feature_flag_evaluation_plan_version:{team_id}"
+
+
+def get_feature_flags_version(team_id: int) -> Optional[str]:
+    """The current version of the team's flags, or None if it can't be looked up."""
+    key = _flags_version_key(team_id)
+    try:
+        version = cache.get(key)
+        if version is None:
+            # A fresh version never matches what plans were compiled under before the previous one was lost
+            cache.add(key, uuid.uuid4().hex, FLAGS_VERSION_TTL_SECONDS)
+            version = cache.get(key)
+        return version
+    except Exception:
+        return None
+
+
+def flag_set_fingerprint(team_id: int, feature_flags: list[FeatureFlag]) -> tuple:
+    """Identifies the flag set, so that plans compiled from it can be reused.
+
+    Flags are identified by their IDs, under the version of the team's flags, which is replaced whenever a flag is
+    saved or deleted. Unsaved flags, or flags of an unknown version, can only be identified by their contents.
+    """
+    version = get_feature_flags_version(team_id)
+    if version is None or any(feature_flag.pk is None for feature_flag in feature_flags):
+        return tuple(feature_flag_fingerprint(feature_flag) for feature_flag in feature_flags)
+    return (version, *(feature_flag.pk for feature_flag in feature_flags))
+
+
+class FeatureFlagEvaluationPlanCache:
+    """Thread-safe LRU cache of evaluation plans per team and flag set."""
+
+    def __init__(self, max_teams: int = FLAG_EVALUATION_PLAN_CACHE_MAX_TEAMS):
+        self.max_teams = max_teams
+        self._plans: OrderedDict[int, OrderedDict[tuple, tuple[float, FeatureFlagEvaluationPlan]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, team_id: int, feature_flags: list[FeatureFlag]) -> FeatureFlagEvaluationPlan:
+        flag_set = flag_set_fingerprint(team_id, feature_flags)
+        previous_plan = None
+        with self._lock:
+            team_plans = self._plans.get(team_id)
+            if team_plans is not None:
+                self._plans.move_to_end(team_id)
+                cached = team_plans.get(flag_set)
+                if cached is not None and time.monotonic() - cached[0] < FLAG_EVALUATION_PLAN_TTL_SECONDS:
+                    team_plans.move_to_end(flag_set)
+                    FLAG_EVALUATION_PLAN_CACHE_COUNTER.labels(cache_hit=True).inc()
+                    return cached[1]
+                if team_plans:
+                    # Flags that didn't change are reused from the plan with the most of them
+                    _, previous_plan = max(team_plans.values(), key=lambda cached: len(cached[1].flags))
+
+        FLAG_EVALUATION_PLAN_CACHE_COUNTER.labels(cache_hit=False).inc()
+        plan = compile_evaluation_plan(team_id, feature_flags, previous_plan=previous_plan)
+        if self.max_teams > 0:
+            with self._lock:
+                team_plans = self._plans.setdefault(team_id, OrderedDict())
+                self._plans.move_to_end(team_id)
+                team_plans[flag_set] = (time.monotonic(), plan)
+                team_plans.move_to_end(flag_set)
+                while len(team_plans) > FLAG_EVALUATION_PLAN_CACHE_MAX_FLAG_SETS:
+                    team_plans.popitem(last=False)
+                while len(self._plans) > self.max_teams:
+                    self._plans.popitem(last=False)
+        return plan
+
+    def invalidate(self, team_id: int) -> None:
+        with self._lock:
+            self._plans.pop(team_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._plans.clear()
+
+    def __len__(self) -> int:
+        return sum(len(team_plans) for team_plans in self._plans.values())
+
+
+FLAG_EVALUATION_PLAN_CACHE = FeatureFlagEvaluationPlanCache()
+
+
+def get_feature_flag_evaluation_plan(team_id: int, feature_flags: list[FeatureFlag]) -> FeatureFlagEvaluationPlan:
+    return FLAG_EVALUATION_PLAN_CACHE.get(team_id, feature_flags)
+
+
+def invalidate_feature_flags_version(team_id: int) -> None:
+    """Makes all processes compile the team's plans again, as no cached plan matches a new version."""
+    try:
+        cache.set(_flags_version_key(team_id), uuid.uuid4().hex, FLAGS_VERSION_TTL_SECONDS)
+    except Exception:
+        pass
+
+
+def invalidate_feature_flag_evaluation_plan(team_id: int) -> None:
+    FLAG_EVALUATION_PLAN_CACHE.invalidate(team_id)
+    invalidate_feature_flags_version(team_id)
+    # Other processes could otherwise compile plans from flags before the change is committed, under the new version
+    transaction.on_commit(lambda: invalidate_feature_flags_version(team_id))
@@ -1,4 +1,5 @@
 import hashlib
+from collections import defaultdict
 from dataclasses import dataclass
 from enum import StrEnum
 import time
@@ -24,7 +25,7 @@ from posthog.models.property import GroupTypeIndex, GroupTypeName
 from posthog.models.property.property import Property
 from posthog.models.cohort import Cohort, CohortOrEmpty
 from posthog.models.utils import execute_with_timeout
-from posthog.queries.base import match_property, properties_to_Q, sanitize_property_key
+from posthog.queries.base import properties_to_Q, sanitize_property_key
 from posthog.database_healthcheck import (
     postgres_healthcheck,
     DATABASE_FOR_FLAG_MATCHING,
@@ -37,6 +38,13 @@ from .feature_flag import (
     get_feature_flags_for_team_in_cache,
     set_feature_flags_for_team_in_cache,
 )
+from .flag_evaluation_plan import (
+    CompiledFlagCondition,
+    FeatureFlagEvaluationPlan,
+    build_variant_lookup_table,
+    check_pure_is_not_operator_condition,
+    get_feature_flag_evaluation_plan,
+)
 
 logger = structlog.get_logger(__name__)
 
@@ -44,6 +52,10 @@ __LONG_SCALE__ = float(0xFFFFFFFFFFFFFFF)
 
 FLAG_MATCHING_QUERY_TIMEOUT_MS = 300  # 300 ms. Any longer and we'll just error out.
 
+# Bulk evaluation queries cover a whole batch of distinct IDs, so they get a longer timeout than a single `/decide`
+BULK_FLAG_MATCHING_QUERY_TIMEOUT_MS = 5000
+BULK_FLAG_MATCHING_BATCH_SIZE = 1000
+
 FLAG_EVALUATION_ERROR_COUNTER = Counter(
     "flag_evaluation_error_total",
     "Failed decide requests with reason.",
@@ -142,6 +154,7 @@ class FeatureFlagMatcher:
         group_property_value_overrides: Optional[dict[str, dict[str, Union[str, int]]]] = None,
         skip_database_flags: bool = False,
         cohorts_cache: Optional[dict[int, CohortOrEmpty]] = None,
+        evaluation_plan: Optional[FeatureFlagEvaluationPlan] = None,
     ):
         if group_property_value_overrides is None:
             group_property_value_overrides = {}
@@ -165,16 +178,25 @@ class FeatureFlagMatcher:
         else:
             self.cohorts_cache = cohorts_cache
 
+        self._evaluation_plan = evaluation_plan
+
+    @property
+    def evaluation_plan(self) -> FeatureFlagEvaluationPlan:
+        if self._evaluation_plan is None:
+            self._evaluation_plan = get_feature_flag_evaluation_plan(self.cache.team_id, self.feature_flags)
+        return self._evaluation_plan
+
     def get_match(self, feature_flag: FeatureFlag) -> FeatureFlagMatch:
         # If aggregating flag by groups and relevant group type is not passed - flag is off!
         if self.hashed_identifier(feature_flag) is None:
             return FeatureFlagMatch(match=False, reason=FeatureFlagMatchReason.NO_GROUP_TYPE)
 
+        compiled_flag = self.evaluation_plan.get(feature_flag)
         highest_priority_evaluation_reason = FeatureFlagMatchReason.NO_CONDITION_MATCH
         highest_priority_index = 0
 
         # Match for boolean super condition first
-        if feature_flag.filters.get("super_groups", None):
+        if compiled_flag.has_super_groups:
             (
                 is_match,
                 super_condition_value,
@@ -189,18 +211,15 @@ class FeatureFlagMatcher:
                     payload=payload,
                 )
 
-        # Stable sort conditions with variant overrides to the top. This ensures that if overrides are present, they are
+        # Conditions are stable sorted with variant overrides to the top. This ensures that if overrides are present, they are
         # evaluated first, and the variant override is applied to the first matching condition.
-        # :TRICKY: We need to include the enumeration index before the sort so the flag evaluation reason gets the right condition index.
-        sorted_flag_conditions = sorted(
-            enumerate(feature_flag.conditions),
-            key=lambda condition_tuple: 0 if condition_tuple[1].get("variant") else 1,
-        )
-        for index, condition in sorted_flag_conditions:
+        # :TRICKY: Each condition keeps its index from before the sort so the flag evaluation reason gets the right condition index.
+        for condition in compiled_flag.sorted_conditions:
+            index = condition.index
             is_match, evaluation_reason = self.is_condition_match(feature_flag, condition, index)
             if is_match:
-                variant_override = condition.get("variant")
-                if variant_override in [variant["key"] for variant in feature_flag.variants]:
+                variant_override = condition.variant
+                if variant_override in compiled_flag.variant_keys:
                     variant = variant_override
                 else:
                     variant = self.get_matching_variant(feature_flag)
@@ -268,12 +287,10 @@ class FeatureFlagMatcher:
         )
 
     def get_matching_variant(self, feature_flag: FeatureFlag) -> Optional[str]:
-        for variant in self.variant_lookup_table(feature_flag):
-            if (
-                self.get_hash(feature_flag, salt="variant") >= variant["value_min"]
-                and self.get_hash(feature_flag, salt="variant") < variant["value_max"]
-            ):
-                return variant["key"]
+        variant_hash = self.get_hash(feature_flag, salt="variant")
+        for value_min, value_max, key in self.variant_lookup_table(feature_flag):
+            if variant_hash >= value_min and variant_hash < value_max:
+                return key
         return None
 
     def get_matching_payload(
@@ -304,10 +321,11 @@ class FeatureFlagMatcher:
             )
 
         # Evaluate if properties are empty
-        if feature_flag.super_conditions and len(feature_flag.super_conditions) > 0:
-            condition = feature_flag.super_conditions[0]
+        super_conditions = self.evaluation_plan.get(feature_flag).super_conditions
+        if super_conditions:
+            condition = super_conditions[0]
 
-            if not condition.get("properties"):
+            if not condition.condition.get("properties"):
                 is_match, evaluation_reason = self.is_condition_match(feature_flag, condition, 0)
                 return (
                     True,
@@ -320,24 +338,22 @@ class FeatureFlagMatcher:
         return False, False, FeatureFlagMatchReason.NO_CONDITION_MATCH
 
     def is_condition_match(
-        self, feature_flag: FeatureFlag, condition: dict, condition_index: int
+        self, feature_flag: FeatureFlag, condition: CompiledFlagCondition, condition_index: int
     ) -> tuple[bool, FeatureFlagMatchReason]:
-        rollout_percentage = condition.get("rollout_percentage")
-        if len(condition.get("properties", [])) > 0:
-            properties = Filter(data=condition).property_groups.flat
-            if self.can_compute_locally(properties, feature_flag.aggregation_group_type_index):
+        rollout_percentage = condition.rollout_percentage
+        if condition.has_properties:
+            target_properties = self.property_value_overrides
+            if feature_flag.aggregation_group_type_index is not None:
+                target_properties = self.group_property_value_overrides.get(
+                    self.cache.group_type_index_to_name[feature_flag.aggregation_group_type_index], {}
+                )
+            if condition.can_compute_locally(target_properties):
                 # :TRICKY: If overrides are enough to determine if a condition is a match,
                 # we can skip checking the query.
                 # This ensures match even if the person hasn't been ingested yet.
-                target_properties = self.property_value_overrides
-                if feature_flag.aggregation_group_type_index is not None:
-                    target_properties = self.group_property_value_overrides.get(
-                        self.cache.group_type_index_to_name[feature_flag.aggregation_group_type_index],
-                        {},
-                    )
-                condition_match = all(match_property(property, target_properties) for property in properties)
+                condition_match = all(property.matches(target_properties) for property in condition.get_properties())
             else:
-                match_if_entity_doesnt_exist = check_pure_is_not_operator_condition(condition)
+                match_if_entity_doesnt_exist = condition.match_if_entity_doesnt_exist
                 condition_match = self._condition_matches(
                     feature_flag,
                     condition_index,
@@ -391,17 +407,12 @@ class FeatureFlagMatcher:
 
         return self.query_conditions.get(key, False)
 
-    # Define contiguous sub-domains within [0, 1].
-    # By looking up a random hash value, you can find the associated variant key.
-    # e.g. the first of two variants with 50% rollout percentage will have value_max: 0.5
-    # and the second will have value_min: 0.5 and value_max: 1.0
-    def variant_lookup_table(self, feature_flag: FeatureFlag):
-        lookup_table = []
-        value_min = 0
-        for variant in feature_flag.variants:
-            value_max = value_min + variant["rollout_percentage"] / 100
-            lookup_table.append({"value_min": value_min, "value_max": value_max, "key": variant["key"]})
-            value_min = value_max
+    # (value_min, value_max, variant key) sub-domains within [0, 1], see `build_variant_lookup_table`
+    def variant_lookup_table(self, feature_flag: FeatureFlag) -> tuple[tuple[float, float, str], ...]:
+        lookup_table = self.evaluation_plan.get(feature_flag).variant_lookup_table
+        if lookup_table is None:
+            # The variants couldn't be compiled, so this raises the same error as before
+            return build_variant_lookup_table(feature_flag)
         return lookup_table
 
     @cached_property
@@ -431,8 +442,6 @@ class FeatureFlagMatcher:
                             [],
                         )
 
-                person_fields: list[str] = []
-
                 for existence_condition_key in self.has_pure_is_not_conditions:
                     if existence_condition_key == PERSON_KEY:
                         person_exists = person_query.exists()
@@ -447,138 +456,9 @@ class FeatureFlagMatcher:
                         group_exists = group_query.exists()
                         all_conditions[f"{ENTITY_EXISTS_PREFIX}{existence_condition_key}"] = group_exists
 
-                def condition_eval(key, condition):
-                    team_id = self.feature_flags[0].team_id
-                    expr = None
-                    annotate_query = True
-                    nonlocal person_query
-
-                    property_list = Filter(data=condition).property_groups.flat
-                    properties_with_math_operators = get_all_properties_with_math_operators(
-                        property_list, self.cohorts_cache, team_id
-                    )
-
-                    if len(condition.get("properties", {})) > 0:
-                        # Feature Flags don't support OR filtering yet
-                        target_properties = self.property_value_overrides
-                        if feature_flag.aggregation_group_type_index is not None:
-                            if feature_flag.aggregation_group_type_index not in self.cache.group_type_index_to_name:
-                                target_properties = {}
-                            else:
-                                target_properties = self.group_property_value_overrides.get(
-                                    self.cache.group_type_index_to_name[feature_flag.aggregation_group_type_index],
-                                    {},
-                                )
-
-                        expr = properties_to_Q(
-                            team_id,
-                            property_list,
-                            override_property_values=target_properties,
-                            cohorts_cache=self.cohorts_cache,
-                            using_database=DATABASE_FOR_FLAG_MATCHING,
-                        )
-
-                        # TRICKY: Due to property overrides for cohorts, we sometimes shortcircuit the condition check.
-                        # In that case, the expression is either an explicit True or explicit False, or multiple conditions.
-                        # We can skip going to the database in explicit True|False conditions. This is important
-                        # as it allows resolving flags correctly for non-ingested persons.
-                        # However, this doesn't work for the multiple condition case (when expr has multiple Q objects),
-                        # but it's better than nothing.
-                        # TODO: A proper fix would be to handle cohorts with property overrides before we get to this point.
-                        # Unskip test test_complex_cohort_filter_with_override_properties when we fix this.
-                        if expr == Q(pk__isnull=False):
-                            all_conditions[key] = True
-                            annotate_query = False
-                        elif expr == Q(pk__isnull=True):
-                            all_conditions[key] = False
-                            annotate_query = False
-
-                    if annotate_query:
-                        if feature_flag.aggregation_group_type_index is None:
-                            # :TRICKY: Flag matching depends on type of property when doing >, <, >=, <= comparisons.
-                            # This requires a generated field to query in Q objects, which sadly don't allow inlining fields,
-                            # hence we need to annotate the query here, even though these annotations are used much deeper,
-                            # in properties_to_q, in empty_or_null_with_value_q
-                            # These need to come in before the expr so they're available to use inside the expr.
-                            # Same holds for the group queries below.
-                            type_property_annotations = {
-                                prop_key: Func(F(prop_field), function="JSONB_TYPEOF", output_field=CharField())
-                                for prop_key, prop_field in properties_with_math_operators
-                            }
-                            person_query = person_query.annotate(
-                                **type_property_annotations,
-                                **{
-                                    key: ExpressionWrapper(
-                                        expr if expr else RawSQL("true", []),
-                                        output_field=BooleanField(),
-                                    ),
-                                },
-                            )
-                            person_fields.append(key)
-                        else:
-                            if feature_flag.aggregation_group_type_index not in group_query_per_group_type_mapping:
-                                # ignore flags that didn't have the right groups passed in
-                                return
-                            (
-                                group_query,
-                                group_fields,
-                            ) = group_query_per_group_type_mapping[feature_flag.aggregation_group_type_index]
-                            type_property_annotations = {
-                                prop_key: Func(F(prop_field), function="JSONB_TYPEOF", output_field=CharField())
-                                for prop_key, prop_field in properties_with_math_operators
-                            }
-                            group_query = group_query.annotate(
-                                **type_property_annotations,
-                                **{
-                                    key: ExpressionWrapper(
-                                        expr if expr else RawSQL("true", []),
-                                        output_field=BooleanField(),
-                                    )
-                                },
-                            )
-                            group_fields.append(key)
-                            group_query_per_group_type_mapping[feature_flag.aggregation_group_type_index] = (
-                                group_query,
-                                group_fields,
-                            )
-
-                # only fetch all cohorts if not passed in any cached cohorts
-                if not self.cohorts_cache and any(feature_flag.uses_cohorts for feature_flag in self.feature_flags):
-                    all_cohorts = {
-                        cohort.pk: cohort
-                        for cohort in Cohort.objects.using(DATABASE_FOR_FLAG_MATCHING).filter(
-                            team_id=team_id, deleted=False
-                        )
-                    }
-                    self.cohorts_cache.update(all_cohorts)
-                # release conditions
-                for feature_flag in self.feature_flags:
-                    # super release conditions
-                    if feature_flag.super_conditions and len(feature_flag.super_conditions) > 0:
-                        condition = feature_flag.super_conditions[0]
-                        prop_key = (condition.get("properties") or [{}])[0].get("key")
-                        if prop_key:
-                            key = f"flag_{feature_flag.pk}_super_condition"
-                            condition_eval(key, condition)
-
-                            is_set_key = f"flag_{feature_flag.pk}_super_condition_is_set"
-                            is_set_condition = {
-                                "properties": [
-                                    {
-                                        "key": prop_key,
-                                        "operator": "is_set",
-                                    }
-                                ]
-                            }
-                            condition_eval(is_set_key, is_set_condition)
-
-                    with start_span(
-                        op="parse_feature_flag_conditions",
-                        description=f"feature_flag={feature_flag.pk} key={feature_flag.key}",
-                    ):
-                        for index, condition in enumerate(feature_flag.conditions):
-                            key = f"flag_{feature_flag.pk}_condition_{index}"
-                            condition_eval(key, condition)
+                person_query, person_fields = self._annotate_condition_queries(
+                    person_query, group_query_per_group_type_mapping, all_conditions
+                )
 
                 if len(person_fields) > 0:
                     person_query = person_query.values(*person_fields)
@@ -605,6 +485,155 @@ class FeatureFlagMatcher:
             # Covers all cases like invalid JSON, invalid operator, invalid property name, invalid group input format, etc.
             raise
 
+    def _annotate_condition_queries(
+        self,
+        person_query: QuerySet,
+        group_query_per_group_type_mapping: dict[GroupTypeIndex, tuple[QuerySet, list[str]]],
+        all_conditions: dict,
+    ) -> tuple[QuerySet, list[str]]:
+        """
+        Annotates the person and group querysets with one boolean field per flag condition.
+        Conditions that can be decided without going to the database are written straight into `all_conditions`.
+
+        Returns the annotated person queryset and the names of its condition fields.
+        The group querysets are updated in place in `group_query_per_group_type_mapping`.
+        """
+        team_id = self.feature_flags[0].team_id
+        person_fields: list[str] = []
+
+        def condition_eval(key, condition):
+            team_id = self.feature_flags[0].team_id
+            expr = None
+            annotate_query = True
+            nonlocal person_query
+
+            property_list = Filter(data=condition).property_groups.flat
+            properties_with_math_operators = get_all_properties_with_math_operators(
+                property_list, self.cohorts_cache, team_id
+            )
+
+            if len(condition.get("properties", {})) > 0:
+                # Feature Flags don't support OR filtering yet
+                target_properties = self.property_value_overrides
+                if feature_flag.aggregation_group_type_index is not None:
+                    if feature_flag.aggregation_group_type_index not in self.cache.group_type_index_to_name:
+                        target_properties = {}
+                    else:
+                        target_properties = self.group_property_value_overrides.get(
+                            self.cache.group_type_index_to_name[feature_flag.aggregation_group_type_index],
+                            {},
+                        )
+
+                expr = properties_to_Q(
+                    team_id,
+                    property_list,
+                    override_property_values=target_properties,
+                    cohorts_cache=self.cohorts_cache,
+                    using_database=DATABASE_FOR_FLAG_MATCHING,
+                )
+
+                # TRICKY: Due to property overrides for cohorts, we sometimes shortcircuit the condition check.
+                # In that case, the expression is either an explicit True or explicit False, or multiple conditions.
+                # We can skip going to the database in explicit True|False conditions. This is important
+                # as it allows resolving flags correctly for non-ingested persons.
+                # However, this doesn't work for the multiple condition case (when expr has multiple Q objects),
+                # but it's better than nothing.
+                # TODO: A proper fix would be to handle cohorts with property overrides before we get to this point.
+                # Unskip test test_complex_cohort_filter_with_override_properties when we fix this.
+                if expr == Q(pk__isnull=False):
+                    all_conditions[key] = True
+                    annotate_query = False
+                elif expr == Q(pk__isnull=True):
+                    all_conditions[key] = False
+                    annotate_query = False
+
+            if annotate_query:
+                if feature_flag.aggregation_group_type_index is None:
+                    # :TRICKY: Flag matching depends on type of property when doing >, <, >=, <= comparisons.
+                    # This requires a generated field to query in Q objects, which sadly don't allow inlining fields,
+                    # hence we need to annotate the query here, even though these annotations are used much deeper,
+                    # in properties_to_q, in empty_or_null_with_value_q
+                    # These need to come in before the expr so they're available to use inside the expr.
+                    # Same holds for the group queries below.
+                    type_property_annotations = {
+                        prop_key: Func(F(prop_field), function="JSONB_TYPEOF", output_field=CharField())
+                        for prop_key, prop_field in properties_with_math_operators
+                    }
+                    person_query = person_query.annotate(
+                        **type_property_annotations,
+                        **{
+                            key: ExpressionWrapper(
+                                expr if expr else RawSQL("true", []),
+                                output_field=BooleanField(),
+                            ),
+                        },
+                    )
+                    person_fields.append(key)
+                else:
+                    if feature_flag.aggregation_group_type_index not in group_query_per_group_type_mapping:
+                        # ignore flags that didn't have the right groups passed in
+                        return
+                    (
+                        group_query,
+                        group_fields,
+                    ) = group_query_per_group_type_mapping[feature_flag.aggregation_group_type_index]
+                    type_property_annotations = {
+                        prop_key: Func(F(prop_field), function="JSONB_TYPEOF", output_field=CharField())
+                        for prop_key, prop_field in properties_with_math_operators
+                    }
+                    group_query = group_query.annotate(
+                        **type_property_annotations,
+                        **{
+                            key: ExpressionWrapper(
+                                expr if expr else RawSQL("true", []),
+                                output_field=BooleanField(),
+                            )
+                        },
+                    )
+                    group_fields.append(key)
+                    group_query_per_group_type_mapping[feature_flag.aggregation_group_type_index] = (
+                        group_query,
+                        group_fields,
+                    )
+
+        # only fetch all cohorts if not passed in any cached cohorts
+        if not self.cohorts_cache and any(feature_flag.uses_cohorts for feature_flag in self.feature_flags):
+            all_cohorts = {
+                cohort.pk: cohort
+                for cohort in Cohort.objects.using(DATABASE_FOR_FLAG_MATCHING).filter(team_id=team_id, deleted=False)
+            }
+            self.cohorts_cache.update(all_cohorts)
+        # release conditions
+        for feature_flag in self.feature_flags:
+            # super release conditions
+            if feature_flag.super_conditions and len(feature_flag.super_conditions) > 0:
+                condition = feature_flag.super_conditions[0]
+                prop_key = (condition.get("properties") or [{}])[0].get("key")
+                if prop_key:
+                    key = f"flag_{feature_flag.pk}_super_condition"
+                    condition_eval(key, condition)
+
+                    is_set_key = f"flag_{feature_flag.pk}_super_condition_is_set"
+                    is_set_condition = {
+                        "properties": [
+                            {
+                                "key": prop_key,
+                                "operator": "is_set",
+                            }
+                        ]
+                    }
+                    condition_eval(is_set_key, is_set_condition)
+
+            with start_span(
+                op="parse_feature_flag_conditions",
+                description=f"feature_flag={feature_flag.pk} key={feature_flag.key}",
+            ):
+                for index, condition in enumerate(feature_flag.conditions):
+                    key = f"flag_{feature_flag.pk}_condition_{index}"
+                    condition_eval(key, condition)
+
+        return person_query, person_fields
+
     def hashed_identifier(self, feature_flag: FeatureFlag) -> Optional[str]:
         """
         If aggregating by people, returns distinct_id.
@@ -635,25 +664,6 @@ class FeatureFlagMatcher:
         hash_val = int(hashlib.sha1(hash_key.encode("utf-8")).hexdigest()[:15], 16)
         return hash_val / __LONG_SCALE__
 
-    def can_compute_locally(
-        self,
-        properties: list[Property],
-        group_type_index: Optional[GroupTypeIndex] = None,
-    ) -> bool:
-        target_properties = self.property_value_overrides
-        if group_type_index is not None:
-            target_properties = self.group_property_value_overrides.get(
-                self.cache.group_type_index_to_name[group_type_index], {}
-            )
-        for property in properties:
-            # can't locally compute if property is a cohort
-            # need to atleast fetch the cohort
-            if property.type == "cohort":
-                return False
-            if property.key not in target_properties:
-                return False
-        return True
-
     def get_highest_priority_match_evaluation(
         self,
         current_match: FeatureFlagMatchReason,
@@ -670,12 +680,16 @@ class FeatureFlagMatcher:
     def has_pure_is_not_conditions(self) -> set[Literal["person"] | GroupTypeIndex]:
         entity_to_condition_check: set[Literal["person"] | GroupTypeIndex] = set()
         for feature_flag in self.feature_flags:
-            for condition in feature_flag.conditions:
-                if check_pure_is_not_operator_condition(condition):
-                    if feature_flag.aggregation_group_type_index is not None:
-                        entity_to_condition_check.add(feature_flag.aggregation_group_type_index)
-                    else:
-                        entity_to_condition_check.add("person")
+            compiled_flag = self.evaluation_plan.flags_by_key.get(feature_flag.key)
+            if compiled_flag is not None:
+                conditions = [condition.match_if_entity_doesnt_exist for condition in compiled_flag.sorted_conditions]
+            else:
+                conditions = [check_pure_is_not_operator_condition(condition) for condition in feature_flag.conditions]
+            if any(conditions):
+                if feature_flag.aggregation_group_type_index is not None:
+                    entity_to_condition_check.add(feature_flag.aggregation_group_type_index)
+                else:
+                    entity_to_condition_check.add("person")
 
         return entity_to_condition_check
 
@@ -907,6 +921,334 @@ def get_all_feature_flags(
     )
 
 
+def get_feature_flag_hash_key_overrides_bulk(
+    team_id: int,
+    distinct_ids: list[str],
+    using_database: str = "default",
+) -> dict[str, dict[str, str]]:
+    """Same as `get_feature_flag_hash_key_overrides(team_id, [distinct_id])` for each distinct ID, in two queries."""
+    person_id_to_distinct_ids: dict[int, list[str]] = defaultdict(list)
+    for person_id, distinct_id in (
+        PersonDistinctId.objects.using(using_database)
+        .filter(distinct_id__in=distinct_ids, team_id=team_id)
+        .values_list("person_id", "distinct_id")
+    ):
+        person_id_to_distinct_ids[person_id].append(distinct_id)
+
+    feature_flag_to_key_overrides: dict[str, dict[str, str]] = {distinct_id: {} for distinct_id in distinct_ids}
+    for feature_flag, override, person_id in (
+        FeatureFlagHashKeyOverride.objects.using(using_database)
+        .filter(person_id__in=list(person_id_to_distinct_ids.keys()), team_id=team_id)
+        .values_list("feature_flag_key", "hash_key", "person_id")
+    ):
+        for distinct_id in person_id_to_distinct_ids[person_id]:
+            feature_flag_to_key_overrides[distinct_id][feature_flag] = override
+
+    return feature_flag_to_key_overrides
+
+
+def _condition_property_keys(
+    properties: list[Property], cohorts_cache: dict[int, CohortOrEmpty], team_id: int
+) -> tuple[set[str], bool]:
+    """Returns the keys of all properties in the condition, including those nested in cohorts, and whether any cohorts are used."""
+    keys: set[str] = set()
+    uses_cohorts = False
+    for prop in properties:
+        if prop.type == "cohort":
+            uses_cohorts = True
+            cohort_id = int(cast(Union[str, int], prop.value))
+            if cohorts_cache.get(cohort_id) is None:
+                queried_cohort = (
+                    Cohort.objects.using(DATABASE_FOR_FLAG_MATCHING)
+                    .filter(pk=cohort_id, team_id=team_id, deleted=False)
+                    .first()
+                )
+                cohorts_cache[cohort_id] = queried_cohort or ""
+            cohort = cohorts_cache[cohort_id]
+            if cohort:
+                cohort_keys, _ = _condition_property_keys(cohort.properties.flat, cohorts_cache, team_id)
+                keys.update(cohort_keys)
+        else:
+            keys.add(prop.key)
+    return keys, uses_cohorts
+
+
+def _flag_conditions_depend_on_identifier(
+    feature_flag: FeatureFlag, cohorts_cache: dict[int, CohortOrEmpty], team_id: int
+) -> bool:
+    """
+    Whether the flag's condition queries differ per distinct ID.
+
+    `get_all_feature_flags` always overrides `distinct_id` for persons and `$group_key` for groups, and overridden
+    properties are inlined into the condition query. Conditions using only the overridden property are decided
+    locally, without the query, so they don't count.
+    """
+    override_key = "distinct_id" if feature_flag.aggregation_group_type_index is None else "$group_key"
+
+    if feature_flag.super_conditions and len(feature_flag.super_conditions) > 0:
+        properties = Filter(data=feature_flag.super_conditions[0]).property_groups.flat
+        keys, _ = _condition_property_keys(properties, cohorts_cache, team_id)
+        if override_key in keys:
+            return True
+
+    for condition in feature_flag.conditions:
+        properties = Filter(data=condition).property_groups.flat
+        keys, uses_cohorts = _condition_property_keys(properties, cohorts_cache, team_id)
+        if override_key in keys and (uses_cohorts or keys != {override_key}):
+            return True
+    return False
+
+
+class BulkQueryConditions:
+    """
+    Runs the condition queries of `FeatureFlagMatcher.query_conditions` once for a whole batch of distinct IDs,
+    with one set-based query for persons and one per group type, instead of one query per distinct ID.
+
+    Flags whose condition queries differ per distinct ID are left out and listed in `identifier_dependent_flags`.
+    """
+
+    def __init__(
+        self,
+        feature_flags: list[FeatureFlag],
+        team_id: int,
+        distinct_ids: list[str],
+        groups_by_id: dict[str, dict[GroupTypeName, str]],
+        cache: FlagsMatcherCache,
+        cohorts_cache: dict[int, CohortOrEmpty],
+    ):
+        self.feature_flags = feature_flags
+        self.team_id = team_id
+        self.distinct_ids = distinct_ids
+        self.groups_by_id = groups_by_id
+        self.cache = cache
+        self.cohorts_cache = cohorts_cache
+
+        self.identifier_dependent_flags: list[FeatureFlag] = []
+        self._fetched = False
+        self._error: Optional[Exception] = None
+        self._has_pure_is_not_conditions: set[Literal["person"] | GroupTypeIndex] = set()
+        self._constant_conditions: dict[str, bool] = {}
+        self._existing_distinct_ids: set[str] = set()
+        self._existing_group_keys: dict[GroupTypeIndex, set[str]] = {}
+        self._person_conditions: dict[str, dict[str, bool]] = {}
+        self._group_conditions: dict[tuple[GroupTypeIndex, str], dict[str, bool]] = {}
+
+    def for_distinct_id(self, distinct_id: str, groups: dict[GroupTypeName, str]) -> dict[str, bool]:
+        if not self._fetched:
+            self._fetched = True
+            try:
+                self._fetch()
+            except Exception as err:
+                self._error = err
+        if self._error is not None:
+            raise self._error
+
+        all_conditions: dict[str, bool] = {}
+        group_keys: list[tuple[GroupTypeIndex, str]] = []
+        for group_type, group_key in groups.items():
+            group_type_index = self.cache.group_types_to_indexes.get(group_type)
+            if group_type_index is not None:
+                group_keys.append((group_type_index, group_key))
+
+        if PERSON_KEY in self._has_pure_is_not_conditions:
+            all_conditions[f"{ENTITY_EXISTS_PREFIX}{PERSON_KEY}"] = distinct_id in self._existing_distinct_ids
+        for group_type_index, group_key in group_keys:
+            if group_type_index in self._has_pure_is_not_conditions:
+                all_conditions[f"{ENTITY_EXISTS_PREFIX}{group_type_index}"] = (
+                    group_key in self._existing_group_keys[group_type_index]
+                )
+
+        all_conditions.update(self._constant_conditions)
+        all_conditions.update(self._person_conditions.get(distinct_id, {}))
+        for group_type_index, group_key in group_keys:
+            all_conditions.update(self._group_conditions.get((group_type_index, group_key), {}))
+        return all_conditions
+
+    def _fetch(self) -> None:
+        with execute_with_timeout(BULK_FLAG_MATCHING_QUERY_TIMEOUT_MS, DATABASE_FOR_FLAG_MATCHING):
+            if not self.cohorts_cache and any(feature_flag.uses_cohorts for feature_flag in self.feature_flags):
+                self.cohorts_cache.update(
+                    {
+                        cohort.pk: cohort
+                        for cohort in Cohort.objects.using(DATABASE_FOR_FLAG_MATCHING).filter(
+                            team_id=self.team_id, deleted=False
+                        )
+                    }
+                )
+
+            shared_flags = []
+            for feature_flag in self.feature_flags:
+                if _flag_conditions_depend_on_identifier(feature_flag, self.cohorts_cache, self.team_id):
+                    self.identifier_dependent_flags.append(feature_flag)
+                else:
+                    shared_flags.append(feature_flag)
+            if not shared_flags:
+                return
+
+            # Without overrides, the matcher builds the condition expressions shared by all distinct IDs
+            template = FeatureFlagMatcher(shared_flags, "", cache=self.cache, cohorts_cache=self.cohorts_cache)
+            self._has_pure_is_not_conditions = template.has_pure_is_not_conditions
+
+            person_query: QuerySet = Person.objects.using(DATABASE_FOR_FLAG_MATCHING).filter(
+                team_id=self.team_id,
+                persondistinctid__distinct_id__in=self.distinct_ids,
+                persondistinctid__team_id=self.team_id,
+            )
+            group_keys_per_group_type_index: dict[GroupTypeIndex, set[str]] = defaultdict(set)
+            for distinct_id in self.distinct_ids:
+                for group_type, group_key in self.groups_by_id.get(distinct_id, {}).items():
+                    group_type_index = self.cache.group_types_to_indexes.get(group_type)
+                    if group_type_index is not None:
+                        group_keys_per_group_type_index[group_type_index].add(group_key)
+            basic_group_query: QuerySet = Group.objects.using(DATABASE_FOR_FLAG_MATCHING).filter(team_id=self.team_id)
+            group_query_per_group_type_mapping: dict[GroupTypeIndex, tuple[QuerySet, list[str]]] = {
+                group_type_index: (
+                    basic_group_query.filter(group_type_index=group_type_index, group_key__in=list(group_keys)),
+                    [],
+                )
+                for group_type_index, group_keys in group_keys_per_group_type_index.items()
+            }
+
+            for existence_condition_key in self._has_pure_is_not_conditions:
+                if existence_condition_key == PERSON_KEY:
+                    self._existing_distinct_ids = set(
+                        person_query.values_list("persondistinctid__distinct_id", flat=True)
+                    )
+                elif existence_condition_key in group_query_per_group_type_mapping:
+                    group_type_index = cast(GroupTypeIndex, existence_condition_key)
+                    group_query, _ = group_query_per_group_type_mapping[group_type_index]
+                    self._existing_group_keys[group_type_index] = set(group_query.values_list("group_key", flat=True))
+
+            person_query, person_fields = template._annotate_condition_queries(
+                person_query, group_query_per_group_type_mapping, self._constant_conditions
+            )
+
+            if len(person_fields) > 0:
+                for row in person_query.values("persondistinctid__distinct_id", *person_fields):
+                    self._person_conditions[row.pop("persondistinctid__distinct_id")] = row
+
+            for group_type_index, (group_query, group_fields) in group_query_per_group_type_mapping.items():
+                if len(group_fields) > 0:
+                    for row in group_query.values("group_key", *group_fields):
+                        self._group_conditions[(group_type_index, row.pop("group_key"))] = row
+
+
+class BulkFeatureFlagMatcher(FeatureFlagMatcher):
+    """
+    `FeatureFlagMatcher` for one distinct ID of a batch.
+    Condition query results come from the batch's `BulkQueryConditions`.
+    """
+
+    def __init__(self, *args, bulk_query_conditions: BulkQueryConditions, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.bulk_query_conditions = bulk_query_conditions
+        self._query_conditions: Optional[dict[str, bool]] = None
+
+    @property  # type: ignore[override]
+    def query_conditions(self) -> dict[str, bool]:
+        if self._query_conditions is None:
+            try:
+                all_conditions = self.bulk_query_conditions.for_distinct_id(self.distinct_id, self.groups)
+                if self.bulk_query_conditions.identifier_dependent_flags:
+                    matcher = FeatureFlagMatcher(
+                        self.bulk_query_conditions.identifier_dependent_flags,
+                        self.distinct_id,
+                        self.groups,
+                        self.cache,
+                        self.hash_key_overrides,
+                        self.property_value_overrides,
+                        self.group_property_value_overrides,
+                        self.skip_database_flags,
+                        self.cohorts_cache,
+                        self.evaluation_plan,
+                    )
+                    all_conditions = {**all_conditions, **matcher.query_conditions}
+            except DatabaseError:
+                self.failed_to_fetch_conditions = True
+                raise
+            self._query_conditions = all_conditions
+        return self._query_conditions
+
+
+# Return feature flags for many distinct IDs at once
+def get_all_feature_flags_bulk(
+    team_id: int,
+    distinct_ids: list[str],
+    groups_by_id: Optional[dict[str, dict[GroupTypeName, str]]] = None,
+) -> dict[str, tuple[dict[str, Union[str, bool]], dict[str, dict], dict[str, object], bool]]:
+    """
+    Returns the same as `get_all_feature_flags(team_id, distinct_id, groups_by_id[distinct_id])`, for each distinct ID.
+
+    Person and group conditions are evaluated for batches of distinct IDs with a few set-based queries,
+    instead of one query per distinct ID. As there's no `hash_key_override`, no hash key overrides are written.
+    """
+    if groups_by_id is None:
+        groups_by_id = {}
+
+    all_feature_flags = get_feature_flags_for_team_in_cache(team_id)
+    cache_hit = True
+    if all_feature_flags is None:
+        cache_hit = False
+        all_feature_flags = set_feature_flags_for_team_in_cache(team_id)
+
+    FLAG_CACHE_HIT_COUNTER.labels(team_id=label_for_team_id_to_track(team_id), cache_hit=cache_hit).inc()
+
+    if not all_feature_flags:
+        return {distinct_id: ({}, {}, {}, False) for distinct_id in distinct_ids}
+
+    flags_have_experience_continuity_enabled = any(
+        feature_flag.ensure_experience_continuity for feature_flag in all_feature_flags
+    )
+    is_database_alive = (not settings.DECIDE_SKIP_POSTGRES_FLAGS) and postgres_healthcheck.is_connected()
+
+    cache = FlagsMatcherCache(team_id)
+    cohorts_cache: dict[int, CohortOrEmpty] = {}
+    evaluation_plan = get_feature_flag_evaluation_plan(team_id, all_feature_flags)
+    results = {}
+    for batch_start in range(0, len(distinct_ids), BULK_FLAG_MATCHING_BATCH_SIZE):
+        batch = distinct_ids[batch_start : batch_start + BULK_FLAG_MATCHING_BATCH_SIZE]
+        skip_database_flags = not is_database_alive
+        hash_key_overrides: dict[str, dict[str, str]] = {}
+
+        if is_database_alive and flags_have_experience_continuity_enabled:
+            with start_span(op="with_experience_continuity_read_path"):
+                try:
+                    with execute_with_timeout(BULK_FLAG_MATCHING_QUERY_TIMEOUT_MS, DATABASE_FOR_FLAG_MATCHING):
+                        hash_key_overrides = get_feature_flag_hash_key_overrides_bulk(
+                            team_id, batch, DATABASE_FOR_FLAG_MATCHING
+                        )
+                except Exception as e:
+                    handle_feature_flag_exception(
+                        e, f"[Feature Flags] Error fetching hash key overrides from {DATABASE_FOR_FLAG_MATCHING} db"
+                    )
+                    # Same as for a single distinct ID, treat this as if there are no experience continuity flags
+                    skip_database_flags = True
+
+        bulk_query_conditions = BulkQueryConditions(
+            all_feature_flags, team_id, batch, groups_by_id, cache, cohorts_cache
+        )
+        for distinct_id in batch:
+            groups = groups_by_id.get(distinct_id, {})
+            property_value_overrides, group_property_value_overrides = add_local_person_and_group_properties(
+                distinct_id, groups, {}, {}
+            )
+            results[distinct_id] = BulkFeatureFlagMatcher(
+                all_feature_flags,
+                distinct_id,
+                groups,
+                cache,
+                hash_key_overrides.get(distinct_id, {}),
+                property_value_overrides,
+                group_property_value_overrides,
+                skip_database_flags,
+                cohorts_cache,
+                evaluation_plan,
+                bulk_query_conditions=bulk_query_conditions,
+            ).get_matches()
+
+    return results
+
+
 def set_feature_flag_hash_key_overrides(team_id: int, distinct_ids: list[str], hash_key_override: str) -> bool:
     # As a product decision, the first override wins, i.e consistency matters for the first walkthrough.
     # Thus, we don't need to do upserts here.
@@ -1058,13 +1400,6 @@ def add_local_person_and_group_properties(distinct_id, groups, person_properties
     return all_person_properties, all_group_properties
 
 
-def check_pure_is_not_operator_condition(condition: dict) -> bool:
-    properties = condition.get("properties", [])
-    if properties and all(prop.get("operator") in ("is_not_set", "is_not") for prop in properties):
-        return True
-    return False
-
-
 def check_flag_evaluation_query_is_ok(feature_flag: FeatureFlag, team_id: int) -> bool:
     # TRICKY: There are some cases where the regex is valid re2 syntax, but postgresql doesn't like it.
     # This function tries to validate such cases. See `test_cant_create_flag_with_data_that_fails_to_query` for an example.
@@ -43,6 +43,10 @@ class InsightCachingState(UUIDModel):
     last_refresh_queued_at: models.DateTimeField = models.DateTimeField(blank=True, null=True)
     refresh_attempt: models.IntegerField = models.IntegerField(null=False, default=0)
 
+    # ClickHouse cost of the latest refreshes, recorded from `system.query_log`
+    query_duration_ms: models.IntegerField = models.IntegerField(null=True)
+    read_bytes: models.BigIntegerField = models.BigIntegerField(null=True)
+
     created_at: models.DateTimeField = models.DateTimeField(auto_now_add=True)
     updated_at: models.DateTimeField = models.DateTimeField(auto_now=True)
 
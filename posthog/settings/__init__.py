@@ -111,6 +111,34 @@ IN_UNIT_TESTING: bool = get_from_env("IN_UNIT_TESTING", False, type_cast=str_to_
 
 HOGQL_INCREASED_MAX_EXECUTION_TIME: int = get_from_env("HOGQL_INCREASED_MAX_EXECUTION_TIME", 600, type_cast=int)
 
+# Reuse each team's HogQL database schema between queries, until one of the models it's built from changes.
+# Changes made without Django signals (e.g. group types created during ingestion) are picked up after the TTL
+HOGQL_DATABASE_CACHE: bool = get_from_env("HOGQL_DATABASE_CACHE", not TEST, type_cast=str_to_bool)
+HOGQL_DATABASE_CACHE_TTL_SECONDS: int = get_from_env("HOGQL_DATABASE_CACHE_TTL_SECONDS", 300, type_cast=int)
+
+# Reuse compiled HogQL queries until the team's schema, property definitions, cohorts or actions change.
+# Changes made without Django signals (e.g. property definitions created during ingestion) are picked up after the TTL
+HOGQL_COMPILED_QUERY_CACHE: bool = get_from_env("HOGQL_COMPILED_QUERY_CACHE", not TEST, type_cast=str_to_bool)
+HOGQL_COMPILED_QUERY_CACHE_TTL_SECONDS: int = get_from_env("HOGQL_COMPILED_QUERY_CACHE_TTL_SECONDS", 300, type_cast=int)
+
+# Stream query results from ClickHouse as Arrow for the query runners that support it
+HOGQL_ARROW_RESULTS: bool = get_from_env("HOGQL_ARROW_RESULTS", False, type_cast=str_to_bool)
+
+# Write cached query responses in the binary format, with lazily decoded results. They're read either way, so this
+# should only be turned on once everything reading the cache can read the binary format
+QUERY_CACHE_BINARY_FORMAT: bool = get_from_env("QUERY_CACHE_BINARY_FORMAT", False, type_cast=str_to_bool)
+
+# Concurrent runs of the same query wait for the first one's result instead of calculating it in parallel.
+# The lease bounds how long they wait, in case the first run never finishes
+QUERY_COALESCING_ENABLED: bool = get_from_env("QUERY_COALESCING_ENABLED", True, type_cast=str_to_bool)
+QUERY_COALESCING_LEASE_SECONDS: int = get_from_env("QUERY_COALESCING_LEASE_SECONDS", 180, type_cast=int)
+
+# Refresh stale trends by only recomputing the intervals after the previous refresh, minus the ingestion lag
+TRENDS_INCREMENTAL_REFRESH: bool = get_from_env("TRENDS_INCREMENTAL_REFRESH", False, type_cast=str_to_bool)
+TRENDS_INCREMENTAL_REFRESH_INGESTION_LAG_MINUTES: int = get_from_env(
+    "TRENDS_INCREMENTAL_REFRESH_INGESTION_LAG_MINUTES", 60, type_cast=int
+)
+
 # Extend and override these settings with EE's ones
 if "ee.apps.EnterpriseConfig" in INSTALLED_APPS:
     from ee.settings import *  # noqa: F401, F403
@@ -1,5 +1,7 @@
 import os
 
+from posthog.settings.utils import get_from_env
+
 AIRBYTE_API_KEY = os.getenv("AIRBYTE_API_KEY", None)
 AIRBYTE_BUCKET_REGION = os.getenv("AIRBYTE_BUCKET_REGION", None)
 AIRBYTE_BUCKET_KEY = os.getenv("AIRBYTE_BUCKET_KEY", None)
@@ -8,6 +10,15 @@ AIRBYTE_BUCKET_DOMAIN = os.getenv("AIRBYTE_BUCKET_DOMAIN", None)
 # for DLT
 BUCKET_URL = os.getenv("BUCKET_URL", None)
 AIRBYTE_BUCKET_NAME = os.getenv("AIRBYTE_BUCKET_NAME", None)
+# How Postgres tables are loaded: "sqlalchemy" a dict per row, or "pyarrow" an Arrow table per chunk of rows.
+# Arrow loads types from the table's columns, e.g. JSON as strings, so existing tables may change schema.
+DATA_WAREHOUSE_POSTGRES_SOURCE_BACKEND = os.getenv("DATA_WAREHOUSE_POSTGRES_SOURCE_BACKEND", "sqlalchemy")
+# How many ranges of a numeric or time primary key full refreshes of Postgres tables read at the same time
+DATA_WAREHOUSE_POSTGRES_SOURCE_PARALLELISM = get_from_env(
+    "DATA_WAREHOUSE_POSTGRES_SOURCE_PARALLELISM", 4, type_cast=int
+)
+# How many steps of data import pipelines, e.g. extracting a source, a worker runs at the same time
+DATA_WAREHOUSE_PIPELINE_MAX_WORKERS = get_from_env("DATA_WAREHOUSE_PIPELINE_MAX_WORKERS", 32, type_cast=int)
 
 HUBSPOT_APP_CLIENT_ID = os.getenv("HUBSPOT_APP_CLIENT_ID", None)
 HUBSPOT_APP_CLIENT_SECRET = os.getenv("HUBSPOT_APP_CLIENT_SECRET", None)
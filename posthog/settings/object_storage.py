@@ -30,3 +30,7 @@ OBJECT_STORAGE_SESSION_RECORDING_LTS_FOLDER = os.getenv(
 )
 OBJECT_STORAGE_EXPORTS_FOLDER = os.getenv("OBJECT_STORAGE_EXPORTS_FOLDER", "exports")
 OBJECT_STORAGE_MEDIA_UPLOADS_FOLDER = os.getenv("OBJECT_STORAGE_MEDIA_UPLOADS_FOLDER", "media_uploads")
+# Exports bigger than this are uploaded in parts of this size as they are rendered. S3 needs parts of at least 5MB.
+OBJECT_STORAGE_EXPORTS_PART_SIZE_BYTES = get_from_env(
+    "OBJECT_STORAGE_EXPORTS_PART_SIZE_BYTES", 8 * 1024 * 1024, type_cast=int
+)
@@ -17,6 +17,28 @@ BATCH_EXPORT_POSTGRES_UPLOAD_CHUNK_SIZE_BYTES: int = 1024 * 1024 * 50  # 50MB
 BATCH_EXPORT_BIGQUERY_UPLOAD_CHUNK_SIZE_BYTES: int = 1024 * 1024 * 100  # 100MB
 BATCH_EXPORT_HTTP_UPLOAD_CHUNK_SIZE_BYTES: int = 1024 * 1024 * 10  # 10MB
 BATCH_EXPORT_HTTP_BATCH_SIZE: int = 1000
+# How many record batches to read from ClickHouse ahead of the destination, while it's busy with the previous ones
+BATCH_EXPORT_MAX_PREFETCHED_RECORD_BATCHES: int = get_from_env(
+    "BATCH_EXPORT_MAX_PREFETCHED_RECORD_BATCHES", 4, type_cast=int
+)
+# How many flushed files may wait for an upload to start, while the next one is being written
+BATCH_EXPORT_MAX_PENDING_UPLOADS: int = get_from_env("BATCH_EXPORT_MAX_PENDING_UPLOADS", 1, type_cast=int)
+# Parts of an S3 multipart upload are independent, so they can be uploaded concurrently
+BATCH_EXPORT_S3_MAX_CONCURRENT_UPLOADS: int = get_from_env("BATCH_EXPORT_S3_MAX_CONCURRENT_UPLOADS", 4, type_cast=int)
+# Parts waiting to be uploaded are kept in memory up to this total, and spooled to disk beyond it
+BATCH_EXPORT_S3_UPLOAD_MAX_BUFFER_MEMORY_BYTES: int = get_from_env(
+    "BATCH_EXPORT_S3_UPLOAD_MAX_BUFFER_MEMORY_BYTES", 1024 * 1024 * 200, type_cast=int
+)
+# How many runs a single backfill may run at the same time
+BATCH_EXPORT_BACKFILL_MAX_PARALLELISM: int = get_from_env("BATCH_EXPORT_BACKFILL_MAX_PARALLELISM", 8, type_cast=int)
+# How many backfill runs may be started per minute, across all backfills running in parallel, to protect ClickHouse
+BATCH_EXPORT_BACKFILL_MAX_RUNS_STARTED_PER_MINUTE: int = get_from_env(
+    "BATCH_EXPORT_BACKFILL_MAX_RUNS_STARTED_PER_MINUTE", 60, type_cast=int
+)
+# Threads compressing batch export files off the event loop, shared by all batch exports running in a worker
+BATCH_EXPORT_COMPRESSION_MAX_WORKERS: int = get_from_env("BATCH_EXPORT_COMPRESSION_MAX_WORKERS", 4, type_cast=int)
+# How many record batches of one batch export may be compressed while the next one is being encoded
+BATCH_EXPORT_MAX_PENDING_COMPRESSIONS: int = get_from_env("BATCH_EXPORT_MAX_PENDING_COMPRESSIONS", 2, type_cast=int)
 
 UNCONSTRAINED_TIMESTAMP_TEAM_IDS: list[str] = get_list(os.getenv("UNCONSTRAINED_TIMESTAMP_TEAM_IDS", ""))
 UNCONSTRAINED_TIMESTAMP_TEAM_IDS = get_list(os.getenv("UNCONSTRAINED_TIMESTAMP_TEAM_IDS", ""))
@@ -52,6 +52,28 @@ class ObjectStorageClient(metaclass=abc.ABCMeta):
         """
         pass
 
+    @abc.abstractmethod
+    def create_multipart_upload(self, bucket: str, key: str) -> Optional[str]:
+        """
+        Start writing an object in parts. Returns the id of the upload, to pass when uploading the parts.
+        """
+        pass
+
+    @abc.abstractmethod
+    def upload_part(self, bucket: str, key: str, upload_id: str, part_number: int, content: bytes) -> Optional[str]:
+        """
+        Upload a part of at least 5MB, except for the last one. Returns the ETag of the part.
+        """
+        pass
+
+    @abc.abstractmethod
+    def complete_multipart_upload(self, bucket: str, key: str, upload_id: str, etags: list[str]) -> None:
+        pass
+
+    @abc.abstractmethod
+    def abort_multipart_upload(self, bucket: str, key: str, upload_id: str) -> None:
+        pass
+
 
 class UnavailableStorage(ObjectStorageClient):
     def head_bucket(self, bucket: str):
@@ -78,6 +100,18 @@ class UnavailableStorage(ObjectStorageClient):
     def copy_objects(self, bucket: str, source_prefix: str, target_prefix: str) -> int | None:
         pass
 
+    def create_multipart_upload(self, bucket: str, key: str) -> Optional[str]:
+        pass
+
+    def upload_part(self, bucket: str, key: str, upload_id: str, part_number: int, content: bytes) -> Optional[str]:
+        pass
+
+    def complete_multipart_upload(self, bucket: str, key: str, upload_id: str, etags: list[str]) -> None:
+        pass
+
+    def abort_multipart_upload(self, bucket: str, key: str, upload_id: str) -> None:
+        pass
+
 
 class ObjectStorage(ObjectStorageClient):
     def __init__(self, aws_client) -> None:
@@ -190,6 +224,53 @@ class ObjectStorage(ObjectStorageClient):
             capture_exception(e)
             return None
 
+    def create_multipart_upload(self, bucket: str, key: str) -> Optional[str]:
+        try:
+            return self.aws_client.create_multipart_upload(Bucket=bucket, Key=key)["UploadId"]
+        except Exception as e:
+            logger.exception("object_storage.create_multipart_upload_failed", bucket=bucket, file_name=key, error=e)
+            capture_exception(e)
+            raise ObjectStorageError("create multipart upload failed") from e
+
+    def upload_part(self, bucket: str, key: str, upload_id: str, part_number: int, content: bytes) -> Optional[str]:
+        try:
+            return self.aws_client.upload_part(
+                Bucket=bucket, Key=key, UploadId=upload_id, PartNumber=part_number, Body=content
+            )["ETag"]
+        except Exception as e:
+            logger.exception(
+                "object_storage.upload_part_failed",
+                bucket=bucket,
+                file_name=key,
+                part_number=part_number,
+                error=e,
+            )
+            capture_exception(e)
+            raise ObjectStorageError("upload part failed") from e
+
+    def complete_multipart_upload(self, bucket: str, key: str, upload_id: str, etags: list[str]) -> None:
+        try:
+            self.aws_client.complete_multipart_upload(
+                Bucket=bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={
+                    "Parts": [{"ETag": etag, "PartNumber": part_number} for part_number, etag in enumerate(etags, 1)]
+                },
+            )
+        except Exception as e:
+            logger.exception("object_storage.complete_multipart_upload_failed", bucket=bucket, file_name=key, error=e)
+            capture_exception(e)
+            raise ObjectStorageError("complete multipart upload failed") from e
+
+    def abort_multipart_upload(self, bucket: str, key: str, upload_id: str) -> None:
+        try:
+            self.aws_client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+        except Exception as e:
+            # Parts of aborted or abandoned uploads are cleaned up by the bucket's lifecycle rules
+            logger.exception("object_storage.abort_multipart_upload_failed", bucket=bucket, file_name=key, error=e)
+            capture_exception(e)
+
 
 _client: ObjectStorageClient = UnavailableStorage()
 
@@ -254,6 +335,32 @@ def copy_objects(source_prefix: str, target_prefix: str) -> int:
     )
 
 
+def create_multipart_upload(file_name: str) -> Optional[str]:
+    return object_storage_client().create_multipart_upload(bucket=settings.OBJECT_STORAGE_BUCKET, key=file_name)
+
+
+def upload_part(file_name: str, upload_id: str, part_number: int, content: bytes) -> Optional[str]:
+    return object_storage_client().upload_part(
+        bucket=settings.OBJECT_STORAGE_BUCKET,
+        key=file_name,
+        upload_id=upload_id,
+        part_number=part_number,
+        content=content,
+    )
+
+
+def complete_multipart_upload(file_name: str, upload_id: str, etags: list[str]) -> None:
+    return object_storage_client().complete_multipart_upload(
+        bucket=settings.OBJECT_STORAGE_BUCKET, key=file_name, upload_id=upload_id, etags=etags
+    )
+
+
+def abort_multipart_upload(file_name: str, upload_id: str) -> None:
+    return object_storage_client().abort_multipart_upload(
+        bucket=settings.OBJECT_STORAGE_BUCKET, key=file_name, upload_id=upload_id
+    )
+
+
 def get_presigned_url(file_key: str, expiration: int = 3600) -> Optional[str]:
     return object_storage_client().get_presigned_url(
         bucket=settings.OBJECT_STORAGE_BUCKET, file_key=file_key, expiration=expiration
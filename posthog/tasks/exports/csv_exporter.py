@@ -1,5 +1,9 @@
+import csv
 import datetime
 import io
+import itertools
+import pickle
+import tempfile
 from typing import Any, Optional
 from collections.abc import Generator
 from urllib.parse import parse_qsl, quote, urlencode, urlparse, urlunparse
@@ -15,7 +19,7 @@ from requests.exceptions import HTTPError
 from posthog.api.services.query import process_query_dict
 from posthog.hogql_queries.query_runner import ExecutionMode
 from posthog.jwt import PosthogJwtAudience, encode_jwt
-from posthog.models.exported_asset import ExportedAsset, save_content
+from posthog.models.exported_asset import ContentWriter, ExportedAsset
 from posthog.utils import absolute_uri
 from .ordered_csv_renderer import OrderedCsvRenderer
 from ..exporter import (
@@ -32,6 +36,8 @@ logger = structlog.get_logger(__name__)
 
 RESULT_LIMIT_KEYS = ("distinct_ids",)
 RESULT_LIMIT_LENGTH = 10
+# How much rendered CSV to buffer before handing it over to be uploaded
+CSV_EXPORT_WRITE_SIZE = 1024 * 1024
 
 
 # SUPPORTED CSV TYPES
@@ -54,9 +60,9 @@ RESULT_LIMIT_LENGTH = 10
 # HOW DOES THIS WORK
 # 1. We receive an export task with a given resource uri (identical to the API)
 # 2. We call the actual API to load the data with the given params so that we receive a paginateable response
-# 3. We save the response to a chunk in object storage and then load the `next` page of results
+# 3. We render the response, upload it to object storage in parts as they fill up, and then load the `next` page of results
 # 4. Repeat until exhausted or limit reached
-# 5. We save the final blob output and update the ExportedAsset
+# 5. We complete the upload, or save the output if it was smaller than a part, and update the ExportedAsset
 
 
 def add_query_params(url: str, params: dict[str, str]) -> str:
@@ -283,61 +289,97 @@ def get_from_hogql_query(exported_asset: ExportedAsset, limit: int, resource: di
         return
 
 
-def _export_to_dict(exported_asset: ExportedAsset, limit: int) -> Any:
+def _get_rows(exported_asset: ExportedAsset, limit: int) -> Generator[Any, None, None]:
     resource = exported_asset.export_context
 
-    columns: list[str] = resource.get("columns", [])
-    returned_rows: Generator[Any, None, None]
-
     if resource.get("source"):
-        returned_rows = get_from_hogql_query(exported_asset, limit, resource)
+        return get_from_hogql_query(exported_asset, limit, resource)
     else:
-        returned_rows = get_from_insights_api(exported_asset, limit, resource)
+        return get_from_insights_api(exported_asset, limit, resource)
+
+
+def _export_to_table(exported_asset: ExportedAsset, limit: int) -> Generator[list[Any], None, None]:
+    """
+    Yields the header, then the values of each row in the order of the header, as rows are loaded.
 
-    all_csv_rows = list(returned_rows)
+    The header is known from the first row when it has all the columns of the export or, without columns, when none of
+    its values are flattened into more columns. Otherwise, any row could add columns to the header, so rows are spooled
+    to a temporary file until all of them have been loaded.
+    """
     renderer = OrderedCsvRenderer()
-    render_context = {}
-    if columns:
-        render_context["header"] = columns
-
-    if len(all_csv_rows):
-        # NOTE: This is not ideal as some rows _could_ have different keys
-        # Ideally we would extend the csvrenderer to supported keeping the order in place
-        is_any_col_list_or_dict = [x for x in all_csv_rows[0].values() if isinstance(x, dict) or isinstance(x, list)]
-        if not is_any_col_list_or_dict:
-            # If values are serialised then keep the order of the keys, else allow it to be unordered
-            renderer.header = all_csv_rows[0].keys()
-    else:
+    columns: list[str] = list(exported_asset.export_context.get("columns", []))
+    rows = _get_rows(exported_asset, limit)
+
+    first_row = next(rows, None)
+    if first_row is None:
         # If we have no rows, that means we couldn't convert anything, so put something to avoid confusion
-        all_csv_rows = [{"error": "No data available or unable to format for export."}]
+        first_row = {"error": "No data available or unable to format for export."}
+    flat_rows = (renderer.flatten_item(row) for row in itertools.chain([first_row], rows))
 
-    return renderer, all_csv_rows, render_context
+    header: Optional[list[str]] = None
+    if columns:
+        if set(columns) <= renderer.flatten_item(first_row).keys():
+            header = columns
+    elif not any(isinstance(value, dict | list) for value in first_row.values()):
+        # If values are serialised then keep the order of the keys
+        header = list(first_row.keys())
+
+    if header is not None:
+        yield header
+        for flat_row in flat_rows:
+            yield [flat_row.get(key, None) for key in header]
+        return
+
+    with tempfile.TemporaryFile() as spooled_rows:
+        unique_fields: dict[str, None] = {}
+        for flat_row in flat_rows:
+            unique_fields.update(dict.fromkeys(flat_row))
+            pickle.dump(flat_row, spooled_rows)
+
+        header = renderer.resolve_header(list(unique_fields), columns)
+        yield header
+
+        spooled_rows.seek(0)
+        while True:
+            try:
+                flat_row = pickle.load(spooled_rows)
+            except EOFError:
+                break
+            yield [flat_row.get(key, None) for key in header]
 
 
 def _export_to_csv(exported_asset: ExportedAsset, limit: int) -> None:
-    renderer, all_csv_rows, render_context = _export_to_dict(exported_asset, limit)
+    output = io.StringIO()
+    csv_writer = csv.writer(output)
 
-    rendered_csv_content = renderer.render(all_csv_rows, renderer_context=render_context)
-    save_content(exported_asset, rendered_csv_content)
+    with ContentWriter(exported_asset) as content_writer:
+        for row in _export_to_table(exported_asset, limit):
+            csv_writer.writerow(row)
 
+            if output.tell() >= CSV_EXPORT_WRITE_SIZE:
+                content_writer.write(output.getvalue().encode("utf-8"))
+                output.seek(0)
+                output.truncate()
 
-def _export_to_excel(exported_asset: ExportedAsset, limit: int) -> None:
-    output = io.BytesIO()
+        content_writer.write(output.getvalue().encode("utf-8"))
 
-    workbook = Workbook()
-    worksheet = workbook.active
 
-    renderer, all_csv_rows, render_context = _export_to_dict(exported_asset, limit)
+def _export_to_excel(exported_asset: ExportedAsset, limit: int) -> None:
+    # Write-only workbooks keep rows in a temporary file until saved, rather than in memory
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet()
+
+    for row in _export_to_table(exported_asset, limit):
+        worksheet.append(
+            [value if value is None or isinstance(value, str | int | float | bool) else str(value) for value in row]
+        )
 
-    for row_num, row_data in enumerate(renderer.tablize(all_csv_rows, header=render_context.get("header"))):
-        for col_num, value in enumerate(row_data):
-            if value is not None and not isinstance(value, str | int | float | bool):
-                value = str(value)
-            worksheet.cell(row=row_num + 1, column=col_num + 1, value=value)
+    with tempfile.TemporaryFile() as output, ContentWriter(exported_asset) as content_writer:
+        workbook.save(output)
+        output.seek(0)
 
-    workbook.save(output)
-    output.seek(0)
-    save_content(exported_asset, output.getvalue())
+        while chunk := output.read(content_writer.part_size):
+            content_writer.write(chunk)
 
 
 def get_limit_param_key(path: str) -> str:
@@ -28,7 +28,25 @@ class OrderedCsvRenderer(
 
         # Get the set of all unique headers, and sort them.
         unique_fields = list(unique_everseen(itertools.chain(*(item.keys() for item in data))))
+        field_headers = self.resolve_header(unique_fields, header)
 
+        # Return your "table", with the headers as the first row.
+        if labels:
+            yield [labels.get(x, x) for x in field_headers]
+        else:
+            yield field_headers
+
+        # Create a row for each dictionary, filling in columns for which the
+        # item has no data with None values.
+        for item in data:
+            yield [item.get(key, None) for key in field_headers]
+
+    def resolve_header(self, unique_fields: list[str], header: Any = None) -> list[str]:
+        """
+        Order the flattened fields of all items by the field they were flattened from, e.g. keeping
+        `properties.$browser` next to `properties.$os`. Fields of a given header are expanded to all
+        the fields flattened from them, e.g. `properties` to `properties.$browser` and `properties.$os`.
+        """
         ordered_fields: dict[str, Any] = OrderedDict()
         for item in unique_fields:
             field = item.split(".")
@@ -51,13 +69,4 @@ class OrderedCsvRenderer(
                 field_headers.remove(single_header)
                 field_headers[pos_single_header:pos_single_header] = ordered_fields[single_header]
 
-        # Return your "table", with the headers as the first row.
-        if labels:
-            yield [labels.get(x, x) for x in field_headers]
-        else:
-            yield field_headers
-
-        # Create a row for each dictionary, filling in columns for which the
-        # item has no data with None values.
-        for item in data:
-            yield [item.get(key, None) for key in field_headers]
+        return field_headers
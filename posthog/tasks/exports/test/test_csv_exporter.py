@@ -172,6 +172,70 @@ class TestCSVExporter(APIBaseTest):
                 == b"id,distinct_id,properties.$browser,event,timestamp,person,elements_chain\r\ne9ca132e-400f-4854-a83c-16c151b2f145,2,Safari,event_name,2022-07-06T19:37:43.095295+00:00,,\r\n1624228e-a4f1-48cd-aabc-6baa3ddb22e4,2,Safari,event_name,2022-07-06T19:37:43.095279+00:00,,\r\n66d45914-bdf5-4980-a54a-7dc699bdcce9,2,Safari,event_name,2022-07-06T19:37:43.095262+00:00,,\r\n"
             )
 
+    @patch("posthog.models.exported_asset.UUIDT")
+    @patch("posthog.models.exported_asset.object_storage")
+    def test_csv_exporter_uploads_to_object_storage_in_parts(self, mocked_object_storage, mocked_uuidt) -> None:
+        exported_asset = self._create_asset()
+        mocked_uuidt.return_value = "a-guid"
+        mocked_object_storage.create_multipart_upload.return_value = "an-upload-id"
+        mocked_object_storage.upload_part.side_effect = (
+            lambda path, upload_id, part_number, content: f"etag-{part_number}"
+        )
+
+        with (
+            self.settings(
+                OBJECT_STORAGE_ENABLED=True,
+                OBJECT_STORAGE_EXPORTS_FOLDER="Test-Exports",
+                OBJECT_STORAGE_EXPORTS_PART_SIZE_BYTES=100,
+            ),
+            patch("posthog.tasks.exports.csv_exporter.CSV_EXPORT_WRITE_SIZE", 1),
+        ):
+            csv_exporter.export_tabular(exported_asset)
+
+        object_path = f"{TEST_PREFIX}/csv/team-{self.team.id}/task-{exported_asset.id}/a-guid"
+        mocked_object_storage.create_multipart_upload.assert_called_once_with(object_path)
+        mocked_object_storage.write.assert_not_called()
+        mocked_object_storage.complete_multipart_upload.assert_called_once_with(
+            object_path, "an-upload-id", ["etag-1", "etag-2"]
+        )
+        parts = [call.args[3] for call in mocked_object_storage.upload_part.call_args_list]
+        assert (
+            b"".join(parts)
+            == b"id,distinct_id,properties.$browser,event,timestamp,person,elements_chain\r\ne9ca132e-400f-4854-a83c-16c151b2f145,2,Safari,event_name,2022-07-06T19:37:43.095295+00:00,,\r\n1624228e-a4f1-48cd-aabc-6baa3ddb22e4,2,Safari,event_name,2022-07-06T19:37:43.095279+00:00,,\r\n66d45914-bdf5-4980-a54a-7dc699bdcce9,2,Safari,event_name,2022-07-06T19:37:43.095262+00:00,,\r\n"
+        )
+        assert exported_asset.content_location == object_path
+        assert exported_asset.content is None
+
+    @patch("posthog.models.exported_asset.UUIDT")
+    @patch("posthog.models.exported_asset.object_storage")
+    def test_csv_exporter_aborts_upload_in_parts_when_export_fails(self, mocked_object_storage, mocked_uuidt) -> None:
+        exported_asset = self._create_asset()
+        mocked_uuidt.return_value = "a-guid"
+        mocked_object_storage.create_multipart_upload.return_value = "an-upload-id"
+        mocked_object_storage.upload_part.return_value = "an-etag"
+
+        def rows_then_error(*args):
+            yield {"distinct_id": "2", "event": "event_name" * 10}
+            yield {"distinct_id": "2", "event": "event_name" * 10}
+            raise HTTPError("Failed loading the next page")
+
+        with (
+            self.settings(
+                OBJECT_STORAGE_ENABLED=True,
+                OBJECT_STORAGE_EXPORTS_FOLDER="Test-Exports",
+                OBJECT_STORAGE_EXPORTS_PART_SIZE_BYTES=100,
+            ),
+            patch("posthog.tasks.exports.csv_exporter.CSV_EXPORT_WRITE_SIZE", 1),
+            patch("posthog.tasks.exports.csv_exporter._get_rows", side_effect=rows_then_error),
+        ):
+            with pytest.raises(HTTPError):
+                csv_exporter.export_tabular(exported_asset)
+
+        object_path = f"{TEST_PREFIX}/csv/team-{self.team.id}/task-{exported_asset.id}/a-guid"
+        mocked_object_storage.abort_multipart_upload.assert_called_once_with(object_path, "an-upload-id")
+        mocked_object_storage.complete_multipart_upload.assert_not_called()
+        assert exported_asset.content_location is None
+
     @patch("posthog.models.exported_asset.UUIDT")
     @patch("posthog.models.exported_asset.object_storage.write")
     def test_csv_exporter_does_not_filter_columns_on_empty_param(
@@ -34,6 +34,7 @@ from posthog.tasks.tasks import (
     pg_row_count,
     pg_table_cache_hit_rate,
     process_scheduled_changes,
+    record_insight_cache_query_costs_task,
     redis_celery_queue_depth,
     redis_heartbeat,
     schedule_all_subscriptions,
@@ -154,6 +155,13 @@ def setup_periodic_tasks(sender: Celery, **kwargs: Any) -> None:
         "check dashboard items",
     )
 
+    add_periodic_task_with_expiry(
+        sender,
+        600,
+        record_insight_cache_query_costs_task.s(),
+        "record insight cache query costs",
+    )
+
     sender.add_periodic_task(crontab(minute="*/15"), check_async_migration_health.s())
 
     if settings.INGESTION_LAG_METRIC_TEAM_IDS:
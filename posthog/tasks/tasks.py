@@ -679,6 +679,13 @@ def schedule_cache_updates_task() -> None:
     schedule_cache_updates()
 
 
+@shared_task(ignore_result=True)
+def record_insight_cache_query_costs_task() -> None:
+    from posthog.caching.insight_cache import record_query_costs
+
+    record_query_costs()
+
+
 @shared_task(
     ignore_result=True,
     autoretry_for=(CHQueryErrorTooManySimultaneousQueries,),
@@ -3,7 +3,9 @@ import collections.abc
 import dataclasses
 import datetime as dt
 import json
+import time
 import typing
+import uuid
 
 import temporalio
 import temporalio.activity
@@ -13,9 +15,16 @@ import temporalio.exceptions
 import temporalio.workflow
 from asgiref.sync import sync_to_async
 from django.conf import settings
+from redis.exceptions import RedisError
 
+from posthog import redis
 from posthog.batch_exports.models import BatchExportBackfill
-from posthog.batch_exports.service import BackfillBatchExportInputs, unpause_batch_export
+from posthog.batch_exports.service import (
+    BackfillBatchExportInputs,
+    fetch_completed_batch_export_run_interval_ends,
+    unpause_batch_export,
+    update_batch_export_backfill_progress,
+)
 from posthog.temporal.batch_exports.base import PostHogWorkflow
 from posthog.temporal.batch_exports.batch_exports import (
     CreateBatchExportBackfillInputs,
@@ -24,6 +33,7 @@ from posthog.temporal.batch_exports.batch_exports import (
     update_batch_export_backfill_model_status,
 )
 from posthog.temporal.common.client import connect
+from posthog.warehouse.util import database_sync_to_async
 
 
 class TemporalScheduleNotFoundError(Exception):
@@ -109,6 +119,8 @@ class BackfillScheduleInputs:
     end_at: str | None
     frequency_seconds: float
     start_delay: float = 5.0
+    parallelism: int = 1
+    backfill_id: str | None = None
 
 
 def get_utcnow():
@@ -122,7 +134,9 @@ async def backfill_schedule(inputs: BackfillScheduleInputs) -> None:
     """Temporal Activity to backfill a Temporal Schedule.
 
     The backfill is broken up into batches of 1. After a backfill batch is
-    requested, we wait for it to be done before continuing with the next.
+    requested, we wait for it to be done before continuing with the next. Backfills
+    with an end and a parallelism of more than 1 are backfilled in parallel instead,
+    see `backfill_schedule_in_parallel`.
 
     This activity heartbeats while waiting to allow cancelling an ongoing backfill.
     """
@@ -164,6 +178,11 @@ async def backfill_schedule(inputs: BackfillScheduleInputs) -> None:
     description = await schedule_handle.describe()
 
     frequency = dt.timedelta(seconds=inputs.frequency_seconds)
+
+    if end_at is not None and inputs.parallelism > 1:
+        await backfill_schedule_in_parallel(client, description, inputs, start_at, end_at, frequency)
+        return
+
     full_backfill_range = backfill_range(start_at, end_at, frequency)
 
     for _, backfill_end_at in full_backfill_range:
@@ -178,41 +197,185 @@ async def backfill_schedule(inputs: BackfillScheduleInputs) -> None:
             await sync_to_async(unpause_batch_export)(client, inputs.schedule_id)
             return
 
-        schedule_action: temporalio.client.ScheduleActionStartWorkflow = description.schedule.action
+        await asyncio.sleep(inputs.start_delay)
 
-        search_attributes = [
-            temporalio.common.SearchAttributePair(
-                key=temporalio.common.SearchAttributeKey.for_text("TemporalScheduledById"), value=description.id
-            ),
-            temporalio.common.SearchAttributePair(
-                key=temporalio.common.SearchAttributeKey.for_datetime("TemporalScheduledStartTime"),
-                value=backfill_end_at,
-            ),
-        ]
+        workflow_handle = await start_backfill_run(client, description, backfill_end_at)
+        details = HeartbeatDetails(
+            schedule_id=inputs.schedule_id,
+            workflow_id=workflow_handle.id,
+            last_batch_data_interval_end=backfill_end_at.isoformat(),
+        )
+        temporalio.activity.heartbeat(details)
 
-        args = await client.data_converter.decode(schedule_action.args)
-        args[0]["is_backfill"] = True
+        await wait_for_workflow_with_heartbeat(details, workflow_handle, heartbeat_timeout, inputs.start_delay)
 
-        await asyncio.sleep(inputs.start_delay)
 
-        workflow_handle = await client.start_workflow(
+async def start_backfill_run(
+    client: temporalio.client.Client,
+    description: temporalio.client.ScheduleDescription,
+    backfill_end_at: dt.datetime,
+) -> temporalio.client.WorkflowHandle:
+    """Start the run of the described Temporal Schedule whose data interval ends at `backfill_end_at`."""
+    schedule_action: temporalio.client.ScheduleActionStartWorkflow = description.schedule.action
+
+    search_attributes = [
+        temporalio.common.SearchAttributePair(
+            key=temporalio.common.SearchAttributeKey.for_text("TemporalScheduledById"), value=description.id
+        ),
+        temporalio.common.SearchAttributePair(
+            key=temporalio.common.SearchAttributeKey.for_datetime("TemporalScheduledStartTime"),
+            value=backfill_end_at,
+        ),
+    ]
+
+    args = await client.data_converter.decode(schedule_action.args)
+    args[0]["is_backfill"] = True
+
+    workflow_id = f"{description.id}-{backfill_end_at:%Y-%m-%dT%H:%M:%S}Z"
+
+    try:
+        return await client.start_workflow(
             schedule_action.workflow,
             *args,
-            id=f"{description.id}-{backfill_end_at:%Y-%m-%dT%H:%M:%S}Z",
+            id=workflow_id,
             task_queue=schedule_action.task_queue,
             run_timeout=schedule_action.run_timeout,
             task_timeout=schedule_action.task_timeout,
             id_reuse_policy=temporalio.common.WorkflowIDReusePolicy.ALLOW_DUPLICATE,
             search_attributes=temporalio.common.TypedSearchAttributes(search_attributes=search_attributes),
         )
-        details = HeartbeatDetails(
-            schedule_id=inputs.schedule_id,
-            workflow_id=workflow_handle.id,
-            last_batch_data_interval_end=backfill_end_at.isoformat(),
-        )
-        temporalio.activity.heartbeat(details)
+    except temporalio.exceptions.WorkflowAlreadyStartedError:
+        # Started before this activity was retried, and still running: We can wait for it instead.
+        return client.get_workflow_handle(workflow_id)
 
-        await wait_for_workflow_with_heartbeat(details, workflow_handle, heartbeat_timeout, inputs.start_delay)
+
+class BackfillRunRateLimiter:
+    """Rate limit starting backfill runs across all backfills, as each of them puts load on ClickHouse.
+
+    Runs started are counted in fixed one minute windows in Redis. Redis errors never block a backfill.
+    """
+
+    KEY_PREFIX = "batch_export_backfill_runs_started"
+
+    def __init__(self, max_runs_started_per_minute: int):
+        self.max_runs_started_per_minute = max_runs_started_per_minute
+
+    async def wait(self) -> None:
+        """Wait until another run may be started."""
+        while True:
+            now = time.time()
+            window = int(now // 60)
+
+            try:
+                runs_started = await asyncio.to_thread(self._count_run_started, window)
+            except RedisError:
+                return
+
+            if runs_started <= self.max_runs_started_per_minute:
+                return
+
+            await asyncio.sleep((window + 1) * 60 - now)
+
+    def _count_run_started(self, window: int) -> int:
+        key = f"{self.KEY_PREFIX}:{window}"
+        pipeline = redis.get_client().pipeline()
+        pipeline.incr(key)
+        pipeline.expire(key, 120)
+        runs_started, _ = pipeline.execute()
+        return runs_started
+
+
+class BackfillProgress:
+    """Report how many runs of a backfill have finished on its BatchExportBackfill."""
+
+    def __init__(self, backfill_id: str | None, total_runs: int, finished_runs: int):
+        self.backfill_id = backfill_id
+        self.total_runs = total_runs
+        self.finished_runs = finished_runs
+        self._lock = asyncio.Lock()
+
+    async def report(self) -> None:
+        if self.backfill_id is None:
+            return
+
+        # Reports must not overtake each other, or an older count could be written last
+        async with self._lock:
+            await database_sync_to_async(update_batch_export_backfill_progress)(
+                backfill_id=uuid.UUID(self.backfill_id), total_runs=self.total_runs, finished_runs=self.finished_runs
+            )
+
+    async def finish_run(self) -> None:
+        self.finished_runs += 1
+        await self.report()
+
+
+async def backfill_schedule_in_parallel(
+    client: temporalio.client.Client,
+    description: temporalio.client.ScheduleDescription,
+    inputs: BackfillScheduleInputs,
+    start_at: dt.datetime,
+    end_at: dt.datetime,
+    frequency: dt.timedelta,
+) -> None:
+    """Backfill a Temporal Schedule running up to `inputs.parallelism` runs at the same time.
+
+    Runs of different data intervals are independent, so they can run in any order. Runs that completed
+    before, like in a previous attempt of this activity, are found in the BatchExportRun ledger and skipped.
+    Runs that are still running from a previous attempt are waited for instead of started again.
+    """
+    parallelism = min(inputs.parallelism, settings.BATCH_EXPORT_BACKFILL_MAX_PARALLELISM)
+    backfill_end_ats = [backfill_end_at for _, backfill_end_at in backfill_range(start_at, end_at, frequency)]
+
+    completed_end_ats = await database_sync_to_async(fetch_completed_batch_export_run_interval_ends)(
+        uuid.UUID(inputs.schedule_id), start_at, end_at
+    )
+    pending_end_ats = [
+        backfill_end_at for backfill_end_at in backfill_end_ats if backfill_end_at not in completed_end_ats
+    ]
+
+    progress = BackfillProgress(
+        backfill_id=inputs.backfill_id,
+        total_runs=len(backfill_end_ats),
+        finished_runs=len(backfill_end_ats) - len(pending_end_ats),
+    )
+    await progress.report()
+
+    rate_limiter = BackfillRunRateLimiter(settings.BATCH_EXPORT_BACKFILL_MAX_RUNS_STARTED_PER_MINUTE)
+    running = asyncio.Semaphore(parallelism)
+
+    async def backfill_run(backfill_end_at: dt.datetime) -> None:
+        async with running:
+            await rate_limiter.wait()
+
+            if await check_temporal_schedule_exists(client, description.id) is False:
+                raise TemporalScheduleNotFoundError(description.id)
+
+            await asyncio.sleep(inputs.start_delay)
+            workflow_handle = await start_backfill_run(client, description, backfill_end_at)
+
+            try:
+                await workflow_handle.result()
+            except temporalio.client.WorkflowFailureError:
+                # Like when backfilling one run at a time, failed runs don't fail the backfill.
+                pass
+
+        await progress.finish_run()
+
+    async def heartbeat() -> None:
+        while True:
+            temporalio.activity.heartbeat()
+            await asyncio.sleep(1)
+
+    heartbeat_task = asyncio.create_task(heartbeat())
+    tasks = [asyncio.create_task(backfill_run(backfill_end_at)) for backfill_end_at in pending_end_ats]
+
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        heartbeat_task.cancel()
+        await asyncio.wait([heartbeat_task, *tasks])
 
 
 async def wait_for_workflow_with_heartbeat(
@@ -343,6 +506,8 @@ class BackfillBatchExportWorkflow(PostHogWorkflow):
             end_at=inputs.end_at,
             frequency_seconds=frequency_seconds,
             start_delay=inputs.start_delay,
+            parallelism=inputs.parallelism,
+            backfill_id=backfill_id,
         )
         try:
             await temporalio.workflow.execute_activity(
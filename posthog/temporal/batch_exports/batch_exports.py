@@ -1,4 +1,5 @@
 import collections.abc
+import concurrent.futures
 import dataclasses
 import datetime as dt
 import typing
@@ -28,6 +29,7 @@ from posthog.temporal.batch_exports.metrics import (
     get_export_finished_metric,
     get_export_started_metric,
 )
+from posthog.temporal.batch_exports.utils import aprefetch
 from posthog.temporal.common.clickhouse import ClickHouseClient
 from posthog.temporal.common.client import connect
 from posthog.temporal.common.logger import bind_temporal_worker_logger
@@ -39,6 +41,24 @@ RecordsGenerator = collections.abc.Generator[pa.RecordBatch, None, None]
 AsyncBytesGenerator = collections.abc.AsyncGenerator[bytes, None]
 AsyncRecordsGenerator = collections.abc.AsyncGenerator[pa.RecordBatch, None]
 
+_compression_executor: concurrent.futures.ThreadPoolExecutor | None = None
+
+
+def get_compression_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """Return the executor batch export files are compressed in, shared by all batch exports in this worker.
+
+    gzip and brotli release the GIL while compressing, so threads compress in parallel, without having to
+    send each chunk to another process.
+    """
+    global _compression_executor
+
+    if _compression_executor is None:
+        _compression_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=settings.BATCH_EXPORT_COMPRESSION_MAX_WORKERS, thread_name_prefix="batch-export-compression"
+        )
+    return _compression_executor
+
+
 SELECT_FROM_PERSONS_VIEW = """
 SELECT *
 FROM
@@ -140,7 +160,7 @@ async def iter_model_records(
             yield record
 
     else:
-        for record in iter_records(
+        async for record in aiter_records(
             client,
             team_id=team_id,
             is_backfill=is_backfill,
@@ -163,12 +183,7 @@ async def iter_records_from_model_view(
     if model_name == "persons":
         view = SELECT_FROM_PERSONS_VIEW
     else:
-        # TODO: Let this model be exported by `astream_query_as_arrow`.
-        # Just to reduce risk, I don't want to change the function that runs 100% of the exports
-        # without battle testing it first.
-        # There are already changes going out to the queries themselves that will impact events in a
-        # positive way. So, we can come back later and drop this block.
-        for record_batch in iter_records(
+        async for record_batch in aiter_records(
             client,
             team_id=team_id,
             is_backfill=is_backfill,
@@ -199,6 +214,8 @@ def iter_records(
 ) -> RecordsGenerator:
     """Iterate over Arrow batch records for a batch export.
 
+    This blocks the event loop while ClickHouse streams, so prefer `aiter_records` in activities.
+
     Args:
         client: The ClickHouse client used to query for the batch records.
         team_id: The ID of the team whose data we are querying.
@@ -213,6 +230,75 @@ def iter_records(
     Returns:
         A generator that yields tuples of batch records as Python dictionaries and their schema.
     """
+    query_str, query_parameters = prepare_events_query(
+        team_id=team_id,
+        interval_start=interval_start,
+        interval_end=interval_end,
+        exclude_events=exclude_events,
+        include_events=include_events,
+        fields=fields,
+        extra_query_parameters=extra_query_parameters,
+        is_backfill=is_backfill,
+    )
+    yield from client.stream_query_as_arrow(query_str, query_parameters=query_parameters)
+
+
+async def aiter_records(
+    client: ClickHouseClient,
+    team_id: int,
+    interval_start: str,
+    interval_end: str,
+    exclude_events: collections.abc.Iterable[str] | None = None,
+    include_events: collections.abc.Iterable[str] | None = None,
+    fields: list[BatchExportField] | None = None,
+    extra_query_parameters: dict[str, typing.Any] | None = None,
+    is_backfill: bool = False,
+    max_prefetched_record_batches: int | None = None,
+) -> AsyncRecordsGenerator:
+    """Asynchronously iterate over Arrow batch records for a batch export.
+
+    Record batches are read from ClickHouse in the background while the caller processes the previous ones, up to
+    `max_prefetched_record_batches` of them. Once that many are waiting, reading pauses, so the response isn't buffered
+    in memory any further than that. The event loop is never blocked while waiting for ClickHouse.
+
+    Args:
+        See iter_records, and:
+        max_prefetched_record_batches: How many record batches to read ahead of the caller at most. Defaults to the
+            BATCH_EXPORT_MAX_PREFETCHED_RECORD_BATCHES setting.
+
+    Returns:
+        An async generator that yields Arrow record batches.
+    """
+    query_str, query_parameters = prepare_events_query(
+        team_id=team_id,
+        interval_start=interval_start,
+        interval_end=interval_end,
+        exclude_events=exclude_events,
+        include_events=include_events,
+        fields=fields,
+        extra_query_parameters=extra_query_parameters,
+        is_backfill=is_backfill,
+    )
+    if max_prefetched_record_batches is None:
+        max_prefetched_record_batches = settings.BATCH_EXPORT_MAX_PREFETCHED_RECORD_BATCHES
+
+    async for record_batch in aprefetch(
+        client.astream_query_as_arrow(query_str, query_parameters=query_parameters), max_prefetched_record_batches
+    ):
+        yield record_batch
+
+
+def prepare_events_query(
+    team_id: int,
+    interval_start: str,
+    interval_end: str,
+    exclude_events: collections.abc.Iterable[str] | None = None,
+    include_events: collections.abc.Iterable[str] | None = None,
+    fields: list[BatchExportField] | None = None,
+    extra_query_parameters: dict[str, typing.Any] | None = None,
+    is_backfill: bool = False,
+) -> tuple[str, dict[str, typing.Any]]:
+    """Return the query to export events with, and its parameters. See iter_records for the arguments."""
     data_interval_start_ch = dt.datetime.fromisoformat(interval_start).strftime("%Y-%m-%d %H:%M:%S")
     data_interval_end_ch = dt.datetime.fromisoformat(interval_end).strftime("%Y-%m-%d %H:%M:%S")
 
@@ -260,7 +346,7 @@ def iter_records(
     else:
         query_parameters = base_query_parameters
 
-    yield from client.stream_query_as_arrow(query_str, query_parameters=query_parameters)
+    return query_str, query_parameters
 
 
 def get_data_interval(interval: str, data_interval_end: str | None) -> tuple[dt.datetime, dt.datetime]:
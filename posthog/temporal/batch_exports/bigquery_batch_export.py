@@ -34,6 +34,7 @@ from posthog.temporal.batch_exports.metrics import (
     get_bytes_exported_metric,
     get_rows_exported_metric,
 )
+from posthog.temporal.batch_exports.pipeline import FlushedFile, UploadPipeline
 from posthog.temporal.batch_exports.temporary_file import (
     BatchExportWriter,
     FlushCallable,
@@ -424,27 +425,21 @@ async def insert_into_bigquery_activity(inputs: BigQueryInsertInputs) -> Records
                 ) as bigquery_stage_table,
             ):
 
-                async def flush_to_bigquery(
-                    local_results_file,
-                    records_since_last_flush,
-                    bytes_since_last_flush,
-                    flush_counter: int,
-                    last_inserted_at,
-                    last,
-                ):
+                async def load_file_to_bigquery(flushed_file: FlushedFile) -> None:
                     logger.debug(
                         "Loading %s records of size %s bytes",
-                        local_results_file.records_since_last_reset,
-                        local_results_file.bytes_since_last_reset,
+                        flushed_file.records_since_last_flush,
+                        flushed_file.bytes_since_last_flush,
                     )
                     table = bigquery_stage_table if requires_merge else bigquery_table
 
-                    await bq_client.load_jsonl_file(local_results_file, table, schema)
+                    await bq_client.load_jsonl_file(flushed_file.file, table, schema)
 
-                    rows_exported.add(records_since_last_flush)
-                    bytes_exported.add(bytes_since_last_flush)
+                def heartbeat_loaded_file(flushed_file: FlushedFile, _: None) -> None:
+                    rows_exported.add(flushed_file.records_since_last_flush)
+                    bytes_exported.add(flushed_file.bytes_since_last_flush)
 
-                    heartbeater.details = (str(last_inserted_at),)
+                    heartbeater.details = (str(flushed_file.last_inserted_at),)
 
                 record_schema = pa.schema(
                     # NOTE: For some reason, some batches set non-nullable fields as non-nullable, whereas other
@@ -457,16 +452,23 @@ async def insert_into_bigquery_activity(inputs: BigQueryInsertInputs) -> Records
                         for field in first_record_batch.select([field.name for field in schema]).schema
                     ]
                 )
+                # Load jobs are appending to the same table, so we only overlap them with writing the next file
+                pipeline: UploadPipeline[None] = UploadPipeline(
+                    upload=load_file_to_bigquery,
+                    on_uploaded=heartbeat_loaded_file,
+                    max_pending_uploads=settings.BATCH_EXPORT_MAX_PENDING_UPLOADS,
+                )
                 writer = JSONLBatchExportWriter(
                     max_bytes=settings.BATCH_EXPORT_BIGQUERY_UPLOAD_CHUNK_SIZE_BYTES,
-                    flush_callable=flush_to_bigquery,
+                    flush_callable=pipeline.flush,
                 )
 
-                async with writer.open_temporary_file():
-                    async for record_batch in records_iterator:
-                        record_batch = cast_record_batch_json_columns(record_batch, json_columns=json_columns)
+                async with pipeline:
+                    async with writer.open_temporary_file():
+                        async for record_batch in records_iterator:
+                            record_batch = cast_record_batch_json_columns(record_batch, json_columns=json_columns)
 
-                        await writer.write_record_batch(record_batch)
+                            await writer.write_record_batch(record_batch)
 
                 if requires_merge:
                     merge_key = (
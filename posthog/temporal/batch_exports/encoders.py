@@ -0,0 +1,299 @@
+"""Columnar encoders of record batches as JSONL and CSV.
+
+Encoding a record batch row by row means building a Python dict per row, and serializing every value with a
+Python call, even though most columns are strings or integers. These encoders work a column at a time instead:
+String, integer and boolean columns are escaped and formatted with Arrow compute functions, and only columns of
+other types are serialized value by value. Rows are then assembled from the encoded columns and precomputed
+escaped column names in a single Arrow call.
+
+The output is the same as `orjson.dumps(row, default=str)` for JSONL, and as `csv.DictWriter` for CSV, byte by byte.
+"""
+
+import collections.abc
+import csv
+import io
+import typing
+
+import orjson
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# The escapes orjson uses for JSON strings. Backslashes must be escaped first, so no other escape is escaped twice.
+JSON_STRING_ESCAPES = [
+    ("\\", "\\\\"),
+    ('"', '\\"'),
+    ("\n", "\\n"),
+    ("\r", "\\r"),
+    ("\t", "\\t"),
+    ("\b", "\\b"),
+    ("\f", "\\f"),
+]
+JSON_CONTROL_CHARACTERS = [chr(c) for c in range(0x20) if chr(c) not in "\n\r\t\b\f"]
+JSON_CONTROL_CHARACTERS_PATTERN = r"[\x00-\x07\x0b\x0e-\x1f]"
+
+
+def _json_dumps_bytes(value: typing.Any) -> bytes:
+    # Imported here as temporary_file.py imports this module.
+    from posthog.temporal.batch_exports.temporary_file import json_dumps_bytes
+
+    return json_dumps_bytes(value)
+
+
+def _decode_dictionary(array: pa.Array) -> pa.Array:
+    if pa.types.is_dictionary(array.type):
+        return array.dictionary_decode()
+    return array
+
+
+def _is_string(array: pa.Array) -> bool:
+    return pa.types.is_string(array.type) or pa.types.is_large_string(array.type)
+
+
+def _is_json(array: pa.Array) -> bool:
+    """Whether an array is of `JsonType`, without importing it, as `utils` requires Django."""
+    return isinstance(array.type, pa.ExtensionType) and array.type.extension_name == "json"
+
+
+def _to_pylist(array: pa.Array) -> list[typing.Any]:
+    """Convert an array to Python objects, like `pa.Array.to_pylist`."""
+    if _is_json(array):
+        # Imported here as `utils` requires Django, which `JsonType` columns come from anyway.
+        from posthog.temporal.batch_exports.utils import load_json
+
+        # Parsing the storage directly saves creating a `JsonScalar` for each value.
+        return [None if value is None else load_json(value) for value in array.storage.to_pylist()]
+
+    return array.to_pylist()
+
+
+def _is_utc_timestamp(array: pa.Array) -> bool:
+    return pa.types.is_timestamp(array.type) and array.type.unit != "ns" and array.type.tz in (None, "UTC", "+00:00")
+
+
+def _join(*arrays: pa.Array | str) -> pa.Array:
+    """Concatenate string arrays and strings element-wise."""
+    return pc.binary_join_element_wise(
+        *(pa.scalar(array, pa.large_string()) if isinstance(array, str) else array for array in arrays),
+        pa.scalar("", pa.large_string()),
+    )
+
+
+def _quote(array: pa.Array) -> pa.Array:
+    return _join('"', array, '"')
+
+
+def format_utc_timestamps(array: pa.Array, separator: str = "T") -> pa.Array:
+    """Format timestamps like `datetime.isoformat` does, with microseconds only if there are any.
+
+    Timestamps without a time zone are formatted without an offset, UTC ones with "+00:00".
+    """
+    timestamps = array.cast(pa.timestamp("us", tz="UTC"))
+    seconds = pc.floor_temporal(timestamps, unit="second")
+    microseconds = pc.subtract(timestamps.cast(pa.int64()), seconds.cast(pa.int64()))
+
+    formatted = _join(
+        pc.strftime(seconds.cast(pa.timestamp("s", tz="UTC")), f"%Y-%m-%d{separator}%H:%M:%S").cast(pa.large_string()),
+        pc.if_else(
+            pc.equal(microseconds, 0),
+            pa.scalar("", pa.large_string()),
+            _join(".", pc.utf8_lpad(microseconds.cast(pa.large_string()), width=6, padding="0")),
+        ),
+    )
+    if array.type.tz is None:
+        return formatted
+    return _join(formatted, "+00:00")
+
+
+def concatenate_binary_array(array: pa.Array) -> bytes:
+    """Return the values of a binary array without nulls, one after the other."""
+    array = array.cast(pa.large_binary())
+    offsets_buffer, values_buffer = array.buffers()[1:3]
+    if values_buffer is None:
+        return b""
+
+    offsets = memoryview(offsets_buffer).cast("q")
+    return values_buffer.to_pybytes()[offsets[array.offset] : offsets[array.offset + len(array)]]
+
+
+def escape_json_strings(array: pa.Array) -> pa.Array:
+    """Escape a string array to be used as JSON strings, without the surrounding quotes."""
+    for character, escaped in JSON_STRING_ESCAPES:
+        array = pc.replace_substring(array, character, escaped)
+
+    if pc.any(pc.match_substring_regex(array, JSON_CONTROL_CHARACTERS_PATTERN)).as_py():
+        # Very rare, so not worth a pass per character otherwise
+        for character in JSON_CONTROL_CHARACTERS:
+            array = pc.replace_substring(array, character, f"\\u{ord(character):04x}")
+
+    return array
+
+
+class JSONLRecordBatchEncoder:
+    """Encode record batches as JSONL, with the same output as `orjson.dumps(row, default=str)` for each row.
+
+    Attributes:
+        json_columns_as_raw_bytes: Pass the JSON strings of `JsonType` columns through as they are, instead of parsing
+            and serializing them again. The result is the same JSON, but may be formatted differently, e.g. when the
+            JSON strings have spaces.
+    """
+
+    def __init__(self, json_columns_as_raw_bytes: bool = False):
+        self.json_columns_as_raw_bytes = json_columns_as_raw_bytes
+        self._escaped_column_names: dict[tuple[str, ...], list[pa.Scalar]] = {}
+
+    def escaped_column_names(self, column_names: collections.abc.Sequence[str]) -> list[pa.Scalar]:
+        """Return what comes before each column's value in a row: The column name as a JSON key, with separators."""
+        key = tuple(column_names)
+        if key not in self._escaped_column_names:
+            self._escaped_column_names[key] = [
+                pa.scalar((b"{" if index == 0 else b",") + orjson.dumps(column_name) + b":", pa.large_binary())
+                for index, column_name in enumerate(column_names)
+            ]
+        return self._escaped_column_names[key]
+
+    def encode_column(self, array: pa.Array) -> pa.Array:
+        """Encode each value of a column as JSON."""
+        if _is_json(array):
+            if self.json_columns_as_raw_bytes:
+                return array.storage.fill_null("null")
+
+        array = _decode_dictionary(array)
+
+        if _is_string(array):
+            return _quote(escape_json_strings(array.cast(pa.large_string()))).fill_null("null")
+        if pa.types.is_integer(array.type) or pa.types.is_boolean(array.type):
+            return array.cast(pa.string()).fill_null("null")
+        if _is_utc_timestamp(array):
+            return _quote(format_utc_timestamps(array)).fill_null("null")
+
+        return pa.array([_json_dumps_bytes(value) for value in _to_pylist(array)], type=pa.binary())
+
+    def encode(self, record_batch: pa.RecordBatch) -> bytes:
+        """Encode a record batch as JSONL, a line per row."""
+        if record_batch.num_rows == 0:
+            return b""
+        if record_batch.num_columns == 0:
+            return b"{}\n" * record_batch.num_rows
+
+        arguments: list[typing.Any] = []
+        for escaped_column_name, array in zip(
+            self.escaped_column_names(record_batch.column_names), record_batch.columns
+        ):
+            arguments.append(escaped_column_name)
+            arguments.append(self.encode_column(array).cast(pa.large_binary()))
+        arguments.append(pa.scalar(b"}\n", pa.large_binary()))
+        arguments.append(pa.scalar(b"", pa.large_binary()))
+
+        return concatenate_binary_array(pc.binary_join_element_wise(*arguments))
+
+
+class CSVRecordBatchEncoder:
+    """Encode record batches as CSV, with the same output as a `csv.DictWriter` with the same arguments.
+
+    Only unquoted CSV with an escape character is encoded a column at a time, anything else falls back to a
+    `csv.DictWriter`, which is what decides which characters are escaped.
+    """
+
+    def __init__(
+        self,
+        field_names: collections.abc.Sequence[str],
+        extras_action: typing.Literal["raise", "ignore"] = "ignore",
+        delimiter: str = ",",
+        quote_char: str = '"',
+        escape_char: str | None = "\\",
+        line_terminator: str = "\n",
+        quoting=csv.QUOTE_NONE,
+    ):
+        self.field_names = field_names
+        self.extras_action: typing.Literal["raise", "ignore"] = extras_action
+        self.delimiter = delimiter
+        self.quote_char = quote_char
+        self.escape_char = escape_char
+        self.line_terminator = line_terminator
+        self.quoting = quoting
+
+        # A record with a single empty field must be quoted, which is an error when not quoting.
+        self.is_columnar = quoting == csv.QUOTE_NONE and escape_char is not None and len(field_names) > 1
+        self.escaped_characters = self._find_escaped_characters() if self.is_columnar else []
+
+    def dict_writer(self, file: typing.IO[str]) -> csv.DictWriter:
+        return csv.DictWriter(
+            file,
+            fieldnames=self.field_names,
+            extrasaction=self.extras_action,
+            delimiter=self.delimiter,
+            quotechar=self.quote_char,
+            escapechar=self.escape_char,
+            quoting=self.quoting,
+            lineterminator=self.line_terminator,
+        )
+
+    def _find_escaped_characters(self) -> list[str]:
+        """Ask `csv` which characters it escapes, as that has changed between Python versions."""
+        assert self.escape_char is not None
+
+        candidates = {self.delimiter, self.quote_char, *self.line_terminator, "\n", "\r"} - {self.escape_char}
+        escaped_characters = [self.escape_char]
+        for candidate in sorted(candidates):
+            output = io.StringIO()
+            self.dict_writer(output).writerow({self.field_names[0]: candidate})
+            if output.getvalue().startswith(self.escape_char + candidate):
+                escaped_characters.append(candidate)
+        return escaped_characters
+
+    def escape(self, array: pa.Array) -> pa.Array:
+        """Escape a string array like `csv` does, the escape character first so no other escape is escaped twice."""
+        assert self.escape_char is not None
+
+        for character in self.escaped_characters:
+            array = pc.replace_substring(array, character, self.escape_char + character)
+        return array
+
+    def encode_column(self, array: pa.Array) -> pa.Array:
+        """Format each value of a column like `csv` does: Empty for None, `repr` for floats, `str` for the rest."""
+        array = _decode_dictionary(array)
+
+        if pa.types.is_boolean(array.type):
+            formatted = pc.if_else(array, "True", "False")
+        elif pa.types.is_integer(array.type) or _is_string(array):
+            formatted = array.cast(pa.large_string())
+        elif _is_utc_timestamp(array):
+            formatted = format_utc_timestamps(array, separator=" ")
+        else:
+            formatted = pa.array(
+                [
+                    None if value is None else repr(value) if isinstance(value, float) else str(value)
+                    for value in _to_pylist(array)
+                ],
+                type=pa.large_string(),
+            )
+
+        return self.escape(formatted).fill_null("")
+
+    def encode(self, record_batch: pa.RecordBatch) -> bytes:
+        """Encode a record batch as CSV, a line per row."""
+        if record_batch.num_rows == 0:
+            return b""
+
+        if not self.is_columnar or (
+            self.extras_action == "raise" and set(record_batch.column_names) - set(self.field_names)
+        ):
+            output = io.StringIO()
+            self.dict_writer(output).writerows(record_batch.to_pylist())
+            return output.getvalue().encode("utf-8")
+
+        column_names = set(record_batch.column_names)
+        arguments: list[typing.Any] = [
+            self.encode_column(record_batch.column(field_name)).cast(pa.large_string())
+            if field_name in column_names
+            else pa.scalar("", pa.large_string())
+            for field_name in self.field_names
+        ]
+        arguments.append(pa.scalar(self.delimiter, pa.large_string()))
+        rows = pc.binary_join_element_wise(
+            pc.binary_join_element_wise(*arguments),
+            pa.scalar(self.line_terminator, pa.large_string()),
+            pa.scalar("", pa.large_string()),
+        )
+
+        return concatenate_binary_array(rows)
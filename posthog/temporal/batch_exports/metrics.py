@@ -22,3 +22,19 @@ def get_export_finished_metric(status: str) -> MetricCounter:
             "batch_export_finished", "Number of batch exports finished, for any reason (including failure)."
         )
     )
+
+
+def get_bytes_compressed_in_metric(compression: str) -> MetricCounter:
+    return (
+        activity.metric_meter()
+        .with_additional_attributes({"compression": compression})
+        .create_counter("batch_export_bytes_compressed_in", "Number of bytes passed to compression.")
+    )
+
+
+def get_bytes_compressed_out_metric(compression: str) -> MetricCounter:
+    return (
+        activity.metric_meter()
+        .with_additional_attributes({"compression": compression})
+        .create_counter("batch_export_bytes_compressed_out", "Number of bytes output by compression.")
+    )
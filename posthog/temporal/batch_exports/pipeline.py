@@ -0,0 +1,202 @@
+"""Overlap encoding of batch export files with uploading them to the destination.
+
+Batch exports go through three stages: Fetching record batches from ClickHouse, encoding them into a
+`BatchExportTemporaryFile` with a `BatchExportWriter`, and uploading the file each time the writer flushes it.
+Fetching already runs ahead of encoding, up to a bounded number of record batches (see `aiter_records`). An
+`UploadPipeline` does the same for uploads: Its `flush` can be passed as a writer's `flush_callable`, and it hands
+each flushed file over to a background upload, so the writer can continue encoding (and fetching) while uploads are
+in flight. Once enough uploads are in flight, `flush` waits for one of them to finish, which applies back-pressure
+all the way to ClickHouse.
+
+Uploads may finish in any order, but `on_uploaded` is called in the order files were flushed, and only once all
+files flushed before have been uploaded too. So, heartbeating progress from `on_uploaded` never claims a file was
+uploaded while an earlier one is still in flight, and resuming from a heartbeat never skips any data.
+"""
+
+import asyncio
+import collections.abc
+import dataclasses
+import datetime as dt
+import typing
+
+from posthog.temporal.batch_exports.temporary_file import BatchExportTemporaryFile
+
+T = typing.TypeVar("T")
+
+
+@dataclasses.dataclass
+class FlushedFile:
+    """A file flushed by a `BatchExportWriter`, owned by the pipeline until it's uploaded.
+
+    Attributes:
+        file: A copy of the flushed file, rewound and ready to be read, closed once uploaded.
+        sequence_number: The order in which the file was flushed, starting at 0 for each pipeline.
+        records_since_last_flush: The number of records in the file.
+        bytes_since_last_flush: The number of bytes in the file.
+        flush_counter: The flush counter of the writer that flushed the file.
+        last_inserted_at: The latest `_inserted_at` in the file.
+        is_last: Whether this is the last file flushed by the writer.
+    """
+
+    file: typing.Any
+    sequence_number: int
+    records_since_last_flush: int
+    bytes_since_last_flush: int
+    flush_counter: int
+    last_inserted_at: dt.datetime
+    is_last: bool
+
+
+CopyFileCallable = collections.abc.Callable[[BatchExportTemporaryFile], typing.Any]
+UploadCallable = collections.abc.Callable[[FlushedFile], collections.abc.Awaitable[T]]
+OnUploadedCallable = collections.abc.Callable[[FlushedFile, T], None]
+
+
+class UploadPipeline(typing.Generic[T]):
+    """Upload files flushed by a `BatchExportWriter` in the background, while the writer keeps encoding.
+
+    Usage:
+
+        pipeline = UploadPipeline(upload=upload, on_uploaded=heartbeat, max_concurrent_uploads=4)
+        writer = JSONLBatchExportWriter(flush_callable=pipeline.flush, ...)
+
+        async with pipeline:
+            async with writer.open_temporary_file():
+                async for record_batch in records:
+                    await writer.write_record_batch(record_batch)
+
+    Exiting the pipeline waits for all uploads to finish. If any upload fails, the exception is raised from the
+    next call to `flush`, or when exiting, and uploads still in flight are cancelled.
+
+    Attributes:
+        upload: Called with each flushed file to upload it. May be called concurrently, in any order.
+        on_uploaded: Called with each flushed file and the result of uploading it, in the order files
+            were flushed. This is where to heartbeat progress.
+        max_concurrent_uploads: How many uploads may be running at the same time.
+        max_pending_uploads: How many flushed files may be waiting for an upload to start. Together with
+            `max_concurrent_uploads`, this bounds the space taken by copies of flushed files.
+        copy_file: Called with each flushed file to copy it, as the writer resets the file once flushed.
+            Defaults to copying into a new `BatchExportTemporaryFile`.
+    """
+
+    def __init__(
+        self,
+        upload: UploadCallable[T],
+        on_uploaded: OnUploadedCallable[T],
+        max_concurrent_uploads: int = 1,
+        max_pending_uploads: int = 1,
+        copy_file: CopyFileCallable | None = None,
+    ):
+        if max_concurrent_uploads < 1:
+            raise ValueError("max_concurrent_uploads must be at least 1")
+        if max_pending_uploads < 0:
+            raise ValueError("max_pending_uploads must not be negative")
+
+        self.upload = upload
+        self.on_uploaded = on_uploaded
+        self.max_concurrent_uploads = max_concurrent_uploads
+        self.max_pending_uploads = max_pending_uploads
+        self.copy_file: CopyFileCallable = copy_file or BatchExportTemporaryFile.copy
+
+        self._uploads_in_flight = asyncio.Semaphore(max_concurrent_uploads + max_pending_uploads)
+        self._uploads_running = asyncio.Semaphore(max_concurrent_uploads)
+        self._tasks: set[asyncio.Task] = set()
+        self._uploaded: dict[int, tuple[FlushedFile, T]] = {}
+        self._next_sequence_number = 0
+        self._next_sequence_number_to_commit = 0
+        self._exception: BaseException | None = None
+
+    async def flush(
+        self,
+        local_results_file: BatchExportTemporaryFile,
+        records_since_last_flush: int,
+        bytes_since_last_flush: int,
+        flush_counter: int,
+        last_inserted_at: dt.datetime,
+        is_last: bool,
+    ) -> None:
+        """Start uploading a flushed file in the background, to be used as a writer's `flush_callable`.
+
+        The writer resets its file as soon as this returns, so we upload a copy of it.
+        """
+        self._raise_for_failed_upload()
+        await self._uploads_in_flight.acquire()
+
+        try:
+            self._raise_for_failed_upload()
+            flushed_file = FlushedFile(
+                file=self.copy_file(local_results_file),
+                sequence_number=self._next_sequence_number,
+                records_since_last_flush=records_since_last_flush,
+                bytes_since_last_flush=bytes_since_last_flush,
+                flush_counter=flush_counter,
+                last_inserted_at=last_inserted_at,
+                is_last=is_last,
+            )
+        except BaseException:
+            self._uploads_in_flight.release()
+            raise
+
+        self._next_sequence_number += 1
+        task = asyncio.create_task(self._upload(flushed_file))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _upload(self, flushed_file: FlushedFile) -> None:
+        try:
+            async with self._uploads_running:
+                result = await self.upload(flushed_file)
+        except Exception as e:
+            if self._exception is None:
+                self._exception = e
+            return
+        finally:
+            flushed_file.file.close()
+            self._uploads_in_flight.release()
+
+        self._uploaded[flushed_file.sequence_number] = (flushed_file, result)
+        self._commit_uploaded()
+
+    def _commit_uploaded(self) -> None:
+        """Call `on_uploaded` for every uploaded file whose predecessors have all been uploaded too."""
+        while self._exception is None and self._next_sequence_number_to_commit in self._uploaded:
+            flushed_file, result = self._uploaded.pop(self._next_sequence_number_to_commit)
+            self._next_sequence_number_to_commit += 1
+
+            try:
+                self.on_uploaded(flushed_file, result)
+            except Exception as e:
+                self._exception = e
+
+    def _raise_for_failed_upload(self) -> None:
+        if self._exception is not None:
+            raise self._exception
+
+    async def wait(self) -> None:
+        """Wait for all uploads started so far to finish, raising if any of them failed."""
+        while self._tasks:
+            await asyncio.wait(list(self._tasks), return_when=asyncio.FIRST_COMPLETED)
+            self._raise_for_failed_upload()
+        self._raise_for_failed_upload()
+
+    async def cancel(self) -> None:
+        """Cancel all uploads in flight."""
+        for task in self._tasks:
+            task.cancel()
+        if self._tasks:
+            await asyncio.wait(list(self._tasks))
+
+    async def __aenter__(self) -> "UploadPipeline[T]":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> bool:
+        if exc_type is not None:
+            await self.cancel()
+            return False
+
+        try:
+            await self.wait()
+        except BaseException:
+            await self.cancel()
+            raise
+        return False
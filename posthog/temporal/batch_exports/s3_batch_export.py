@@ -1,12 +1,17 @@
+import asyncio
 import contextlib
 import dataclasses
 import datetime as dt
 import io
 import json
 import posixpath
+import shutil
+import tempfile
 import typing
 
 import aioboto3
+import aiohttp
+import botocore.exceptions
 import pyarrow as pa
 from django.conf import settings
 from temporalio import activity, workflow
@@ -26,6 +31,7 @@ from posthog.temporal.batch_exports.batch_exports import (
     StartBatchExportRunInputs,
     default_fields,
     execute_batch_export_insert_activity,
+    get_compression_executor,
     get_data_interval,
     iter_model_records,
     start_batch_export_run,
@@ -34,6 +40,7 @@ from posthog.temporal.batch_exports.metrics import (
     get_bytes_exported_metric,
     get_rows_exported_metric,
 )
+from posthog.temporal.batch_exports.pipeline import FlushedFile, UploadPipeline
 from posthog.temporal.batch_exports.temporary_file import (
     BatchExportTemporaryFile,
     BatchExportWriter,
@@ -125,6 +132,32 @@ class S3MultiPartUploadState(typing.NamedTuple):
 Part = dict[str, str | int]
 
 
+class S3PartBuffer(tempfile.SpooledTemporaryFile):
+    """A copy of a part waiting to be uploaded, kept in memory if the buffer memory of its upload allows.
+
+    Parts that don't fit in the remaining buffer memory are spooled to disk right away.
+    """
+
+    def __init__(self, memory_bytes: int, release_memory: typing.Callable[[int], None]):
+        # `SpooledTemporaryFile` doesn't roll over with a `max_size` of 0, so roll over on the first write
+        super().__init__(max_size=memory_bytes or 1, mode="w+b")
+        self.memory_bytes = memory_bytes
+        self._release_memory = release_memory
+
+    def rewind(self):
+        """Rewind the buffer before reading it."""
+        self.seek(0)
+
+    def close(self):
+        if not self.closed:
+            self._release_memory(self.memory_bytes)
+        super().close()
+
+
+class RetryablePartUploadError(Exception):
+    """Raised when uploading a part failed, but trying again may succeed."""
+
+
 class S3MultiPartUpload:
     """An S3 multi-part upload.
 
@@ -139,6 +172,9 @@ class S3MultiPartUpload:
         kms_key_id: If using 'aws:kms' encryption, the KMS key ID.
         aws_access_key_id: The AWS access key ID used to connect to the bucket.
         aws_secret_access_key: The AWS secret access key used to connect to the bucket.
+        max_buffer_memory_bytes: How much memory copies of parts waiting to be uploaded may use in total,
+            see `buffer_part`.
+        max_part_upload_attempts: How many times to try uploading each part.
     """
 
     def __init__(
@@ -151,6 +187,8 @@ class S3MultiPartUpload:
         aws_access_key_id: str | None = None,
         aws_secret_access_key: str | None = None,
         endpoint_url: str | None = None,
+        max_buffer_memory_bytes: int = 0,
+        max_part_upload_attempts: int = 3,
     ):
         self._session = aioboto3.Session()
         self.region_name = region_name
@@ -163,19 +201,41 @@ class S3MultiPartUpload:
         self.kms_key_id = kms_key_id
         self.upload_id: str | None = None
         self.parts: list[Part] = []
+        self.in_flight_part_numbers: set[int] = set()
+        self.max_buffer_memory_bytes = max_buffer_memory_bytes
+        self.buffer_memory_bytes = 0
+        self.max_part_upload_attempts = max_part_upload_attempts
 
-    def to_state(self) -> S3MultiPartUploadState:
-        """Produce state tuple that can be used to resume this S3MultiPartUpload."""
+    def to_state(self, up_to_part_number: int | None = None) -> S3MultiPartUploadState:
+        """Produce state tuple that can be used to resume this S3MultiPartUpload.
+
+        Only the parts uploaded together with all the parts before them are included, so parts still in flight,
+        and any uploaded after them, are uploaded again when resuming. This replaces them, as S3 keeps the last
+        part uploaded with each part number.
+
+        Args:
+            up_to_part_number: Only include parts up to this part number, e.g. the last part whose records
+                have been accounted for in the same heartbeat.
+        """
         # The second predicate is trivial but required by type-checking.
         if self.is_upload_in_progress() is False or self.upload_id is None:
             raise NoUploadInProgressError()
 
-        return S3MultiPartUploadState(self.upload_id, self.parts)
+        parts = []
+        for expected_part_number, part in enumerate(self.parts, start=1):
+            part_number = int(part["PartNumber"])
+            if part_number != expected_part_number or (
+                up_to_part_number is not None and part_number > up_to_part_number
+            ):
+                break
+            parts.append(part)
+
+        return S3MultiPartUploadState(self.upload_id, parts)
 
     @property
     def part_number(self):
-        """Return the current part number."""
-        return len(self.parts)
+        """Return the current part number, which is the highest number of any part uploaded or in flight."""
+        return max([int(part["PartNumber"]) for part in self.parts] + list(self.in_flight_part_numbers), default=0)
 
     def is_upload_in_progress(self) -> bool:
         """Whether this S3MultiPartUpload is in progress or not."""
@@ -246,6 +306,28 @@ class S3MultiPartUpload:
 
         return response["Location"]
 
+    def buffer_part(self, body: BatchExportTemporaryFile) -> S3PartBuffer:
+        """Copy a part to upload into its own buffer, so `body` can be reused while the part is in flight.
+
+        The buffer is kept in memory if the part fits in what's left of `max_buffer_memory_bytes`, otherwise
+        it's spooled to disk. Closing the buffer gives its memory back.
+        """
+        body.seek(0, io.SEEK_END)
+        size = body.tell()
+        body.seek(0)
+
+        memory_bytes = size if self.buffer_memory_bytes + size <= self.max_buffer_memory_bytes else 0
+        self.buffer_memory_bytes += memory_bytes
+
+        buffer = S3PartBuffer(memory_bytes, release_memory=self._release_buffer_memory)
+        shutil.copyfileobj(body, buffer)
+        buffer.rewind()
+
+        return buffer
+
+    def _release_buffer_memory(self, memory_bytes: int) -> None:
+        self.buffer_memory_bytes -= memory_bytes
+
     async def abort(self):
         """Abort this S3 multi-part upload."""
         if self.is_upload_in_progress() is False:
@@ -261,29 +343,69 @@ class S3MultiPartUpload:
         self.upload_id = None
         self.parts = []
 
-    async def upload_part(self, body: BatchExportTemporaryFile, rewind: bool = True):
-        """Upload a part of this multi-part upload."""
-        next_part_number = self.part_number + 1
+    async def upload_part(
+        self, body: BatchExportTemporaryFile | S3PartBuffer, rewind: bool = True, part_number: int | None = None
+    ) -> Part:
+        """Upload a part of this multi-part upload.
+
+        Args:
+            body: The file to upload as the part.
+            rewind: Whether to rewind `body` before uploading it.
+            part_number: The number of the part. Parts can only be uploaded concurrently by giving each their
+                number, otherwise the part after the last uploaded (or in flight) part is uploaded.
+        """
+        next_part_number = self.part_number + 1 if part_number is None else part_number
 
         if rewind is True:
             body.rewind()
-
+        start_position = body.tell()
+
+        self.in_flight_part_numbers.add(next_part_number)
+        try:
+            for attempt in range(1, self.max_part_upload_attempts + 1):
+                body.seek(start_position)
+
+                try:
+                    response = await self._upload_part(body, next_part_number)
+                except RetryablePartUploadError:
+                    if attempt == self.max_part_upload_attempts:
+                        raise
+                    await asyncio.sleep(2 ** (attempt - 1))
+                else:
+                    break
+        finally:
+            self.in_flight_part_numbers.discard(next_part_number)
+
+        part: Part = {"PartNumber": next_part_number, "ETag": response["ETag"]}
+        self.parts.append(part)
+        self.parts.sort(key=lambda part: int(part["PartNumber"]))
+
+        return part
+
+    async def _upload_part(self, body: BatchExportTemporaryFile | S3PartBuffer, part_number: int):
         # aiohttp is not duck-type friendly and requires a io.IOBase
         # We comply with the file-like interface of io.IOBase.
         # So we tell mypy to be nice with us.
         reader = io.BufferedReader(body)  # type: ignore
 
-        async with self.s3_client() as s3_client:
-            response = await s3_client.upload_part(
-                Bucket=self.bucket_name,
-                Key=self.key,
-                PartNumber=next_part_number,
-                UploadId=self.upload_id,
-                Body=reader,
-            )
-        reader.detach()  # BufferedReader closes the file otherwise.
-
-        self.parts.append({"PartNumber": next_part_number, "ETag": response["ETag"]})
+        try:
+            async with self.s3_client() as s3_client:
+                return await s3_client.upload_part(
+                    Bucket=self.bucket_name,
+                    Key=self.key,
+                    PartNumber=part_number,
+                    UploadId=self.upload_id,
+                    Body=reader,
+                )
+        except botocore.exceptions.ClientError as e:
+            status_code = e.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+            if status_code >= 500:
+                raise RetryablePartUploadError() from e
+            raise
+        except (botocore.exceptions.ConnectionError, aiohttp.ClientError) as e:
+            raise RetryablePartUploadError() from e
+        finally:
+            reader.detach()  # BufferedReader closes the file otherwise.
 
     async def __aenter__(self):
         """Asynchronous context manager protocol enter."""
@@ -363,6 +485,7 @@ async def initialize_and_resume_multipart_upload(inputs: S3InsertInputs) -> tupl
         aws_access_key_id=inputs.aws_access_key_id,
         aws_secret_access_key=inputs.aws_secret_access_key,
         endpoint_url=inputs.endpoint_url,
+        max_buffer_memory_bytes=settings.BATCH_EXPORT_S3_UPLOAD_MAX_BUFFER_MEMORY_BYTES,
     )
 
     details = activity.info().heartbeat_details
@@ -477,28 +600,28 @@ async def insert_into_s3_activity(inputs: S3InsertInputs) -> RecordsCompleted:
             return records_completed
 
         async with s3_upload as s3_upload:
+            first_part_number = s3_upload.part_number + 1
 
-            async def flush_to_s3(
-                local_results_file,
-                records_since_last_flush: int,
-                bytes_since_last_flush: int,
-                flush_counter: int,
-                last_inserted_at: dt.datetime,
-                last: bool,
-            ):
+            async def upload_to_s3(flushed_file: FlushedFile) -> Part:
+                part_number = first_part_number + flushed_file.sequence_number
                 logger.debug(
                     "Uploading %s part %s containing %s records with size %s bytes",
-                    "last " if last else "",
-                    s3_upload.part_number + 1,
-                    records_since_last_flush,
-                    bytes_since_last_flush,
+                    "last " if flushed_file.is_last else "",
+                    part_number,
+                    flushed_file.records_since_last_flush,
+                    flushed_file.bytes_since_last_flush,
                 )
 
-                await s3_upload.upload_part(local_results_file)
-                rows_exported.add(records_since_last_flush)
-                bytes_exported.add(bytes_since_last_flush)
+                return await s3_upload.upload_part(flushed_file.file, part_number=part_number)
+
+            def heartbeat_uploaded_part(flushed_file: FlushedFile, part: Part) -> None:
+                rows_exported.add(flushed_file.records_since_last_flush)
+                bytes_exported.add(flushed_file.bytes_since_last_flush)
 
-                heartbeater.details = (str(last_inserted_at), s3_upload.to_state())
+                heartbeater.details = (
+                    str(flushed_file.last_inserted_at),
+                    s3_upload.to_state(up_to_part_number=int(part["PartNumber"])),
+                )
 
             first_record_batch = cast_record_batch_json_columns(first_record_batch)
             column_names = first_record_batch.column_names
@@ -513,21 +636,29 @@ async def insert_into_s3_activity(inputs: S3InsertInputs) -> RecordsCompleted:
                 [field.with_nullable(True) for field in first_record_batch.select(column_names).schema]
             )
 
+            pipeline: UploadPipeline[Part] = UploadPipeline(
+                upload=upload_to_s3,
+                on_uploaded=heartbeat_uploaded_part,
+                max_concurrent_uploads=settings.BATCH_EXPORT_S3_MAX_CONCURRENT_UPLOADS,
+                max_pending_uploads=settings.BATCH_EXPORT_MAX_PENDING_UPLOADS,
+                copy_file=s3_upload.buffer_part,
+            )
             writer = get_batch_export_writer(
                 inputs,
-                flush_callable=flush_to_s3,
+                flush_callable=pipeline.flush,
                 max_bytes=settings.BATCH_EXPORT_S3_UPLOAD_CHUNK_SIZE_BYTES,
                 schema=schema,
             )
 
-            async with writer.open_temporary_file():
-                rows_exported = get_rows_exported_metric()
-                bytes_exported = get_bytes_exported_metric()
+            rows_exported = get_rows_exported_metric()
+            bytes_exported = get_bytes_exported_metric()
 
-                async for record_batch in record_iterator:
-                    record_batch = cast_record_batch_json_columns(record_batch)
+            async with pipeline:
+                async with writer.open_temporary_file():
+                    async for record_batch in record_iterator:
+                        record_batch = cast_record_batch_json_columns(record_batch)
 
-                    await writer.write_record_batch(record_batch)
+                        await writer.write_record_batch(record_batch)
 
             records_completed = writer.records_total
             await s3_upload.complete()
@@ -557,6 +688,8 @@ def get_batch_export_writer(
             max_bytes=settings.BATCH_EXPORT_S3_UPLOAD_CHUNK_SIZE_BYTES,
             flush_callable=flush_callable,
             compression=inputs.compression,
+            compression_executor=get_compression_executor(),
+            max_pending_compressions=settings.BATCH_EXPORT_MAX_PENDING_COMPRESSIONS,
         )
     else:
         raise UnsupportedFileFormatError(inputs.file_format, "S3")
@@ -37,6 +37,7 @@ from posthog.temporal.batch_exports.metrics import (
     get_bytes_exported_metric,
     get_rows_exported_metric,
 )
+from posthog.temporal.batch_exports.pipeline import FlushedFile, UploadPipeline
 from posthog.temporal.batch_exports.temporary_file import (
     BatchExportTemporaryFile,
     JSONLBatchExportWriter,
@@ -619,40 +620,44 @@ async def insert_into_snowflake_activity(inputs: SnowflakeInsertInputs) -> Recor
                     [field.with_nullable(True) for field in first_record_batch.select(record_columns).schema]
                 )
 
-                async def flush_to_snowflake(
-                    local_results_file,
-                    records_since_last_flush,
-                    bytes_since_last_flush,
-                    flush_counter: int,
-                    last_inserted_at,
-                    last: bool,
-                ):
+                async def put_file_to_snowflake(flushed_file: FlushedFile) -> None:
                     logger.info(
                         "Putting %sfile %s containing %s records with size %s bytes",
-                        "last " if last else "",
-                        flush_counter,
-                        records_since_last_flush,
-                        bytes_since_last_flush,
+                        "last " if flushed_file.is_last else "",
+                        flushed_file.flush_counter,
+                        flushed_file.records_since_last_flush,
+                        flushed_file.bytes_since_last_flush,
                     )
 
                     table = snow_stage_table if requires_merge else snow_table
 
-                    await snow_client.put_file_to_snowflake_table(local_results_file, table, flush_counter)
-                    rows_exported.add(records_since_last_flush)
-                    bytes_exported.add(bytes_since_last_flush)
+                    await snow_client.put_file_to_snowflake_table(flushed_file.file, table, flushed_file.flush_counter)
 
-                    heartbeater.details = (str(last_inserted_at), flush_counter)
+                def heartbeat_put_file(flushed_file: FlushedFile, _: None) -> None:
+                    rows_exported.add(flushed_file.records_since_last_flush)
+                    bytes_exported.add(flushed_file.bytes_since_last_flush)
 
+                    heartbeater.details = (str(flushed_file.last_inserted_at), flushed_file.flush_counter)
+
+                # PUTs share the connection, so we only overlap them with writing the next file
+                pipeline: UploadPipeline[None] = UploadPipeline(
+                    upload=put_file_to_snowflake,
+                    on_uploaded=heartbeat_put_file,
+                    max_pending_uploads=settings.BATCH_EXPORT_MAX_PENDING_UPLOADS,
+                )
                 writer = JSONLBatchExportWriter(
                     max_bytes=settings.BATCH_EXPORT_SNOWFLAKE_UPLOAD_CHUNK_SIZE_BYTES,
-                    flush_callable=flush_to_snowflake,
+                    flush_callable=pipeline.flush,
                 )
 
-                async with writer.open_temporary_file(current_flush_counter):
-                    async for record_batch in records_iterator:
-                        record_batch = cast_record_batch_json_columns(record_batch, json_columns=known_variant_columns)
+                async with pipeline:
+                    async with writer.open_temporary_file(current_flush_counter):
+                        async for record_batch in records_iterator:
+                            record_batch = cast_record_batch_json_columns(
+                                record_batch, json_columns=known_variant_columns
+                            )
 
-                        await writer.write_record_batch(record_batch)
+                            await writer.write_record_batch(record_batch)
 
                 await snow_client.copy_loaded_files_to_snowflake_table(
                     snow_stage_table if requires_merge else snow_table
@@ -1,11 +1,15 @@
 """This module contains a temporary file to stage data in batch exports."""
 
 import abc
+import asyncio
+import collections
 import collections.abc
+import concurrent.futures
 import contextlib
 import csv
 import datetime as dt
 import gzip
+import shutil
 import tempfile
 import typing
 
@@ -13,6 +17,13 @@ import brotli
 import orjson
 import pyarrow as pa
 import pyarrow.parquet as pq
+from temporalio import activity
+
+from posthog.temporal.batch_exports.encoders import CSVRecordBatchEncoder, JSONLRecordBatchEncoder
+from posthog.temporal.batch_exports.metrics import (
+    get_bytes_compressed_in_metric,
+    get_bytes_compressed_out_metric,
+)
 
 
 def replace_broken_unicode(obj):
@@ -42,6 +53,12 @@ class BatchExportTemporaryFile:
     This class does not implement the file-like interface but rather passes any calls
     to the underlying tempfile.NamedTemporaryFile. We do override 'write' methods
     to allow tracking bytes and records.
+
+    Content passed to `write` is compressed right away, on the calling thread. Content passed to
+    `write_in_background` is compressed in `compression_executor`, off the event loop, and written once
+    compressed, in the order it was passed. gzip chunks are compressed independently and in parallel, as
+    concatenated gzip members make up a valid gzip file. brotli chunks are all part of one stream, so each
+    one is only compressed once the previous one is done, which still overlaps compressing with encoding.
     """
 
     def __init__(
@@ -56,6 +73,8 @@ class BatchExportTemporaryFile:
         dir: str | None = None,
         *,
         errors: str | None = None,
+        compression_executor: concurrent.futures.Executor | None = None,
+        max_pending_compressions: int = 1,
     ):
         self._file = tempfile.NamedTemporaryFile(
             mode=mode,
@@ -74,6 +93,12 @@ class BatchExportTemporaryFile:
         self.records_since_last_reset = 0
         self._brotli_compressor = None
 
+        self.compression_executor = compression_executor
+        self.max_pending_compressions = max_pending_compressions
+        self._pending_compressions: collections.deque[tuple[int, concurrent.futures.Future[bytes]]] = (
+            collections.deque()
+        )
+
     def __getattr__(self, name):
         """Pass get attr to underlying tempfile.NamedTemporaryFile."""
         return self._file.__getattr__(name)
@@ -124,10 +149,23 @@ class BatchExportTemporaryFile:
             case _:
                 raise ValueError(f"Unsupported compression: '{self.compression}'")
 
+    def track_compression(self, bytes_in: int, bytes_out: int) -> None:
+        """Report how many bytes went into and came out of compression."""
+        if self.compression is None or not activity.in_activity():
+            return
+
+        get_bytes_compressed_in_metric(self.compression).add(bytes_in)
+        get_bytes_compressed_out_metric(self.compression).add(bytes_out)
+
     def write(self, content: bytes | str):
         """Write bytes to underlying file keeping track of how many bytes were written."""
-        compressed_content = self.compress(content)
+        encoded = content.encode("utf-8") if isinstance(content, str) else content
+        compressed_content = self.compress(encoded)
+        self.track_compression(len(encoded), len(compressed_content))
+
+        return self._write_compressed(compressed_content)
 
+    def _write_compressed(self, compressed_content: bytes) -> int:
         if "b" in self.mode:
             result = self._file.write(compressed_content)
         else:
@@ -138,6 +176,47 @@ class BatchExportTemporaryFile:
 
         return result
 
+    def write_in_background(self, content: bytes | str) -> None:
+        """Compress `content` in `compression_executor`, and write it once compressed.
+
+        Without compression, or without a `compression_executor`, content is written right away. Otherwise, call
+        `wait_for_background_writes` to write compressed content to the file, and before reading the file.
+        """
+        if self.compression is None or self.compression_executor is None:
+            self.write(content)
+            return
+
+        encoded = content.encode("utf-8") if isinstance(content, str) else content
+
+        if self.compression == "brotli":
+            previous = self._pending_compressions[-1][1] if self._pending_compressions else None
+            future = self.compression_executor.submit(self._compress_after, previous, encoded)
+        else:
+            future = self.compression_executor.submit(self.compress, encoded)
+
+        self._pending_compressions.append((len(encoded), future))
+
+    def _compress_after(self, previous: concurrent.futures.Future[bytes] | None, content: bytes) -> bytes:
+        """Compress content once the previous content is compressed, for compressors that keep state."""
+        if previous is not None:
+            previous.result()
+        return self.compress(content)
+
+    async def wait_for_background_writes(self, max_pending: int = 0) -> None:
+        """Write compressed content in order, waiting until at most `max_pending` are still being compressed."""
+        while self._pending_compressions:
+            bytes_in, future = self._pending_compressions[0]
+
+            if not future.done():
+                if len(self._pending_compressions) <= max_pending:
+                    break
+                await asyncio.wrap_future(future)
+
+            self._pending_compressions.popleft()
+            compressed_content = future.result()
+            self.track_compression(bytes_in, len(compressed_content))
+            self._write_compressed(compressed_content)
+
     def write_record_as_bytes(self, record: bytes):
         result = self.write(record)
 
@@ -225,11 +304,33 @@ class BatchExportTemporaryFile:
         """Rewind the file before reading it."""
         self._file.seek(0)
 
+    def copy(self) -> "BatchExportTemporaryFile":
+        """Copy the contents of this file into a new, rewound, `BatchExportTemporaryFile`.
+
+        The contents are copied as they are, already compressed, so the copy has no compression. Tracker
+        attributes are copied too.
+        """
+        copied_file = BatchExportTemporaryFile()
+
+        self._file.seek(0)
+        shutil.copyfileobj(self._file, copied_file._file)
+        copied_file.rewind()
+
+        copied_file.bytes_total = self.bytes_total
+        copied_file.records_total = self.records_total
+        copied_file.bytes_since_last_reset = self.bytes_since_last_reset
+        copied_file.records_since_last_reset = self.records_since_last_reset
+
+        return copied_file
+
     def reset(self):
         """Reset underlying file by truncating it.
 
         Also resets the tracker attributes for bytes and records since last reset.
         """
+        if self._pending_compressions:
+            raise ValueError("Cannot reset file while writes are still being compressed")
+
         self._file.seek(0)
         self._file.truncate()
 
@@ -326,6 +427,7 @@ class BatchExportWriter(abc.ABC):
             try:
                 yield
             finally:
+                await temp_file.wait_for_background_writes()
                 self.track_bytes_written(temp_file)
 
                 if self.last_inserted_at is not None and self.bytes_since_last_flush > 0:
@@ -376,6 +478,9 @@ class BatchExportWriter(abc.ABC):
         column_names.pop(column_names.index("_inserted_at"))
 
         self._write_record_batch(record_batch.select(column_names))
+        await self.batch_export_file.wait_for_background_writes(
+            max_pending=self.batch_export_file.max_pending_compressions
+        )
 
         self.last_inserted_at = last_inserted_at
         self.track_records_written(record_batch)
@@ -389,6 +494,8 @@ class BatchExportWriter(abc.ABC):
 
         The underlying batch export temporary file will be reset after calling `flush_callable`.
         """
+        await self.batch_export_file.wait_for_background_writes()
+
         if is_last is True and self.batch_export_file.compression == "brotli":
             self.batch_export_file.finish_brotli_compressor()
 
@@ -412,9 +519,17 @@ class BatchExportWriter(abc.ABC):
 class JSONLBatchExportWriter(BatchExportWriter):
     """A `BatchExportWriter` for JSONLines format.
 
+    Record batches are encoded a column at a time by a `JSONLRecordBatchEncoder`, and written to the file
+    all at once.
+
     Attributes:
         default: The default function to use to cast non-serializable Python objects to serializable objects.
             By default, non-serializable objects will be cast to string via `str()`.
+        json_columns_as_raw_bytes: Write JSON columns as they come from ClickHouse, instead of parsing them
+            and serializing them again. The JSON is the same, but its formatting may differ.
+        compression_executor: Compress in this executor, off the event loop, instead of right away.
+        max_pending_compressions: How many record batches may be compressed in the background while the
+            next one is being encoded.
     """
 
     def __init__(
@@ -423,14 +538,22 @@ class JSONLBatchExportWriter(BatchExportWriter):
         flush_callable: FlushCallable,
         compression: None | str = None,
         default: typing.Callable = str,
+        json_columns_as_raw_bytes: bool = False,
+        compression_executor: concurrent.futures.Executor | None = None,
+        max_pending_compressions: int = 1,
     ):
         super().__init__(
             max_bytes=max_bytes,
             flush_callable=flush_callable,
-            file_kwargs={"compression": compression},
+            file_kwargs={
+                "compression": compression,
+                "compression_executor": compression_executor,
+                "max_pending_compressions": max_pending_compressions,
+            },
         )
 
         self.default = default
+        self.encoder = JSONLRecordBatchEncoder(json_columns_as_raw_bytes=json_columns_as_raw_bytes)
 
     def write(self, content: bytes) -> int:
         """Write a single row of JSONL."""
@@ -445,12 +568,22 @@ class JSONLBatchExportWriter(BatchExportWriter):
 
     def _write_record_batch(self, record_batch: pa.RecordBatch) -> None:
         """Write records to a temporary file as JSONL."""
-        for record in record_batch.to_pylist():
-            self.write(record)
+        encoded = self.encoder.encode(record_batch)
+        if encoded:
+            self.batch_export_file.write_in_background(encoded)
 
 
 class CSVBatchExportWriter(BatchExportWriter):
-    """A `BatchExportWriter` for CSV format."""
+    """A `BatchExportWriter` for CSV format.
+
+    Record batches are encoded a column at a time by a `CSVRecordBatchEncoder`, and written to the file
+    all at once.
+
+    Attributes:
+        compression_executor: Compress in this executor, off the event loop, instead of right away.
+        max_pending_compressions: How many record batches may be compressed in the background while the
+            next one is being encoded.
+    """
 
     def __init__(
         self,
@@ -464,11 +597,17 @@ class CSVBatchExportWriter(BatchExportWriter):
         line_terminator: str = "\n",
         quoting=csv.QUOTE_NONE,
         compression: str | None = None,
+        compression_executor: concurrent.futures.Executor | None = None,
+        max_pending_compressions: int = 1,
     ):
         super().__init__(
             max_bytes=max_bytes,
             flush_callable=flush_callable,
-            file_kwargs={"compression": compression},
+            file_kwargs={
+                "compression": compression,
+                "compression_executor": compression_executor,
+                "max_pending_compressions": max_pending_compressions,
+            },
         )
         self.field_names = field_names
         self.extras_action: typing.Literal["raise", "ignore"] = extras_action
@@ -478,27 +617,21 @@ class CSVBatchExportWriter(BatchExportWriter):
         self.line_terminator = line_terminator
         self.quoting = quoting
 
-        self._csv_writer: csv.DictWriter | None = None
-
-    @property
-    def csv_writer(self) -> csv.DictWriter:
-        if self._csv_writer is None:
-            self._csv_writer = csv.DictWriter(
-                self.batch_export_file,
-                fieldnames=self.field_names,
-                extrasaction=self.extras_action,
-                delimiter=self.delimiter,
-                quotechar=self.quote_char,
-                escapechar=self.escape_char,
-                quoting=self.quoting,
-                lineterminator=self.line_terminator,
-            )
-
-        return self._csv_writer
+        self.encoder = CSVRecordBatchEncoder(
+            field_names=field_names,
+            extras_action=extras_action,
+            delimiter=delimiter,
+            quote_char=quote_char,
+            escape_char=escape_char,
+            line_terminator=line_terminator,
+            quoting=quoting,
+        )
 
     def _write_record_batch(self, record_batch: pa.RecordBatch) -> None:
         """Write records to a temporary file as CSV."""
-        self.csv_writer.writerows(record_batch.to_pylist())
+        encoded = self.encoder.encode(record_batch)
+        if encoded:
+            self.batch_export_file.write_in_background(encoded)
 
 
 class ParquetBatchExportWriter(BatchExportWriter):
@@ -76,6 +76,60 @@ async def apeek_first_and_rewind(
     return (first, rewind_gen())
 
 
+class _PrefetchError:
+    """Wraps an exception raised by a prefetched generator, to re-raise it in the consumer."""
+
+    def __init__(self, exception: Exception):
+        self.exception = exception
+
+
+_PREFETCH_DONE = object()
+
+
+async def aprefetch(
+    gen: collections.abc.AsyncGenerator[T, None], max_size: int
+) -> collections.abc.AsyncGenerator[T, None]:
+    """Consume an async generator in a background task, up to `max_size` elements ahead of the caller.
+
+    Once `max_size` elements are waiting, the background task stops consuming the generator until the caller
+    catches up. So, a slow caller applies back-pressure all the way to the generator's source, while the caller never
+    waits for an element that could have been fetched while it was busy with the previous one.
+
+    Exceptions raised by the generator are re-raised to the caller after all elements that came before them.
+    """
+    if max_size < 1:
+        raise ValueError("max_size must be at least 1")
+
+    queue: asyncio.Queue[typing.Any] = asyncio.Queue(maxsize=max_size)
+
+    async def produce() -> None:
+        try:
+            async for value in gen:
+                await queue.put(value)
+        except Exception as e:
+            await queue.put(_PrefetchError(e))
+            return
+        await queue.put(_PREFETCH_DONE)
+
+    producer = asyncio.create_task(produce())
+
+    try:
+        while True:
+            value = await queue.get()
+
+            if value is _PREFETCH_DONE:
+                return
+            if isinstance(value, _PrefetchError):
+                raise value.exception
+
+            yield value
+    finally:
+        if not producer.done():
+            producer.cancel()
+            await asyncio.wait([producer])
+        await gen.aclose()
+
+
 @contextlib.asynccontextmanager
 async def set_status_to_running_task(
     run_id: str | None, logger
@@ -116,16 +170,21 @@ async def set_status_to_running_task(
             await asyncio.wait([background_task])
 
 
+def load_json(value: str) -> typing.Any:
+    """Parse a JSON string from a `JsonType` array."""
+    try:
+        return orjson.loads(value.encode("utf-8"))
+    except:
+        # Fallback if it's something orjson can't handle
+        return json.loads(value)
+
+
 class JsonScalar(pa.ExtensionScalar):
     """Represents a JSON binary string."""
 
     def as_py(self) -> dict | None:
         if self.value:
-            try:
-                return orjson.loads(self.value.as_py().encode("utf-8"))
-            except:
-                # Fallback if it's something orjson can't handle
-                return json.loads(self.value.as_py())
+            return load_json(self.value.as_py())
         else:
             return None
 
@@ -1,14 +1,23 @@
 from dataclasses import dataclass
-from typing import Literal
+from typing import Any, Literal, Optional
+from collections.abc import Callable
 from uuid import UUID
 
 import dlt
 from django.conf import settings
+from dlt.common.pipeline import TRefreshMode
+from dlt.extract.exceptions import InvalidParallelResourceDataType
 from dlt.pipeline.exceptions import PipelineStepFailed
 
-from asgiref.sync import async_to_sync
 import asyncio
+import concurrent.futures
+import contextlib
+import contextvars
+import functools
+import threading
+from temporalio import activity
 from posthog.settings.base_variables import TEST
+from posthog.temporal.common.heartbeat import Heartbeater
 from structlog.typing import FilteringBoundLogger
 from dlt.sources import DltSource
 from collections import Counter
@@ -17,6 +26,28 @@ from posthog.warehouse.data_load.validate_schema import validate_schema_and_upda
 from posthog.warehouse.models.external_data_source import ExternalDataSource
 
 
+_pipeline_executor: concurrent.futures.ThreadPoolExecutor | None = None
+
+
+def get_pipeline_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """Return the executor the steps of data import pipelines run in, shared by all imports in this worker.
+
+    Only steps run in threads, imports otherwise wait on the event loop, so a worker can run more imports than it has
+    threads.
+    """
+    global _pipeline_executor
+
+    if _pipeline_executor is None:
+        _pipeline_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=settings.DATA_WAREHOUSE_PIPELINE_MAX_WORKERS, thread_name_prefix="data-import-pipeline"
+        )
+    return _pipeline_executor
+
+
+class DataImportCancelled(Exception):
+    pass
+
+
 @dataclass
 class PipelineInputs:
     source_id: UUID
@@ -37,6 +68,7 @@ class DataImportPipeline:
         logger: FilteringBoundLogger,
         reset_pipeline: bool,
         incremental: bool = False,
+        heartbeater: Optional[Heartbeater] = None,
     ):
         self.inputs = inputs
         self.logger = logger
@@ -47,6 +79,21 @@ class DataImportPipeline:
             self.source = source
 
         self._incremental = incremental
+        self.heartbeater = heartbeater
+        self.extracted_rows: Counter[str] = Counter()
+        self._extracted_rows_lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        resources = list(self.source.selected_resources.values())
+        for resource in resources:
+            resource.add_map(self._track_rows(resource.name))
+
+            if len(resources) > 1:
+                # Extract resources of the same source concurrently, in dlt's extract workers
+                with contextlib.suppress(InvalidParallelResourceDataType):
+                    resource.parallelize()
+
         self.refresh_dlt = reset_pipeline
         self.should_chunk_pipeline = (
             incremental
@@ -86,11 +133,87 @@ class DataImportPipeline:
             dataset_name=self.inputs.dataset_name,
         )
 
-    def _run(self) -> dict[str, int]:
+    def _track_rows(self, resource_name: str) -> Callable[[Any], Any]:
+        """Return a map step counting the rows of each chunk a resource yields, and stopping it once cancelled."""
+
+        def track_rows(items: Any) -> Any:
+            if self._cancelled.is_set():
+                raise DataImportCancelled(f"Data import of {resource_name} was cancelled")
+
+            if hasattr(items, "num_rows"):
+                rows = items.num_rows
+            elif isinstance(items, list):
+                rows = len(items)
+            else:
+                rows = 1
+
+            with self._extracted_rows_lock:
+                self.extracted_rows[resource_name] += rows
+                details = (dict(self.extracted_rows),)
+
+            if self._loop is not None:
+                # Heartbeats have to be sent from the event loop. Steps run in the copied context of the activity.
+                self._loop.call_soon_threadsafe(self._heartbeat, details)
+
+            return items
+
+        return track_rows
+
+    def _heartbeat(self, details: tuple[Any, ...]) -> None:
+        if self.heartbeater is not None:
+            self.heartbeater.details = details
+        if activity.in_activity():
+            activity.heartbeat(*details)
+
+    async def _run_step(self, step: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking step of a dlt pipeline in a thread.
+
+        Cancelling the step stops it at the next chunk of rows extracted, and waits for it to stop so nothing is left
+        writing to the pipeline's working directory.
+        """
+        self._loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        future = self._loop.run_in_executor(
+            get_pipeline_executor(), functools.partial(context.run, step, *args, **kwargs)
+        )
+
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            self._cancelled.set()
+            with contextlib.suppress(Exception):
+                await future
+            raise
+
+    async def _run_pipeline(self, pipeline: dlt.Pipeline, refresh: Optional[TRefreshMode]) -> Counter[str]:
+        """Extract, normalize and load the source one step at a time, like `dlt.Pipeline.run` does."""
+        await self._run_step(pipeline.extract, self.source, refresh=refresh)
+        await self._run_step(pipeline.normalize, loader_file_format=self.loader_file_format)
+
+        row_counts = pipeline.last_trace.last_normalize_info.row_counts
+        # Remove any DLT tables from the counts
+        filtered_rows = dict(filter(lambda pair: not pair[0].startswith("_dlt"), row_counts.items()))
+
+        await self._run_step(pipeline.load)
+
+        return Counter(filtered_rows)
+
+    async def _load_pending_packages(self, pipeline: dlt.Pipeline) -> None:
+        """Restore the state of the pipeline from the destination, and finish loading anything a previous run left."""
+        if pipeline.config.restore_from_destination:
+            await self._run_step(pipeline.sync_destination)
+
+        if pipeline.list_extracted_load_packages():
+            await self._run_step(pipeline.normalize, loader_file_format=self.loader_file_format)
+        if pipeline.list_normalized_load_packages():
+            await self._run_step(pipeline.load)
+
+    async def _run(self) -> dict[str, int]:
         if self.refresh_dlt:
             self.logger.info("Pipeline getting a full refresh due to reset_pipeline being set")
 
         pipeline = self._create_pipeline()
+        await self._load_pending_packages(pipeline)
 
         total_counts: Counter[str] = Counter({})
 
@@ -103,19 +226,12 @@ class DataImportPipeline:
             while counts:
                 self.logger.info(f"Running incremental (non-sql) pipeline, run ${pipeline_runs}")
 
-                pipeline.run(
-                    self.source,
-                    loader_file_format=self.loader_file_format,
-                    refresh="drop_sources" if self.refresh_dlt and pipeline_runs == 0 else None,
+                counts = await self._run_pipeline(
+                    pipeline, refresh="drop_sources" if self.refresh_dlt and pipeline_runs == 0 else None
                 )
-
-                row_counts = pipeline.last_trace.last_normalize_info.row_counts
-                # Remove any DLT tables from the counts
-                filtered_rows = dict(filter(lambda pair: not pair[0].startswith("_dlt"), row_counts.items()))
-                counts = Counter(filtered_rows)
                 total_counts = counts + total_counts
 
-                async_to_sync(validate_schema_and_update_table)(
+                await validate_schema_and_update_table(
                     run_id=self.inputs.run_id,
                     team_id=self.inputs.team_id,
                     schema_id=self.inputs.schema_id,
@@ -127,17 +243,10 @@ class DataImportPipeline:
         else:
             self.logger.info("Running standard pipeline")
 
-            pipeline.run(
-                self.source,
-                loader_file_format=self.loader_file_format,
-                refresh="drop_sources" if self.refresh_dlt else None,
-            )
-            row_counts = pipeline.last_trace.last_normalize_info.row_counts
-            filtered_rows = dict(filter(lambda pair: not pair[0].startswith("_dlt"), row_counts.items()))
-            counts = Counter(filtered_rows)
+            counts = await self._run_pipeline(pipeline, refresh="drop_sources" if self.refresh_dlt else None)
             total_counts = total_counts + counts
 
-            async_to_sync(validate_schema_and_update_table)(
+            await validate_schema_and_update_table(
                 run_id=self.inputs.run_id,
                 team_id=self.inputs.team_id,
                 schema_id=self.inputs.schema_id,
@@ -149,7 +258,7 @@ class DataImportPipeline:
 
     async def run(self) -> dict[str, int]:
         try:
-            return await asyncio.to_thread(self._run)
+            return await self._run()
         except PipelineStepFailed as e:
             self.logger.exception(f"Data import failed for endpoint with exception {e}", exc_info=e)
             raise
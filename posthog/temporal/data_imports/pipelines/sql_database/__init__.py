@@ -4,6 +4,7 @@ from datetime import datetime, date
 from typing import Any, Optional, Union, List  # noqa: UP035
 from collections.abc import Iterable
 from zoneinfo import ZoneInfo
+from django.conf import settings
 from sqlalchemy import MetaData, Table
 from sqlalchemy.engine import Engine
 
@@ -17,6 +18,7 @@ from urllib.parse import quote
 from posthog.warehouse.types import IncrementalFieldType
 
 from .helpers import (
+    TableBackend,
     table_rows,
     engine_from_credentials,
     get_primary_key,
@@ -44,6 +46,7 @@ def postgres_source(
     table_names: list[str],
     incremental_field: Optional[str] = None,
     incremental_field_type: Optional[IncrementalFieldType] = None,
+    backend: Optional[TableBackend] = None,
 ) -> DltSource:
     host = quote(host)
     user = quote(user)
@@ -62,7 +65,14 @@ def postgres_source(
     else:
         incremental = None
 
-    db_source = sql_database(credentials, schema=schema, table_names=table_names, incremental=incremental)
+    db_source = sql_database(
+        credentials,
+        schema=schema,
+        table_names=table_names,
+        incremental=incremental,
+        backend=backend or settings.DATA_WAREHOUSE_POSTGRES_SOURCE_BACKEND,
+        parallelism=settings.DATA_WAREHOUSE_POSTGRES_SOURCE_PARALLELISM,
+    )
 
     return db_source
 
@@ -101,6 +111,8 @@ def sql_database(
     metadata: Optional[MetaData] = None,
     table_names: Optional[List[str]] = dlt.config.value,  # noqa: UP006
     incremental: Optional[dlt.sources.incremental] = None,
+    backend: TableBackend = "sqlalchemy",
+    parallelism: int = 1,
 ) -> Iterable[DltResource]:
     """
     A DLT source which loads data from an SQL database using SQLAlchemy.
@@ -111,6 +123,8 @@ def sql_database(
         schema (Optional[str]): Name of the database schema to load (if different from default).
         metadata (Optional[MetaData]): Optional `sqlalchemy.MetaData` instance. `schema` argument is ignored when this is used.
         table_names (Optional[List[str]]): A list of table names to load. By default, all tables in the schema are loaded.
+        backend (TableBackend): Whether to load rows as dicts ("sqlalchemy"), or chunks of rows as Arrow tables ("pyarrow").
+        parallelism (int): How many ranges of a table's primary key to read at the same time on full refreshes.
 
     Returns:
         Iterable[DltResource]: A list of DLT resources for each table to be loaded.
@@ -142,4 +156,6 @@ def sql_database(
             engine=engine,
             table=table,
             incremental=incremental,
+            backend=backend,
+            parallelism=parallelism,
         )
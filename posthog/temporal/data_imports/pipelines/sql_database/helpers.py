@@ -2,22 +2,146 @@
 
 from typing import (
     Any,
+    Literal,
     Optional,
     Union,
 )
-from collections.abc import Iterator
+from collections.abc import Callable, Iterator, Sequence
+import concurrent.futures
+import datetime
+import decimal
 import operator
+import queue
+import threading
 
 import dlt
+import orjson
+import pyarrow as pa
 from dlt.sources.credentials import ConnectionStringCredentials
 from dlt.common.configuration.specs import BaseConfiguration, configspec
 from dlt.common.typing import TDataItem
-from .settings import DEFAULT_CHUNK_SIZE
+from .settings import DEFAULT_ARROW_CHUNK_SIZE, DEFAULT_CHUNK_SIZE, DEFAULT_PARALLELISM
 
-from sqlalchemy import Table, create_engine, Column
+from sqlalchemy import Table, create_engine, Column, func, select
+from sqlalchemy import types as sqltypes
 from sqlalchemy.engine import Engine
 from sqlalchemy.sql import Select
 
+# How rows are loaded: "sqlalchemy" yields a dict per row, "pyarrow" yields a `pa.Table` per chunk of rows
+TableBackend = Literal["sqlalchemy", "pyarrow"]
+
+
+# Type of numeric columns without a precision, as dlt loads decimals without one
+UNBOUNDED_DECIMAL_TYPE = pa.decimal128(38, 9)
+
+
+def sql_type_to_arrow_type(sql_type: sqltypes.TypeEngine) -> pa.DataType:
+    """Return the Arrow type to load a column of the given SQL type as, which is a string for unknown types."""
+    if isinstance(sql_type, sqltypes.Boolean):
+        return pa.bool_()
+    if isinstance(sql_type, sqltypes.Integer):
+        return pa.int64()
+    if isinstance(sql_type, sqltypes.Float):
+        return pa.float64()
+    if isinstance(sql_type, sqltypes.Numeric):
+        if not sql_type.asdecimal:
+            return pa.float64()
+        if sql_type.precision is not None and sql_type.precision <= 38:
+            return pa.decimal128(sql_type.precision, sql_type.scale or 0)
+        return UNBOUNDED_DECIMAL_TYPE
+    if isinstance(sql_type, sqltypes.DateTime):
+        return pa.timestamp("us", tz="UTC" if sql_type.timezone else None)
+    if isinstance(sql_type, sqltypes.Date):
+        return pa.date32()
+    if isinstance(sql_type, sqltypes.Time):
+        return pa.time64("us")
+    if isinstance(sql_type, sqltypes.LargeBinary):
+        return pa.binary()
+    # Including JSON and ARRAY columns, as dlt stores nested values as JSON strings
+    return pa.string()
+
+
+def _to_string(value: Any) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, dict | list | bool):
+        return orjson.dumps(value, default=str).decode("utf-8")
+    return str(value)
+
+
+def _round_decimals(values: Sequence[Any], arrow_type: pa.DataType) -> Sequence[Any]:
+    """Round decimals to the scale of `arrow_type`, as numerics without a scale can have values of any scale."""
+    if not pa.types.is_decimal(arrow_type):
+        return values
+
+    exponent = decimal.Decimal(1).scaleb(-arrow_type.scale)
+    # The default context only keeps 28 digits, fewer than a decimal128 can have
+    with decimal.localcontext(prec=38):
+        return [
+            value.quantize(exponent)
+            if isinstance(value, decimal.Decimal)
+            and value.is_finite()
+            and value.as_tuple().exponent < -arrow_type.scale
+            else value
+            for value in values
+        ]
+
+
+def _to_arrow_array(values: Sequence[Any], arrow_type: pa.DataType, fall_back_to_string: bool) -> pa.Array:
+    """Convert the values of a column to an Arrow array of `arrow_type`, or of strings if they don't fit it."""
+    if pa.types.is_string(arrow_type):
+        return pa.array([_to_string(value) for value in values], type=arrow_type)
+
+    try:
+        return pa.array(_round_decimals(values, arrow_type), type=arrow_type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError, decimal.InvalidOperation):
+        if not fall_back_to_string:
+            raise
+        return pa.array([_to_string(value) for value in values], type=pa.string())
+
+
+def rows_to_arrow(
+    rows: Sequence[Sequence[Any]],
+    column_names: Sequence[str],
+    arrow_types: Sequence[pa.DataType],
+    fall_back_to_string: bool = True,
+) -> pa.Table:
+    """Convert rows, as tuples, to a `pa.Table`, converting a column at a time instead of a row at a time.
+
+    Columns with values that don't fit their type are converted to strings, unless `fall_back_to_string` is off,
+    in which case they raise.
+    """
+    columns = list(zip(*rows)) if rows else [() for _ in column_names]
+    arrays = []
+    for name, values, arrow_type in zip(column_names, columns, arrow_types):
+        try:
+            arrays.append(_to_arrow_array(values, arrow_type, fall_back_to_string))
+        except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError, decimal.InvalidOperation) as e:
+            raise ValueError(f"Values of column '{name}' don't fit its type {arrow_type}") from e
+    return pa.Table.from_arrays(arrays, names=list(column_names))
+
+
+def split_key_range(min_value: Any, max_value: Any, partitions: int) -> list[Any]:
+    """Return up to `partitions - 1` increasing boundaries splitting the range from `min_value` to `max_value`."""
+    if partitions < 2 or min_value is None or max_value is None or not min_value < max_value:
+        return []
+
+    if isinstance(min_value, datetime.date) and not isinstance(min_value, datetime.datetime):
+        # Dates can't be split by fractions of a day
+        step: Any = datetime.timedelta(days=max((max_value - min_value).days // partitions, 1))
+    elif isinstance(min_value, int):
+        step = max((max_value - min_value) // partitions, 1)
+    else:
+        step = (max_value - min_value) / partitions
+
+    boundaries = []
+    for index in range(1, partitions):
+        boundary = min_value + step * index
+        if boundary > max_value:
+            break
+        boundaries.append(boundary)
+    return boundaries
+
 
 class TableLoader:
     def __init__(
@@ -26,11 +150,19 @@ class TableLoader:
         table: Table,
         chunk_size: int = 1000,
         incremental: Optional[dlt.sources.incremental[Any]] = None,
+        backend: TableBackend = "sqlalchemy",
+        parallelism: int = 1,
     ) -> None:
         self.engine = engine
         self.table = table
         self.chunk_size = chunk_size
         self.incremental = incremental
+        self.backend = backend
+        self.parallelism = parallelism
+        # Chunks of a load all have the same schema, so which columns fall back to strings is decided by the first
+        self.arrow_types = [sql_type_to_arrow_type(column.type) for column in table.columns]
+        self._arrow_types_decided = False
+        self._arrow_types_lock = threading.Lock()
         if incremental:
             try:
                 self.cursor_column: Optional[Column[Any]] = table.c[incremental.cursor_path]
@@ -62,19 +194,153 @@ class TableLoader:
             return query
         return query.where(filter_op(self.cursor_column, self.last_value))  # type: ignore
 
-    def load_rows(self) -> Iterator[list[TDataItem]]:
+    def get_partition_column(self) -> Optional[Column[Any]]:
+        """Return the column to partition reads by: A single numeric or time primary key, if there is one."""
+        primary_key = get_primary_key(self.table)
+        if len(primary_key) != 1:
+            return None
+
+        column = self.table.c[primary_key[0]]
+        if isinstance(column.type, sqltypes.Integer | sqltypes.Numeric | sqltypes.DateTime | sqltypes.Date):
+            return column
+        return None
+
+    def make_partitioned_queries(self) -> list[Select[Any]]:
+        """Split the query of a full refresh into up to `parallelism` queries over ranges of the primary key.
+
+        The first and last ranges are open, and rows with a null key get a query of their own, so together the
+        queries read every row exactly once, even rows inserted after the key range was looked up. Incremental
+        loads aren't partitioned, as they read rows in cursor order.
+        """
         query = self.make_query()
+        column = self.get_partition_column()
+        if self.incremental or self.parallelism < 2 or column is None:
+            return [query]
+
+        with self.engine.connect() as conn:
+            min_value, max_value = conn.execute(select(func.min(column), func.max(column))).one()
+
+        boundaries = split_key_range(min_value, max_value, self.parallelism)
+        if not boundaries:
+            return [query]
+
+        queries = [query.where(column < boundaries[0])]
+        queries.extend(query.where(column >= lower, column < upper) for lower, upper in zip(boundaries, boundaries[1:]))
+        queries.append(query.where(column >= boundaries[-1]))
+        if column.nullable:
+            queries.append(query.where(column.is_(None)))
+        return queries
+
+    def load(self) -> Iterator[TDataItem]:
+        """Load chunks of rows with the configured backend, reading ranges of the primary key in parallel if possible."""
+        load_chunks: Callable[[Select[Any]], Iterator[TDataItem]] = (
+            self.load_arrow_tables if self.backend == "pyarrow" else self.load_rows
+        )
+        queries = self.make_partitioned_queries()
+
+        if len(queries) == 1:
+            yield from load_chunks(queries[0])
+        else:
+            yield from self.load_in_parallel(queries, load_chunks)
+
+    def load_in_parallel(
+        self, queries: Sequence[Select[Any]], load_chunks: Callable[[Select[Any]], Iterator[TDataItem]]
+    ) -> Iterator[TDataItem]:
+        """Run queries over up to `parallelism` connections at once, yielding chunks as they are loaded.
+
+        Chunks wait in a bounded queue, so reads pause while whoever consumes the chunks falls behind.
+        """
+        chunks: queue.Queue[Any] = queue.Queue(maxsize=self.parallelism * 2)
+        stopped = threading.Event()
+        done = object()
+
+        def put(item: Any) -> bool:
+            while not stopped.is_set():
+                try:
+                    chunks.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def read(query: Select[Any]) -> None:
+            try:
+                for chunk in load_chunks(query):
+                    if not put(chunk):
+                        return
+            except Exception as e:
+                put(e)
+            finally:
+                put(done)
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.parallelism, thread_name_prefix="sql-table-loader"
+        ) as executor:
+            for query in queries:
+                executor.submit(read, query)
+
+            try:
+                remaining = len(queries)
+                while remaining:
+                    item = chunks.get()
+                    if item is done:
+                        remaining -= 1
+                    elif isinstance(item, Exception):
+                        raise item
+                    else:
+                        yield item
+            finally:
+                stopped.set()
+
+    def load_rows(self, query: Optional[Select[Any]] = None) -> Iterator[list[TDataItem]]:
+        if query is None:
+            query = self.make_query()
         with self.engine.connect() as conn:
             result = conn.execution_options(yield_per=self.chunk_size).execute(query)
             for partition in result.partitions(size=self.chunk_size):
                 yield [dict(row._mapping) for row in partition]
 
+    def load_arrow_tables(self, query: Optional[Select[Any]] = None) -> Iterator[pa.Table]:
+        """Load rows a chunk at a time, each chunk as a `pa.Table`.
+
+        Rows are streamed from a server-side cursor, like `load_rows` does, but each chunk is converted to
+        Arrow a column at a time, with types derived from the table's columns. That skips building a dict per
+        row, and lets dlt write each chunk as is, instead of normalizing every row. The query, and so the
+        incremental cursor semantics, are the same as `load_rows`.
+        """
+        if query is None:
+            query = self.make_query()
+
+        with self.engine.connect() as conn:
+            result = conn.execution_options(yield_per=self.chunk_size).execute(query)
+            for partition in result.partitions(size=self.chunk_size):
+                yield self.rows_to_arrow(partition)
+
+    def rows_to_arrow(self, rows: Sequence[Sequence[Any]]) -> pa.Table:
+        """Convert a chunk of rows to a `pa.Table` with the schema of all chunks of the load.
+
+        Columns with values that don't fit their type in the first chunk are loaded as strings from then on. Values
+        that don't fit in a later chunk raise, as earlier chunks may already have been written with the column's type.
+        """
+        column_names = [column.name for column in self.table.columns]
+        if not self._arrow_types_decided:
+            # Chunks of parallel reads can be the first
+            with self._arrow_types_lock:
+                if not self._arrow_types_decided:
+                    arrow_table = rows_to_arrow(rows, column_names, self.arrow_types)
+                    self.arrow_types = arrow_table.schema.types
+                    self._arrow_types_decided = True
+                    return arrow_table
+        return rows_to_arrow(rows, column_names, self.arrow_types, fall_back_to_string=False)
+
 
 def table_rows(
     engine: Engine,
     table: Table,
-    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    chunk_size: Optional[int] = None,
     incremental: Optional[dlt.sources.incremental[Any]] = None,
+    backend: TableBackend = "sqlalchemy",
+    parallelism: int = DEFAULT_PARALLELISM,
 ) -> Iterator[TDataItem]:
     """
     A DLT source which loads data from an SQL database using SQLAlchemy.
@@ -91,8 +357,13 @@ def table_rows(
     """
     yield dlt.mark.materialize_table_schema()  # type: ignore
 
-    loader = TableLoader(engine, table, incremental=incremental, chunk_size=chunk_size)
-    yield from loader.load_rows()
+    if chunk_size is None:
+        chunk_size = DEFAULT_ARROW_CHUNK_SIZE if backend == "pyarrow" else DEFAULT_CHUNK_SIZE
+
+    loader = TableLoader(
+        engine, table, incremental=incremental, chunk_size=chunk_size, backend=backend, parallelism=parallelism
+    )
+    yield from loader.load()
 
     engine.dispose()
 
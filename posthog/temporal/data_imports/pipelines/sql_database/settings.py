@@ -1,3 +1,9 @@
 """Sql Database source settings and constants"""
 
 DEFAULT_CHUNK_SIZE = 1000
+
+# Arrow tables are converted a column at a time, so larger chunks amortize the per-chunk overhead
+DEFAULT_ARROW_CHUNK_SIZE = 10_000
+
+# How many ranges of the primary key a full refresh reads at the same time, each over its own connection
+DEFAULT_PARALLELISM = 1
@@ -1,10 +1,15 @@
-from typing import Any
+import asyncio
+import threading
+import time
+from typing import Any, Optional
 from unittest.mock import MagicMock, PropertyMock, patch
 import uuid
 
+import dlt
 import pytest
 import structlog
 from asgiref.sync import sync_to_async
+from dlt.sources import DltSource
 from posthog.temporal.data_imports.pipelines.pipeline import DataImportPipeline, PipelineInputs
 from posthog.temporal.data_imports.pipelines.stripe import stripe_source
 from posthog.test.base import APIBaseTest
@@ -14,7 +19,7 @@ from posthog.warehouse.models.external_data_source import ExternalDataSource
 
 
 class TestDataImportPipeline(APIBaseTest):
-    async def _create_pipeline(self, schema_name: str, incremental: bool):
+    async def _create_pipeline(self, schema_name: str, incremental: bool, source: Optional[DltSource] = None):
         source = await sync_to_async(ExternalDataSource.objects.create)(
             source_id=str(uuid.uuid4()),
             connection_id=str(uuid.uuid4()),
@@ -49,7 +54,8 @@ class TestDataImportPipeline(APIBaseTest):
                 job_type=ExternalDataSource.Type.STRIPE,
                 team_id=self.team.pk,
             ),
-            source=stripe_source(
+            source=source
+            or stripe_source(
                 api_key="",
                 account_id="",
                 endpoint=schema_name,
@@ -103,3 +109,42 @@ class TestDataImportPipeline(APIBaseTest):
 
             assert res.get("customer") == 1
             assert mock_validate_schema_and_update_table.call_count == 2
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.asyncio
+    async def test_pipeline_stops_extracting_when_cancelled(self):
+        extracting = threading.Event()
+
+        @dlt.source
+        def slow_source():
+            @dlt.resource
+            def customer():
+                for index in range(100):
+                    if index == 3:
+                        extracting.set()
+                    time.sleep(0.05)
+                    yield [{"id": index}]
+
+            return customer
+
+        def mock_create_pipeline(local_self: Any):
+            mock = MagicMock()
+            mock.extract.side_effect = lambda source, **kwargs: list(source)
+            return mock
+
+        with (
+            patch.object(DataImportPipeline, "_create_pipeline", mock_create_pipeline),
+            patch(
+                "posthog.temporal.data_imports.pipelines.pipeline.validate_schema_and_update_table"
+            ) as mock_validate_schema_and_update_table,
+        ):
+            pipeline = await self._create_pipeline("Customer", False, source=slow_source())
+            task = asyncio.create_task(pipeline.run())
+            await asyncio.to_thread(extracting.wait)
+            task.cancel()
+
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+            assert 0 < pipeline.extracted_rows["customer"] < 100
+            assert mock_validate_schema_and_update_table.call_count == 0
@@ -0,0 +1,204 @@
+import datetime as dt
+import decimal
+from unittest import mock
+
+import pyarrow as pa
+import pytest
+from sqlalchemy import JSON, Column, DateTime, Integer, MetaData, Numeric, String, Table, create_engine
+
+from posthog.temporal.data_imports.pipelines.sql_database.helpers import TableLoader, rows_to_arrow, split_key_range
+
+
+@pytest.fixture
+def engine_and_table(tmp_path):
+    # A file, not in memory, so that every connection sees the same database
+    engine = create_engine(f"sqlite:///{tmp_path / 'source.db'}")
+    metadata = MetaData()
+    table = Table(
+        "events",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("name", String),
+        Column("amount", Numeric(10, 2)),
+        Column("properties", JSON),
+        Column("created_at", DateTime),
+    )
+    metadata.create_all(engine)
+
+    with engine.begin() as conn:
+        conn.execute(
+            table.insert(),
+            [
+                {
+                    "id": index,
+                    "name": None if index % 3 == 0 else f"event-{index}",
+                    "amount": decimal.Decimal(f"{index}.50"),
+                    "properties": {"index": index, "nested": [1, 2]},
+                    "created_at": dt.datetime(2024, 1, 1) + dt.timedelta(hours=index),
+                }
+                for index in range(10)
+            ]
+            + [
+                {
+                    "id": index,
+                    "name": f"event-{index}",
+                    "amount": None,
+                    "properties": None,
+                    "created_at": dt.datetime(2024, 2, 1),
+                }
+                for index in range(1000, 1100)
+            ],
+        )
+
+    yield engine, table
+
+    engine.dispose()
+
+
+def test_load_arrow_tables_matches_load_rows(engine_and_table):
+    engine, table = engine_and_table
+    loader = TableLoader(engine, table, chunk_size=4, backend="pyarrow")
+
+    arrow_tables = list(loader.load_arrow_tables())
+    rows = [row for chunk in loader.load_rows() for row in chunk]
+
+    assert [arrow_table.num_rows for arrow_table in arrow_tables] == [4] * 27 + [2]
+    assert all(arrow_table.schema == arrow_tables[0].schema for arrow_table in arrow_tables)
+    assert arrow_tables[0].schema.field("id").type == pa.int64()
+    assert arrow_tables[0].schema.field("amount").type == pa.decimal128(10, 2)
+    assert arrow_tables[0].schema.field("created_at").type == pa.timestamp("us")
+
+    arrow_rows = pa.concat_tables(arrow_tables).to_pylist()
+    assert [{**row, "properties": None} for row in arrow_rows] == [{**row, "properties": None} for row in rows]
+    assert arrow_rows[1]["properties"] == '{"index":1,"nested":[1,2]}'
+
+
+def test_load_arrow_tables_keeps_incremental_cursor(engine_and_table):
+    engine, table = engine_and_table
+    incremental = mock.MagicMock(cursor_path="id", last_value=6, last_value_func=max)
+    loader = TableLoader(engine, table, chunk_size=1000, incremental=incremental, backend="pyarrow")
+
+    (arrow_table,) = loader.load_arrow_tables()
+
+    assert arrow_table.column("id").to_pylist() == [7, 8, 9, *range(1000, 1100)]
+
+
+def test_rows_to_arrow_falls_back_to_strings():
+    arrow_table = rows_to_arrow(
+        [(1, None, "a"), ("not-an-int", None, "b")],
+        ["mixed", "nulls", "strings"],
+        [pa.int64(), pa.int64(), pa.string()],
+    )
+
+    assert arrow_table.column("mixed").to_pylist() == ["1", "not-an-int"]
+    assert arrow_table.column("nulls").type == pa.int64()
+    assert arrow_table.column("strings").type == pa.string()
+
+    with pytest.raises(ValueError, match="mixed"):
+        rows_to_arrow([("not-an-int",)], ["mixed"], [pa.int64()], fall_back_to_string=False)
+
+
+def test_load_arrow_tables_of_unbounded_numerics_have_the_same_schema(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'source.db'}")
+    metadata = MetaData()
+    table = Table("payments", metadata, Column("id", Integer, primary_key=True), Column("amount", Numeric))
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            table.insert(),
+            [
+                {"id": 1, "amount": decimal.Decimal("1.5")},
+                {"id": 2, "amount": decimal.Decimal("2.5")},
+                {"id": 3, "amount": decimal.Decimal("123.25")},
+                {"id": 4, "amount": decimal.Decimal("0.125")},
+            ],
+        )
+
+    arrow_tables = list(TableLoader(engine, table, chunk_size=2, backend="pyarrow").load_arrow_tables())
+    engine.dispose()
+
+    assert [arrow_table.schema.field("amount").type for arrow_table in arrow_tables] == [pa.decimal128(38, 9)] * 2
+    assert pa.concat_tables(arrow_tables).column("amount").to_pylist() == [
+        decimal.Decimal("1.5"),
+        decimal.Decimal("2.5"),
+        decimal.Decimal("123.25"),
+        decimal.Decimal("0.125"),
+    ]
+
+
+def test_rows_to_arrow_rounds_decimals_of_more_than_28_digits():
+    arrow_table = rows_to_arrow(
+        [(decimal.Decimal("12345678901234567890123.1234567891234"),)],
+        ["amount"],
+        [pa.decimal128(38, 9)],
+        fall_back_to_string=False,
+    )
+
+    assert arrow_table.column("amount").to_pylist() == [decimal.Decimal("12345678901234567890123.123456789")]
+
+    too_large = decimal.Decimal("1" * 35 + ".1234567891")
+    arrow_table = rows_to_arrow([(too_large,)], ["amount"], [pa.decimal128(38, 9)])
+
+    assert arrow_table.column("amount").to_pylist() == [str(too_large)]
+
+
+def test_load_arrow_tables_falls_back_to_strings_for_the_whole_load(engine_and_table):
+    engine, table = engine_and_table
+    loader = TableLoader(engine, table, backend="pyarrow")
+    first_chunk = loader.rows_to_arrow([(1, "a", "not-a-number", None, None)])
+    second_chunk = loader.rows_to_arrow([(2, "b", decimal.Decimal("1.50"), None, None)])
+
+    assert first_chunk.schema == second_chunk.schema
+    assert second_chunk.schema.field("amount").type == pa.string()
+    assert second_chunk.column("amount").to_pylist() == ["1.50"]
+
+    other_loader = TableLoader(engine, table, backend="pyarrow")
+    other_loader.rows_to_arrow([(1, "a", decimal.Decimal("1.50"), None, None)])
+    with pytest.raises(ValueError, match="amount"):
+        other_loader.rows_to_arrow([(2, "b", "not-a-number", None, None)])
+
+
+@pytest.mark.parametrize("backend", ["sqlalchemy", "pyarrow"])
+def test_load_reads_key_ranges_in_parallel(engine_and_table, backend):
+    engine, table = engine_and_table
+    loader = TableLoader(engine, table, chunk_size=7, backend=backend, parallelism=4)
+
+    queries = loader.make_partitioned_queries()
+    chunks = list(loader.load())
+
+    assert len(queries) == 4
+    if backend == "pyarrow":
+        ids = [id for chunk in chunks for id in chunk.column("id").to_pylist()]
+    else:
+        ids = [row["id"] for chunk in chunks for row in chunk]
+    assert sorted(ids) == [*range(10), *range(1000, 1100)]
+
+
+def test_load_does_not_partition_incremental_loads(engine_and_table):
+    engine, table = engine_and_table
+    incremental = mock.MagicMock(cursor_path="id", last_value=None, last_value_func=max)
+    loader = TableLoader(engine, table, incremental=incremental, parallelism=4)
+
+    assert len(loader.make_partitioned_queries()) == 1
+
+
+@pytest.mark.parametrize(
+    "min_value,max_value,partitions,expected",
+    [
+        (0, 100, 4, [25, 50, 75]),
+        (0, 2, 4, [1, 2]),
+        (5, 5, 4, []),
+        (None, None, 4, []),
+        (0, 100, 1, []),
+        (dt.date(2024, 1, 1), dt.date(2024, 1, 3), 4, [dt.date(2024, 1, 2), dt.date(2024, 1, 3)]),
+        (
+            dt.datetime(2024, 1, 1),
+            dt.datetime(2024, 1, 2),
+            2,
+            [dt.datetime(2024, 1, 1, 12)],
+        ),
+        (decimal.Decimal("0"), decimal.Decimal("1"), 2, [decimal.Decimal("0.5")]),
+    ],
+)
+def test_split_key_range(min_value, max_value, partitions, expected):
+    assert split_key_range(min_value, max_value, partitions) == expected
@@ -13,8 +13,8 @@ from posthog.warehouse.models import (
     ExternalDataSource,
     get_external_data_job,
 )
+from posthog.temporal.common.heartbeat import Heartbeater
 from posthog.temporal.common.logger import bind_temporal_worker_logger
-import asyncio
 from structlog.typing import FilteringBoundLogger
 from posthog.warehouse.models.external_data_schema import ExternalDataSchema, aget_schema_by_id
 from posthog.warehouse.models.ssh_tunnel import SSHTunnel
@@ -253,24 +253,14 @@ async def _run(
     schema: ExternalDataSchema,
     reset_pipeline: bool,
 ) -> tuple[TSchemaTables, dict[str, int]]:
-    # Temp background heartbeat for now
-    async def heartbeat() -> None:
-        while True:
-            await asyncio.sleep(10)
-            activity.heartbeat()
-
-    heartbeat_task = asyncio.create_task(heartbeat())
-
-    try:
+    # Heartbeats regularly, and with the rows extracted so far after every chunk of rows
+    async with Heartbeater() as heartbeater:
         table_row_counts = await DataImportPipeline(
-            job_inputs, source, logger, reset_pipeline, schema.is_incremental
+            job_inputs, source, logger, reset_pipeline, schema.is_incremental, heartbeater=heartbeater
         ).run()
         total_rows_synced = sum(table_row_counts.values())
 
         await aupdate_job_count(inputs.run_id, inputs.team_id, total_rows_synced)
         await aremove_reset_pipeline(inputs.source_id)
-    finally:
-        heartbeat_task.cancel()
-        await asyncio.wait([heartbeat_task])
 
     return source.schema.tables, table_row_counts
@@ -14,6 +14,8 @@ import temporalio.worker
 from asgiref.sync import sync_to_async
 from django.conf import settings
 
+from posthog.batch_exports.models import BatchExportRun
+from posthog.batch_exports.service import create_batch_export_backfill, create_batch_export_run
 from posthog.temporal.batch_exports.backfill_batch_export import (
     BackfillBatchExportInputs,
     BackfillBatchExportWorkflow,
@@ -196,6 +198,65 @@ async def test_backfill_schedule_activity(activity_environment, temporal_worker,
                 assert args[0]["is_backfill"] is True
 
 
+@pytest.mark.django_db(transaction=True)
+async def test_backfill_schedule_activity_in_parallel_skips_completed_runs(
+    activity_environment, temporal_worker, temporal_client, temporal_schedule, team
+):
+    """Test backfill_schedule activity runs in parallel, skipping runs that completed before."""
+    start_at = dt.datetime(2023, 1, 1, 0, 0, 0, tzinfo=dt.UTC)
+    end_at = dt.datetime(2023, 1, 1, 0, 10, 0, tzinfo=dt.UTC)
+
+    desc = await temporal_schedule.describe()
+    backfill = await sync_to_async(create_batch_export_backfill)(
+        batch_export_id=uuid.UUID(desc.id), team_id=team.pk, start_at=start_at.isoformat(), end_at=end_at.isoformat()
+    )
+    completed_end_ats = [start_at + dt.timedelta(minutes=minutes) for minutes in (1, 4, 10)]
+    for completed_end_at in completed_end_ats:
+        await sync_to_async(create_batch_export_run)(
+            batch_export_id=uuid.UUID(desc.id),
+            data_interval_start=(completed_end_at - dt.timedelta(minutes=1)).isoformat(),
+            data_interval_end=completed_end_at.isoformat(),
+            status=BatchExportRun.Status.COMPLETED,
+        )
+
+    inputs = BackfillScheduleInputs(
+        schedule_id=desc.id,
+        start_at=start_at.isoformat(),
+        end_at=end_at.isoformat(),
+        start_delay=1.0,
+        frequency_seconds=desc.schedule.spec.intervals[0].every.total_seconds(),
+        parallelism=4,
+        backfill_id=str(backfill.id),
+    )
+
+    await activity_environment.run(backfill_schedule, inputs)
+
+    query = f'TemporalScheduledById="{desc.id}"'
+    workflows: list[temporalio.client.WorkflowExecution] = []
+
+    timeout = 20
+    waited = 0
+    expected = 7
+    while len(workflows) < expected:
+        # It can take a few seconds for workflows to be query-able
+        waited += 1
+        if waited > timeout:
+            raise TimeoutError("Timed-out waiting for workflows to be query-able")
+
+        await asyncio.sleep(1)
+
+        workflows = [workflow async for workflow in temporal_client.list_workflows(query=query)]
+
+    assert len(workflows) == expected
+    assert not {f"{desc.id}-{end_at:%Y-%m-%dT%H:%M:%S}Z" for end_at in completed_end_ats} & {
+        workflow.id for workflow in workflows
+    }
+
+    backfills = await afetch_batch_export_backfills(batch_export_id=desc.id)
+    assert backfills[0].total_runs == 10
+    assert backfills[0].finished_runs == 10
+
+
 @pytest.mark.django_db(transaction=True)
 async def test_backfill_batch_export_workflow(temporal_worker, temporal_schedule, temporal_client, team):
     """Test BackfillBatchExportWorkflow executes all backfill runs and updates model."""
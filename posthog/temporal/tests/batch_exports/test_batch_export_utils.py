@@ -5,7 +5,7 @@ import pytest
 import pytest_asyncio
 
 from posthog.batch_exports.models import BatchExportRun
-from posthog.temporal.batch_exports.utils import set_status_to_running_task
+from posthog.temporal.batch_exports.utils import aprefetch, set_status_to_running_task
 from posthog.temporal.common.logger import bind_temporal_worker_logger
 from posthog.temporal.tests.utils.models import (
     acreate_batch_export,
@@ -73,3 +73,60 @@ async def test_batch_export_run_is_set_to_running(ateam, s3_batch_export):
 
     await run.arefresh_from_db()
     assert run.status == BatchExportRun.Status.RUNNING
+
+
+async def test_aprefetch_reads_ahead_up_to_max_size():
+    """Test aprefetch yields everything in order, while never reading more than max_size ahead."""
+    produced = []
+
+    async def gen():
+        for i in range(10):
+            produced.append(i)
+            yield i
+
+    consumed = []
+    async for value in aprefetch(gen(), max_size=2):
+        # Let the background task run as far ahead as it can
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        consumed.append(value)
+        # What's queued, plus the one waiting to be queued
+        assert len(produced) - len(consumed) <= 2 + 1
+
+    assert consumed == list(range(10))
+
+
+async def test_aprefetch_raises_errors_after_previous_values():
+    """Test an exception in the prefetched generator is raised in the caller, after what came before it."""
+
+    async def gen():
+        yield 1
+        yield 2
+        raise ValueError("Oh no")
+
+    consumed = []
+    with pytest.raises(ValueError, match="Oh no"):
+        async for value in aprefetch(gen(), max_size=4):
+            consumed.append(value)
+
+    assert consumed == [1, 2]
+
+
+async def test_aprefetch_closes_generator_when_caller_stops():
+    """Test the prefetched generator is closed when the caller stops early."""
+    closed = asyncio.Event()
+
+    async def gen():
+        try:
+            for i in range(100):
+                yield i
+        finally:
+            closed.set()
+
+    prefetched = aprefetch(gen(), max_size=2)
+    async for value in prefetched:
+        if value == 3:
+            break
+    await prefetched.aclose()
+
+    assert closed.is_set()
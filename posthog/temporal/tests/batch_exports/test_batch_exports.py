@@ -8,6 +8,7 @@ from django.test import override_settings
 
 from posthog.batch_exports.service import BatchExportModel
 from posthog.temporal.batch_exports.batch_exports import (
+    aiter_records,
     get_data_interval,
     iter_model_records,
     iter_records,
@@ -80,6 +81,40 @@ async def test_iter_records(clickhouse_client):
     assert_records_match_events(records, events)
 
 
+@pytest.mark.parametrize("max_prefetched_record_batches", [1, 4])
+async def test_aiter_records(clickhouse_client, max_prefetched_record_batches):
+    """Test the rows returned by aiter_records match those of iter_records, with any prefetch size."""
+    team_id = randint(1, 1000000)
+    data_interval_end = dt.datetime.fromisoformat("2023-04-25T14:31:00.000000+00:00")
+    data_interval_start = dt.datetime.fromisoformat("2023-04-25T14:30:00.000000+00:00")
+
+    (events, _, _) = await generate_test_events_in_clickhouse(
+        client=clickhouse_client,
+        team_id=team_id,
+        start_time=data_interval_start,
+        end_time=data_interval_end,
+        count=10000,
+        count_outside_range=0,
+        count_other_team=0,
+        duplicate=False,
+        person_properties={"$browser": "Chrome", "$os": "Mac OS X"},
+    )
+
+    records = [
+        record
+        async for record_batch in aiter_records(
+            clickhouse_client,
+            team_id,
+            data_interval_start.isoformat(),
+            data_interval_end.isoformat(),
+            max_prefetched_record_batches=max_prefetched_record_batches,
+        )
+        for record in record_batch.to_pylist()
+    ]
+
+    assert_records_match_events(records, events)
+
+
 async def test_iter_records_handles_duplicates(clickhouse_client):
     """Test the rows returned by iter_records are de-duplicated."""
     team_id = randint(1, 1000000)
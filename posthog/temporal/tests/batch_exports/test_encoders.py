@@ -0,0 +1,108 @@
+import csv
+import datetime as dt
+import io
+import random
+
+import orjson
+import pyarrow as pa
+import pytest
+
+from posthog.temporal.batch_exports.encoders import CSVRecordBatchEncoder, JSONLRecordBatchEncoder
+from posthog.temporal.batch_exports.temporary_file import json_dumps_bytes
+from posthog.temporal.batch_exports.utils import cast_record_batch_json_columns
+
+# Everything JSON and CSV need to escape, plus some characters they don't.
+CHARACTERS = [chr(c) for c in range(0x30)] + list('\\"\x7f\u2028é😀,|abc ')
+JSON_PROPERTIES = '{"$browser": "Chrome\\u0001", "nested": {"a": [1, 2.5]}}'
+
+
+def random_string(rng: random.Random) -> str | None:
+    if rng.random() < 0.1:
+        return None
+    return "".join(rng.choice(CHARACTERS) for _ in range(rng.randint(0, 16)))
+
+
+def random_record_batch(seed: int, num_rows: int = 50) -> pa.RecordBatch:
+    rng = random.Random(seed)
+    strings = [random_string(rng) for _ in range(num_rows)]
+
+    return pa.RecordBatch.from_pydict(
+        {
+            "event": pa.array(strings, type=pa.string()),
+            "distinct_id": pa.array(strings, type=pa.large_string()),
+            "team_id": pa.array([rng.choice([None, 0, -1, 2**62]) for _ in range(num_rows)], type=pa.int64()),
+            "small": pa.array([rng.choice([None, 0, 255]) for _ in range(num_rows)], type=pa.uint8()),
+            "is_identified": pa.array([rng.choice([None, True, False]) for _ in range(num_rows)], type=pa.bool_()),
+            "value": pa.array([rng.choice([None, 0.1, 1.5, 1e20, -0.0]) for _ in range(num_rows)], type=pa.float64()),
+            "timestamp": pa.array(
+                [rng.choice([None, dt.datetime(2024, 1, 1, 12, 30, 1, 1, tzinfo=dt.UTC)]) for _ in range(num_rows)],
+                type=pa.timestamp("us", tz="UTC"),
+            ),
+            "created_at": pa.array(
+                [
+                    rng.choice([None, dt.datetime(1999, 12, 31), dt.datetime(2024, 1, 1, 0, 0, 0, 999000)])
+                    for _ in range(num_rows)
+                ],
+                type=pa.timestamp("ms"),
+            ),
+            "elements": pa.array(
+                [rng.choice([None, [], ["a\n", "b"]]) for _ in range(num_rows)], type=pa.list_(pa.string())
+            ),
+            "site_url": pa.array(strings, type=pa.string()).dictionary_encode(),
+            "properties": pa.array(
+                [rng.choice([None, JSON_PROPERTIES, "[]", "null"]) for _ in range(num_rows)], type=pa.string()
+            ),
+        }
+    )
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_jsonl_encoder_matches_encoding_each_row(seed):
+    """Test JSONL encoded a column at a time is the same as encoding each row with orjson."""
+    record_batch = cast_record_batch_json_columns(random_record_batch(seed))
+    expected = b"".join(json_dumps_bytes(record) + b"\n" for record in record_batch.to_pylist())
+
+    encoded = JSONLRecordBatchEncoder().encode(record_batch)
+
+    assert encoded == expected
+
+
+def test_jsonl_encoder_passes_json_columns_through():
+    """Test JSON columns can be passed through as they are, which is the same JSON, formatted differently."""
+    record_batch = cast_record_batch_json_columns(random_record_batch(0))
+    expected = [orjson.loads(record) for record in JSONLRecordBatchEncoder().encode(record_batch).splitlines()]
+
+    encoded = JSONLRecordBatchEncoder(json_columns_as_raw_bytes=True).encode(record_batch)
+
+    assert [orjson.loads(line) for line in encoded.splitlines()] == expected
+    assert b'"properties":{"$browser": "Chrome\\u0001"' in encoded
+
+
+def test_jsonl_encoder_encodes_empty_record_batches():
+    """Test no lines are encoded without rows, and empty objects without columns."""
+    record_batch = random_record_batch(0)
+
+    assert JSONLRecordBatchEncoder().encode(record_batch.slice(0, 0)) == b""
+    assert JSONLRecordBatchEncoder().encode(record_batch.select([])) == b"{}\n" * record_batch.num_rows
+
+
+@pytest.mark.parametrize(
+    "dialect",
+    [
+        {},
+        {"delimiter": "\t"},
+        {"escape_char": "|", "line_terminator": "\r\n"},
+        {"quoting": csv.QUOTE_MINIMAL},
+    ],
+)
+@pytest.mark.parametrize("seed", range(5))
+def test_csv_encoder_matches_dict_writer(seed, dialect):
+    """Test CSV encoded a column at a time is the same as writing each row with a `csv.DictWriter`."""
+    record_batch = random_record_batch(seed)
+    field_names = ["event", "team_id", "missing", *record_batch.column_names[3:]]
+    encoder = CSVRecordBatchEncoder(field_names=field_names, **dialect)
+
+    expected = io.StringIO()
+    encoder.dict_writer(expected).writerows(record_batch.to_pylist())
+
+    assert encoder.encode(record_batch) == expected.getvalue().encode("utf-8")
@@ -0,0 +1,120 @@
+import asyncio
+import datetime as dt
+import random
+
+import pyarrow as pa
+import pytest
+
+from posthog.temporal.batch_exports.pipeline import FlushedFile, UploadPipeline
+from posthog.temporal.batch_exports.temporary_file import JSONLBatchExportWriter
+
+pytestmark = [pytest.mark.asyncio]
+
+
+def record_batches(n: int, rows_per_batch: int = 10):
+    start = dt.datetime(2024, 1, 1, tzinfo=dt.UTC)
+    for i in range(n):
+        yield pa.RecordBatch.from_pylist(
+            [
+                {"id": i * rows_per_batch + j, "_inserted_at": start + dt.timedelta(seconds=i * rows_per_batch + j)}
+                for j in range(rows_per_batch)
+            ]
+        )
+
+
+async def test_upload_pipeline_commits_uploads_in_flush_order():
+    """Test uploads finishing out of order are only committed once all earlier uploads are done."""
+    uploaded = {}
+    committed = []
+    running = 0
+    max_running = 0
+
+    async def upload(flushed_file: FlushedFile) -> int:
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+
+        await asyncio.sleep(random.uniform(0, 0.01))
+        uploaded[flushed_file.sequence_number] = flushed_file.file.read()
+
+        running -= 1
+        return flushed_file.sequence_number
+
+    def on_uploaded(flushed_file: FlushedFile, result: int) -> None:
+        assert result == flushed_file.sequence_number
+        # Everything flushed before must have been uploaded already
+        assert all(sequence_number in uploaded for sequence_number in range(result + 1))
+        committed.append((result, flushed_file.last_inserted_at))
+
+    pipeline: UploadPipeline[int] = UploadPipeline(
+        upload=upload, on_uploaded=on_uploaded, max_concurrent_uploads=3, max_pending_uploads=1
+    )
+    writer = JSONLBatchExportWriter(max_bytes=1, flush_callable=pipeline.flush)
+
+    async with pipeline:
+        async with writer.open_temporary_file():
+            for record_batch in record_batches(20):
+                await writer.write_record_batch(record_batch)
+
+    assert [sequence_number for sequence_number, _ in committed] == list(range(20))
+    assert [last_inserted_at for _, last_inserted_at in committed] == sorted(
+        last_inserted_at for _, last_inserted_at in committed
+    )
+    assert max_running == 3
+
+    # Each upload got its own copy of the flushed file, even though the writer reuses its file
+    lines = b"".join(uploaded[sequence_number] for sequence_number in range(20)).splitlines()
+    assert len(lines) == 200
+
+
+async def test_upload_pipeline_applies_back_pressure():
+    """Test flushing waits once enough uploads are in flight."""
+    release = asyncio.Event()
+    flushed = 0
+
+    async def upload(flushed_file: FlushedFile) -> None:
+        await release.wait()
+
+    pipeline: UploadPipeline[None] = UploadPipeline(
+        upload=upload, on_uploaded=lambda *_: None, max_concurrent_uploads=2, max_pending_uploads=1
+    )
+    writer = JSONLBatchExportWriter(max_bytes=1, flush_callable=pipeline.flush)
+
+    async def write():
+        nonlocal flushed
+        async with writer.open_temporary_file():
+            for record_batch in record_batches(5):
+                await writer.write_record_batch(record_batch)
+                flushed += 1
+
+    async with pipeline:
+        write_task = asyncio.create_task(write())
+        await asyncio.sleep(0.05)
+        assert flushed == 3
+
+        release.set()
+        await write_task
+
+    assert flushed == 5
+
+
+async def test_upload_pipeline_raises_failed_upload():
+    """Test a failed upload is raised, and nothing flushed after it is committed."""
+    committed = []
+
+    async def upload(flushed_file: FlushedFile) -> None:
+        if flushed_file.sequence_number == 2:
+            raise ValueError("Upload failed")
+
+    pipeline: UploadPipeline[None] = UploadPipeline(
+        upload=upload, on_uploaded=lambda flushed_file, _: committed.append(flushed_file.sequence_number)
+    )
+    writer = JSONLBatchExportWriter(max_bytes=1, flush_callable=pipeline.flush)
+
+    with pytest.raises(ValueError, match="Upload failed"):
+        async with pipeline:
+            async with writer.open_temporary_file():
+                for record_batch in record_batches(10):
+                    await writer.write_record_batch(record_batch)
+
+    assert committed == [0, 1]
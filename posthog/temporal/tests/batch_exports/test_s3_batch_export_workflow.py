@@ -4,6 +4,7 @@ import functools
 import json
 import os
 import uuid
+from unittest import mock
 
 import aioboto3
 import botocore.exceptions
@@ -29,10 +30,14 @@ from posthog.temporal.batch_exports.s3_batch_export import (
     S3BatchExportInputs,
     S3BatchExportWorkflow,
     S3InsertInputs,
+    S3MultiPartUpload,
+    S3MultiPartUploadState,
+    RetryablePartUploadError,
     get_s3_key,
     insert_into_s3_activity,
     s3_default_fields,
 )
+from posthog.temporal.batch_exports.temporary_file import BatchExportTemporaryFile
 from posthog.temporal.common.clickhouse import ClickHouseClient
 from posthog.temporal.tests.batch_exports.utils import mocked_start_batch_export_run
 from posthog.temporal.tests.utils.events import (
@@ -1243,3 +1248,101 @@ async def test_insert_into_s3_activity_heartbeats(
         data_interval_start=data_interval_start,
         data_interval_end=data_interval_end,
     )
+
+
+def test_s3_multi_part_upload_buffers_parts_within_memory_limit():
+    """Test parts are buffered in memory while they fit in the buffer memory, and on disk otherwise."""
+    s3_upload = S3MultiPartUpload(
+        region_name="us-east-1",
+        bucket_name="test-bucket",
+        key="test-key",
+        encryption=None,
+        kms_key_id=None,
+        max_buffer_memory_bytes=10,
+    )
+
+    with BatchExportTemporaryFile() as be_file:
+        be_file.write(b"123456")
+
+        first_buffer = s3_upload.buffer_part(be_file)
+        second_buffer = s3_upload.buffer_part(be_file)
+
+        assert not first_buffer._rolled
+        assert second_buffer._rolled
+        assert first_buffer.read() == second_buffer.read() == b"123456"
+        assert s3_upload.buffer_memory_bytes == 6
+
+        first_buffer.close()
+        assert s3_upload.buffer_memory_bytes == 0
+
+        third_buffer = s3_upload.buffer_part(be_file)
+        assert not third_buffer._rolled
+
+        second_buffer.close()
+        third_buffer.close()
+        assert s3_upload.buffer_memory_bytes == 0
+
+
+async def test_s3_multi_part_upload_resumes_from_parts_uploaded_in_order():
+    """Test only parts uploaded together with all parts before them are included in the state."""
+    s3_upload = S3MultiPartUpload(
+        region_name="us-east-1",
+        bucket_name="test-bucket",
+        key="test-key",
+        encryption=None,
+        kms_key_id=None,
+        max_part_upload_attempts=2,
+    )
+    s3_upload.continue_from_state(S3MultiPartUploadState("upload-id", [{"PartNumber": 1, "ETag": "etag-1"}]))
+
+    release_part_2 = asyncio.Event()
+    attempts = {2: 0, 3: 0}
+
+    async def upload_part(body, part_number):
+        attempts[part_number] += 1
+        if part_number == 2:
+            await release_part_2.wait()
+        return {"ETag": f"etag-{part_number}"}
+
+    s3_upload._upload_part = upload_part  # type: ignore
+
+    with BatchExportTemporaryFile() as be_file:
+        be_file.write(b"123456")
+
+        part_2 = asyncio.create_task(s3_upload.upload_part(be_file, part_number=2))
+        await s3_upload.upload_part(be_file, part_number=3)
+
+        assert s3_upload.part_number == 3
+        assert s3_upload.to_state().parts == [{"PartNumber": 1, "ETag": "etag-1"}]
+
+        release_part_2.set()
+        await part_2
+
+    assert [part["PartNumber"] for part in s3_upload.to_state().parts] == [1, 2, 3]
+    assert [part["PartNumber"] for part in s3_upload.to_state(up_to_part_number=2).parts] == [1, 2]
+    assert attempts == {2: 1, 3: 1}
+
+
+async def test_s3_multi_part_upload_retries_part_uploads():
+    """Test a part upload that fails with a retryable error is retried from the start of the part."""
+    s3_upload = S3MultiPartUpload(
+        region_name="us-east-1", bucket_name="test-bucket", key="test-key", encryption=None, kms_key_id=None
+    )
+    s3_upload.continue_from_state(S3MultiPartUploadState("upload-id", []))
+
+    bodies = []
+
+    async def upload_part(body, part_number):
+        bodies.append(body.read())
+        if len(bodies) == 1:
+            raise RetryablePartUploadError()
+        return {"ETag": "etag"}
+
+    s3_upload._upload_part = upload_part  # type: ignore
+
+    with BatchExportTemporaryFile() as be_file, mock.patch("asyncio.sleep"):
+        be_file.write(b"123456")
+        await s3_upload.upload_part(be_file)
+
+    assert bodies == [b"123456", b"123456"]
+    assert s3_upload.to_state().parts == [{"PartNumber": 1, "ETag": "etag"}]
@@ -1,8 +1,11 @@
+import concurrent.futures
 import csv
 import datetime as dt
+import gzip
 import io
 import json
 
+import brotli
 import pyarrow as pa
 import pyarrow.parquet as pq
 import pytest
@@ -42,6 +45,22 @@ def test_batch_export_temporary_file_tracks_bytes(to_write):
         assert be_file.bytes_since_last_reset == 0
 
 
+def test_batch_export_temporary_file_copy():
+    """Test a copy of BatchExportTemporaryFile keeps its compressed contents after the original is reset."""
+    with BatchExportTemporaryFile(compression="gzip") as be_file:
+        be_file.write_records_to_jsonl([{"id": "record-1"}, {"id": "record-2"}])
+        be_file.rewind()
+        contents = be_file.read()
+
+        with be_file.copy() as copied_file:
+            be_file.reset()
+
+            assert copied_file.read() == contents
+            assert copied_file.compression is None
+            assert copied_file.bytes_since_last_reset == len(contents)
+            assert copied_file.records_since_last_reset == 2
+
+
 TEST_RECORDS = [
     [],
     [
@@ -396,3 +415,49 @@ async def test_flushing_parquet_writer_resets_underlying_file(record_batch):
         assert writer.records_since_last_flush == 0
 
     assert flush_counter == 2
+
+
+@pytest.mark.parametrize("compression", ["gzip", "brotli"])
+@pytest.mark.asyncio
+async def test_jsonl_writer_compresses_in_background(compression):
+    """Test record batches compressed in an executor are written in order, and decompress like inline ones."""
+    record_batches = [
+        pa.RecordBatch.from_pydict(
+            {
+                "event": pa.array([f"test-event-{index}-{row}" for row in range(1000)]),
+                "_inserted_at": pa.array(list(range(index * 1000, (index + 1) * 1000))),
+            }
+        )
+        for index in range(20)
+    ]
+    flushed = {}
+
+    def store_on_flush(key):
+        async def flush(batch_export_file, *args):
+            flushed[key] = flushed.get(key, b"") + batch_export_file.read()
+
+        return flush
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        inline_writer = JSONLBatchExportWriter(
+            max_bytes=100_000, flush_callable=store_on_flush("inline"), compression=compression
+        )
+        background_writer = JSONLBatchExportWriter(
+            max_bytes=100_000,
+            flush_callable=store_on_flush("background"),
+            compression=compression,
+            compression_executor=executor,
+            max_pending_compressions=3,
+        )
+
+        for writer in (inline_writer, background_writer):
+            async with writer.open_temporary_file():
+                for record_batch in record_batches:
+                    await writer.write_record_batch(record_batch)
+
+    decompress = gzip.decompress if compression == "gzip" else brotli.decompress
+    expected = b"".join(b'{"event":"test-event-%d-%d"}\n' % (index, row) for index in range(20) for row in range(1000))
+
+    assert decompress(flushed["inline"]) == expected
+    assert decompress(flushed["background"]) == expected
+    assert background_writer.records_total == 20_000
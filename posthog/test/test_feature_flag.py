@@ -6,13 +6,23 @@ from unittest.mock import patch
 from django.core.cache import cache
 from django.db import IntegrityError, connection
 from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from freezegun import freeze_time
+from rest_framework.exceptions import ValidationError
 import pytest
 
 from posthog.api.test.test_feature_flag import QueryTimeoutWrapper
 from posthog.models import Cohort, FeatureFlag, GroupTypeMapping, Person
 from posthog.models.feature_flag import get_feature_flags_for_team_in_cache
+from posthog.models.feature_flag.flag_evaluation_plan import (
+    FLAG_EVALUATION_PLAN_CACHE,
+    compile_condition_properties,
+    compile_property,
+    feature_flag_fingerprint,
+    get_feature_flag_evaluation_plan,
+    invalidate_feature_flags_version,
+)
 from posthog.models.feature_flag.flag_matching import (
     FeatureFlagHashKeyOverride,
     FeatureFlagMatch,
@@ -20,13 +30,16 @@ from posthog.models.feature_flag.flag_matching import (
     FeatureFlagMatchReason,
     FlagsMatcherCache,
     get_all_feature_flags,
+    get_all_feature_flags_bulk,
     get_feature_flag_hash_key_overrides,
     set_feature_flag_hash_key_overrides,
 )
 from posthog.models.group import Group
 from posthog.models.organization import Organization
+from posthog.models.property import Property
 from posthog.models.team import Team
 from posthog.models.user import User
+from posthog.queries.base import match_property
 from posthog.test.base import (
     BaseTest,
     QueryMatchingTest,
@@ -5917,6 +5930,303 @@ class TestFeatureFlagHashKeyOverrides(BaseTest, QueryMatchingTest):
         self.assertEqual(payloads, {})
 
 
+@patch(
+    "posthog.models.feature_flag.flag_matching.postgres_healthcheck.is_connected",
+    return_value=True,
+)
+class TestFeatureFlagMatcherBulk(BaseTest, QueryMatchingTest):
+    maxDiff = None
+
+    def setUp(self):
+        super().setUp()
+        GroupTypeMapping.objects.create(team=self.team, group_type="organization", group_type_index=0)
+        Group.objects.create(
+            team=self.team,
+            group_type_index=0,
+            group_key="foo",
+            group_properties={"name": "foo.inc"},
+            version=1,
+        )
+        Group.objects.create(
+            team=self.team,
+            group_type_index=0,
+            group_key="bar",
+            group_properties={"name": "bar.inc"},
+            version=1,
+        )
+        cohort = Cohort.objects.create(
+            team=self.team,
+            groups=[{"properties": [{"key": "plan", "value": "pro", "type": "person", "operator": "exact"}]}],
+        )
+        for i in range(10):
+            Person.objects.create(
+                team=self.team,
+                distinct_ids=[f"person_{i}", f"alias_{i}"],
+                properties={
+                    "email": f"user{i}@{'posthog.com' if i % 2 else 'example.com'}",
+                    "age": i * 10,
+                    "plan": "pro" if i % 3 == 0 else "free",
+                },
+            )
+
+        def create_flag(key: str, filters: dict, **kwargs):
+            FeatureFlag.objects.create(team=self.team, key=key, created_by=self.user, filters=filters, **kwargs)
+
+        create_flag(
+            "email-flag",
+            {"groups": [{"properties": [{"key": "email", "value": "posthog.com", "operator": "icontains"}]}]},
+        )
+        create_flag(
+            "age-flag",
+            {"groups": [{"properties": [{"key": "age", "value": "40", "operator": "gt"}], "rollout_percentage": 50}]},
+        )
+        create_flag("cohort-flag", {"groups": [{"properties": [{"key": "id", "value": cohort.pk, "type": "cohort"}]}]})
+        create_flag(
+            "is-not-set-flag",
+            {"groups": [{"properties": [{"key": "plan", "operator": "is_not_set"}]}]},
+        )
+        create_flag(
+            "distinct-id-flag",
+            {"groups": [{"properties": [{"key": "distinct_id", "value": ["person_1", "alias_2", "unknown_1"]}]}]},
+        )
+        create_flag(
+            "distinct-id-and-email-flag",
+            {
+                "groups": [
+                    {
+                        "properties": [
+                            {"key": "distinct_id", "value": "person_", "operator": "icontains"},
+                            {"key": "email", "value": "example.com", "operator": "icontains"},
+                        ]
+                    }
+                ]
+            },
+        )
+        create_flag(
+            "multivariate-flag",
+            {
+                "groups": [{"rollout_percentage": 100}],
+                "multivariate": {
+                    "variants": [
+                        {"key": "first-variant", "rollout_percentage": 50},
+                        {"key": "second-variant", "rollout_percentage": 50},
+                    ]
+                },
+                "payloads": {"first-variant": {"color": "blue"}},
+            },
+        )
+        create_flag(
+            "group-flag",
+            {
+                "aggregation_group_type_index": 0,
+                "groups": [
+                    {"properties": [{"key": "name", "value": "foo.inc", "type": "group", "group_type_index": 0}]}
+                ],
+            },
+        )
+
+        self.distinct_ids = [f"person_{i}" for i in range(10)] + ["alias_2", "alias_5", "unknown_1", "unknown_2"]
+        self.groups_by_id = {"person_1": {"organization": "foo"}, "person_2": {"organization": "bar"}}
+
+    def test_bulk_matches_per_distinct_id_evaluation(self, *args):
+        results = get_all_feature_flags_bulk(self.team.pk, self.distinct_ids, self.groups_by_id)
+
+        self.assertEqual(set(results.keys()), set(self.distinct_ids))
+        for distinct_id in self.distinct_ids:
+            self.assertEqual(
+                results[distinct_id],
+                get_all_feature_flags(self.team.pk, distinct_id, self.groups_by_id.get(distinct_id, {})),
+                distinct_id,
+            )
+
+    def test_bulk_matches_per_distinct_id_evaluation_with_experience_continuity(self, *args):
+        FeatureFlag.objects.create(
+            team=self.team,
+            key="continuity-flag",
+            created_by=self.user,
+            rollout_percentage=30,
+            ensure_experience_continuity=True,
+        )
+        set_feature_flag_hash_key_overrides(self.team.pk, ["person_3", "alias_3"], "anonymous_id")
+
+        results = get_all_feature_flags_bulk(self.team.pk, self.distinct_ids, self.groups_by_id)
+
+        for distinct_id in self.distinct_ids:
+            self.assertEqual(
+                results[distinct_id],
+                get_all_feature_flags(self.team.pk, distinct_id, self.groups_by_id.get(distinct_id, {})),
+                distinct_id,
+            )
+
+    def test_bulk_query_count_does_not_grow_with_distinct_ids(self, *args):
+        # Using `distinct_id` together with other properties needs a query per distinct ID, so leave it out here
+        FeatureFlag.objects.filter(team=self.team, key="distinct-id-and-email-flag").delete()
+        get_all_feature_flags_bulk(self.team.pk, self.distinct_ids[:2], self.groups_by_id)  # warm the flag cache
+
+        with CaptureQueriesContext(connection) as few_ids_queries:
+            get_all_feature_flags_bulk(self.team.pk, self.distinct_ids[:2], self.groups_by_id)
+        with CaptureQueriesContext(connection) as many_ids_queries:
+            get_all_feature_flags_bulk(self.team.pk, self.distinct_ids, self.groups_by_id)
+
+        self.assertEqual(len(many_ids_queries.captured_queries), len(few_ids_queries.captured_queries))
+
+    def test_bulk_with_no_flags(self, *args):
+        FeatureFlag.objects.filter(team=self.team).delete()
+
+        self.assertEqual(
+            get_all_feature_flags_bulk(self.team.pk, ["person_1", "unknown_1"]),
+            {"person_1": ({}, {}, {}, False), "unknown_1": ({}, {}, {}, False)},
+        )
+
+
+class TestFeatureFlagEvaluationPlan(BaseTest):
+    def setUp(self):
+        super().setUp()
+        FLAG_EVALUATION_PLAN_CACHE.clear()
+
+    def create_flag(self, key: str, filters: dict, **kwargs) -> FeatureFlag:
+        return FeatureFlag.objects.create(team=self.team, key=key, created_by=self.user, filters=filters, **kwargs)
+
+    def test_compiled_properties_match_like_match_property(self):
+        properties = [
+            {"key": "key", "value": "value", "operator": "exact"},
+            {"key": "key", "value": ["value", "Other"], "operator": "exact"},
+            {"key": "key", "value": "true", "operator": "exact"},
+            {"key": "key", "value": [False], "operator": "exact"},
+            {"key": "key", "value": "value", "operator": "is_not"},
+            {"key": "key", "value": "1.5", "operator": "is_not"},
+            {"key": "key", "value": "VAL", "operator": "icontains"},
+            {"key": "key", "value": "VAL", "operator": "not_icontains"},
+            {"key": "key", "value": r"^val.*\d$", "operator": "regex"},
+            {"key": "key", "value": r"^val.*\d$", "operator": "not_regex"},
+            {"key": "key", "value": "?*", "operator": "regex"},
+            {"key": "key", "value": "?*", "operator": "not_regex"},
+            {"key": "key", "value": "5", "operator": "gt"},
+            {"key": "key", "value": 5, "operator": "gte"},
+            {"key": "key", "value": "abc", "operator": "lt"},
+            {"key": "key", "value": "5", "operator": "lte"},
+            {"key": "key", "operator": "is_set"},
+            {"key": "key", "value": "2024-01-01", "operator": "is_date_before"},
+        ]
+        override_values = ["value", "Value", "other", "value1", "true", "False", 3, 5, 7.5, "6", None, True]
+
+        for property_data in properties:
+            property = Property(**property_data)
+            compiled_property = compile_property(property)
+            for override_value in override_values:
+                with self.subTest(property=property_data, override_value=override_value):
+                    self.assertEqual(
+                        compiled_property.matches({"key": override_value}),
+                        match_property(property, {"key": override_value}),
+                    )
+
+    def test_plan_is_reused_until_flags_change(self):
+        flag = self.create_flag(
+            "beta-feature",
+            {"groups": [{"properties": [{"key": "email", "value": "posthog.com", "operator": "icontains"}]}]},
+        )
+        flags = list(FeatureFlag.objects.filter(team=self.team))
+
+        plan = get_feature_flag_evaluation_plan(self.team.pk, flags)
+        self.assertIs(
+            get_feature_flag_evaluation_plan(self.team.pk, list(FeatureFlag.objects.filter(team=self.team))), plan
+        )
+        self.assertEqual(hash(plan), hash(get_feature_flag_evaluation_plan(self.team.pk, flags)))
+
+        # Updating the flag in another process doesn't fire the signal here, only replaces the version of the flags
+        FeatureFlag.objects.filter(pk=flag.pk).update(
+            filters={"groups": [{"properties": [{"key": "email", "value": "example.com", "operator": "icontains"}]}]}
+        )
+        invalidate_feature_flags_version(self.team.pk)
+        updated_flags = list(FeatureFlag.objects.filter(team=self.team))
+        updated_plan = get_feature_flag_evaluation_plan(self.team.pk, updated_flags)
+
+        self.assertIsNot(updated_plan, plan)
+        self.assertEqual(
+            FeatureFlagMatcher(
+                updated_flags, "user_1", property_value_overrides={"email": "test@example.com"}
+            ).get_match(updated_flags[0]),
+            FeatureFlagMatch(True, None, FeatureFlagMatchReason.CONDITION_MATCH, 0),
+        )
+
+    def test_plan_lookup_does_not_serialize_flags(self):
+        self.create_flag("beta-feature", {"groups": [{"properties": [], "rollout_percentage": 100}]})
+        flags = list(FeatureFlag.objects.filter(team=self.team))
+        plan = get_feature_flag_evaluation_plan(self.team.pk, flags)
+
+        with patch(
+            "posthog.models.feature_flag.flag_evaluation_plan.feature_flag_fingerprint", wraps=feature_flag_fingerprint
+        ) as fingerprint:
+            self.assertIs(get_feature_flag_evaluation_plan(self.team.pk, flags), plan)
+            fingerprint.assert_not_called()
+
+    def test_plans_of_subsets_of_flags_are_kept_apart(self):
+        first_flag = self.create_flag("first-flag", {"groups": [{"properties": [], "rollout_percentage": 100}]})
+        second_flag = self.create_flag("second-flag", {"groups": [{"properties": [], "rollout_percentage": 100}]})
+
+        plan = get_feature_flag_evaluation_plan(self.team.pk, [first_flag, second_flag])
+        subset_plan = get_feature_flag_evaluation_plan(self.team.pk, [first_flag])
+
+        self.assertIsNot(subset_plan, plan)
+        self.assertIs(get_feature_flag_evaluation_plan(self.team.pk, [first_flag, second_flag]), plan)
+        self.assertIs(get_feature_flag_evaluation_plan(self.team.pk, [first_flag]), subset_plan)
+        self.assertEqual(len(FLAG_EVALUATION_PLAN_CACHE), 2)
+
+    def test_saving_a_flag_invalidates_the_plan(self):
+        flag = self.create_flag("beta-feature", {"groups": [{"properties": [], "rollout_percentage": 100}]})
+        get_feature_flag_evaluation_plan(self.team.pk, [flag])
+        self.assertEqual(len(FLAG_EVALUATION_PLAN_CACHE), 1)
+
+        flag.filters = {"groups": [{"properties": [], "rollout_percentage": 0}]}
+        flag.save()
+
+        self.assertEqual(len(FLAG_EVALUATION_PLAN_CACHE), 0)
+
+    def test_flags_are_only_compiled_once(self):
+        self.create_flag(
+            "multivariate-flag",
+            {
+                "groups": [{"properties": [{"key": "email", "value": "posthog.com", "operator": "icontains"}]}],
+                "multivariate": {
+                    "variants": [
+                        {"key": "first-variant", "rollout_percentage": 50},
+                        {"key": "second-variant", "rollout_percentage": 50},
+                    ]
+                },
+            },
+        )
+        self.create_flag(
+            "regex-flag", {"groups": [{"properties": [{"key": "email", "value": "^test", "operator": "regex"}]}]}
+        )
+
+        with patch(
+            "posthog.models.feature_flag.flag_evaluation_plan.compile_condition_properties",
+            wraps=compile_condition_properties,
+        ) as compile_properties:
+            for distinct_id in ["user_1", "user_2", "user_3"]:
+                flag_values, *_ = get_all_feature_flags(
+                    self.team.pk, distinct_id, property_value_overrides={"email": "test@posthog.com"}
+                )
+                self.assertIn(flag_values["multivariate-flag"], ["first-variant", "second-variant"])
+                self.assertTrue(flag_values["regex-flag"])
+
+        self.assertEqual(compile_properties.call_count, 2)
+
+    def test_invalid_flag_fails_on_evaluation_only(self):
+        valid_flag = self.create_flag("valid-flag", {"groups": [{"properties": [], "rollout_percentage": 100}]})
+        invalid_flag = self.create_flag(
+            "invalid-flag",
+            {"groups": [{"properties": [{"key": "email", "value": "a", "type": "group", "group_type_index": 42}]}]},
+        )
+
+        matcher = FeatureFlagMatcher([valid_flag, invalid_flag], "user_1")
+        self.assertEqual(
+            matcher.get_match(valid_flag), FeatureFlagMatch(True, None, FeatureFlagMatchReason.CONDITION_MATCH, 0)
+        )
+        with self.assertRaises(ValidationError):
+            matcher.get_match(invalid_flag)
+
+
 @patch(
     "posthog.models.feature_flag.flag_matching.postgres_healthcheck.is_connected",
     return_value=True,